@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+load_world_from_db 基准测试
+
+生成一个大规模世界（多场景、多角色、长上下文）保存到数据库，
+然后分别以可信路径（model_construct）和校验路径（model_validate）加载，
+输出耗时与 SQL 语句数。
+
+使用方法:
+    python scripts/benchmark_load_world.py
+    python scripts/benchmark_load_world.py --stages 20 --actors 10 --messages 200 --repeat 5
+
+作者: yanghanggit
+日期: 2025-01-20
+"""
+
+import os
+import sys
+
+# 将 src 目录添加到模块搜索路径
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+
+import argparse
+import time
+from typing import List
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from loguru import logger
+from ai_trpg.demo.models import Actor, Attributes, Effect, Stage, World
+from ai_trpg.pgsql import pgsql_ensure_database_tables
+from ai_trpg.pgsql.statement_stats import assert_statement_budget
+from ai_trpg.pgsql.world_operations import (
+    delete_world,
+    load_world_from_db,
+    save_world_to_db,
+)
+
+BENCHMARK_WORLD_NAME = "基准测试世界"
+
+
+def _create_context(owner: str, message_count: int) -> List[BaseMessage]:
+    """生成一段长对话上下文（第一条为 SystemMessage）"""
+    context: List[BaseMessage] = [SystemMessage(content=f"你是{owner}。" * 20)]
+    for index in range(1, message_count):
+        if index % 2 == 1:
+            context.append(
+                HumanMessage(content=f"第 {index} 轮观察: " + "场景描写" * 50)
+            )
+        else:
+            context.append(AIMessage(content=f"第 {index} 轮行动: " + "行动计划" * 50))
+    return context
+
+
+def _create_large_world(
+    stage_count: int, actors_per_stage: int, messages_per_context: int
+) -> World:
+    """生成大规模测试世界"""
+    stage_names = [f"场景{index}" for index in range(stage_count)]
+    stages = [
+        Stage(
+            name=stage_name,
+            profile=f"{stage_name}的档案",
+            environment=f"{stage_name}的环境",
+            narrative=f"{stage_name}的叙事",
+            actor_states="",
+            stage_connections=[
+                stage_names[(index + 1) % stage_count],
+                stage_names[(index - 1) % stage_count],
+            ],
+            actors=[
+                Actor(
+                    name=f"{stage_name}-角色{actor_index}",
+                    profile="角色档案",
+                    appearance="角色外观",
+                    attributes=Attributes(health=100, max_health=100, attack=10),
+                    effects=[Effect(name="祝福", description="攻击力提升")],
+                    context=_create_context(
+                        f"{stage_name}-角色{actor_index}", messages_per_context
+                    ),
+                )
+                for actor_index in range(actors_per_stage)
+            ],
+            context=_create_context(stage_name, messages_per_context),
+        )
+        for index, stage_name in enumerate(stage_names)
+    ]
+    return World(
+        name=BENCHMARK_WORLD_NAME,
+        campaign_setting="基准测试",
+        stages=stages,
+        context=_create_context("世界", messages_per_context),
+    )
+
+
+def _benchmark(label: str, trusted: bool, repeat: int) -> float:
+    """多次加载世界，返回平均耗时（秒）"""
+    elapsed: List[float] = []
+    for _ in range(repeat):
+        with assert_statement_budget(10, label=label) as budget:
+            start = time.perf_counter()
+            world = load_world_from_db(BENCHMARK_WORLD_NAME, trusted=trusted)
+            elapsed.append(time.perf_counter() - start)
+        assert world is not None
+
+    average = sum(elapsed) / len(elapsed)
+    logger.info(
+        f"⏱️ {label}: 平均 {average * 1000:.1f}ms, 最快 {min(elapsed) * 1000:.1f}ms, {budget.count} 条 SQL 语句"
+    )
+    return average
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="load_world_from_db 基准测试")
+    parser.add_argument("--stages", type=int, default=10, help="场景数量")
+    parser.add_argument("--actors", type=int, default=10, help="每个场景的角色数量")
+    parser.add_argument(
+        "--messages", type=int, default=100, help="每段上下文的消息数量"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="每种路径的加载次数")
+    args = parser.parse_args()
+
+    pgsql_ensure_database_tables()
+
+    world = _create_large_world(args.stages, args.actors, args.messages)
+    total_messages = len(world.context) + sum(
+        len(stage.context) + sum(len(actor.context) for actor in stage.actors)
+        for stage in world.stages
+    )
+    logger.info(
+        f"🌍 生成测试世界: {len(world.stages)} 个场景, {len(world.get_all_actors())} 个角色, {total_messages} 条消息"
+    )
+
+    delete_world(BENCHMARK_WORLD_NAME)
+    save_world_to_db(world)
+
+    try:
+        trusted = _benchmark("可信路径 (model_construct)", True, args.repeat)
+        validated = _benchmark("校验路径 (model_validate)", False, args.repeat)
+        logger.success(f"🚀 可信路径加速比: {validated / trusted:.2f}x")
+    finally:
+        delete_world(BENCHMARK_WORLD_NAME)
+
+
+if __name__ == "__main__":
+    main()
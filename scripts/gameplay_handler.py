@@ -5,15 +5,29 @@
 提供游戏玩法相关的功能处理，包括游戏指令的执行和处理。
 """
 
+from typing import Sequence
 from loguru import logger
 from ai_trpg.agent import GameWorld
+from ai_trpg.deepseek import llm_governor
+from ai_trpg.pgsql import (
+    world_lease,
+    ensure_world_lease_held,
+    WorldLeaseLostError,
+    WorldLeaseTimeoutError,
+    read_from_primary,
+    statement_stats,
+    track_phase,
+    record_turn_checkpoint,
+    clear_turn_journal,
+)
 from pipeline_kickoff import handle_kickoff
 from pipeline_actor_observe_and_plan import handle_actors_observe_and_plan
 from pipeline_stage_execute import (
     handle_stage_execute,
 )
-from pipeline_actor_self_update import handle_actors_self_update
+from pipeline_actor_self_update import ActorSelfUpdateError, handle_actors_self_update
 from pipeline_stage_self_update import handle_stage_self_update
+from pipeline_turn_dag import TurnIncompleteError, handle_turn_dag
 
 
 ########################################################################################################################
@@ -31,66 +45,130 @@ async def handle_game_command(
         mcp_client: MCP 客户端实例
     """
     logger.success(f"🎮 游戏指令 ====> : {command}")
-    await handle_kickoff(game_world)
+
+    try:
+        statement_stats.reset()
+        await run_game_commands([command], game_world)
+        statement_stats.log_summary()
+        llm_governor.log_summary()
+    except WorldLeaseTimeoutError as e:
+        logger.error(f"❌ 世界正被其他客户端执行回合，本次指令未执行: {e}")
+    except WorldLeaseLostError as e:
+        logger.error(
+            f"❌ 执行中世界租约丢失，已中止本次指令（重新执行可从回合日志恢复）: {e}"
+        )
+    except TurnIncompleteError as e:
+        logger.error(f"❌ 回合未完成，未记录检查点（重新执行可从回合日志恢复）: {e}")
+    except ActorSelfUpdateError as e:
+        logger.error(f"❌ 部分角色自我更新失败，可重新执行本指令: {e}")
+
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+async def run_game_commands(
+    commands: Sequence[str],
+    game_world: GameWorld,
+) -> None:
+    """在世界租约内依次执行一组游戏指令（失败时抛出异常，由调用方处理）
+
+    Args:
+        commands: 游戏指令序列
+        game_world: 游戏代理管理器
+
+    Raises:
+        WorldLeaseTimeoutError: 世界正被其他客户端执行回合
+        WorldLeaseLostError: 执行中世界租约丢失
+        TurnIncompleteError: 回合中有节点失败
+        ActorSelfUpdateError: 部分角色自我更新失败
+    """
+    # 以世界租约串行化同一世界上的回合（跨客户端/进程），不同世界互不阻塞
+    async with world_lease(game_world.world_id):
+        for command in commands:
+            await _execute_game_command(command, game_world)
+
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+async def _execute_game_command(
+    command: str,
+    game_world: GameWorld,
+) -> None:
+    """在持有世界租约的情况下执行游戏指令
+
+    开局与观察规划的读取（上下文、场景/角色）按常规路由，可以走只读副本；
+    场景执行与自我更新读取的是 MCP 服务器进程刚写入的数据，本进程的
+    read-your-writes 窗口覆盖不到，这些阶段在 read_from_primary 中执行。
+
+    Args:
+        command: 游戏指令内容
+        game_world: 游戏代理管理器
+    """
+    with track_phase("kickoff"):
+        await handle_kickoff(game_world)
+
+    # 每个阶段开始前确认仍持有世界租约（租约丢失后其他客户端可能已开始执行回合）
+    await ensure_world_lease_held()
 
     match command:
 
         # /game all:actors_observe_and_plan - 让所有角色代理观察场景并规划行动
         case "all:actors_observe_and_plan":
 
-            await handle_actors_observe_and_plan(
-                game_world=game_world,
-                use_concurrency=True,
-            )
+            with track_phase("actors_observe_and_plan"):
+                await handle_actors_observe_and_plan(
+                    game_world=game_world,
+                    use_concurrency=True,
+                )
 
         # /game all:actor_plans_and_update_stage - 让场景代理执行所有角色的行动计划
         case "all:actor_plans_and_update_stage":
 
-            await handle_stage_execute(
-                game_world=game_world,
-                use_concurrency=True,
-            )
+            with track_phase("stage_execute"), read_from_primary():
+                await handle_stage_execute(
+                    game_world=game_world,
+                    use_concurrency=True,
+                )
 
         # /game all:actors_self_update - 让所有角色进行自我更新
         case "all:actors_self_update":
 
-            await handle_actors_self_update(
-                game_world=game_world,
-                use_concurrency=True,
-            )
+            with track_phase("actors_self_update"), read_from_primary():
+                await handle_actors_self_update(
+                    game_world=game_world,
+                    use_concurrency=True,
+                )
 
         # /game all:stage_self_update - 让所有场景进行自我更新
         case "all:stage_self_update":
 
-            await handle_stage_self_update(
-                game_world=game_world,
-                use_concurrency=True,
-            )
+            with track_phase("stage_self_update"), read_from_primary():
+                await handle_stage_self_update(
+                    game_world=game_world,
+                    use_concurrency=True,
+                )
 
         # /game pipeline:test1 - 测试流水线1: 开局→观察规划→执行更新循环
         case "pipeline:test1":
 
-            # 步骤1: 所有角色观察场景并规划行动
-            await handle_actors_observe_and_plan(
-                game_world=game_world,
-                use_concurrency=True,
-            )
-
-            # 步骤2: 场景执行计划并生成新的状态快照
-            # 输出的状态快照将成为下一轮的输入
-            await handle_stage_execute(
-                game_world=game_world,
-                use_concurrency=False,
-            )
-
-            # 步骤3: 所有角色进行状态更新
-            await handle_actors_self_update(
-                game_world=game_world,
-                use_concurrency=True,
-            )
-
-            # 步骤4: 所有场景进行状态更新
-            await handle_stage_self_update(
-                game_world=game_world,
-                use_concurrency=True,
-            )
+            # 步骤1-4: 按场景依赖调度 观察规划 → 场景执行 → 角色自我更新 → 场景自我更新
+            # 每个节点完成后写入回合日志，回合中途退出后重新执行本指令只补做未完成的节点
+            # 每个场景独立推进，只有角色移动带来的跨场景依赖需要等待（不再有全局阶段屏障）
+            # 场景执行以开始时读取的场景版本提交（expected_version），执行期间被其他场景修改时整批回滚，基于最新快照重新执行
+            # 有节点失败时抛出 TurnIncompleteError，不记录检查点、不清理回合日志
+            await handle_turn_dag(game_world)
+
+            # 步骤5: 记录回合检查点（可从快照+变更日志回放到任意回合）
+            await ensure_world_lease_held()
+            with track_phase("turn_checkpoint"):
+                turn = record_turn_checkpoint(game_world.world_id)
+                # 检查点之后本回合不会再恢复，清理回合日志
+                clear_turn_journal(game_world.world_id, before_turn=turn + 1)
+                logger.info(f"🏁 第 {turn} 回合结束")
+
+            # 步骤6: 增量刷新代理注册表（本回合的移动/死亡），回收长时间未参与回合的场景/角色代理
+            # 变更日志由 MCP 服务器写入，从主库读取
+            with read_from_primary():
+                await game_world.refresh()
+            await game_world.evict_idle_agents()
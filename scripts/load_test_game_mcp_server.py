@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Game MCP 服务器并发负载测试
+
+模拟多个智能体同时通过 MCP 调用写入工具（每个智能体负责自己的角色，互不冲突），
+输出总吞吐量与单次调用延迟分布，用于验证数据库调用不阻塞服务器事件循环。
+
+使用前先启动服务器:
+    python scripts/run_game_mcp_server.py
+
+使用方法:
+    python scripts/load_test_game_mcp_server.py
+    python scripts/load_test_game_mcp_server.py --agents 50 --calls 20
+
+作者: yanghanggit
+日期: 2025-01-20
+"""
+
+import os
+import sys
+
+# 将 src 目录添加到模块搜索路径
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+
+import argparse
+import asyncio
+import time
+from typing import List, Tuple
+from loguru import logger
+from ai_trpg.demo.models import Actor, Attributes, Stage, World
+from ai_trpg.mcp import mcp_config
+from ai_trpg.mcp.execution import create_mcp_client
+from ai_trpg.pgsql import pgsql_ensure_database_tables
+from ai_trpg.pgsql.world_operations import delete_world, save_world_to_db
+
+LOAD_TEST_WORLD_NAME = "负载测试世界"
+
+# 每个场景的角色数量
+ACTORS_PER_STAGE = 10
+
+
+def _create_load_test_world(agent_count: int) -> World:
+    """生成负载测试世界（每个智能体一个角色）"""
+    stage_count = (agent_count + ACTORS_PER_STAGE - 1) // ACTORS_PER_STAGE
+    stages = [
+        Stage(
+            name=f"场景{stage_index}",
+            profile="负载测试场景",
+            environment="负载测试环境",
+            narrative="",
+            actor_states="",
+            actors=[
+                Actor(
+                    name=f"角色{actor_index}",
+                    profile="负载测试角色",
+                    appearance="初始外观",
+                    attributes=Attributes(health=100, max_health=100, attack=10),
+                )
+                for actor_index in range(
+                    stage_index * ACTORS_PER_STAGE,
+                    min((stage_index + 1) * ACTORS_PER_STAGE, agent_count),
+                )
+            ],
+        )
+        for stage_index in range(stage_count)
+    ]
+    return World(name=LOAD_TEST_WORLD_NAME, campaign_setting="负载测试", stages=stages)
+
+
+async def _run_agent(agent_index: int, call_count: int) -> List[Tuple[bool, float]]:
+    """一个智能体：连接服务器，交替调用生命值与外观更新工具"""
+    client = await create_mcp_client(
+        mcp_server_url=mcp_config.mcp_server_url,
+        mcp_protocol_version=mcp_config.protocol_version,
+        mcp_timeout=mcp_config.mcp_timeout,
+        auto_connect=True,
+    )
+    actor_name = f"角色{agent_index}"
+    samples: List[Tuple[bool, float]] = []
+
+    try:
+        for call_index in range(call_count):
+            start = time.perf_counter()
+            if call_index % 2 == 0:
+                result = await client.call_tool(
+                    "update_actor_health",
+                    {
+                        "world_name": LOAD_TEST_WORLD_NAME,
+                        "actor_name": actor_name,
+                        "new_health": 100 - call_index,
+                    },
+                )
+            else:
+                result = await client.call_tool(
+                    "update_actor_appearance",
+                    {
+                        "world_name": LOAD_TEST_WORLD_NAME,
+                        "actor_name": actor_name,
+                        "new_appearance": f"第 {call_index} 次更新的外观",
+                    },
+                )
+            samples.append((result.success, time.perf_counter() - start))
+    finally:
+        await client.disconnect()
+
+    return samples
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    """返回已排序列表的百分位数"""
+    index = min(len(values) - 1, int(len(values) * percent / 100))
+    return values[index]
+
+
+async def _run_load_test(agent_count: int, call_count: int) -> None:
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(_run_agent(agent_index, call_count) for agent_index in range(agent_count))
+    )
+    elapsed = time.perf_counter() - start
+
+    samples = [sample for agent_samples in results for sample in agent_samples]
+    latencies = sorted(latency for _, latency in samples)
+    failures = sum(1 for success, _ in samples if not success)
+
+    logger.info(
+        f"📊 {agent_count} 个智能体 × {call_count} 次调用 = {len(samples)} 次, 失败 {failures} 次"
+    )
+    logger.info(
+        f"⏱️ 延迟: p50 {_percentile(latencies, 50) * 1000:.1f}ms, p95 {_percentile(latencies, 95) * 1000:.1f}ms, 最大 {latencies[-1] * 1000:.1f}ms"
+    )
+    logger.success(
+        f"🚀 吞吐量: {len(samples) / elapsed:.1f} 次/秒 (总耗时 {elapsed:.2f}s)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Game MCP 服务器并发负载测试")
+    parser.add_argument("--agents", type=int, default=50, help="并发智能体数量")
+    parser.add_argument("--calls", type=int, default=20, help="每个智能体的调用次数")
+    args = parser.parse_args()
+
+    pgsql_ensure_database_tables()
+
+    delete_world(LOAD_TEST_WORLD_NAME)
+    save_world_to_db(_create_load_test_world(args.agents))
+
+    try:
+        asyncio.run(_run_load_test(args.agents, args.calls))
+    finally:
+        delete_world(LOAD_TEST_WORLD_NAME)
+
+
+if __name__ == "__main__":
+    main()
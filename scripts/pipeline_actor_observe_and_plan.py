@@ -6,6 +6,7 @@
 """
 
 import asyncio
+from typing import Final, Optional
 from uuid import UUID
 from loguru import logger
 from pydantic import BaseModel
@@ -13,14 +14,17 @@ from langchain_core.messages import HumanMessage, AIMessage
 from ai_trpg.deepseek import create_deepseek_llm
 from ai_trpg.utils import strip_json_code_block
 from workflow_handlers import handle_chat_workflow_execution
-from ai_trpg.pgsql import get_actor_context, add_actor_context
-from ai_trpg.pgsql.actor_operations import get_actors_in_world
+from ai_trpg.pgsql import get_actor_context, add_actor_context, run_as_agent
+from ai_trpg.pgsql.actor_operations import iter_actors_in_world
 from ai_trpg.pgsql.actor import ActorDB
 from ai_trpg.pgsql.actor_plan_operations import (
     clear_all_actor_plans,
     add_actor_plan_to_db,
 )
-from ai_trpg.agent import GameWorld
+from ai_trpg.agent import GameWorld, InputFingerprintTracker, fingerprint_inputs
+
+# 输入指纹中的阶段名称
+OBSERVE_AND_PLAN_PHASE: Final[str] = "observe_and_plan"
 
 
 ########################################################################################################################
@@ -59,22 +63,11 @@ class ActorObservationAndPlan(BaseModel):
 ########################################################################################################################
 ########################################################################################################################
 ########################################################################################################################
-async def _handle_actor_observe_and_plan(
-    world_id: UUID,
-    actor_db: ActorDB,
-) -> None:
-    """处理单个角色的观察和行动规划
-
-    让角色从第一人称视角观察场景，并立即规划下一步行动。
-    使用JSON格式输出，便于解析和后续处理。
-    直接使用 ActorDB 的预加载数据，无需 MCP Resource 调用。
+def _gen_observe_and_plan_prompt(actor_db: ActorDB) -> str:
+    """生成角色观察与规划提示词（角色与场景信息直接来自 ActorDB 的预加载数据）
 
-    Args:
-        world_id: 世界ID
-        actor_db: 角色数据库对象（已预加载 stage, attributes, effects 等关系）
+    其他角色与 Effect 按名称排序，相同的数据总是生成相同的提示词（用于输入指纹）。
     """
-    # logger.info(f"角色观察并规划: {actor_db.name}")
-
     # 直接从 ActorDB 获取数据（已通过 joinedload 预加载）
     stage_db = actor_db.stage
     actor_name = actor_db.name
@@ -83,14 +76,16 @@ async def _handle_actor_observe_and_plan(
     if actor_db.effects:
         effect_parts = [
             f"{e.name}({e.description})" if e.description else e.name
-            for e in actor_db.effects
+            for e in sorted(actor_db.effects, key=lambda e: e.name)
         ]
         effects_str = ", ".join(effect_parts)
     else:
         effects_str = "无"
 
     # 直接格式化其他角色外观（过滤掉当前角色）
-    other_actors = [a for a in stage_db.actors if a.name != actor_name]
+    other_actors = sorted(
+        (a for a in stage_db.actors if a.name != actor_name), key=lambda a: a.name
+    )
     if other_actors:
         other_actors_parts = [
             f"**{a.name}**\n- 外观: {a.appearance}" for a in other_actors
@@ -99,7 +94,7 @@ async def _handle_actor_observe_and_plan(
     else:
         other_actors_str = "无其他角色"
 
-    observe_and_plan_prompt = f"""# 指令！你（{actor_name}）进行观察与规划行动
+    return f"""# 指令！你（{actor_name}）进行观察与规划行动
 
 ## 第一步: 你的角色信息 与 当前场景信息
 
@@ -165,9 +160,76 @@ async def _handle_actor_observe_and_plan(
 
 **要求**：基于第一步提供的角色信息 → 观察场景 → 规划行动 → 输出JSON"""
 
+
+def _observe_and_plan_inputs(actor_db: ActorDB, prompt: str) -> str:
+    """观察与规划的输入指纹（提示词与场景叙事）"""
+    return fingerprint_inputs(prompt, actor_db.stage.narrative)
+
+
+def acknowledge_actor_observation(
+    world_id: UUID,
+    actor_db: ActorDB,
+    input_fingerprints: InputFingerprintTracker,
+) -> None:
+    """把角色当前的输入记录为已观察（不调用 LLM）
+
+    场景执行只执行了该角色自己的计划时，执行结果（场景状态的改写与通知）只是角色自身
+    行动的回声，不是新的事件：以执行后的状态作为观察基准，下一回合没有其他变化时沿用计划。
+
+    Args:
+        world_id: 世界ID
+        actor_db: 场景执行后重新读取的角色（已预加载 stage, attributes, effects 等关系）
+        input_fingerprints: 代理输入指纹
+    """
+    prompt = _gen_observe_and_plan_prompt(actor_db)
+    input_fingerprints.record(
+        OBSERVE_AND_PLAN_PHASE,
+        actor_db.name,
+        _observe_and_plan_inputs(actor_db, prompt),
+        len(get_actor_context(world_id, actor_db.name)),
+    )
+
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+async def handle_single_actor_observe_and_plan(
+    world_id: UUID,
+    actor_db: ActorDB,
+    input_fingerprints: Optional[InputFingerprintTracker] = None,
+) -> None:
+    """处理单个角色的观察和行动规划
+
+    让角色从第一人称视角观察场景，并立即规划下一步行动。
+    使用JSON格式输出，便于解析和后续处理。
+    直接使用 ActorDB 的预加载数据，无需 MCP Resource 调用。
+
+    传入 input_fingerprints 时，角色的输入（提示词中的角色与场景信息、场景叙事、
+    上下文中的新消息）与上一次规划相同则不调用 LLM，按策略沿用或清空上一次的计划。
+
+    Args:
+        world_id: 世界ID
+        actor_db: 角色数据库对象（已预加载 stage, attributes, effects 等关系）
+        input_fingerprints: 代理输入指纹（为 None 时每次都调用 LLM）
+    """
+    actor_name = actor_db.name
+    observe_and_plan_prompt = _gen_observe_and_plan_prompt(actor_db)
+
     # 从数据库读取上下文
     actor_context = get_actor_context(world_id, actor_name)
 
+    # 输入未变化：沿用上一次的计划（reuse_plan）或本回合不行动（skip）
+    inputs = _observe_and_plan_inputs(actor_db, observe_and_plan_prompt)
+    if input_fingerprints is not None and input_fingerprints.is_unchanged(
+        OBSERVE_AND_PLAN_PHASE, actor_name, inputs, len(actor_context)
+    ):
+        if input_fingerprints.policy == "skip":
+            clear_all_actor_plans(world_id, actor_name)
+            logger.info(f"⏭️ 角色 {actor_name} 的输入未变化，本回合不行动")
+        else:
+            logger.info(f"♻️ 角色 {actor_name} 的输入未变化，沿用上一次的计划")
+        return
+
     actors_observe_and_plan_response = await handle_chat_workflow_execution(
         agent_name=actor_name,
         context=actor_context,
@@ -208,6 +270,12 @@ async def _handle_actor_observe_and_plan(
         )
         logger.debug(f"💾 已将角色 '{actor_name}' 的计划保存到数据库")
 
+        # 记录本次输入（上下文已追加上面的两条消息）
+        if input_fingerprints is not None:
+            input_fingerprints.record(
+                OBSERVE_AND_PLAN_PHASE, actor_name, inputs, len(actor_context) + 2
+            )
+
     except Exception as e:
         logger.error(f"JSON解析错误: {e}")
 
@@ -221,7 +289,7 @@ async def handle_actors_observe_and_plan(
 ) -> None:
     """处理所有角色的观察和行动规划（数据库驱动版本）
 
-    从数据库一次性获取所有存活角色，让每个角色从第一人称视角观察场景，
+    从数据库分批流式读取存活角色，让每个角色从第一人称视角观察场景，
     并立即规划下一步行动。使用JSON格式输出，便于解析和后续处理。
 
     已死亡的角色（is_dead=True）会被自动跳过（通过数据库查询过滤）。
@@ -234,34 +302,44 @@ async def handle_actors_observe_and_plan(
     world_id = game_world.world_id
     assert world_id is not None, "world_id不能为空"
 
-    # 从数据库一次性获取所有存活的角色（已预加载 stage, attributes, effects 等关系）
-    alive_actors_db = get_actors_in_world(world_id=world_id, is_dead=False)
-
-    if not alive_actors_db:
-        logger.warning(f"⚠️ 世界 {world_id} 没有存活的角色需要进行观察和规划")
-        return
+    # 从数据库分批流式读取存活的角色（每批已预加载 stage, attributes, effects 等关系）
+    # 逐批处理，内存占用只与批次大小有关
+    total_actors = 0
+    for alive_actors_db in iter_actors_in_world(world_id=world_id, is_dead=False):
+        total_actors += len(alive_actors_db)
 
-    logger.info(
-        f"🎭 世界 {world_id} 中有 {len(alive_actors_db)} 个存活角色需要观察和规划: "
-        f"{', '.join([a.name for a in alive_actors_db])}"
-    )
+        logger.info(
+            f"🎭 世界 {world_id} 中有 {len(alive_actors_db)} 个存活角色需要观察和规划: "
+            f"{', '.join([a.name for a in alive_actors_db])}"
+        )
 
-    if use_concurrency:
-        # 并行处理所有角色
-        logger.debug(f"🔄 并行处理 {len(alive_actors_db)} 个角色的观察和规划")
-        tasks = [
-            _handle_actor_observe_and_plan(
-                world_id=world_id,
-                actor_db=actor_db,
-            )
-            for actor_db in alive_actors_db
-        ]
-        await asyncio.gather(*tasks)
-    else:
-        # 顺序处理所有角色
-        logger.debug(f"🔄 顺序处理 {len(alive_actors_db)} 个角色的观察和规划")
-        for actor_db in alive_actors_db:
-            await _handle_actor_observe_and_plan(
-                world_id=world_id,
-                actor_db=actor_db,
-            )
+        if use_concurrency:
+            # 并行处理本批角色
+            logger.debug(f"🔄 并行处理 {len(alive_actors_db)} 个角色的观察和规划")
+            tasks = [
+                run_as_agent(
+                    actor_db.name,
+                    handle_single_actor_observe_and_plan(
+                        world_id=world_id,
+                        actor_db=actor_db,
+                        input_fingerprints=game_world.input_fingerprints,
+                    ),
+                )
+                for actor_db in alive_actors_db
+            ]
+            await asyncio.gather(*tasks)
+        else:
+            # 顺序处理本批角色
+            logger.debug(f"🔄 顺序处理 {len(alive_actors_db)} 个角色的观察和规划")
+            for actor_db in alive_actors_db:
+                await run_as_agent(
+                    actor_db.name,
+                    handle_single_actor_observe_and_plan(
+                        world_id=world_id,
+                        actor_db=actor_db,
+                        input_fingerprints=game_world.input_fingerprints,
+                    ),
+                )
+
+    if total_actors == 0:
+        logger.warning(f"⚠️ 世界 {world_id} 没有存活的角色需要进行观察和规划")
@@ -6,14 +6,32 @@
 """
 
 import asyncio
+from typing import Final, List, Optional
 from uuid import UUID
 from loguru import logger
 from langchain_core.messages import HumanMessage
 from ai_trpg.deepseek import create_deepseek_llm
 from ai_trpg.mcp import McpClient
-from ai_trpg.agent import GameWorld
+from ai_trpg.agent import GameWorld, InputFingerprintTracker, fingerprint_inputs
 from workflow_handlers import handle_mcp_workflow_execution
-from ai_trpg.pgsql import get_actor_context, get_actors_in_world, ActorDB
+from ai_trpg.pgsql import (
+    get_actor_context,
+    get_actors_by_names,
+    iter_actors_in_world,
+    ActorDB,
+    run_as_agent,
+)
+
+# 输入指纹中的阶段名称
+ACTOR_SELF_UPDATE_PHASE: Final[str] = "actor_self_update"
+
+
+class ActorSelfUpdateError(Exception):
+    """部分角色的自我更新失败（其余角色已更新完成）"""
+
+    def __init__(self, actor_names: List[str]) -> None:
+        super().__init__(f"角色自我更新失败: {actor_names}")
+        self.actor_names = actor_names
 
 
 def _gen_self_update_request_prompt(actor_db: ActorDB) -> str:
@@ -29,10 +47,10 @@ def _gen_self_update_request_prompt(actor_db: ActorDB) -> str:
     max_health = actor_db.attributes.max_health
     attack = actor_db.attributes.attack
 
-    # 直接遍历 effects（List[EffectDB]）
+    # 按名称遍历 effects（List[EffectDB]），相同的数据总是生成相同的提示词（用于输入指纹）
     if actor_db.effects:
         effects_list = []
-        for effect in actor_db.effects:
+        for effect in sorted(actor_db.effects, key=lambda effect: effect.name):
             effects_list.append(f"- **{effect.name}**: {effect.description}")
         effects_text = "\n".join(effects_list)
     else:
@@ -166,10 +184,18 @@ def _gen_self_update_request_prompt_test(actor_db: ActorDB) -> str:
 ########################################################################################################################
 ########################################################################################################################
 ########################################################################################################################
+def _self_update_inputs(actor_db: ActorDB) -> str:
+    """角色自我更新的输入指纹（提示词中的属性与 Effect、外观）"""
+    return fingerprint_inputs(
+        _gen_self_update_request_prompt(actor_db), actor_db.appearance
+    )
+
+
 async def _handle_actor_self_update(
     actor_db: ActorDB,
     mcp_client: McpClient,
     world_id: UUID,
+    input_fingerprints: Optional[InputFingerprintTracker] = None,
 ) -> None:
     """处理单个角色的自我状态更新
 
@@ -178,11 +204,14 @@ async def _handle_actor_self_update(
     2. 添加新的 Effect（如增益、减益等）
 
     通过调用 MCP 工具实现状态更新。
+    传入 input_fingerprints 时，属性、Effect、外观与上下文都没有变化则跳过；
+    记录的是调用之后的输入，本次工具对外观/Effect 的修改不会让下一回合再次更新。
 
     Args:
         actor_db: 角色数据库对象
         mcp_client: MCP 客户端
         world_id: 游戏世界 ID
+        input_fingerprints: 代理输入指纹（为 None 时每次都调用 LLM）
     """
 
     # 步骤1-2: 分析与工具调用（直接使用 ActorDB 对象）
@@ -196,6 +225,14 @@ async def _handle_actor_self_update(
     # 从数据库读取上下文
     actor_context = get_actor_context(world_id, actor_db.name)
 
+    # 输入未变化（没有新的场景事件，自身状态也没变）：无需更新
+    inputs = _self_update_inputs(actor_db)
+    if input_fingerprints is not None and input_fingerprints.is_unchanged(
+        ACTOR_SELF_UPDATE_PHASE, actor_db.name, inputs, len(actor_context)
+    ):
+        logger.info(f"⏭️ 角色 {actor_db.name} 的输入未变化，跳过自我更新")
+        return
+
     # mcp 的工作流（传入二次推理指令）
     await handle_mcp_workflow_execution(
         agent_name=actor_db.name,
@@ -207,6 +244,16 @@ async def _handle_actor_self_update(
         skip_re_invoke=True,
     )
 
+    # 记录调用之后的输入（自身的修改不是新的事件；自我更新不写入上下文）
+    if input_fingerprints is not None:
+        for updated_actor in get_actors_by_names(world_id, [actor_db.name]):
+            input_fingerprints.record(
+                ACTOR_SELF_UPDATE_PHASE,
+                actor_db.name,
+                _self_update_inputs(updated_actor),
+                len(actor_context),
+            )
+
 
 ########################################################################################################################
 ########################################################################################################################
@@ -217,56 +264,108 @@ async def handle_actors_self_update(
 ) -> None:
     """处理所有角色的自我状态更新
 
-    从数据库获取所有存活角色，直接使用 ActorDB 对象进行更新。
+    从数据库分批流式读取存活角色，直接使用 ActorDB 对象逐批进行更新。
 
     Args:
         game_world: 游戏代理管理器
         use_concurrency: 是否使用并行处理，默认False（顺序执行）
-    """
 
-    # 从数据库获取所有存活角色（is_dead=False）
-    alive_actors = get_actors_in_world(game_world.world_id, is_dead=False)
+    Raises:
+        ActorSelfUpdateError: 所有批次处理完后，有角色更新失败
+    """
 
-    if len(alive_actors) == 0:
+    # 从数据库分批流式读取存活角色（is_dead=False），逐批处理
+    total_actors = 0
+    failed_actor_names: List[str] = []
+    for alive_actors in iter_actors_in_world(game_world.world_id, is_dead=False):
+        total_actors += len(alive_actors)
+        try:
+            await handle_actors_self_update_chunk(
+                game_world=game_world,
+                alive_actors=alive_actors,
+                use_concurrency=use_concurrency,
+            )
+        except ActorSelfUpdateError as e:
+            failed_actor_names.extend(e.actor_names)
+
+    if total_actors == 0:
         logger.warning("⚠️ 当前没有存活角色，跳过自我状态更新流程")
-        return
+
+    if failed_actor_names:
+        raise ActorSelfUpdateError(failed_actor_names)
+
+
+async def handle_single_actor_self_update(
+    game_world: GameWorld,
+    actor_db: ActorDB,
+) -> None:
+    """处理单个存活角色的自我状态更新（失败时抛出异常）
+
+    回合调度中每个角色是一个独立的节点，单独记录完成，恢复回合时只补做失败的角色。
+
+    Args:
+        game_world: 游戏代理管理器
+        actor_db: 存活角色
+    """
+    # 通过角色名称获取对应的代理（用于获取 mcp_client）
+    agent = game_world.get_actor_agent(actor_db.name)
+    assert agent is not None, f"未找到角色 {actor_db.name} 对应的代理"
+    await run_as_agent(
+        actor_db.name,
+        _handle_actor_self_update(
+            actor_db=actor_db,
+            mcp_client=agent.mcp_client,
+            world_id=game_world.world_id,
+            input_fingerprints=game_world.input_fingerprints,
+        ),
+    )
+
+
+async def handle_actors_self_update_chunk(
+    game_world: GameWorld,
+    alive_actors: List[ActorDB],
+    use_concurrency: bool,
+) -> None:
+    """处理一批存活角色的自我状态更新
+
+    单个角色失败不影响本批其他角色，全部处理完后再抛出失败的角色。
+
+    Args:
+        game_world: 游戏代理管理器
+        alive_actors: 本批存活角色
+        use_concurrency: 是否使用并行处理
+
+    Raises:
+        ActorSelfUpdateError: 本批中有角色更新失败
+    """
+    failed_actor_names: List[str] = []
 
     if use_concurrency:
         logger.debug(f"🔄 并行处理 {len(alive_actors)} 个角色的自我更新")
-        actor_update_tasks = []
-
-        for actor_db in alive_actors:
-            # 通过角色名称获取对应的代理（用于获取 mcp_client）
-            agent = game_world.get_agent_by_name(actor_db.name)
-            assert agent is not None, f"未找到角色 {actor_db.name} 对应的代理"
-            if agent:
-                actor_update_tasks.append(
-                    _handle_actor_self_update(
-                        actor_db=actor_db,
-                        mcp_client=agent.mcp_client,
-                        world_id=game_world.world_id,
-                    )
-                )
-            else:
-                logger.warning(f"⚠️ 未找到角色 {actor_db.name} 对应的代理，跳过")
-
-        await asyncio.gather(*actor_update_tasks, return_exceptions=True)
+        results = await asyncio.gather(
+            *(
+                handle_single_actor_self_update(game_world, actor_db)
+                for actor_db in alive_actors
+            ),
+            return_exceptions=True,
+        )
+        for actor_db, result in zip(alive_actors, results):
+            if isinstance(result, BaseException):
+                logger.error(f"❌ 角色 {actor_db.name} 自我更新失败: {result}")
+                failed_actor_names.append(actor_db.name)
 
     else:
         logger.debug(f"🔄 顺序处理 {len(alive_actors)} 个角色的自我更新")
 
         for actor_db in alive_actors:
-            # 通过角色名称获取对应的代理（用于获取 mcp_client）
-            agent = game_world.get_agent_by_name(actor_db.name)
-            assert agent is not None, f"未找到角色 {actor_db.name} 对应的代理"
-            if agent:
-                await _handle_actor_self_update(
-                    actor_db=actor_db,
-                    mcp_client=agent.mcp_client,
-                    world_id=game_world.world_id,
-                )
-            else:
-                logger.warning(f"⚠️ 未找到角色 {actor_db.name} 对应的代理，跳过")
+            try:
+                await handle_single_actor_self_update(game_world, actor_db)
+            except Exception as e:
+                logger.error(f"❌ 角色 {actor_db.name} 自我更新失败: {e}")
+                failed_actor_names.append(actor_db.name)
+
+    if failed_actor_names:
+        raise ActorSelfUpdateError(failed_actor_names)
 
 
 ########################################################################################################################
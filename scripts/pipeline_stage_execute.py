@@ -3,24 +3,46 @@
 游戏流水线 - 场景执行模块
 
 负责编排角色计划并更新场景状态。
+
+场景执行以执行开始时读取的场景版本做比较并交换：所有状态写入通过 apply_world_mutations
+一次提交，并附带 expected_version。执行期间场景被其他场景修改（例如有角色移动进来）时，
+整批回滚，基于最新的场景快照重新执行，因此不同场景可以并发执行。
+
+脏标记：执行完成后记录执行后的输入（参与角色的计划与状态、场景状态与版本）。下一回合所有角色
+沿用计划且场景没有其他变化时输入相同，跳过执行。只执行了一个角色的计划时，执行结果是该角色
+自身行动的回声，以执行后的状态作为该角色的观察基准（见 acknowledge_actor_observation）。
 """
 
 import asyncio
-from typing import List
+from typing import Dict, Final, List, Optional
 from loguru import logger
 from langchain_core.messages import HumanMessage, AIMessage
 from ai_trpg.deepseek import create_deepseek_llm
-from ai_trpg.agent import GameWorld
+from ai_trpg.agent import GameWorld, fingerprint_inputs
 from workflow_handlers import (
     handle_mcp_workflow_execution,
 )
-from ai_trpg.pgsql import get_stage_context, add_stage_context, add_actor_context
-from ai_trpg.pgsql.stage_operations import get_stage_by_name, get_stages_in_world
+from ai_trpg.pgsql import (
+    get_stage_context,
+    add_stage_context,
+    add_actor_context,
+    get_actors_by_names,
+    run_as_agent,
+    VersionConflictError,
+)
+from ai_trpg.pgsql.stage_operations import get_stage_by_name, iter_stages_in_world
 from ai_trpg.pgsql.actor_plan_operations import (
     get_latest_actor_plan,
 )
 from ai_trpg.pgsql import ActorDB, StageDB
 from uuid import UUID
+from pipeline_actor_observe_and_plan import acknowledge_actor_observation
+
+# 场景执行的最大尝试次数（含首次执行，版本冲突时基于最新快照重新执行）
+STAGE_EXECUTE_MAX_ATTEMPTS: Final[int] = 3
+
+# 输入指纹中的阶段名称
+STAGE_EXECUTE_PHASE: Final[str] = "stage_execute"
 
 
 def _gen_compressed_stage_execute_prompt(stage_name: str) -> str:
@@ -63,10 +85,10 @@ def _build_actor_plan_prompt(actor_db: ActorDB, world_id: UUID) -> str:
         max_health = actor_db.attributes.max_health if actor_db.attributes else 0
         attack = actor_db.attributes.attack if actor_db.attributes else 0
 
-        # 格式化 Effect（紧凑型，包含名称和描述）
+        # 格式化 Effect（紧凑型，包含名称和描述，按名称排序）
         if actor_db.effects:
             effect_parts = []
-            for effect in actor_db.effects:
+            for effect in sorted(actor_db.effects, key=lambda effect: effect.name):
                 if effect.description:
                     effect_parts.append(f"{effect.name}({effect.description})")
                 else:
@@ -92,61 +114,124 @@ def _build_actor_plan_prompt(actor_db: ActorDB, world_id: UUID) -> str:
 ########################################################################################################################
 ########################################################################################################################
 ########################################################################################################################
-def _collect_actor_plan_prompts(actors: List[ActorDB], world_id: UUID) -> List[str]:
+def _collect_actor_plan_prompts(
+    actors: List[ActorDB], world_id: UUID
+) -> Dict[str, str]:
     """收集所有角色的行动计划
 
-    从角色数据库对象列表中提取每个角色的行动计划。
+    从角色数据库对象列表中提取每个角色的行动计划（没有计划的角色不包含在内）。
 
     Args:
         actors: 角色数据库对象列表
         world_id: 世界ID
 
     Returns:
-        角色计划提示词字符串列表
+        角色名称 → 角色计划提示词
     """
-    ret: List[str] = []
+    ret: Dict[str, str] = {}
 
     for actor_db in actors:
         prompt = _build_actor_plan_prompt(actor_db, world_id)
         if prompt != "":
-            ret.append(prompt)
+            ret[actor_db.name] = prompt
 
     return ret
 
 
+def _stage_execute_inputs(stage_db: StageDB, actor_plans: Dict[str, str]) -> str:
+    """场景执行的输入指纹（角色计划与状态、场景状态与版本，与角色顺序无关）"""
+    return fingerprint_inputs(
+        *(actor_plans[actor_name] for actor_name in sorted(actor_plans)),
+        stage_db.actor_states,
+        stage_db.environment,
+        stage_db.connections,
+        str(stage_db.version),
+    )
+
+
 ########################################################################################################################
 ########################################################################################################################
 ########################################################################################################################
-async def _handle_single_stage_execute(
+async def handle_single_stage_execute(
     stage_db: StageDB,
     game_world: GameWorld,
+    actors: Optional[List[ActorDB]] = None,
 ) -> None:
     """处理单个场景中角色的行动计划并更新场景状态
 
+    执行期间场景被其他场景修改（版本冲突）时，重新读取场景与角色后再次执行。
+
     Args:
         stage_db: 场景数据库对象(已预加载actors)
         game_world: 游戏代理管理器(用于获取mcp_client)
+        actors: 参与执行的角色（为 None 时使用 stage_db.actors）
+
+    Raises:
+        VersionConflictError: 重试耗尽仍然冲突
+    """
+    world_id = game_world.world_id
+
+    # 默认直接使用 stage_db.actors (已通过 joinedload 预加载)
+    if actors is None:
+        actors = stage_db.actors
+
+    for attempt in range(1, STAGE_EXECUTE_MAX_ATTEMPTS + 1):
+        if await _execute_stage_once(stage_db, game_world, actors):
+            return
+
+        if attempt >= STAGE_EXECUTE_MAX_ATTEMPTS:
+            raise VersionConflictError(
+                f"场景 '{stage_db.name}' 执行期间持续被修改，已重试 {STAGE_EXECUTE_MAX_ATTEMPTS} 次"
+            )
+        logger.warning(
+            f"⚠️ 场景 {stage_db.name} 执行期间被其他场景修改（版本 {stage_db.version}），"
+            f"基于最新快照重新执行（第 {attempt}/{STAGE_EXECUTE_MAX_ATTEMPTS} 次）"
+        )
+
+        # 重新读取场景与参与的角色（场景只会因其他场景的写入而变化，参与者不变）
+        fresh_stage = get_stage_by_name(world_id, stage_db.name)
+        if fresh_stage is None:
+            logger.error(f"重新执行时未找到场景: {stage_db.name}")
+            return
+        stage_db = fresh_stage
+        actors = get_actors_by_names(
+            world_id, [actor_db.name for actor_db in actors], is_dead=False
+        )
+
+
+async def _execute_stage_once(
+    stage_db: StageDB,
+    game_world: GameWorld,
+    actors: List[ActorDB],
+) -> bool:
+    """基于一个场景快照执行一次场景
+
+    Args:
+        stage_db: 场景快照（version 为执行开始时的版本）
+        game_world: 游戏代理管理器
+        actors: 参与执行的角色
+
+    Returns:
+        bool: 执行已完成（或无需执行）；False 表示版本冲突，本次写入未提交
     """
     world_id = game_world.world_id
 
-    # 直接使用 stage_db.actors (已通过 joinedload 预加载)
-    actors = stage_db.actors
     if not actors:
         logger.warning(f"⚠️ 场景 {stage_db.name} 没有角色，跳过场景执行")
-        return
+        return True
 
     # 收集所有角色的行动计划
     actor_plans = _collect_actor_plan_prompts(actors, world_id)
 
     if not actor_plans:
         logger.warning(f"⚠️ 场景 {stage_db.name} 没有角色有行动计划，跳过场景执行")
-        return
+        return True
 
     # 获取 stage_agent (需要用于 MCP workflow 工具调用)
-    stage_agent = game_world.get_agent_by_name(stage_db.name)
+    stage_agent = game_world.get_stage_agent(stage_db.name)
     if not stage_agent:
         logger.error(f"未找到场景代理: {stage_db.name}")
-        return
+        return True
 
     # 构建行动执行提示词（MCP Workflow 版本 - 专注于分析和工具调用）
     step1_2_instruction = f"""# 指令！你（{stage_db.name}）场景行动执行与使用工具同步状态
@@ -155,7 +240,7 @@ async def _handle_single_stage_execute(
 
 ### 角色计划与信息
 
-{"\n\n".join(actor_plans)}
+{"\n\n".join(actor_plans.values())}
 
 ### 当前角色状态
 
@@ -209,19 +294,21 @@ async def _handle_single_stage_execute(
 
 ### 步骤2: 调用工具
 
-按顺序执行工具调用，保存步骤1的分析结果：
+调用一次 apply_world_mutations，按以下顺序列出全部变更，一次性保存步骤1的分析结果：
 
-1. **同步场景状态** - 保存计算日志、叙事、角色状态、环境描述、场景连通性
+1. **同步场景状态**（update_stage_info）
+   - 保存叙事、角色状态、环境描述、场景连通性
+   - 必须附带 `"expected_version": {stage_db.version}`（本次执行读取的场景版本）
 
-2. **更新角色生命值**
+2. **更新角色生命值**（update_actor_health）
    - 基于战斗计算和治疗效果更新生命值
    - 使用绝对值格式，确保数据一致性
 
-3. **添加 Effect** - 如有新增Effect，按角色和Effect逐一调用
+3. **添加 Effect**（add_actor_effect） - 如有新增Effect，按角色和Effect逐条列出
 
-4. **移除 Effect** - 如有消耗Effect，按角色和Effect逐一调用
+4. **移除 Effect**（remove_actor_effect） - 如有消耗Effect，按角色和Effect逐条列出
 
-5. **移动角色到场景**
+5. **移动角色到场景**（move_actor_to_stage）
    - 验证目标场景存在于连通性声明中，存在则执行转移，不存在则仅更新位置描述
    - 确保角色状态和叙事与实际场景位置保持一致
 
@@ -245,6 +332,17 @@ async def _handle_single_stage_execute(
     # 从数据库读取上下文
     stage_context = get_stage_context(world_id, stage_db.name)
 
+    # 输入未变化：所有角色沿用上一次已执行过的计划，场景也没有其他变化
+    input_fingerprints = game_world.input_fingerprints
+    if input_fingerprints.is_unchanged(
+        STAGE_EXECUTE_PHASE,
+        stage_db.name,
+        _stage_execute_inputs(stage_db, actor_plans),
+        len(stage_context),
+    ):
+        logger.info(f"⏭️ 场景 {stage_db.name} 的输入未变化，跳过场景执行")
+        return True
+
     # 执行 MCP 工作流（改用支持工具调用的工作流，传入步骤3指令）
     await handle_mcp_workflow_execution(
         agent_name=stage_db.name,
@@ -256,13 +354,20 @@ async def _handle_single_stage_execute(
         skip_re_invoke=True,
     )
 
-    try:
-        # 执行后重新读取场景数据以获取最新的 narrative
-        updated_stage = get_stage_by_name(world_id, stage_db.name)
-        if not updated_stage:
-            logger.error(f"执行后未找到场景: {stage_db.name}")
-            return
+    # 执行后重新读取场景数据以获取最新的 narrative
+    updated_stage = get_stage_by_name(world_id, stage_db.name)
+    if not updated_stage:
+        logger.error(f"执行后未找到场景: {stage_db.name}")
+        return True
 
+    # 场景状态没有保存，而场景版本已被其他写入推进：expected_version 不匹配，整批已回滚
+    if (
+        updated_stage.narrative == stage_db.narrative
+        and updated_stage.version != stage_db.version
+    ):
+        return False
+
+    try:
         narrative = updated_stage.narrative
 
         # 批量添加场景消息到数据库
@@ -306,9 +411,48 @@ async def _handle_single_stage_execute(
                 f"✅ 角色 {actor_db.name} 收到场景执行结果通知 = \n{scene_event_notification}"
             )
 
+        # 记录执行后的输入（角色计划不变时，下一回合的输入与执行后的状态相同）
+        if input_fingerprints.policy != "always":
+            _record_executed_inputs(
+                updated_stage, game_world, list(actor_plans), len(stage_context) + 3
+            )
+
     except Exception as e:
         logger.error(f"JSON解析错误: {e}")
 
+    return True
+
+
+def _record_executed_inputs(
+    stage_db: StageDB,
+    game_world: GameWorld,
+    planned_actor_names: List[str],
+    context_length: int,
+) -> None:
+    """记录场景执行后的输入，只执行了一个角色的计划时以执行后的状态作为该角色的观察基准
+
+    Args:
+        stage_db: 执行后重新读取的场景
+        game_world: 游戏代理管理器
+        planned_actor_names: 本次执行了计划的角色
+        context_length: 执行后场景上下文的长度
+    """
+    world_id = game_world.world_id
+    input_fingerprints = game_world.input_fingerprints
+
+    # 重新读取执行了计划的角色（生命值与死亡状态已变化）
+    actors = get_actors_by_names(world_id, planned_actor_names, is_dead=False)
+    input_fingerprints.record(
+        STAGE_EXECUTE_PHASE,
+        stage_db.name,
+        _stage_execute_inputs(stage_db, _collect_actor_plan_prompts(actors, world_id)),
+        context_length,
+    )
+
+    if len(planned_actor_names) == 1:
+        for actor_db in actors:
+            acknowledge_actor_observation(world_id, actor_db, input_fingerprints)
+
 
 ########################################################################################################################
 ########################################################################################################################
@@ -325,19 +469,23 @@ async def handle_stage_execute(
     """
     world_id = game_world.world_id
 
-    # 一次性读取所有场景(包括预加载的actors)
-    stages = get_stages_in_world(world_id)
-
-    if use_concurrency:
-        # 并发处理所有场景
-        tasks = [
-            _handle_single_stage_execute(stage_db, game_world) for stage_db in stages
-        ]
-        await asyncio.gather(*tasks)
-    else:
-        # 顺序处理所有场景
-        for stage_db in stages:
-            await _handle_single_stage_execute(stage_db, game_world)
+    # 分批流式读取场景(每批预加载actors)，逐批处理
+    for stages in iter_stages_in_world(world_id):
+        if use_concurrency:
+            # 并发处理本批场景
+            tasks = [
+                run_as_agent(
+                    stage_db.name, handle_single_stage_execute(stage_db, game_world)
+                )
+                for stage_db in stages
+            ]
+            await asyncio.gather(*tasks)
+        else:
+            # 顺序处理本批场景
+            for stage_db in stages:
+                await run_as_agent(
+                    stage_db.name, handle_single_stage_execute(stage_db, game_world)
+                )
 
 
 ########################################################################################################################
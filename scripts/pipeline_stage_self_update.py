@@ -6,6 +6,7 @@
 """
 
 import asyncio
+from typing import List, Optional
 from loguru import logger
 from pydantic import BaseModel
 from langchain_core.messages import HumanMessage, AIMessage
@@ -19,9 +20,11 @@ from ai_trpg.pgsql import (
     get_stage_context,
     add_stage_context,
     add_actor_context,
-    get_stages_in_world,
+    iter_stages_in_world,
     update_stage_info,
     StageDB,
+    ActorMovementEventDB,
+    run_as_agent,
 )
 
 
@@ -70,29 +73,38 @@ async def handle_stage_self_update(
     """
     logger.info("🎭 开始场景自我更新流程...")
 
-    # 从数据库获取所有场景
-    stages = get_stages_in_world(game_world.world_id)
-    if len(stages) == 0:
+    # 从数据库分批流式读取场景，逐批处理
+    total_stages = 0
+    for stages in iter_stages_in_world(game_world.world_id):
+        total_stages += len(stages)
+
+        if use_concurrency:
+            logger.debug(f"🔄 并行处理 {len(stages)} 个场景的自我更新")
+            stage_update_tasks = [
+                run_as_agent(
+                    stage_db.name,
+                    handle_single_stage_self_update(
+                        stage_db=stage_db,
+                    ),
+                )
+                for stage_db in stages
+            ]
+            await asyncio.gather(*stage_update_tasks, return_exceptions=True)
+
+        else:
+            logger.debug(f"🔄 顺序处理 {len(stages)} 个场景的自我更新")
+            for stage_db in stages:
+                await run_as_agent(
+                    stage_db.name,
+                    handle_single_stage_self_update(
+                        stage_db=stage_db,
+                    ),
+                )
+
+    if total_stages == 0:
         logger.warning("⚠️ 没有可用的场景，无法进行场景自我更新")
         return
 
-    if use_concurrency:
-        logger.debug(f"🔄 并行处理 {len(stages)} 个场景的自我更新")
-        stage_update_tasks = [
-            _handle_stage_self_update(
-                stage_db=stage_db,
-            )
-            for stage_db in stages
-        ]
-        await asyncio.gather(*stage_update_tasks, return_exceptions=True)
-
-    else:
-        logger.debug(f"🔄 顺序处理 {len(stages)} 个场景的自我更新")
-        for stage_db in stages:
-            await _handle_stage_self_update(
-                stage_db=stage_db,
-            )
-
     logger.info("✅ 场景自我更新流程完成")
 
     # 清理当前世界的角色移动事件
@@ -106,8 +118,9 @@ async def handle_stage_self_update(
 ########################################################################################################################
 ########################################################################################################################
 ########################################################################################################################
-async def _handle_stage_self_update(
+async def handle_single_stage_self_update(
     stage_db: StageDB,
+    movement_events: Optional[List[ActorMovementEventDB]] = None,
 ) -> None:
     """处理单个场景的自我状态更新
 
@@ -116,13 +129,14 @@ async def _handle_stage_self_update(
 
     Args:
         stage_db: 场景数据库对象
-        game_world: 游戏代理管理器
+        movement_events: 要处理的角色进入事件（为 None 时从数据库查询该场景的全部事件）
     """
     logger.debug(f"🔄 正在更新场景: {stage_db.name}")
     world_id = stage_db.world_id
 
     # 检查是否有角色进入当前场景的事件 (从数据库查询)
-    movement_events = get_actor_movement_events_by_stage(world_id, stage_db.name)
+    if movement_events is None:
+        movement_events = get_actor_movement_events_by_stage(world_id, stage_db.name)
 
     if len(movement_events) == 0:
         logger.debug(f"ℹ️ 场景 {stage_db.name} 无角色进入事件，跳过更新")
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+游戏流水线 - 按场景依赖调度的完整回合
+
+把 观察规划 → 场景执行 → 角色自我更新 → 场景自我更新 四个全局阶段
+拆成每个场景独立的一条链，由 TurnScheduler 按依赖调度：
+
+- execute:场景 依赖该场景所有存活角色的 observe:角色
+- actor_self_update:角色 依赖回合开始时角色所在场景的 execute:场景
+  （每个角色一个节点，单独写入回合日志，恢复回合时只补做失败的角色）
+- stage_self_update:场景 依赖本场景以及所有有连接通向它的场景的 execute 与 actor_self_update
+  （角色移动只会发生在场景执行中，移动事件的来源即这些场景）
+
+只有移动关系带来的跨场景依赖才需要等待，回合耗时接近最慢的一条场景链。
+没有连接却发生的移动（少见）在所有节点完成后补充处理，移动事件不会遗漏。
+
+可恢复回合：每个节点完成后写入回合日志（turn_journal），回合开始时的场景角色分布也一并记录。
+进程在回合中途退出后再次执行同一回合（检查点尚未记录）时，沿用记录的角色分布重建同样的节点，
+已完成的节点直接跳过，只补做未完成的部分，不会重复已成功的 LLM 调用。
+
+每个节点开始前与写入回合日志前确认世界租约仍然有效，租约丢失时节点失败且不记录完成。
+有节点失败时回合未完成：依赖失败节点的节点（包括间接依赖）不执行、不写入回合日志，
+保留移动事件与回合日志，抛出 TurnIncompleteError，调用方不记录检查点，
+重新执行同一回合时只补做失败及未执行的节点。
+
+读写分离：观察规划节点的读取按常规路由（可走只读副本）；回合开始的调度读取、场景执行、
+角色/场景自我更新读取的是 MCP 服务器刚写入的数据，在 read_from_primary 中执行。
+
+耗时统计：各场景同一阶段的节点并发执行、阶段之间互相重叠，每个节点的耗时记录到
+statement_stats.node_durations；阶段耗时按该阶段第一个节点开始到最后一个节点结束，每回合记录一次。
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Generator, List, Optional, Set, Tuple
+from uuid import UUID
+from loguru import logger
+from pydantic import BaseModel
+from ai_trpg.agent import GameWorld, TurnNodeFunc, TurnScheduler, TurnScheduleResult
+from ai_trpg.pgsql import (
+    ActorDB,
+    ActorMovementEventDB,
+    StageDB,
+    clear_all_actor_movement_events,
+    ensure_world_lease_held,
+    get_actor_movement_events_by_stage,
+    get_actor_movement_events_in_world,
+    get_actors_by_names,
+    get_actors_in_world,
+    get_last_turn,
+    get_stage_by_name,
+    get_stage_connection_names,
+    get_stage_with_actors,
+    get_stages_in_world,
+    get_turn_journal,
+    read_from_primary,
+    record_turn_node_completed,
+    run_as_agent,
+    statement_stats,
+    track_node,
+)
+from pipeline_actor_observe_and_plan import handle_single_actor_observe_and_plan
+from pipeline_stage_execute import handle_single_stage_execute
+from pipeline_actor_self_update import handle_single_actor_self_update
+from pipeline_stage_self_update import handle_single_stage_self_update
+
+# 回合日志中记录回合开始状态的节点名称
+TURN_START_NODE = "turn_start"
+
+
+class TurnStartRecord(BaseModel):
+    """回合开始时的场景 → 存活角色名称（恢复回合时沿用，保证节点与原回合一致）"""
+
+    stage_actor_names: Dict[str, List[str]]
+
+
+class StageUpdateRecord(BaseModel):
+    """场景自我更新已处理的移动事件（恢复回合时不再补充处理）"""
+
+    handled_event_ids: List[UUID]
+
+
+class TurnIncompleteError(Exception):
+    """回合中有节点失败（已完成的节点保留在回合日志中，重新执行时跳过）"""
+
+    def __init__(self, turn: int, result: TurnScheduleResult) -> None:
+        super().__init__(
+            f"第 {turn} 回合有 {len(result.failures)} 个节点失败: {sorted(result.failures)}, "
+            f"{len(result.skipped)} 个节点因依赖失败未执行: {sorted(result.skipped)}"
+        )
+        self.turn = turn
+        self.result = result
+
+
+class _PhaseClock:
+    """记录回合内每个阶段的执行跨度（第一个节点开始 → 最后一个节点结束）"""
+
+    def __init__(self) -> None:
+        self._spans: Dict[str, Tuple[float, float]] = {}
+
+    @contextmanager
+    def node(self, phase: str) -> Generator[None, None, None]:
+        """执行阶段中的一个节点（节点耗时由 track_node 记录）"""
+        start = time.perf_counter()
+        try:
+            with track_node(phase):
+                yield
+        finally:
+            end = time.perf_counter()
+            first, last = self._spans.get(phase, (start, end))
+            self._spans[phase] = (min(first, start), max(last, end))
+
+    def timed(self, phase: str, func: TurnNodeFunc) -> TurnNodeFunc:
+        """包装节点函数"""
+
+        async def run() -> None:
+            with self.node(phase):
+                await func()
+
+        return run
+
+    def record(self) -> None:
+        """每个阶段记录一次阶段耗时"""
+        for phase, (start, end) in self._spans.items():
+            statement_stats.record_phase_duration(phase, end - start)
+
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+def _journaled_node(
+    world_id: UUID, turn: int, key: str, func: TurnNodeFunc
+) -> TurnNodeFunc:
+    """节点完成后写入回合日志（租约丢失时不执行、不记录）"""
+
+    async def run() -> None:
+        await ensure_world_lease_held()
+        await func()
+        await ensure_world_lease_held()
+        record_turn_node_completed(world_id, turn, key)
+
+    return run
+
+
+async def _skipped_node() -> None:
+    """回合日志中已完成的节点"""
+
+
+def _observe_node(game_world: GameWorld, actor_db: ActorDB) -> TurnNodeFunc:
+    async def run() -> None:
+        await run_as_agent(
+            actor_db.name,
+            handle_single_actor_observe_and_plan(
+                world_id=game_world.world_id,
+                actor_db=actor_db,
+                input_fingerprints=game_world.input_fingerprints,
+            ),
+        )
+
+    return run
+
+
+def _execute_node(
+    stage_db: StageDB, game_world: GameWorld, actors: List[ActorDB]
+) -> TurnNodeFunc:
+    async def run() -> None:
+        with read_from_primary():
+            # 执行开始时重新读取场景（回合开始后可能已有角色移动进来），其版本用于提交时的比较并交换
+            current_stage = get_stage_by_name(game_world.world_id, stage_db.name)
+            await run_as_agent(
+                stage_db.name,
+                handle_single_stage_execute(
+                    current_stage or stage_db, game_world, actors
+                ),
+            )
+
+    return run
+
+
+def _actor_self_update_node(game_world: GameWorld, actor_name: str) -> TurnNodeFunc:
+    async def run() -> None:
+        with read_from_primary():
+            # 场景执行后重新读取（生命值/死亡状态已变化），已死亡的角色不再更新
+            for actor_db in get_actors_by_names(
+                game_world.world_id, [actor_name], is_dead=False
+            ):
+                await handle_single_actor_self_update(game_world, actor_db)
+
+    return run
+
+
+def _stage_self_update_node(
+    world_id: UUID,
+    turn: int,
+    key: str,
+    stage_name: str,
+    handled_event_ids: Set[UUID],
+) -> TurnNodeFunc:
+    async def run() -> None:
+        await ensure_world_lease_held()
+        with read_from_primary():
+            movement_events = get_actor_movement_events_by_stage(world_id, stage_name)
+            handled_event_ids.update(event.id for event in movement_events)
+            await _update_stage_with_events(world_id, stage_name, movement_events)
+        await ensure_world_lease_held()
+        _record_stage_update(world_id, turn, key, movement_events)
+
+    return run
+
+
+async def _update_stage_with_events(
+    world_id: UUID, stage_name: str, movement_events: List[ActorMovementEventDB]
+) -> None:
+    """用指定的移动事件更新场景（没有事件时跳过，不读取场景）"""
+    if not movement_events:
+        logger.debug(f"ℹ️ 场景 {stage_name} 无角色进入事件，跳过更新")
+        return
+
+    # 读取最新的场景（包含移动进来的角色）
+    stage_db = get_stage_with_actors(world_id, stage_name)
+    if stage_db is None:
+        return
+    await run_as_agent(
+        stage_name, handle_single_stage_self_update(stage_db, movement_events)
+    )
+
+
+def _record_stage_update(
+    world_id: UUID,
+    turn: int,
+    key: str,
+    movement_events: List[ActorMovementEventDB],
+) -> None:
+    """记录场景自我更新完成及其处理过的移动事件"""
+    record = StageUpdateRecord(
+        handled_event_ids=[event.id for event in movement_events]
+    )
+    record_turn_node_completed(world_id, turn, key, record.model_dump_json())
+
+
+def _handled_event_ids_in_journal(journal: Dict[str, Optional[str]]) -> Set[UUID]:
+    """回合日志中已完成的场景自我更新处理过的移动事件"""
+    handled_event_ids: Set[UUID] = set()
+    for key, payload_json in journal.items():
+        if key.startswith(("stage_self_update:", "late_stage_self_update:")):
+            if payload_json is not None:
+                handled_event_ids.update(
+                    StageUpdateRecord.model_validate_json(
+                        payload_json
+                    ).handled_event_ids
+                )
+    return handled_event_ids
+
+
+def _load_turn_start(
+    world_id: UUID,
+    turn: int,
+    journal: Dict[str, Optional[str]],
+    stages: List[StageDB],
+    alive_actors: List[ActorDB],
+) -> TurnStartRecord:
+    """读取回合开始时的场景角色分布（首次执行本回合时记录）"""
+    payload_json = journal.get(TURN_START_NODE)
+    if payload_json is not None:
+        logger.warning(
+            f"♻️ 恢复第 {turn} 回合: 回合日志中已有 {len(journal) - 1} 个节点完成，跳过这些节点"
+        )
+        return TurnStartRecord.model_validate_json(payload_json)
+
+    record = TurnStartRecord(
+        stage_actor_names={stage_db.name: [] for stage_db in stages}
+    )
+    for actor_db in alive_actors:
+        record.stage_actor_names.setdefault(actor_db.stage.name, []).append(
+            actor_db.name
+        )
+    record_turn_node_completed(
+        world_id, turn, TURN_START_NODE, record.model_dump_json()
+    )
+    return record
+
+
+########################################################################################################################
+########################################################################################################################
+########################################################################################################################
+async def handle_turn_dag(game_world: GameWorld) -> TurnScheduleResult:
+    """按场景依赖调度执行一个完整回合（可从回合日志恢复）
+
+    Args:
+        game_world: 游戏代理管理器
+
+    Returns:
+        TurnScheduleResult: 调度结果（总耗时、各节点耗时）
+
+    Raises:
+        TurnIncompleteError: 有节点失败（不补充处理移动事件、不清理移动事件）
+    """
+    world_id = game_world.world_id
+
+    # 进行中的回合 = 最后一个检查点 + 1（检查点记录后回合日志即失效）
+    # 调度依据上一回合（MCP 服务器写入）的结果，从主库读取
+    with read_from_primary():
+        turn = get_last_turn(world_id) + 1
+        journal = get_turn_journal(world_id, turn)
+
+        stages = get_stages_in_world(world_id)
+        alive_actors = get_actors_in_world(world_id, is_dead=False)
+        stage_connections = get_stage_connection_names(world_id)
+    turn_start = _load_turn_start(world_id, turn, journal, stages, alive_actors)
+
+    # 回合开始时每个场景的存活角色（恢复时已死亡的角色不再参与观察与执行）
+    alive_actors_by_name = {actor_db.name: actor_db for actor_db in alive_actors}
+    stage_actors: Dict[str, List[ActorDB]] = {
+        stage_db.name: [
+            alive_actors_by_name[actor_name]
+            for actor_name in turn_start.stage_actor_names.get(stage_db.name, [])
+            if actor_name in alive_actors_by_name
+        ]
+        for stage_db in stages
+    }
+
+    # 可能有角色移动进来的来源场景（有连接通向该场景）
+    incoming_stages: Dict[str, Set[str]] = {stage_db.name: set() for stage_db in stages}
+    for source_name, target_names in stage_connections.items():
+        for target_name in target_names:
+            if target_name in incoming_stages and target_name != source_name:
+                incoming_stages[target_name].add(source_name)
+
+    scheduler = TurnScheduler()
+    phase_clock = _PhaseClock()
+    handled_event_ids = _handled_event_ids_in_journal(journal)
+
+    def add_node(
+        key: str, phase: str, func: TurnNodeFunc, depends_on: List[str]
+    ) -> None:
+        if key in journal:
+            scheduler.add_node(key, _skipped_node, depends_on)
+        else:
+            scheduler.add_node(key, phase_clock.timed(phase, func), depends_on)
+
+    # 场景执行及其角色自我更新的节点（场景自我更新等待来源场景的这些节点）
+    stage_chain_keys: Dict[str, List[str]] = {}
+    for stage_db in stages:
+        actors = stage_actors[stage_db.name]
+        observe_keys = [f"observe:{actor_db.name}" for actor_db in actors]
+        for key, actor_db in zip(observe_keys, actors):
+            add_node(
+                key,
+                "actors_observe_and_plan",
+                _journaled_node(
+                    world_id, turn, key, _observe_node(game_world, actor_db)
+                ),
+                [],
+            )
+
+        execute_key = f"execute:{stage_db.name}"
+        add_node(
+            execute_key,
+            "stage_execute",
+            _journaled_node(
+                world_id,
+                turn,
+                execute_key,
+                _execute_node(stage_db, game_world, actors),
+            ),
+            observe_keys,
+        )
+
+        stage_chain_keys[stage_db.name] = [execute_key]
+        for actor_name in turn_start.stage_actor_names.get(stage_db.name, []):
+            update_key = f"actor_self_update:{actor_name}"
+            stage_chain_keys[stage_db.name].append(update_key)
+            add_node(
+                update_key,
+                "actors_self_update",
+                _journaled_node(
+                    world_id,
+                    turn,
+                    update_key,
+                    _actor_self_update_node(game_world, actor_name),
+                ),
+                [execute_key],
+            )
+
+    for stage_db in stages:
+        stage_update_key = f"stage_self_update:{stage_db.name}"
+        add_node(
+            stage_update_key,
+            "stage_self_update",
+            _stage_self_update_node(
+                world_id, turn, stage_update_key, stage_db.name, handled_event_ids
+            ),
+            [
+                key
+                for source_name in {stage_db.name, *incoming_stages[stage_db.name]}
+                for key in stage_chain_keys[source_name]
+            ],
+        )
+
+    logger.info(
+        f"🗺️ 第 {turn} 回合调度: {len(stages)} 个场景, {len(alive_actors)} 个存活角色, "
+        f"{len(scheduler.node_keys)} 个节点"
+    )
+    result = await scheduler.run()
+
+    if result.incomplete:
+        phase_clock.record()
+        # 失败及未执行的节点未写入回合日志，保留移动事件，重新执行本回合时补做
+        raise TurnIncompleteError(turn, result)
+
+    # 补充处理没有连接却发生的移动（目标场景更新时事件尚未写入）
+    late_events: Dict[str, List[ActorMovementEventDB]] = {}
+    with read_from_primary():
+        for event in get_actor_movement_events_in_world(world_id):
+            if event.id not in handled_event_ids:
+                late_events.setdefault(event.to_stage, []).append(event)
+    for stage_name, movement_events in late_events.items():
+        logger.warning(
+            f"⚠️ 场景 {stage_name} 有 {len(movement_events)} 个来自无连接场景的进入事件，补充更新"
+        )
+        await ensure_world_lease_held()
+        with phase_clock.node("stage_self_update"), read_from_primary():
+            await _update_stage_with_events(world_id, stage_name, movement_events)
+        await ensure_world_lease_held()
+        _record_stage_update(
+            world_id, turn, f"late_stage_self_update:{stage_name}", movement_events
+        )
+
+    # 每个阶段记录一次阶段耗时（节点耗时已由 track_node 记录）
+    phase_clock.record()
+
+    # 回合内的移动事件已全部处理
+    clear_all_actor_movement_events(world_id)
+
+    logger.info(f"✅ 第 {turn} 回合完成: 耗时 {result.elapsed:.2f}s")
+    return result
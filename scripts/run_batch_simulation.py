@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+无界面批量模拟
+
+不经过交互式输入，在 M 个世界上各执行 N 个回合（每个回合依次执行一组游戏指令），
+由 WorldHost 公平调度多个世界的回合，结束后输出吞吐量报告：
+
+- 回合数与每分钟回合数
+- LLM 调用次数、提示词/生成 token 数、因输入未变化而跳过的调用
+- 按阶段的 SQL 语句数、阶段耗时与节点耗时的 p50/p95/p99
+
+SQL 语句与 LLM 统计来自进程级的 statement_stats 与 llm_governor，报告中为所有世界合计，
+不区分世界；单个世界的数据用 --world-name 只模拟该世界获得。
+
+可用于容量规划：固定世界与指令序列，调整并发与 LLM 限流参数后对比报告。
+
+使用前先启动服务器:
+    python scripts/run_game_mcp_server.py
+
+使用方法:
+    python scripts/run_batch_simulation.py
+    python scripts/run_batch_simulation.py --worlds 4 --turns 5 --concurrency 4
+    python scripts/run_batch_simulation.py --pipeline all:actors_observe_and_plan,all:actor_plans_and_update_stage
+    python scripts/run_batch_simulation.py --world-name 某个已有世界 --turns 3 --report report.json
+
+作者: yanghanggit
+日期: 2025-01-20
+"""
+
+import os
+import sys
+
+# 将 src 目录添加到模块搜索路径
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+
+import argparse
+import asyncio
+import time
+from pathlib import Path
+from typing import Dict, List, get_args
+from loguru import logger
+from pydantic import BaseModel, Field
+from ai_trpg.agent import DirtyTrackingPolicy, GameWorld, WorldHost
+from ai_trpg.deepseek import LlmGovernorConfig, llm_governor
+from ai_trpg.demo import World, create_demo_world
+from ai_trpg.pgsql import pgsql_ensure_database_tables, statement_stats
+from ai_trpg.pgsql.world_operations import delete_world, save_world_to_db
+from gameplay_handler import run_game_commands
+
+# 默认每个回合执行的指令序列
+DEFAULT_PIPELINE = "pipeline:test1"
+
+# 支持的游戏指令
+PIPELINE_COMMANDS = (
+    "all:actors_observe_and_plan",
+    "all:actor_plans_and_update_stage",
+    "all:actors_self_update",
+    "all:stage_self_update",
+    "pipeline:test1",
+)
+
+
+class LatencyReport(BaseModel):
+    """一组耗时样本的分布（秒）"""
+
+    samples: int = 0
+    p50: float = 0.0
+    p95: float = 0.0
+    p99: float = 0.0
+    max: float = 0.0
+
+
+class PhaseReport(BaseModel):
+    """单个阶段的统计（所有世界合计）"""
+
+    latency: LatencyReport = Field(
+        default_factory=LatencyReport,
+        description="阶段耗时（每回合每个阶段一个样本）",
+    )
+    node_latency: LatencyReport = Field(
+        default_factory=LatencyReport,
+        description="节点耗时（按场景依赖调度时，每个角色/场景节点一个样本）",
+    )
+    db_statements: int = 0
+    db_time: float = 0.0
+
+
+class BatchSimulationReport(BaseModel):
+    """批量模拟报告
+
+    LLM、SQL 与阶段统计来自进程级的 llm_governor / statement_stats，为所有世界的合计。
+    """
+
+    worlds: List[str]
+    pipeline: List[str]
+    concurrency: int
+    turns: int = Field(description="完成的回合数（所有世界合计）")
+    failed_turns: int = 0
+    elapsed: float = Field(description="总耗时（秒）")
+    turns_per_minute: float = 0.0
+    turn_latency: LatencyReport = Field(default_factory=LatencyReport)
+    llm_calls: int = 0
+    llm_failed: int = 0
+    llm_rate_limited: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    skipped_llm_calls: Dict[str, int] = Field(
+        default_factory=dict, description="因输入未变化而跳过的调用（按阶段）"
+    )
+    db_statements: int = 0
+    phases: Dict[str, PhaseReport] = Field(
+        default_factory=dict, description="按阶段的统计（所有世界合计）"
+    )
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    """返回已排序列表的百分位数"""
+    index = min(len(values) - 1, int(len(values) * percent / 100))
+    return values[index]
+
+
+def _latency_report(durations: List[float]) -> LatencyReport:
+    """统计耗时分布"""
+    if not durations:
+        return LatencyReport()
+    values = sorted(durations)
+    return LatencyReport(
+        samples=len(values),
+        p50=_percentile(values, 50),
+        p95=_percentile(values, 95),
+        p99=_percentile(values, 99),
+        max=values[-1],
+    )
+
+
+def _create_world_copies(world_count: int) -> List[str]:
+    """以演示世界为模板生成多个副本世界并保存到数据库
+
+    系统提示词中包含世界名称，副本通过替换序列化结果中的名称生成。
+    """
+    template = create_demo_world()
+    template_json = template.model_dump_json()
+    world_names: List[str] = []
+    for index in range(world_count):
+        world_name = f"{template.name}-批量{index}"
+        world = World.model_validate_json(
+            template_json.replace(template.name, world_name)
+        )
+        delete_world(world_name)
+        save_world_to_db(world)
+        world_names.append(world_name)
+    logger.info(f"🌍 已生成 {world_count} 个模拟世界: {world_names}")
+    return world_names
+
+
+async def _run_turn(
+    game_world: GameWorld, pipeline: List[str], turn_latencies: List[float]
+) -> None:
+    """在世界租约内依次执行一个回合的指令序列"""
+    start = time.perf_counter()
+    await run_game_commands(pipeline, game_world)
+    turn_latencies.append(time.perf_counter() - start)
+
+
+async def _run_batch_simulation(
+    world_names: List[str],
+    turn_count: int,
+    pipeline: List[str],
+    concurrency: int,
+    dirty_tracking: DirtyTrackingPolicy,
+) -> BatchSimulationReport:
+    """在所有世界上执行回合并汇总报告"""
+    host = WorldHost(max_concurrent_turns=concurrency)
+    turn_latencies: List[float] = []
+    game_worlds: List[GameWorld] = []
+    try:
+        for world_name in world_names:
+            game_world = await host.add_world(world_name)
+            game_world.input_fingerprints.policy = dirty_tracking
+            game_worlds.append(game_world)
+
+        # 只统计回合本身（不含加载世界与连接代理）
+        statement_stats.reset()
+
+        start = time.perf_counter()
+        futures = [
+            host.submit_turn(
+                world_name,
+                lambda game_world: _run_turn(game_world, pipeline, turn_latencies),
+            )
+            for _ in range(turn_count)
+            for world_name in world_names
+        ]
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        elapsed = time.perf_counter() - start
+    finally:
+        await host.close()
+
+    skipped_llm_calls: Dict[str, int] = {}
+    for game_world in game_worlds:
+        for phase, count in game_world.input_fingerprints.skipped.items():
+            skipped_llm_calls[phase] = skipped_llm_calls.get(phase, 0) + count
+
+    failed_turns = sum(1 for result in results if isinstance(result, BaseException))
+    completed_turns = len(results) - failed_turns
+
+    governor_metrics = llm_governor.metrics()
+    statement_totals = statement_stats.by_phase()
+    phase_durations = statement_stats.phase_durations()
+    node_durations = statement_stats.node_durations()
+    phases = {
+        phase: PhaseReport(
+            latency=_latency_report(phase_durations.get(phase, [])),
+            node_latency=_latency_report(node_durations.get(phase, [])),
+            db_statements=(
+                statement_totals[phase].statements if phase in statement_totals else 0
+            ),
+            db_time=(
+                statement_totals[phase].total_time if phase in statement_totals else 0.0
+            ),
+        )
+        for phase in sorted({*phase_durations, *node_durations, *statement_totals})
+    }
+
+    return BatchSimulationReport(
+        worlds=world_names,
+        pipeline=pipeline,
+        concurrency=concurrency,
+        turns=completed_turns,
+        failed_turns=failed_turns,
+        elapsed=elapsed,
+        turns_per_minute=completed_turns / elapsed * 60 if elapsed > 0 else 0.0,
+        turn_latency=_latency_report(turn_latencies),
+        llm_calls=sum(
+            metrics.requests for metrics in governor_metrics.priorities.values()
+        ),
+        llm_failed=sum(
+            metrics.failed for metrics in governor_metrics.priorities.values()
+        ),
+        llm_rate_limited=sum(
+            metrics.rate_limited for metrics in governor_metrics.priorities.values()
+        ),
+        prompt_tokens=governor_metrics.prompt_tokens,
+        completion_tokens=governor_metrics.completion_tokens,
+        total_tokens=governor_metrics.tokens_used,
+        skipped_llm_calls=skipped_llm_calls,
+        db_statements=sum(stats.statements for stats in statement_totals.values()),
+        phases=phases,
+    )
+
+
+def _log_report(report: BatchSimulationReport) -> None:
+    """输出报告"""
+    logger.info(
+        f"📊 {len(report.worlds)} 个世界 × 回合指令 {report.pipeline}, 并发 {report.concurrency}: "
+        f"完成 {report.turns} 个回合, 失败 {report.failed_turns} 个"
+    )
+    logger.info(
+        f"⏱️ 回合耗时: p50 {report.turn_latency.p50:.2f}s, p95 {report.turn_latency.p95:.2f}s, "
+        f"p99 {report.turn_latency.p99:.2f}s, 最大 {report.turn_latency.max:.2f}s"
+    )
+    logger.info(
+        f"🤖 LLM: 调用 {report.llm_calls} 次 (失败 {report.llm_failed}, 限流 {report.llm_rate_limited}), "
+        f"提示词 {report.prompt_tokens} tokens, 生成 {report.completion_tokens} tokens, "
+        f"跳过 {sum(report.skipped_llm_calls.values())} 次"
+    )
+    logger.info(
+        f"🗄️ SQL 语句: {report.db_statements} 条（LLM/SQL/阶段统计为所有世界合计）"
+    )
+    for phase, phase_report in report.phases.items():
+        latency = phase_report.latency
+        node_latency = phase_report.node_latency
+        logger.info(
+            f"  - {phase}: 阶段 {latency.samples} 次, p50 {latency.p50:.2f}s, p95 {latency.p95:.2f}s, "
+            f"p99 {latency.p99:.2f}s; 节点 {node_latency.samples} 个, p50 {node_latency.p50:.2f}s, "
+            f"p95 {node_latency.p95:.2f}s, p99 {node_latency.p99:.2f}s; "
+            f"SQL {phase_report.db_statements} 条 ({phase_report.db_time:.2f}s)"
+        )
+    logger.success(
+        f"🚀 吞吐量: {report.turns_per_minute:.2f} 回合/分钟 (总耗时 {report.elapsed:.2f}s)"
+    )
+
+
+def main() -> None:
+    default_governor_config = LlmGovernorConfig()
+
+    parser = argparse.ArgumentParser(description="无界面批量模拟")
+    parser.add_argument("--turns", type=int, default=3, help="每个世界的回合数")
+    parser.add_argument(
+        "--worlds", type=int, default=2, help="以演示世界为模板生成的世界数量"
+    )
+    parser.add_argument(
+        "--world-name",
+        action="append",
+        default=[],
+        help="使用数据库中已有的世界（可重复指定，指定后不再生成世界）",
+    )
+    parser.add_argument(
+        "--pipeline",
+        default=DEFAULT_PIPELINE,
+        help=f"每个回合依次执行的游戏指令（逗号分隔），可选: {', '.join(PIPELINE_COMMANDS)}",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=4, help="所有世界合计同时执行的回合数"
+    )
+    parser.add_argument(
+        "--dirty-tracking",
+        choices=get_args(DirtyTrackingPolicy),
+        default="reuse_plan",
+        help="代理输入未变化时的处理策略",
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=default_governor_config.max_in_flight,
+        help="LLM 同时进行中的请求数上限（0 表示不限）",
+    )
+    parser.add_argument(
+        "--rpm",
+        type=int,
+        default=default_governor_config.requests_per_minute,
+        help="LLM 每分钟请求数上限（0 表示不限）",
+    )
+    parser.add_argument(
+        "--tpm",
+        type=int,
+        default=default_governor_config.tokens_per_minute,
+        help="LLM 每分钟 token 数上限（0 表示不限）",
+    )
+    parser.add_argument("--report", type=Path, help="将报告保存为 JSON 文件")
+    parser.add_argument(
+        "--keep-worlds", action="store_true", help="结束后保留生成的世界"
+    )
+    args = parser.parse_args()
+
+    pipeline = [
+        command.strip() for command in args.pipeline.split(",") if command.strip()
+    ]
+    if not pipeline:
+        parser.error("回合指令序列不能为空")
+    unknown_commands = [
+        command for command in pipeline if command not in PIPELINE_COMMANDS
+    ]
+    if unknown_commands:
+        parser.error(f"未知的游戏指令: {unknown_commands}")
+
+    llm_governor.configure(
+        LlmGovernorConfig(
+            max_in_flight=args.max_in_flight,
+            requests_per_minute=args.rpm,
+            tokens_per_minute=args.tpm,
+            reserved_completion_tokens=default_governor_config.reserved_completion_tokens,
+        )
+    )
+
+    pgsql_ensure_database_tables()
+
+    generated_worlds = [] if args.world_name else _create_world_copies(args.worlds)
+    world_names: List[str] = args.world_name or generated_worlds
+
+    try:
+        report = asyncio.run(
+            _run_batch_simulation(
+                world_names=world_names,
+                turn_count=args.turns,
+                pipeline=pipeline,
+                concurrency=args.concurrency,
+                dirty_tracking=args.dirty_tracking,
+            )
+        )
+        _log_report(report)
+        if args.report is not None:
+            args.report.write_text(report.model_dump_json(indent=2), encoding="utf-8")
+            logger.info(f"💾 报告已保存: {args.report}")
+    finally:
+        if not args.keep_worlds:
+            for world_name in generated_worlds:
+                delete_world(world_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -23,10 +23,12 @@ sys.path.insert(
 # 导入必要的模块
 import traceback
 import asyncio
+from typing import Optional
 from langchain_core.messages import HumanMessage
 from loguru import logger
 
 from ai_trpg.deepseek import (
+    LlmPriority,
     create_deepseek_llm,
 )
 
@@ -60,11 +62,24 @@ from io_utils import format_user_input_prompt, log_history, dump_history
 from gameplay_handler import handle_game_command
 from ai_trpg.mcp import (
     create_mcp_client,
+    InProcessMcpClient,
     McpClient,
     McpConfig,
 )
 
 
+def _create_in_process_mcp_client(agent_name: str = "") -> McpClient:
+    """创建进程内 MCP 客户端（直接调用本进程中游戏 MCP 服务器的工具函数）"""
+    # 延迟导入：只有进程内模式才需要加载服务器模块
+    from run_game_mcp_server import app as game_mcp_server
+
+    return InProcessMcpClient(
+        game_mcp_server,
+        protocol_version=mcp_config.protocol_version,
+        timeout=mcp_config.mcp_timeout,
+    )
+
+
 async def create_mcp_client_with_config(
     mcp_config: McpConfig,
     list_available: bool,
@@ -83,12 +98,17 @@ async def create_mcp_client_with_config(
     """
     try:
         # 初始化 MCP 客户端
-        mcp_client = await create_mcp_client(
-            mcp_server_url=mcp_config.mcp_server_url,
-            mcp_protocol_version=mcp_config.protocol_version,
-            mcp_timeout=mcp_config.mcp_timeout,
-            auto_connect=auto_connect,
-        )
+        if mcp_config.in_process_client:
+            mcp_client = _create_in_process_mcp_client()
+            if auto_connect:
+                await mcp_client.connect()
+        else:
+            mcp_client = await create_mcp_client(
+                mcp_server_url=mcp_config.mcp_server_url,
+                mcp_protocol_version=mcp_config.protocol_version,
+                mcp_timeout=mcp_config.mcp_timeout,
+                auto_connect=auto_connect,
+            )
 
         if list_available:
 
@@ -130,6 +150,8 @@ async def create_mcp_client_with_config(
 # ============================================================================
 async def main() -> None:
 
+    game_world: Optional[GameWorld] = None
+
     try:
 
         # 设定日志配置
@@ -142,7 +164,11 @@ async def main() -> None:
         assert mcp_client is not None, "MCP 客户端初始化失败"
 
         # 创建游戏代理管理器 (从数据库加载)
-        game_world: GameWorld = GameWorld()
+        game_world = GameWorld(
+            mcp_client_factory=(
+                _create_in_process_mcp_client if mcp_config.in_process_client else None
+            )
+        )
         await game_world.load(
             world_name=get_demo_world_name(),
         )
@@ -240,7 +266,7 @@ async def main() -> None:
                     agent_name=game_world.current_agent.name,
                     context=current_context,
                     request=HumanMessage(content=format_user_input),
-                    llm=create_deepseek_llm(),
+                    llm=create_deepseek_llm(priority=LlmPriority.PLAYER),
                     mcp_client=mcp_client,
                     re_invoke_instruction=None,
                     skip_re_invoke=False,
@@ -269,7 +295,7 @@ async def main() -> None:
                     agent_name=game_world.current_agent.name,
                     context=current_context,
                     request=HumanMessage(content=format_user_input),
-                    llm=create_deepseek_llm(),
+                    llm=create_deepseek_llm(priority=LlmPriority.PLAYER),
                 )
 
                 # 更新当前代理的对话历史
@@ -292,7 +318,7 @@ async def main() -> None:
                     agent_name=game_world.current_agent.name,
                     context=current_context,
                     request=HumanMessage(content=rag_content),
-                    llm=create_deepseek_llm(),
+                    llm=create_deepseek_llm(priority=LlmPriority.PLAYER),
                     document_retriever=PGVectorGameDocumentRetriever(),
                 )
 
@@ -336,6 +362,8 @@ async def main() -> None:
         logger.info("🔒 清理系统资源...")
         if mcp_client:
             await mcp_client.disconnect()
+        if game_world is not None:
+            await game_world.close()
 
 
 if __name__ == "__main__":
@@ -11,6 +11,11 @@ Game MCP 服务器 - 简化版 MCP 服务器实现
 
 使用方法：
     python scripts/run_game_mcp_server.py
+
+多 worker 部署：
+    将 McpConfig.workers 设为大于 1，服务器以无状态 HTTP 模式在多个 uvicorn worker
+    进程中运行并共享同一端口（每个请求独立处理，不依赖 mcp-session-id），
+    工具调用可分摊到多个 CPU 核心。注意数据库连接总数约为 worker 数 × 连接池大小。
 """
 
 import os
@@ -23,6 +28,12 @@ sys.path.insert(
 
 import json
 from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, ParamSpec, TypeVar
+import anyio
+import anyio.to_thread
+from uuid import UUID
+from pydantic import ValidationError
 
 # from urllib.parse import unquote
 from loguru import logger
@@ -30,11 +41,19 @@ from mcp.server.fastmcp import FastMCP
 import mcp.types as types
 from ai_trpg.mcp import mcp_config
 from fastapi import Request, Response, status
+from starlette.applications import Starlette
+import uvicorn
 from ai_trpg.pgsql import (
-    get_world_id_by_name,
+    VersionConflictError,
+    WorldChangeListener,
+    mark_primary_write,
+    world_name_cache,
     save_actor_movement_event_to_db,
     update_stage_info,
     move_actor_to_stage as move_actor_to_stage_db,
+    apply_world_mutations as apply_world_mutations_db,
+    world_mutation_adapter,
+    WorldMutation,
 )
 
 # 导入辅助函数模块
@@ -63,8 +82,61 @@ app = FastMCP(
     name=mcp_config.server_name,
     instructions=mcp_config.server_description,
     debug=True,
+    stateless_http=mcp_config.use_stateless_http,
 )
 
+
+def create_app() -> Starlette:
+    """创建 Streamable HTTP ASGI 应用（多 worker 部署时每个 worker 进程调用一次）"""
+    return app.streamable_http_app()
+
+
+# ============================================================================
+# 数据库调用（在有界工作线程池中执行，不阻塞事件循环）
+# ============================================================================
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+# 同时执行数据库操作的线程数上限（应不超过数据库连接池大小）
+_db_limiter = anyio.CapacityLimiter(mcp_config.db_worker_threads)
+
+
+async def _run_db(func: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+    """在工作线程中执行同步数据库操作
+
+    工具处理函数是 async 的，直接调用同步数据库函数会阻塞事件循环，
+    一条慢查询就会拖住所有智能体的并发工具调用。
+    """
+    return await anyio.to_thread.run_sync(
+        partial(func, *args, **kwargs), limiter=_db_limiter
+    )
+
+
+# ============================================================================
+# 名称解析缓存（跨进程失效）
+# ============================================================================
+
+# 世界变更监听器：其他进程删除/重新保存/同步世界时使名称缓存失效
+_world_change_listener: Optional[WorldChangeListener] = None
+
+
+async def _resolve_world_id(world_name: str) -> Optional[UUID]:
+    """通过名称缓存解析 world_id（首次调用时启动世界变更监听）"""
+    global _world_change_listener
+    if _world_change_listener is None:
+        _world_change_listener = WorldChangeListener()
+        world_name_cache.attach(_world_change_listener)
+        # 其他进程（游戏客户端）提交的写入同样让之后的工具读取走主库（read-your-writes）
+        _world_change_listener.register(lambda event: mark_primary_write())
+        try:
+            await _world_change_listener.start()
+        except Exception as e:
+            logger.warning(f"⚠️ 世界变更监听启动失败，名称缓存仅在本进程内失效: {e}")
+
+    return await _run_db(world_name_cache.resolve_world_id, world_name)
+
+
 # ============================================================================
 # 注册健康检查端点
 # ============================================================================
@@ -126,6 +198,7 @@ async def update_stage_execution_result(
     actor_states: str,
     environment: str,
     connections: str,
+    expected_version: Optional[int] = None,
 ) -> str:
     """
     保存场景执行结果
@@ -141,6 +214,7 @@ async def update_stage_execution_result(
         actor_states: 角色状态字符串（格式：**角色名**: 位置 | 姿态 | 状态）
         environment: 环境描述
         connections: 场景连通性描述。可以保持原值不变，或根据场景事件更新（如门被打开/锁上、通道被发现/封闭等）
+        expected_version: 执行开始时读取的场景版本号（可选）。场景在此期间被修改时不保存，返回版本冲突
 
     Returns:
         更新操作的结果（JSON格式）
@@ -173,15 +247,17 @@ async def update_stage_execution_result(
         # stage.connections = connections
 
         # 请在这个位置使用 update_stage_info 函数将更新同步到数据库
-        world_id = get_world_id_by_name(world_name=world_name)
+        world_id = await _resolve_world_id(world_name)
         assert world_id is not None, f"世界 '{world_name}' 未在数据库中找到"
-        update_stage_info(
+        await _run_db(
+            update_stage_info,
             world_id=world_id,
             stage_name=stage_name,
             environment=environment,
             narrative=narrative,
             actor_states=actor_states,
             connections=connections,
+            expected_version=expected_version,
         )
 
         return json.dumps(
@@ -193,6 +269,13 @@ async def update_stage_execution_result(
             ensure_ascii=False,
         )
 
+    except VersionConflictError as e:
+        logger.warning(f"场景版本冲突，未保存: {e}")
+        return json.dumps(
+            {"success": False, "conflict": True, "error": str(e)},
+            ensure_ascii=False,
+        )
+
     except Exception as e:
         logger.error(f"同步失败: {e}")
         return json.dumps(
@@ -222,11 +305,12 @@ async def move_actor_to_stage(
     """
     try:
         # 步骤1: 获取 world_id
-        world_id = get_world_id_by_name(world_name)
+        world_id = await _resolve_world_id(world_name)
         assert world_id is not None, f"世界 '{world_name}' 未在数据库中找到"
 
         # 步骤2: 执行数据库层面的移动操作（同时返回源场景名称）
-        move_success, source_stage_name = move_actor_to_stage_db(
+        move_success, source_stage_name = await _run_db(
+            move_actor_to_stage_db,
             world_id=world_id,
             actor_name=actor_name,
             target_stage_name=target_stage_name,
@@ -255,7 +339,8 @@ async def move_actor_to_stage(
         logger.info(success_msg)
 
         # 步骤4: 存储一个临时事件，用于后续的通知！
-        save_actor_movement_event_to_db(
+        await _run_db(
+            save_actor_movement_event_to_db,
             world_id=world_id,
             actor_name=actor_name,
             from_stage=source_stage_name,
@@ -310,13 +395,13 @@ async def update_actor_appearance(
     """
     try:
         # 步骤1: 获取 world_id
-        world_id = get_world_id_by_name(world_name)
+        world_id = await _resolve_world_id(world_name)
         assert world_id is not None, f"世界 '{world_name}' 未在数据库中找到"
 
         # 步骤2: 执行数据库更新（返回旧的外观描述）
 
-        old_appearance = update_actor_appearance_db(
-            world_id, actor_name, new_appearance
+        old_appearance = await _run_db(
+            update_actor_appearance_db, world_id, actor_name, new_appearance
         )
         if old_appearance is None:
             error_msg = f"错误：未找到名为 '{actor_name}' 的Actor或更新失败"
@@ -377,13 +462,13 @@ async def add_actor_effect(
     """
     try:
         # 步骤1: 获取 world_id
-        world_id = get_world_id_by_name(world_name)
+        world_id = await _resolve_world_id(world_name)
         assert world_id is not None, f"世界 '{world_name}' 未在数据库中找到"
 
         # 步骤2: 执行数据库添加操作
 
-        success = add_actor_effect_db(
-            world_id, actor_name, effect_name, effect_description
+        success = await _run_db(
+            add_actor_effect_db, world_id, actor_name, effect_name, effect_description
         )
         if not success:
             error_msg = f"错误：未找到名为 '{actor_name}' 的Actor或添加失败"
@@ -446,11 +531,13 @@ async def remove_actor_effect(
     try:
 
         # 步骤1: 获取 world_id
-        world_id = get_world_id_by_name(world_name)
+        world_id = await _resolve_world_id(world_name)
         assert world_id is not None, f"世界 '{world_name}' 未在数据库中找到"
 
         # 步骤2: 执行数据库删除操作
-        removed_count = remove_actor_effect_db(world_id, actor_name, effect_name)
+        removed_count = await _run_db(
+            remove_actor_effect_db, world_id, actor_name, effect_name
+        )
         if removed_count == -1:
             error_msg = f"错误：未找到名为 '{actor_name}' 的Actor"
             logger.error(error_msg)
@@ -525,10 +612,10 @@ async def update_actor_health(world_name: str, actor_name: str, new_health: int)
     """
     try:
         # 步骤1: 获取 world_id
-        world_id = get_world_id_by_name(world_name)
+        world_id = await _resolve_world_id(world_name)
         assert world_id is not None, f"世界 '{world_name}' 未在数据库中找到"
 
-        result = update_actor_health_db(world_id, actor_name, new_health)
+        result = await _run_db(update_actor_health_db, world_id, actor_name, new_health)
         if not result:
             error_msg = f"错误：未找到名为 '{actor_name}' 的Actor或更新失败"
             logger.error(error_msg)
@@ -574,6 +661,94 @@ async def update_actor_health(world_name: str, actor_name: str, new_health: int)
         )
 
 
+@app.tool()
+async def apply_world_mutations(
+    world_name: str, mutations: List[Dict[str, Any]]
+) -> str:
+    """
+    批量应用世界状态变更（单个事务，原子提交）
+
+    将一次场景执行产生的所有状态变更合并为一次调用，任意一条失败则整批回滚。
+    mutations 中每一项都是带 type 字段的对象，支持以下类型：
+
+    - {"type": "update_actor_health", "actor_name": str, "new_health": int}
+    - {"type": "update_actor_appearance", "actor_name": str, "new_appearance": str}
+    - {"type": "add_actor_effect", "actor_name": str, "effect_name": str, "effect_description": str}
+    - {"type": "remove_actor_effect", "actor_name": str, "effect_name": str}
+    - {"type": "move_actor_to_stage", "actor_name": str, "target_stage_name": str, "entry_posture_and_status": str}
+    - {"type": "update_stage_info", "stage_name": str, "environment": str, "narrative": str, "actor_states": str, "connections": str, "expected_version": int}（字段可选，未提供则保持不变；提供 expected_version 时场景版本不一致视为冲突，整批回滚）
+
+    Args:
+        world_name: 游戏世界名称
+        mutations: 变更列表（按顺序执行）
+
+    Returns:
+        批量操作的结果信息（JSON格式），包含是否已提交以及逐条变更的执行结果
+    """
+    try:
+        # 步骤1: 校验所有变更（任意一条格式错误则整批不执行）
+        parsed_mutations: List[WorldMutation] = []
+        validation_errors: List[Dict[str, Any]] = []
+        for index, raw_mutation in enumerate(mutations):
+            try:
+                parsed_mutations.append(
+                    world_mutation_adapter.validate_python(raw_mutation)
+                )
+            except ValidationError as e:
+                validation_errors.append({"index": index, "error": str(e)})
+
+        if validation_errors:
+            logger.error(f"批量变更格式校验失败: {validation_errors}")
+            return json.dumps(
+                {
+                    "success": False,
+                    "committed": False,
+                    "error": "变更格式校验失败，整批未执行",
+                    "validation_errors": validation_errors,
+                    "timestamp": datetime.now().isoformat(),
+                },
+                ensure_ascii=False,
+                indent=2,
+            )
+
+        # 步骤2: 获取 world_id
+        world_id = await _resolve_world_id(world_name)
+        assert world_id is not None, f"世界 '{world_name}' 未在数据库中找到"
+
+        # 步骤3: 在单个事务中应用所有变更
+        batch_result = await _run_db(
+            apply_world_mutations_db, world_id, parsed_mutations
+        )
+
+        logger.info(
+            f"批量变更完成: {len(batch_result.results)} 条, 已提交: {batch_result.committed}"
+        )
+
+        return json.dumps(
+            {
+                "success": batch_result.committed and batch_result.all_succeeded,
+                "committed": batch_result.committed,
+                "results": [result.model_dump() for result in batch_result.results],
+                "timestamp": datetime.now().isoformat(),
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+
+    except Exception as e:
+        logger.error(f"批量应用世界变更失败: {e}")
+        return json.dumps(
+            {
+                "success": False,
+                "committed": False,
+                "error": f"批量应用世界变更失败 - {str(e)}",
+                "timestamp": datetime.now().isoformat(),
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+
+
 # ============================================================================
 # 注册资源
 # ============================================================================
@@ -687,8 +862,23 @@ def main() -> None:
     app.settings.port = mcp_config.mcp_server_port
 
     try:
-        logger.info("✅ 服务器启动完成，等待客户端连接...")
-        app.run(transport="streamable-http")
+        if mcp_config.workers > 1:
+            # 多 worker：各进程独立导入本模块并创建应用，共享同一端口
+            logger.info(
+                f"🧵 多 worker 模式: {mcp_config.workers} 个进程（无状态 HTTP）"
+            )
+            uvicorn.run(
+                f"{os.path.splitext(os.path.basename(__file__))[0]}:create_app",
+                factory=True,
+                host=mcp_config.mcp_server_host,
+                port=mcp_config.mcp_server_port,
+                workers=mcp_config.workers,
+            )
+        else:
+            if mcp_config.use_stateless_http:
+                logger.info("📭 无状态 HTTP 模式")
+            logger.info("✅ 服务器启动完成，等待客户端连接...")
+            app.run(transport="streamable-http")
     except KeyboardInterrupt:
         logger.info("🛑 收到中断信号，正在关闭服务器...")
     except Exception as e:
@@ -4,8 +4,8 @@
 
 此脚本用于更新数据库中的演示世界数据:
 1. 从 demo 模块加载 World 实例
-2. 删除数据库中同名的旧世界(如果存在)
-3. 保存新的 World 实例到数据库
+2. 删除数据库中其他旧演示世界
+3. 将 World 实例差异同步到数据库（只写入有变化的部分，保留已有行的 UUID）
 
 使用方法:
     python scripts/update_demo_world.py
@@ -31,20 +31,16 @@ from ai_trpg.demo import (
     create_test_world3,
 )
 from ai_trpg.demo.models import World
-from ai_trpg.pgsql.world_operations import (
-    save_world_to_db,
-    delete_world,
-)
+from ai_trpg.pgsql.world_operations import delete_world
+from ai_trpg.pgsql.world_sync_operations import sync_world_to_db
 
 
 def _update_world_to_db(world: World) -> None:
     """
     更新世界到数据库
 
-    此函数执行以下操作:
-    1. 删除数据库中同名的旧世界(如果存在)
-    2. 保存新的 World 实例到数据库
-    3. 验证保存结果
+    按场景名称/角色名称与数据库中的同名世界比较，只执行必要的插入、更新与删除；
+    数据库中不存在时直接保存。
 
     Args:
         world: 要更新到数据库的 World 实例
@@ -59,29 +55,26 @@ def _update_world_to_db(world: World) -> None:
     for stage in world.stages:
         logger.info(f"     * {stage.name}: {len(stage.actors)} actors")
 
-    # 1. 删除数据库中同名的旧世界(如果存在)
-    logger.info(f"🗑️  检查并删除旧世界: {world_name}")
-    delete_result = delete_world(world_name)
+    # 差异同步到数据库
+    logger.info(f"💾 同步世界到数据库: {world_name}")
+    result = sync_world_to_db(world)
 
-    if delete_result:
-        logger.success(f"✅ 已删除旧世界: {world_name}")
+    if result.created:
+        logger.success(f"✅ 世界已新建!")
+    elif result.changed:
+        logger.success(
+            f"✅ 世界已同步: 插入 {result.inserted}, 更新 {result.updated}, 删除 {result.deleted}"
+        )
     else:
-        logger.info(f"ℹ️  数据库中不存在旧世界: {world_name}")
-
-    # 2. 保存新的 World 实例到数据库
-    logger.info(f"💾 保存新世界到数据库: {world_name}")
-    world_db = save_world_to_db(world)
-
-    logger.success(f"✅ 世界保存成功!")
-    logger.info(f"   - World ID: {world_db.id}")
-    logger.info(f"   - World Name: {world_db.name}")
-    logger.info(f"   - Campaign Setting: {world_db.campaign_setting}")
+        logger.success(f"✅ 世界无变化")
+    logger.info(f"   - World ID: {result.world_id}")
+    logger.info(f"   - World Name: {world_name}")
 
 
 # 写一个函数，上述的所有create world全部删除一遍
-def _delete_all_demo_worlds() -> None:
+def _delete_all_demo_worlds(keep_world_name: str = "") -> None:
     """
-    删除所有演示世界
+    删除所有演示世界（keep_world_name 指定的世界除外，它会被差异同步）
 
     此函数删除以下演示世界:
     - 雅南城_1 (create_test_world1)
@@ -89,6 +82,9 @@ def _delete_all_demo_worlds() -> None:
     - 雅南城_2_2 (create_test_world_2_2)
     - 雅南城_3 (create_test_world3)
 
+    Args:
+        keep_world_name: 保留不删除的世界名称
+
     Raises:
         Exception: 如果删除过程中发生错误
     """
@@ -102,6 +98,8 @@ def _delete_all_demo_worlds() -> None:
 
     for world in demo_worlds:
         world_name = world.name
+        if world_name == keep_world_name:
+            continue
         logger.info(f"🗑️  删除演示世界: {world_name}")
         delete_result = delete_world(world_name)
 
@@ -161,15 +159,15 @@ def _test_demo_world(demo_world: World) -> None:
 def main() -> None:
     """主函数: 更新演示世界到数据库"""
     try:
-        # 0. logger.info("🗑️ 删除所有旧演示世界...")
-        _delete_all_demo_worlds()
-
         logger.info("🚀 开始更新演示世界到数据库...")
 
         # 1. 创建演示世界实例
         logger.info("📦 创建演示世界实例...")
         demo_world = create_demo_world()
 
+        # 1.2 删除其他旧演示世界（当前演示世界做差异同步，不删除）
+        _delete_all_demo_worlds(keep_world_name=demo_world.name)
+
         # 1.5 测试演示世界
         _test_demo_world(demo_world)
 
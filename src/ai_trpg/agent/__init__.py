@@ -5,7 +5,15 @@
 
 from .base import AbstractGameAgent
 from .models import GameAgent, WorldAgent, ActorAgent, StageAgent
-from .manager import GameWorld
+from .manager import DEFAULT_AGENT_IDLE_SECONDS, GameWorld, McpClientFactory
+from .host import DEFAULT_MAX_CONCURRENT_TURNS, WorldHost
+from .turn_scheduler import TurnNodeFunc, TurnScheduler, TurnScheduleResult
+from .fingerprint import (
+    DEFAULT_DIRTY_TRACKING_POLICY,
+    DirtyTrackingPolicy,
+    InputFingerprintTracker,
+    fingerprint_inputs,
+)
 
 __all__ = [
     "AbstractGameAgent",
@@ -14,4 +22,15 @@ __all__ = [
     "ActorAgent",
     "StageAgent",
     "GameWorld",
+    "McpClientFactory",
+    "DEFAULT_AGENT_IDLE_SECONDS",
+    "WorldHost",
+    "DEFAULT_MAX_CONCURRENT_TURNS",
+    "TurnScheduler",
+    "TurnScheduleResult",
+    "TurnNodeFunc",
+    "InputFingerprintTracker",
+    "DirtyTrackingPolicy",
+    "DEFAULT_DIRTY_TRACKING_POLICY",
+    "fingerprint_inputs",
 ]
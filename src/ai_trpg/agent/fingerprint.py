@@ -0,0 +1,106 @@
+"""代理输入指纹（脏标记）
+
+观察规划、场景执行、角色自我更新每回合都会为每个存活角色（场景）调用 LLM，即使什么都没有发生。
+InputFingerprintTracker 记录每个代理在每个阶段最近一次调用 LLM 时的输入：
+
+- 输入指纹：提示词中用到的数据（场景叙事/环境/角色状态、自身属性与 Effect、外观等）的哈希
+- 上下文长度：调用结束时上下文的消息数量（之后新增的消息即"新的上下文"）
+
+输入指纹相同且上下文没有新消息时，视为输入未变化，按策略处理：
+
+- "always": 不做脏标记判断，每回合都调用（原有行为）
+- "reuse_plan": 跳过调用，沿用上一次的结果（观察规划保留上一回合的计划）
+- "skip": 跳过调用，本回合不行动（观察规划清空计划，场景执行时忽略该角色）
+
+角色自我更新没有计划可沿用，"reuse_plan" 与 "skip" 都直接跳过。
+
+代理自身造成的变化不是新的事件，各阶段记录的是"下一回合没有其他变化时会读到的输入"：
+
+- 角色自我更新记录调用之后的输入（工具对自身外观/Effect 的修改）
+- 场景执行记录执行后的输入（场景状态与版本、参与角色的计划与状态），
+  所有角色沿用计划且场景没有其他变化时跳过执行
+- 场景执行只执行了一个角色的计划时，以执行后的状态重新记录该角色的观察规划输入
+  （执行结果与通知只是角色自身行动的回声）；执行了多个角色的计划时，
+  其他角色的行动是新的事件，下一回合重新规划
+
+使用方法：
+    inputs = fingerprint_inputs(prompt, stage_db.narrative)
+    if tracker.is_unchanged("observe_and_plan", actor_name, inputs, len(context)):
+        ...  # 按 tracker.policy 跳过
+    ...  # 调用 LLM
+    tracker.record("observe_and_plan", actor_name, inputs, len(context) + 2)
+"""
+
+import hashlib
+from typing import Dict, Final, Literal, Tuple
+
+# 输入未变化时的处理策略
+DirtyTrackingPolicy = Literal["always", "reuse_plan", "skip"]
+
+DEFAULT_DIRTY_TRACKING_POLICY: Final[DirtyTrackingPolicy] = "reuse_plan"
+
+
+def fingerprint_inputs(*parts: str) -> str:
+    """计算输入数据的指纹（各部分按顺序参与哈希）"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+class InputFingerprintTracker:
+    """按 (阶段, 代理名称) 记录最近一次 LLM 调用的输入"""
+
+    def __init__(
+        self, policy: DirtyTrackingPolicy = DEFAULT_DIRTY_TRACKING_POLICY
+    ) -> None:
+        self.policy: DirtyTrackingPolicy = policy
+        # (阶段, 代理名称) → (输入指纹, 调用结束时的上下文长度)
+        self._records: Dict[Tuple[str, str], Tuple[str, int]] = {}
+        # 阶段 → 因输入未变化而跳过的次数
+        self._skipped: Dict[str, int] = {}
+
+    @property
+    def skipped(self) -> Dict[str, int]:
+        """获取每个阶段跳过的调用次数"""
+        return dict(self._skipped)
+
+    def is_unchanged(
+        self, phase: str, agent_name: str, inputs: str, context_length: int
+    ) -> bool:
+        """判断代理的输入是否与最近一次调用相同（策略为 "always" 时总是返回 False）
+
+        Args:
+            phase: 阶段名称
+            agent_name: 代理名称
+            inputs: 本次输入指纹（fingerprint_inputs 的结果）
+            context_length: 本次读取到的上下文长度
+
+        Returns:
+            bool: 输入未变化（可以跳过本次调用）
+        """
+        if self.policy == "always":
+            return False
+        if self._records.get((phase, agent_name)) != (inputs, context_length):
+            return False
+        self._skipped[phase] = self._skipped.get(phase, 0) + 1
+        return True
+
+    def record(
+        self, phase: str, agent_name: str, inputs: str, context_length: int
+    ) -> None:
+        """记录一次成功的调用
+
+        Args:
+            phase: 阶段名称
+            agent_name: 代理名称
+            inputs: 本次输入指纹
+            context_length: 调用结束时的上下文长度（包含本次调用写入的消息）
+        """
+        self._records[(phase, agent_name)] = (inputs, context_length)
+
+    def clear(self) -> None:
+        """清空所有记录（切换世界或世界被重新同步时调用）"""
+        self._records.clear()
+        self._skipped.clear()
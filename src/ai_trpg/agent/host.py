@@ -0,0 +1,201 @@
+"""多世界宿主
+
+在同一进程中运行多个战役（GameWorld），共享进程级资源：
+
+- 数据库引擎与会话工厂（pgsql.client 模块级实例）
+- 嵌入模型（embedding_model 模块级实例）
+- LLM HTTP 客户端（langchain-openai 按 base_url 缓存的默认 httpx 客户端）
+- MCP 连接池（由 WorldHost 创建并传给每个 GameWorld）
+
+回合通过 submit_turn 按世界提交：同一世界的回合依次执行，
+不同世界之间按轮询公平调度，同时执行的回合数不超过 max_concurrent_turns，
+回合较多的世界不会让其他世界饿死。
+
+使用方法：
+    host = WorldHost(max_concurrent_turns=4)
+    await host.add_world("世界A")
+    await host.add_world("世界B")
+    result = await host.submit_turn("世界A", lambda game_world: run_turn(game_world))
+    ...
+    await host.close()
+"""
+
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Final, List, Optional, TypeVar
+from loguru import logger
+from .manager import GameWorld, McpClientFactory
+from ..mcp import McpClientPool, mcp_config
+
+T = TypeVar("T")
+
+# 默认同时执行的回合数（所有世界合计）
+DEFAULT_MAX_CONCURRENT_TURNS: Final[int] = 4
+
+
+class _TurnRequest:
+    """排队中的回合"""
+
+    def __init__(
+        self,
+        turn: Callable[[GameWorld], Awaitable[Any]],
+        future: "asyncio.Future[Any]",
+    ) -> None:
+        self.turn = turn
+        self.future = future
+
+
+class WorldHost:
+    """多世界宿主（共享资源 + 公平回合调度）"""
+
+    def __init__(
+        self,
+        max_concurrent_turns: int = DEFAULT_MAX_CONCURRENT_TURNS,
+        mcp_client_factory: Optional[McpClientFactory] = None,
+    ) -> None:
+        """初始化宿主（不建立连接）
+
+        Args:
+            max_concurrent_turns: 所有世界合计同时执行的回合数
+            mcp_client_factory: 代理 MCP 客户端工厂（默认使用共享连接池的句柄）
+        """
+        assert max_concurrent_turns > 0, "同时执行的回合数必须大于 0"
+        self.max_concurrent_turns = max_concurrent_turns
+        self._mcp_client_factory = mcp_client_factory
+        self._mcp_client_pool = McpClientPool(
+            base_url=mcp_config.mcp_server_url,
+            protocol_version=mcp_config.protocol_version,
+            timeout=mcp_config.mcp_timeout,
+            size=mcp_config.client_pool_size,
+        )
+
+        self._worlds: Dict[str, GameWorld] = {}
+        # 每个世界排队中的回合
+        self._queues: Dict[str, Deque[_TurnRequest]] = {}
+        # 有排队回合且没有回合在执行的世界（轮询顺序）
+        self._ready: Deque[str] = deque()
+        # 正在执行回合的世界 → 回合任务
+        self._running: Dict[str, "asyncio.Task[None]"] = {}
+
+    @property
+    def world_names(self) -> List[str]:
+        """获取所有世界名称"""
+        return list(self._worlds)
+
+    def get_world(self, world_name: str) -> Optional[GameWorld]:
+        """根据名称获取世界"""
+        return self._worlds.get(world_name)
+
+    def pending_turns(self, world_name: str) -> int:
+        """获取世界排队中的回合数（不含正在执行的回合）"""
+        return len(self._queues.get(world_name, ()))
+
+    async def add_world(self, world_name: str) -> GameWorld:
+        """加载世界并连接代理（已加载时直接返回）
+
+        Args:
+            world_name: 世界名称
+
+        Returns:
+            GameWorld: 共享本宿主 MCP 连接池的游戏世界
+        """
+        game_world = self._worlds.get(world_name)
+        if game_world is not None:
+            return game_world
+
+        game_world = GameWorld(
+            mcp_client_factory=self._mcp_client_factory,
+            mcp_client_pool=self._mcp_client_pool,
+        )
+        await game_world.load(world_name)
+        await game_world.connect_all_agents()
+
+        self._worlds[world_name] = game_world
+        self._queues[world_name] = deque()
+        logger.info(f"🌍 宿主已加载世界: {world_name} (共 {len(self._worlds)} 个)")
+        return game_world
+
+    async def remove_world(self, world_name: str) -> None:
+        """移除世界：取消排队中的回合，等待正在执行的回合结束后释放代理
+
+        Args:
+            world_name: 世界名称
+        """
+        game_world = self._worlds.pop(world_name, None)
+        if game_world is None:
+            return
+
+        for request in self._queues.pop(world_name, deque()):
+            request.future.cancel()
+        if world_name in self._ready:
+            self._ready.remove(world_name)
+
+        running = self._running.get(world_name)
+        if running is not None:
+            await asyncio.gather(running, return_exceptions=True)
+
+        await game_world.close()
+        logger.info(f"🌍 宿主已移除世界: {world_name}")
+
+    async def close(self) -> None:
+        """移除所有世界并关闭共享的 MCP 连接池"""
+        for world_name in list(self._worlds):
+            await self.remove_world(world_name)
+        if self._mcp_client_pool.is_started:
+            await self._mcp_client_pool.close()
+
+    def submit_turn(
+        self, world_name: str, turn: Callable[[GameWorld], Awaitable[T]]
+    ) -> "asyncio.Future[T]":
+        """提交一个回合（在事件循环中调用）
+
+        Args:
+            world_name: 世界名称（必须已通过 add_world 加载）
+            turn: 回合函数，参数为该世界的 GameWorld
+
+        Returns:
+            asyncio.Future[T]: 回合结果（回合函数的返回值或异常）
+        """
+        if world_name not in self._worlds:
+            raise ValueError(f"World '{world_name}' 未加载到宿主")
+
+        future: "asyncio.Future[T]" = asyncio.get_running_loop().create_future()
+        self._queues[world_name].append(_TurnRequest(turn=turn, future=future))
+        if world_name not in self._running and world_name not in self._ready:
+            self._ready.append(world_name)
+        self._dispatch()
+        return future
+
+    def _dispatch(self) -> None:
+        """按轮询顺序启动回合，直到达到并发上限"""
+        while self._ready and len(self._running) < self.max_concurrent_turns:
+            world_name = self._ready.popleft()
+            queue = self._queues.get(world_name)
+            if not queue:
+                continue
+            request = queue.popleft()
+            self._running[world_name] = asyncio.create_task(
+                self._run_turn(world_name, self._worlds[world_name], request)
+            )
+
+    async def _run_turn(
+        self, world_name: str, game_world: GameWorld, request: _TurnRequest
+    ) -> None:
+        """执行一个回合，结束后将该世界排到轮询队尾"""
+        try:
+            if not request.future.cancelled():
+                result = await request.turn(game_world)
+                if not request.future.cancelled():
+                    request.future.set_result(result)
+        except asyncio.CancelledError:
+            request.future.cancel()
+            raise
+        except Exception as e:
+            logger.error(f"❌ 世界 [{world_name}] 回合执行失败: {e}")
+            if not request.future.cancelled():
+                request.future.set_exception(e)
+        finally:
+            del self._running[world_name]
+            if self._queues.get(world_name):
+                self._ready.append(world_name)
+            self._dispatch()
@@ -1,12 +1,28 @@
 """游戏代理管理器"""
 
 import asyncio
-from typing import List, Optional
+import time
+from typing import Callable, Dict, Final, List, Optional, Set, Type
 from uuid import UUID
 from loguru import logger
 from .models import GameAgent, WorldAgent, ActorAgent, StageAgent
-from ..mcp import McpClient, mcp_config, create_mcp_client
-from ..pgsql import get_world
+from .fingerprint import InputFingerprintTracker
+from ..mcp import McpClient, McpClientPool, mcp_config
+from ..pgsql import (
+    MoveActorToStageMutation,
+    UpdateActorHealthMutation,
+    WorldEntityNames,
+    get_world_entity_names,
+    get_world_id_by_name,
+    load_world_mutations_since,
+)
+
+# MCP 客户端工厂（每个代理创建时调用一次，参数为代理名称）
+# 代理按需创建，工厂返回的客户端必须无需单独 connect 即可使用（连接池句柄/进程内客户端）
+McpClientFactory = Callable[[str], McpClient]
+
+# 场景/角色代理闲置多久后可被回收（秒）
+DEFAULT_AGENT_IDLE_SECONDS: Final[float] = 300.0
 
 
 class GameWorld:
@@ -14,116 +30,235 @@ class GameWorld:
 
     统一管理所有类型的游戏代理，提供类型安全的访问接口。
     保持现有的执行逻辑不变，同时提供更清晰的代理管理功能。
+
+    加载时只读取场景/角色名称，世界观代理立即创建，
+    场景/角色代理在第一次被访问时才创建（get_agent_by_name），
+    闲置的代理可通过 evict_idle_agents 回收，大型世界的启动开销与常驻内存只取决于实际用到的代理。
+
+    角色所在场景与死亡状态随注册表一起维护，refresh 通过变更日志增量更新，无需重新 load。
     """
 
-    def __init__(self) -> None:
-        """初始化代理管理器"""
+    def __init__(
+        self,
+        mcp_client_factory: Optional[McpClientFactory] = None,
+        mcp_client_pool: Optional[McpClientPool] = None,
+    ) -> None:
+        """初始化代理管理器
+
+        Args:
+            mcp_client_factory: 为每个代理创建 MCP 客户端的工厂，
+                默认创建共享同一连接池的 HTTP 客户端句柄；
+                与服务器同进程部署时可传入创建 InProcessMcpClient 的工厂
+            mcp_client_pool: 外部传入的 MCP 连接池（多个世界共享，由调用方关闭），
+                默认为本世界单独创建
+        """
+        # 所有代理共享的 MCP 连接池（连接数与握手次数与代理数量无关）
+        self._owns_mcp_client_pool = mcp_client_pool is None
+        self._mcp_client_pool = mcp_client_pool or McpClientPool(
+            base_url=mcp_config.mcp_server_url,
+            protocol_version=mcp_config.protocol_version,
+            timeout=mcp_config.mcp_timeout,
+            size=mcp_config.client_pool_size,
+        )
+        self._mcp_client_factory: McpClientFactory = (
+            mcp_client_factory or self._create_mcp_client
+        )
         self._world_agent: Optional[WorldAgent] = None
-        self._stage_agents: List[StageAgent] = []
-        self._actor_agents: List[ActorAgent] = []
+        # 代理名称 → 代理类型（按需创建的依据，保持加载时的场景/角色顺序）
+        self._agent_types: Dict[str, Type[GameAgent]] = {}
+        # 已创建的场景/角色代理，以及最近一次被访问的时间（time.monotonic）
+        self._agents: Dict[str, GameAgent] = {}
+        self._last_used: Dict[str, float] = {}
+        # 角色名称 → 所在场景名称、已死亡的角色名称
+        self._actor_stage_names: Dict[str, str] = {}
+        self._dead_actor_names: Set[str] = set()
+        # 注册表已同步到的变更日志序号（refresh 从这里继续）
+        self._log_seq: int = 0
         self._current_agent: Optional[GameAgent] = None
         self._world_name: str = ""
         self._world_id: Optional[UUID] = None
+        # 代理输入指纹（输入未变化的代理跳过 LLM 调用，策略见 input_fingerprints.policy）
+        self.input_fingerprints = InputFingerprintTracker()
 
     async def load(
         self,
         world_name: str,
     ) -> None:
-        """从数据库加载 WorldDB 并创建所有代理
+        """从数据库加载世界的场景/角色名称并创建世界观代理
+
+        场景/角色代理不在此处创建，第一次访问时按需创建。
 
         Args:
             world_name: 世界名称
         """
-        logger.debug("🏗️ 开始创建游戏代理...")
+        logger.debug("🏗️ 开始加载游戏代理...")
 
-        # 从数据库加载完整的 WorldDB (预加载所有关系)
-
-        world_db = get_world(world_name)
-        if not world_db:
+        # 只读取名称，不加载场景/角色的完整数据
+        entity_names = get_world_entity_names(world_name)
+        if entity_names is None:
             raise ValueError(f"World '{world_name}' 不存在于数据库")
 
         # 保存世界信息
-        self._world_name = world_db.name
-        self._world_id = world_db.id
+        self._world_name = world_name
+        self._world_id = entity_names.world_id
         logger.debug(f"✅ 世界名称: {self._world_name}")
         logger.debug(f"✅ 世界 ID: {self._world_id}")
 
         # 创建世界观代理
         self._world_agent = WorldAgent(
-            name=world_db.name,
-            mcp_client=await self._create_mcp_client(),
+            name=world_name,
+            mcp_client=self._mcp_client_factory(world_name),
             world_id=self._world_id,
         )
         logger.debug(f"已创建世界观代理: {self._world_agent.name}")
 
-        # 创建场景代理和角色代理
-        self._stage_agents = []
-        self._actor_agents = []
-
-        for stage_db in world_db.stages:
-            # 创建场景代理
-            stage_agent = StageAgent(
-                name=stage_db.name,
-                mcp_client=await self._create_mcp_client(),
-                world_id=self._world_id,
-            )
-            self._stage_agents.append(stage_agent)
-            logger.debug(f"已创建场景代理: {stage_agent.name}")
-
-            # 直接使用 stage_db.actors (已预加载 attributes 和 effects)
-            for actor_db in stage_db.actors:
-                actor_agent = ActorAgent(
-                    name=actor_db.name,
-                    mcp_client=await self._create_mcp_client(),
-                    world_id=self._world_id,
-                )
-                self._actor_agents.append(actor_agent)
-                logger.debug(
-                    f"已创建角色代理: {actor_agent.name} (所属场景: {stage_agent.name})"
-                )
+        # 登记场景代理和角色代理（按需创建）
+        self._agents = {}
+        self._last_used = {}
+        self.input_fingerprints.clear()
+        self._apply_entity_names(entity_names)
 
         # 默认激活世界观代理
         self._current_agent = self._world_agent
         assert self._current_agent is not None, "当前激活的代理不能为空"
 
-        logger.debug("✅ 所有游戏代理创建完成")
+        logger.debug(
+            f"✅ 游戏代理加载完成: 场景 {len(entity_names.stage_names)} 个, "
+            f"角色 {len(entity_names.actor_stage_names)} 个 (按需创建)"
+        )
+
+    async def refresh(self) -> int:
+        """从变更日志增量刷新注册表（角色移动、死亡、整体同步后的增删）
 
-    async def _create_mcp_client(self) -> McpClient:
-        """创建 MCP 客户端实例
+        只读取上次刷新之后的变更日志并原地更新，已创建的代理与 MCP 客户端保持不变；
+        世界发生过整体同步时重新读取名称并增删代理，世界被删除重建时才完整重新加载。
 
         Returns:
-            McpClient: 新创建的 MCP 客户端实例
+            int: 应用的变更数量（完整重新加载时返回 -1）
         """
-
-        return await create_mcp_client(
-            mcp_server_url=mcp_config.mcp_server_url,
-            mcp_protocol_version=mcp_config.protocol_version,
-            mcp_timeout=mcp_config.mcp_timeout,
-            auto_connect=False,
+        world_id = get_world_id_by_name(self.world_name)
+        if world_id is None:
+            raise ValueError(f"World '{self.world_name}' 不存在于数据库")
+
+        # 世界被删除并重建：旧的日志已随世界删除，只能完整重新加载
+        if world_id != self._world_id:
+            logger.warning(f"⚠️ World '{self.world_name}' 已被重建，重新加载游戏代理")
+            stale_agents = list(self._agents.values())
+            if self._world_agent is not None:
+                stale_agents.append(self._world_agent)
+            await self._release_agents(stale_agents)
+            await self.load(self.world_name)
+            return -1
+
+        delta = load_world_mutations_since(world_id, self._log_seq)
+
+        if delta.resynced:
+            entity_names = get_world_entity_names(self.world_name)
+            if entity_names is None:
+                raise ValueError(f"World '{self.world_name}' 不存在于数据库")
+            await self._release_agents(self._apply_entity_names(entity_names))
+            # 整体同步可能替换了上下文与属性，输入指纹全部失效
+            self.input_fingerprints.clear()
+
+        applied = 0
+        for mutation in delta.mutations:
+            if isinstance(mutation, MoveActorToStageMutation):
+                if mutation.actor_name in self._actor_stage_names:
+                    self._actor_stage_names[mutation.actor_name] = (
+                        mutation.target_stage_name
+                    )
+                    applied += 1
+            elif isinstance(mutation, UpdateActorHealthMutation):
+                # 数据库中只有整体同步会清除死亡标记（生命值恢复不会复活角色）
+                if mutation.new_health <= 0:
+                    self._dead_actor_names.add(mutation.actor_name)
+                    applied += 1
+
+        self._log_seq = max(self._log_seq, delta.latest_seq)
+        if applied or delta.resynced:
+            logger.debug(
+                f"🔄 游戏代理注册表已刷新: 应用 {applied} 条变更 (日志 seq={self._log_seq})"
+            )
+        return applied
+
+    def _apply_entity_names(self, entity_names: WorldEntityNames) -> List[GameAgent]:
+        """用名称快照替换注册表，返回已不存在的已创建代理（由调用方释放）"""
+        agent_types: Dict[str, Type[GameAgent]] = {}
+        for stage_name in entity_names.stage_names:
+            agent_types[stage_name] = StageAgent
+        for actor_name in entity_names.actor_stage_names:
+            agent_types[actor_name] = ActorAgent
+
+        removed_agents = [
+            agent
+            for agent_name, agent in self._agents.items()
+            if agent_types.get(agent_name) is not type(agent)
+        ]
+        for agent in removed_agents:
+            del self._agents[agent.name]
+            self._last_used.pop(agent.name, None)
+            if agent is self._current_agent:
+                self._current_agent = self._world_agent
+
+        self._agent_types = agent_types
+        self._actor_stage_names = dict(entity_names.actor_stage_names)
+        self._dead_actor_names = set(entity_names.dead_actor_names)
+        self._log_seq = max(self._log_seq, entity_names.log_seq)
+        return removed_agents
+
+    async def _release_agents(self, agents: List[GameAgent]) -> None:
+        """并发断开代理的 MCP 客户端（失败只记录日志）"""
+        results = await asyncio.gather(
+            *(agent.mcp_client.disconnect() for agent in agents),
+            return_exceptions=True,
         )
+        for agent, result in zip(agents, results):
+            if isinstance(result, Exception):
+                logger.error(f"❌ 代理 [{agent.name}] MCP 客户端断开失败: {result}")
+
+    def _create_mcp_client(self, agent_name: str) -> McpClient:
+        """创建共享连接池的 MCP 客户端句柄（默认工厂，不建立连接）
+
+        Args:
+            agent_name: 代理名称（随每次工具调用发送）
+
+        Returns:
+            McpClient: 连接池中的代理客户端句柄
+        """
+        return self._mcp_client_pool.client_for(agent_name)
+
+    async def close(self) -> None:
+        """释放所有代理的 MCP 客户端，并关闭本世界创建的 MCP 连接池"""
+        agents = list(self._agents.values())
+        if self._world_agent is not None:
+            agents.append(self._world_agent)
+        self._agents = {}
+        self._last_used = {}
+        await self._release_agents(agents)
+
+        if self._owns_mcp_client_pool and self._mcp_client_pool.is_started:
+            await self._mcp_client_pool.close()
 
     async def connect_all_agents(self) -> None:
-        """并发连接所有代理的 MCP 客户端
+        """并发连接已创建代理的 MCP 客户端
 
-        在 create_agents_from_world 之后调用，用于批量建立所有 MCP 连接。
+        在 load 之后调用，用于批量建立 MCP 连接。
         使用 asyncio.gather 实现真正的并发连接，提高效率。
+        默认工厂下所有代理共享连接池，只有连接池的 size 个会话会真正握手；
+        之后按需创建的代理直接使用已启动的连接池，无需再连接。
         """
         logger.info("🔗 开始并发连接所有代理的 MCP 客户端...")
 
-        # 收集所有需要连接的任务
+        # 收集所有需要连接的任务（世界代理 + 已创建的场景/角色代理）
         connection_tasks = []
 
         # 世界代理
         if self._world_agent:
             connection_tasks.append(self._connect_agent_client(self._world_agent))
 
-        # 场景代理
-        for stage_agent in self._stage_agents:
-            connection_tasks.append(self._connect_agent_client(stage_agent))
-
-        # 角色代理
-        for actor_agent in self._actor_agents:
-            connection_tasks.append(self._connect_agent_client(actor_agent))
+        # 场景代理和角色代理
+        for agent in self._agents.values():
+            connection_tasks.append(self._connect_agent_client(agent))
 
         # 并发执行所有连接
         results = await asyncio.gather(*connection_tasks, return_exceptions=True)
@@ -180,27 +315,47 @@ class GameWorld:
 
     @property
     def actor_agents(self) -> List[ActorAgent]:
-        """获取所有角色代理"""
-        return self._actor_agents
+        """获取所有角色代理（会创建所有尚未创建的角色代理）"""
+        actor_agents: List[ActorAgent] = []
+        for agent_name, agent_type in self._agent_types.items():
+            if agent_type is ActorAgent:
+                agent = self.get_actor_agent(agent_name)
+                assert agent is not None
+                actor_agents.append(agent)
+        return actor_agents
 
     @property
     def all_agents(self) -> List[GameAgent]:
-        """获取所有代理"""
+        """获取所有代理（会创建所有尚未创建的代理，大型世界中开销较大）"""
         agents: List[GameAgent] = []
         assert self._world_agent is not None, "世界观代理未设置"
         if self._world_agent:
             agents.append(self._world_agent)
-        agents.extend(self._stage_agents)
-        agents.extend(self._actor_agents)
+        for agent_name in self._agent_types:
+            agent = self.get_agent_by_name(agent_name)
+            assert agent is not None
+            agents.append(agent)
         return agents
 
+    @property
+    def agent_names(self) -> List[str]:
+        """获取所有代理名称（不创建代理）"""
+        return [self.world_name, *self._agent_types]
+
+    @property
+    def materialized_agents(self) -> List[GameAgent]:
+        """获取已创建的场景/角色代理（不创建新的代理）"""
+        return list(self._agents.values())
+
     @property
     def current_agent(self) -> Optional[GameAgent]:
         """获取当前激活的代理"""
         return self._current_agent
 
     def get_agent_by_name(self, agent_name: str) -> Optional[GameAgent]:
-        """根据名称查找代理
+        """根据名称查找代理（按名称索引，O(1)）
+
+        场景/角色代理第一次被访问时创建，并记录访问时间供闲置回收使用。
 
         Args:
             agent_name: 代理名称
@@ -208,10 +363,103 @@ class GameWorld:
         Returns:
             Optional[GameAgent]: 如果找到返回对应代理，否则返回 None
         """
-        for agent in self.all_agents:
-            if agent.name == agent_name:
-                return agent
-        return None
+        if self._world_agent is not None and agent_name == self._world_agent.name:
+            return self._world_agent
+
+        agent = self._agents.get(agent_name)
+        if agent is None:
+            agent_type = self._agent_types.get(agent_name)
+            if agent_type is None:
+                return None
+            agent = agent_type(
+                name=agent_name,
+                mcp_client=self._mcp_client_factory(agent_name),
+                world_id=self.world_id,
+            )
+            self._agents[agent_name] = agent
+            logger.debug(f"已创建{agent_type.__name__}: {agent_name}")
+
+        self._last_used[agent_name] = time.monotonic()
+        return agent
+
+    def get_actor_stage_name(self, actor_name: str) -> Optional[str]:
+        """获取角色所在场景的名称（不创建代理）"""
+        return self._actor_stage_names.get(actor_name)
+
+    def get_stage_actor_names(self, stage_name: str) -> List[str]:
+        """获取场景中所有角色的名称（不创建代理）"""
+        return [
+            actor_name
+            for actor_name, actor_stage_name in self._actor_stage_names.items()
+            if actor_stage_name == stage_name
+        ]
+
+    def is_actor_dead(self, actor_name: str) -> bool:
+        """角色是否已死亡（以最近一次 load/refresh 为准）"""
+        return actor_name in self._dead_actor_names
+
+    def get_actor_agent(self, actor_name: str) -> Optional[ActorAgent]:
+        """根据名称查找角色代理（O(1)，尚未创建时按需创建）
+
+        Args:
+            actor_name: 角色名称
+
+        Returns:
+            Optional[ActorAgent]: 角色代理，名称不是角色时返回 None
+        """
+        if self._agent_types.get(actor_name) is not ActorAgent:
+            return None
+        agent = self.get_agent_by_name(actor_name)
+        assert isinstance(agent, ActorAgent)
+        return agent
+
+    def get_stage_agent(self, stage_name: str) -> Optional[StageAgent]:
+        """根据名称查找场景代理（O(1)，尚未创建时按需创建）
+
+        Args:
+            stage_name: 场景名称
+
+        Returns:
+            Optional[StageAgent]: 场景代理，名称不是场景时返回 None
+        """
+        if self._agent_types.get(stage_name) is not StageAgent:
+            return None
+        agent = self.get_agent_by_name(stage_name)
+        assert isinstance(agent, StageAgent)
+        return agent
+
+    async def evict_idle_agents(
+        self, max_idle_seconds: float = DEFAULT_AGENT_IDLE_SECONDS
+    ) -> int:
+        """回收闲置的场景/角色代理并释放其 MCP 客户端
+
+        世界观代理与当前激活的代理不会被回收；被回收的代理再次访问时重新创建
+        （上下文保存在数据库中，不会丢失）。
+
+        Args:
+            max_idle_seconds: 超过该时长未被访问的代理会被回收
+
+        Returns:
+            int: 回收的代理数量
+        """
+        now = time.monotonic()
+        idle_agents = [
+            agent
+            for agent_name, agent in self._agents.items()
+            if agent is not self._current_agent
+            and now - self._last_used.get(agent_name, now) >= max_idle_seconds
+        ]
+
+        for agent in idle_agents:
+            del self._agents[agent.name]
+            self._last_used.pop(agent.name, None)
+        await self._release_agents(idle_agents)
+
+        if idle_agents:
+            logger.debug(
+                f"♻️ 回收闲置代理 {len(idle_agents)} 个, 剩余 {len(self._agents)} 个"
+            )
+        return len(idle_agents)
 
     def switch_current_agent(self, target_name: str) -> Optional[GameAgent]:
         """切换到指定名称的代理
@@ -233,15 +481,12 @@ class GameWorld:
             )
             return None
 
-        # 在所有代理中查找目标代理
-        for agent in self.all_agents:
-            if agent.name == target_name:
-                logger.success(
-                    f"✅ 切换代理: [{self._current_agent.name}] → [{agent.name}]"
-                )
-                self._current_agent = agent
-                return agent
-
-        # 未找到目标代理
-        logger.error(f"❌ 未找到角色代理: {target_name}")
-        return None
+        # 查找目标代理（尚未创建时按需创建）
+        agent = self.get_agent_by_name(target_name)
+        if agent is None:
+            logger.error(f"❌ 未找到角色代理: {target_name}")
+            return None
+
+        logger.success(f"✅ 切换代理: [{self._current_agent.name}] → [{agent.name}]")
+        self._current_agent = agent
+        return agent
@@ -0,0 +1,160 @@
+"""回合依赖调度器
+
+把一个回合拆成带依赖关系的节点（有向无环图），每个节点在它依赖的节点全部完成后立即开始，
+不再按全局阶段逐个 asyncio.gather 等待：慢场景只拖慢依赖它的节点，
+回合总耗时接近最慢的一条依赖链，而不是每个阶段最慢者之和。
+
+节点失败不影响无关的节点，失败记录在 TurnScheduleResult.failures 中；
+依赖失败节点的节点（包括间接依赖）不执行，记录在 TurnScheduleResult.skipped 中，
+调用方据此只补做失败与未执行的节点（未执行的节点不会写入回合日志）。
+
+使用方法：
+    scheduler = TurnScheduler()
+    scheduler.add_node("observe:角色A", observe_a)
+    scheduler.add_node("execute:场景1", execute_1, depends_on=["observe:角色A"])
+    result = await scheduler.run()
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Set
+from loguru import logger
+from pydantic import BaseModel, Field
+
+# 节点函数（无参数的协程工厂）
+TurnNodeFunc = Callable[[], Awaitable[None]]
+
+
+class TurnScheduleResult(BaseModel):
+    """一次调度的执行结果"""
+
+    elapsed: float = Field(description="总耗时（秒）")
+    durations: Dict[str, float] = Field(
+        default_factory=dict, description="节点 → 执行耗时（秒）"
+    )
+    failures: Dict[str, str] = Field(
+        default_factory=dict, description="失败的节点 → 错误信息"
+    )
+    skipped: List[str] = Field(
+        default_factory=list, description="因依赖的节点失败而未执行的节点"
+    )
+
+    @property
+    def incomplete(self) -> bool:
+        """是否有节点失败或未执行"""
+        return bool(self.failures or self.skipped)
+
+
+class TurnScheduler:
+    """回合依赖调度器（一次性使用：添加节点后调用一次 run）"""
+
+    def __init__(self) -> None:
+        self._funcs: Dict[str, TurnNodeFunc] = {}
+        self._dependencies: Dict[str, Set[str]] = {}
+
+    @property
+    def node_keys(self) -> List[str]:
+        """获取所有节点（按添加顺序）"""
+        return list(self._funcs)
+
+    def add_node(
+        self, key: str, func: TurnNodeFunc, depends_on: Iterable[str] = ()
+    ) -> None:
+        """添加节点
+
+        Args:
+            key: 节点名称（唯一）
+            func: 节点函数
+            depends_on: 依赖的节点名称（可以在之后添加）
+        """
+        if key in self._funcs:
+            raise ValueError(f"重复的调度节点: {key}")
+        self._funcs[key] = func
+        self._dependencies[key] = set(depends_on)
+
+    def add_dependency(self, key: str, depends_on: Iterable[str]) -> None:
+        """为已添加的节点追加依赖"""
+        self._dependencies[key].update(depends_on)
+
+    def dependencies_of(self, key: str) -> Set[str]:
+        """获取节点的直接依赖"""
+        return set(self._dependencies[key])
+
+    def validate(self) -> None:
+        """检查依赖的节点都存在且没有环，否则抛出 ValueError"""
+        for key, dependencies in self._dependencies.items():
+            missing = dependencies - self._funcs.keys()
+            if missing:
+                raise ValueError(f"调度节点 {key} 依赖不存在的节点: {sorted(missing)}")
+
+        # Kahn 拓扑排序：无法排完说明存在环
+        remaining = {key: len(deps) for key, deps in self._dependencies.items()}
+        dependents: Dict[str, List[str]] = {key: [] for key in self._funcs}
+        for key, dependencies in self._dependencies.items():
+            for dependency in dependencies:
+                dependents[dependency].append(key)
+
+        ready = [key for key, count in remaining.items() if count == 0]
+        visited = 0
+        while ready:
+            key = ready.pop()
+            visited += 1
+            for dependent in dependents[key]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+
+        if visited != len(self._funcs):
+            cyclic = sorted(key for key, count in remaining.items() if count > 0)
+            raise ValueError(f"调度节点存在循环依赖: {cyclic}")
+
+    async def run(self) -> TurnScheduleResult:
+        """执行所有节点：每个节点在依赖全部完成后立即开始
+
+        Returns:
+            TurnScheduleResult: 总耗时、各节点耗时、失败与未执行的节点
+        """
+        self.validate()
+
+        start = time.perf_counter()
+        result = TurnScheduleResult(elapsed=0.0)
+        done: Dict[str, asyncio.Event] = {key: asyncio.Event() for key in self._funcs}
+        skipped: Set[str] = set()
+
+        async def run_node(key: str) -> None:
+            for dependency in self._dependencies[key]:
+                await done[dependency].wait()
+
+            # 依赖的节点失败或未执行时不执行（失败沿依赖链传递）
+            incomplete_dependencies = sorted(
+                dependency
+                for dependency in self._dependencies[key]
+                if dependency in result.failures or dependency in skipped
+            )
+            if incomplete_dependencies:
+                logger.warning(
+                    f"⏭️ 调度节点 {key} 未执行: 依赖的节点未完成 {incomplete_dependencies}"
+                )
+                skipped.add(key)
+                result.skipped.append(key)
+                done[key].set()
+                return
+
+            node_start = time.perf_counter()
+            try:
+                await self._funcs[key]()
+            except Exception as e:
+                logger.error(f"❌ 调度节点 {key} 执行失败: {e}")
+                result.failures[key] = str(e)
+            finally:
+                result.durations[key] = time.perf_counter() - node_start
+                done[key].set()
+
+        await asyncio.gather(*(run_node(key) for key in self._funcs))
+
+        result.elapsed = time.perf_counter() - start
+        logger.debug(
+            f"🗺️ 回合调度完成: {len(self._funcs)} 个节点, "
+            f"失败 {len(result.failures)} 个, 未执行 {len(result.skipped)} 个, 耗时 {result.elapsed:.2f}s"
+        )
+        return result
@@ -6,6 +6,7 @@ DeepSeek 聊天服务模块
 - RAG 增强聊天图（rag_graph.py）
 - MCP 客户端聊天图（mcp_client_graph.py）
 - 统一聊天图（unified_chat_graph.py）
+- LLM 并发调度器（governor.py）
 """
 
 from .chat_graph import create_chat_workflow, execute_chat_workflow, ChatState
@@ -20,7 +21,16 @@ from .mcp_client_graph import (
     execute_mcp_workflow,
     McpState,
 )
-from .client import create_deepseek_llm
+from .client import GovernedChatDeepSeek, create_deepseek_llm
+from .governor import (
+    LlmGovernor,
+    LlmGovernorConfig,
+    LlmGovernorMetrics,
+    LlmPriority,
+    LlmPriorityMetrics,
+    LlmTicket,
+    llm_governor,
+)
 
 __all__ = [
     # 基础聊天图
@@ -38,4 +48,13 @@ __all__ = [
     "McpState",
     # 创建 DeepSeek LLM 实例
     "create_deepseek_llm",
+    "GovernedChatDeepSeek",
+    # LLM 并发调度器
+    "LlmGovernor",
+    "LlmGovernorConfig",
+    "LlmGovernorMetrics",
+    "LlmPriority",
+    "LlmPriorityMetrics",
+    "LlmTicket",
+    "llm_governor",
 ]
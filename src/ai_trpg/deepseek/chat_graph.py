@@ -30,12 +30,12 @@ class ChatState(TypedDict, total=False):
 
 
 ############################################################################################################
-def _chatbot_node(
+async def _chatbot_node(
     state: ChatState,
 ) -> ChatState:
     """聊天机器人节点,最简单的实现"""
     llm = state["llm"]  # 使用状态中的LLM实例
-    response = llm.invoke(state["messages"])  # 生成响应
+    response = await llm.ainvoke(state["messages"])  # 生成响应
     assert isinstance(response, AIMessage), "LLM 返回的响应必须是 AIMessage 类型"
     return {
         "messages": [response],  # messages 会通过 add_messages 自动合并到历史中
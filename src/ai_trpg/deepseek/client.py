@@ -1,15 +1,56 @@
-from typing import Optional
+from typing import Any, List, Optional
 from dotenv import load_dotenv
 
 # 加载 .env 文件中的环境变量
 load_dotenv()
 
 import os
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatResult
 from pydantic import SecretStr
 from langchain_deepseek import ChatDeepSeek
+from .governor import LlmPriority, llm_governor
 
 
-def create_deepseek_llm(temperature: Optional[float] = None) -> ChatDeepSeek:
+class GovernedChatDeepSeek(ChatDeepSeek):
+    """经过 llm_governor 调度的 DeepSeek 模型
+
+    异步调用（ainvoke）在发出请求前向共享调度器申请许可，
+    完成后回报实际 token 用量。同步 invoke 不经过调度器，图节点统一使用 ainvoke。
+    """
+
+    llm_priority: LlmPriority = LlmPriority.AGENT
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        prompt_chars = sum(len(str(message.content)) for message in messages)
+        async with llm_governor.acquire(
+            self.llm_priority, llm_governor.estimate_tokens(prompt_chars)
+        ) as ticket:
+            result = await super()._agenerate(messages, stop, run_manager, **kwargs)
+            token_usage = (result.llm_output or {}).get("token_usage") or {}
+            total_tokens = token_usage.get("total_tokens")
+            if isinstance(total_tokens, int):
+                prompt_tokens = token_usage.get("prompt_tokens")
+                completion_tokens = token_usage.get("completion_tokens")
+                ticket.record_usage(
+                    total_tokens,
+                    prompt_tokens if isinstance(prompt_tokens, int) else 0,
+                    completion_tokens if isinstance(completion_tokens, int) else 0,
+                )
+            return result
+
+
+def create_deepseek_llm(
+    temperature: Optional[float] = None,
+    priority: LlmPriority = LlmPriority.AGENT,
+) -> ChatDeepSeek:
     """
     创建新的DeepSeek LLM实例
 
@@ -18,6 +59,12 @@ def create_deepseek_llm(temperature: Optional[float] = None) -> ChatDeepSeek:
     - 可通过 with_structured_output() 创建结构化输出链
     - 可通过 invoke() 的 config 参数动态控制输出格式
 
+    所有实例的异步调用共享进程级的 llm_governor（并发上限、RPM/TPM 限额与优先级）
+
+    Args:
+        temperature: 温度（默认 0.7）
+        priority: 调度优先级（玩家交互使用 LlmPriority.PLAYER）
+
     Returns:
         ChatDeepSeek: 新创建的DeepSeek LLM实例
 
@@ -35,12 +82,13 @@ def create_deepseek_llm(temperature: Optional[float] = None) -> ChatDeepSeek:
     # logger.debug(f"create_deepseek_llm temperature={temperature}")
 
     # 设置默认温度
-    llm = ChatDeepSeek(
+    llm = GovernedChatDeepSeek(
         api_key=SecretStr(deepseek_api_key),
         api_base="https://api.deepseek.com/v1",
         model="deepseek-chat",
         temperature=temperature if temperature is not None else 0.7,
         # 不设置固定的 response_format，保持输出格式的灵活性
+        llm_priority=priority,
     )
 
     # llm.with_structured_output()
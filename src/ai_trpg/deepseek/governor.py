@@ -0,0 +1,356 @@
+"""LLM 并发调度器
+
+流水线对每个角色同时发起 LLM 调用（asyncio.gather 不设上限），世界较大时会触发
+DeepSeek 的限流（429）。所有经由 create_deepseek_llm 创建的模型实例共享进程级的
+llm_governor，每次请求在发出前向调度器申请许可：
+
+- max_in_flight：同时进行中的请求数上限
+- requests_per_minute：每分钟请求数（令牌桶）
+- tokens_per_minute：每分钟 token 数（令牌桶，按提示词长度预估，完成后按实际用量校正）
+
+排队的请求按优先级出队（同优先级先到先得），玩家交互的请求优先于回合流水线。
+收到 429 时清空请求令牌桶，让其他排队请求一起退避。
+调度器记录每个优先级的排队等待时间，可通过 metrics() 查看。
+
+使用方法：
+    async with llm_governor.acquire(LlmPriority.PLAYER, estimated_tokens=1200) as ticket:
+        result = await call_llm()
+        ticket.record_usage(result_total_tokens)
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import AsyncIterator, Deque, Dict, Final, List, Optional, Tuple
+from loguru import logger
+from pydantic import BaseModel, Field
+
+# 每个优先级保留的最近等待时间样本数（用于计算分位数）
+WAIT_SAMPLE_SIZE: Final[int] = 1000
+
+
+class LlmPriority(IntEnum):
+    """请求优先级（数值越小越先出队）"""
+
+    PLAYER = 0  # 玩家交互
+    AGENT = 1  # 回合流水线中的代理
+    BACKGROUND = 2  # 后台任务
+
+
+class LlmGovernorConfig(BaseModel):
+    """调度器配置（0 表示不限制）"""
+
+    max_in_flight: int = 8
+    requests_per_minute: int = 240
+    tokens_per_minute: int = 400_000
+    # 预估 token 时为每个请求预留的输出 token 数
+    reserved_completion_tokens: int = 512
+
+
+class LlmPriorityMetrics(BaseModel):
+    """单个优先级的调度统计"""
+
+    requests: int = Field(default=0, description="已获得许可的请求数")
+    failed: int = Field(default=0, description="调用失败的请求数")
+    rate_limited: int = Field(default=0, description="收到 429 的请求数")
+    queued: int = Field(default=0, description="当前排队中的请求数")
+    total_wait: float = Field(default=0.0, description="累计排队等待（秒）")
+    max_wait: float = Field(default=0.0, description="最长排队等待（秒）")
+    p50_wait: float = Field(default=0.0, description="最近请求排队等待中位数（秒）")
+    p95_wait: float = Field(default=0.0, description="最近请求排队等待 P95（秒）")
+
+
+class LlmGovernorMetrics(BaseModel):
+    """调度器统计快照"""
+
+    in_flight: int = 0
+    tokens_used: int = Field(default=0, description="已完成请求的实际 token 用量")
+    prompt_tokens: int = Field(default=0, description="其中提示词 token 数")
+    completion_tokens: int = Field(default=0, description="其中生成 token 数")
+    priorities: Dict[str, LlmPriorityMetrics] = Field(default_factory=dict)
+
+
+class _TokenBucket:
+    """令牌桶（容量为每分钟额度，按秒匀速补充；capacity 为 0 表示不限制）"""
+
+    def __init__(self, per_minute: int) -> None:
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self._refill_per_second = per_minute / 60.0
+        self._updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity,
+            self.tokens + (now - self._updated) * self._refill_per_second,
+        )
+        self._updated = now
+
+    def clamp(self, amount: float) -> float:
+        """单个请求最多占用整桶容量（否则永远无法满足）"""
+        return amount if self.unlimited else min(amount, self.capacity)
+
+    def wait_time(self, amount: float) -> float:
+        """距离可以取出 amount 个令牌还需等待的秒数（0 表示现在即可）"""
+        if self.unlimited:
+            return 0.0
+        self._refill()
+        missing = self.clamp(amount) - self.tokens
+        return 0.0 if missing <= 0 else missing / self._refill_per_second
+
+    def consume(self, amount: float) -> None:
+        """取出令牌（允许为负，用于按实际用量补扣）"""
+        if self.unlimited:
+            return
+        self._refill()
+        self.tokens -= amount
+
+    def drain(self) -> None:
+        """清空令牌桶"""
+        if self.unlimited:
+            return
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+
+class _Waiter:
+    """排队中的请求"""
+
+    def __init__(
+        self,
+        priority: LlmPriority,
+        estimated_tokens: int,
+        future: "asyncio.Future[None]",
+    ) -> None:
+        self.priority = priority
+        self.estimated_tokens = estimated_tokens
+        self.future = future
+        self.enqueued = time.monotonic()
+
+
+class LlmTicket:
+    """已获得的许可（用于回报实际 token 用量）"""
+
+    def __init__(self, governor: "LlmGovernor", estimated_tokens: int) -> None:
+        self._governor = governor
+        self.estimated_tokens = estimated_tokens
+        self.actual_tokens: Optional[int] = None
+
+    def record_usage(
+        self, total_tokens: int, prompt_tokens: int = 0, completion_tokens: int = 0
+    ) -> None:
+        """回报实际 token 用量，按与预估的差额校正 token 令牌桶
+
+        Args:
+            total_tokens: 总 token 数
+            prompt_tokens: 其中提示词 token 数（未知时为 0）
+            completion_tokens: 其中生成 token 数（未知时为 0）
+        """
+        if self.actual_tokens is not None:
+            return
+        self.actual_tokens = total_tokens
+        self._governor._tokens.consume(total_tokens - self.estimated_tokens)
+        self._governor._tokens_used += total_tokens
+        self._governor._prompt_tokens += prompt_tokens
+        self._governor._completion_tokens += completion_tokens
+
+
+class LlmGovernor:
+    """LLM 并发调度器（并发上限 + RPM/TPM 令牌桶 + 优先级队列）"""
+
+    def __init__(self, config: Optional[LlmGovernorConfig] = None) -> None:
+        self.configure(config or LlmGovernorConfig())
+
+    def configure(self, config: LlmGovernorConfig) -> None:
+        """应用新的配置并重置统计（应在没有请求进行时调用）"""
+        self.config = config
+        self._requests = _TokenBucket(config.requests_per_minute)
+        self._tokens = _TokenBucket(config.tokens_per_minute)
+        self._in_flight = 0
+        self._tokens_used = 0
+        self._prompt_tokens = 0
+        self._completion_tokens = 0
+        # (优先级, 入队序号, 请求)
+        self._queue: List[Tuple[int, int, _Waiter]] = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self._metrics: Dict[LlmPriority, LlmPriorityMetrics] = {
+            priority: LlmPriorityMetrics() for priority in LlmPriority
+        }
+        self._wait_samples: Dict[LlmPriority, Deque[float]] = {
+            priority: deque(maxlen=WAIT_SAMPLE_SIZE) for priority in LlmPriority
+        }
+
+    @property
+    def in_flight(self) -> int:
+        """当前进行中的请求数"""
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        """当前排队中的请求数"""
+        return sum(1 for _, _, waiter in self._queue if not waiter.future.done())
+
+    def estimate_tokens(self, prompt_chars: int) -> int:
+        """按提示词字符数预估 token 用量（中文约 0.6 token/字，偏保守）"""
+        return int(prompt_chars * 0.6) + self.config.reserved_completion_tokens
+
+    @asynccontextmanager
+    async def acquire(
+        self, priority: LlmPriority, estimated_tokens: int = 0
+    ) -> AsyncIterator[LlmTicket]:
+        """申请一次 LLM 调用的许可，离开上下文时释放
+
+        Args:
+            priority: 请求优先级
+            estimated_tokens: 预估 token 用量（提示词 + 输出）
+
+        Yields:
+            LlmTicket: 许可，可通过 record_usage 回报实际用量
+        """
+        waiter = _Waiter(
+            priority=priority,
+            estimated_tokens=estimated_tokens,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        heapq.heappush(self._queue, (priority, next(self._sequence), waiter))
+        self._metrics[priority].queued += 1
+        self._dispatch()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # 已获得许可但调用方被取消
+                self._release()
+            else:
+                self._metrics[priority].queued -= 1
+                self._dispatch()
+            raise
+
+        ticket = LlmTicket(self, estimated_tokens)
+        try:
+            yield ticket
+        except Exception as e:
+            self._metrics[priority].failed += 1
+            if _is_rate_limit_error(e):
+                self._on_rate_limited(priority)
+            raise
+        finally:
+            self._release()
+
+    def metrics(self) -> LlmGovernorMetrics:
+        """获取统计快照"""
+        snapshot = LlmGovernorMetrics(
+            in_flight=self._in_flight,
+            tokens_used=self._tokens_used,
+            prompt_tokens=self._prompt_tokens,
+            completion_tokens=self._completion_tokens,
+        )
+        for priority in LlmPriority:
+            metrics = self._metrics[priority].model_copy()
+            samples = sorted(self._wait_samples[priority])
+            if samples:
+                metrics.p50_wait = _percentile(samples, 0.50)
+                metrics.p95_wait = _percentile(samples, 0.95)
+            snapshot.priorities[priority.name.lower()] = metrics
+        return snapshot
+
+    def log_summary(self) -> None:
+        """输出按优先级汇总的排队等待统计"""
+        snapshot = self.metrics()
+        lines = [
+            f"🚦 LLM 调度统计: 进行中 {snapshot.in_flight} 个, 已用 {snapshot.tokens_used} tokens"
+        ]
+        for name, metrics in snapshot.priorities.items():
+            if metrics.requests == 0 and metrics.queued == 0:
+                continue
+            lines.append(
+                f"  - {name}: {metrics.requests} 次请求, 排队 {metrics.queued} 个, "
+                f"等待 p50 {metrics.p50_wait * 1000:.0f}ms / p95 {metrics.p95_wait * 1000:.0f}ms "
+                f"/ max {metrics.max_wait * 1000:.0f}ms, 失败 {metrics.failed}, 限流 {metrics.rate_limited}"
+            )
+        logger.info("\n".join(lines))
+
+    def _dispatch(self) -> None:
+        """按优先级放行排队的请求，直到达到并发上限或令牌不足"""
+        while self._queue:
+            _, _, waiter = self._queue[0]
+            if waiter.future.done():
+                heapq.heappop(self._queue)
+                continue
+
+            max_in_flight = self.config.max_in_flight
+            if max_in_flight > 0 and self._in_flight >= max_in_flight:
+                return  # 有请求完成时再放行
+
+            delay = max(
+                self._requests.wait_time(1),
+                self._tokens.wait_time(waiter.estimated_tokens),
+            )
+            if delay > 0:
+                self._schedule_wakeup(delay)
+                return
+
+            heapq.heappop(self._queue)
+            self._requests.consume(1)
+            self._tokens.consume(self._tokens.clamp(waiter.estimated_tokens))
+            self._in_flight += 1
+
+            wait = time.monotonic() - waiter.enqueued
+            metrics = self._metrics[waiter.priority]
+            metrics.queued -= 1
+            metrics.requests += 1
+            metrics.total_wait += wait
+            metrics.max_wait = max(metrics.max_wait, wait)
+            self._wait_samples[waiter.priority].append(wait)
+            waiter.future.set_result(None)
+
+    def _schedule_wakeup(self, delay: float) -> None:
+        """令牌不足时在补充后重新放行"""
+        if self._wakeup is not None and not self._wakeup.cancelled():
+            if self._wakeup.when() <= asyncio.get_running_loop().time() + delay:
+                return
+            self._wakeup.cancel()
+        self._wakeup = asyncio.get_running_loop().call_later(delay, self._on_wakeup)
+
+    def _on_wakeup(self) -> None:
+        self._wakeup = None
+        self._dispatch()
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._dispatch()
+
+    def _on_rate_limited(self, priority: LlmPriority) -> None:
+        """收到 429：清空请求令牌桶，所有排队请求一起退避"""
+        self._metrics[priority].rate_limited += 1
+        self._requests.drain()
+        logger.warning(
+            f"⚠️ LLM 请求被限流 (429)，排队请求退避中 (排队 {self.queued} 个)"
+        )
+
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    """判断异常是否为 429 限流（openai.RateLimitError 或 status_code == 429）"""
+    return getattr(error, "status_code", None) == 429
+
+
+def _percentile(sorted_samples: List[float], fraction: float) -> float:
+    index = min(len(sorted_samples) - 1, int(len(sorted_samples) * fraction))
+    return sorted_samples[index]
+
+
+###########################################################################################
+# 进程级共享的调度器（所有 create_deepseek_llm 创建的实例共用）
+llm_governor: Final[LlmGovernor] = LlmGovernor()
+###########################################################################################
@@ -222,7 +222,7 @@ async def _llm_invoke_node(state: McpState) -> McpState:
     messages = state["messages"]
 
     # 调用 LLM（如果异常，直接向上传播）
-    response = llm.invoke(messages)
+    response = await llm.ainvoke(messages)
     assert isinstance(response, AIMessage), "LLM 返回的响应必须是 AIMessage 类型"
 
     # ✅ 保持所有必要字段
@@ -462,7 +462,7 @@ async def _llm_re_invoke_node(state: McpState) -> McpState:
 
     # 二次调用 LLM（异常向上传播）
     # logger.debug("🔄 开始二次推理，基于工具结果生成智能回答...")
-    re_invoke_response = llm.invoke(messages)
+    re_invoke_response = await llm.ainvoke(messages)
     assert isinstance(
         re_invoke_response, AIMessage
     ), "二次推理返回必须是 AIMessage 类型"
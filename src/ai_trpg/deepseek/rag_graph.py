@@ -230,7 +230,7 @@ def _context_enhancement_node(state: RAGState) -> RAGState:
 
 
 ############################################################################################################
-def _rag_llm_node(state: RAGState) -> RAGState:
+async def _rag_llm_node(state: RAGState) -> RAGState:
     """LLM 生成节点
 
     使用完整对话上下文(messages)和增强信息调用 DeepSeek LLM 生成响应。
@@ -261,7 +261,7 @@ def _rag_llm_node(state: RAGState) -> RAGState:
     logger.info("🤖 [LLM] 使用完整对话上下文调用DeepSeek")
 
     # 调用LLM
-    response = llm.invoke(full_messages)
+    response = await llm.ainvoke(full_messages)
     assert isinstance(response, AIMessage), "LLM响应必须是 AIMessage 类型"
     logger.success("🤖 [LLM] DeepSeek回答生成完成")
 
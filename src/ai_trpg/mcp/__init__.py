@@ -2,7 +2,7 @@
 MCP (Model Context Protocol) 模块
 
 提供完整的 MCP 协议客户端实现，包括：
-- MCP 客户端：处理与 MCP 服务器的通信
+- MCP 客户端：处理与 MCP 服务器的通信（HTTP 或进程内）
 - 数据模型：MCP 协议中使用的数据结构
 - 工具管理：MCP 工具的发现和调用
 - 工具解析：解析LLM响应中的工具调用
@@ -20,6 +20,8 @@ MCP (Model Context Protocol) 模块
 """
 
 from .client import McpClient
+from .in_process_client import InProcessMcpClient
+from .pool import McpClientPool, PooledMcpClient
 from .models import (
     McpToolInfo,
     McpToolResult,
@@ -43,6 +45,9 @@ from .config import McpConfig, mcp_config
 __all__ = [
     # 客户端
     "McpClient",
+    "InProcessMcpClient",
+    "McpClientPool",
+    "PooledMcpClient",
     # 数据模型
     "McpToolInfo",
     "McpToolResult",
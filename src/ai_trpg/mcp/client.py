@@ -30,6 +30,7 @@ class McpClient:
         base_url: str,
         protocol_version: str,
         timeout: int,
+        connector: Optional[aiohttp.BaseConnector] = None,
     ):
         """
         初始化 MCP 客户端
@@ -38,10 +39,12 @@ class McpClient:
             base_url: MCP 服务器基础 URL
             protocol_version: MCP 协议版本
             timeout: 请求超时时间（秒）
+            connector: 共享的 TCP 连接器（可选，由调用方负责关闭，见 McpClientPool）
         """
         self.base_url = base_url.rstrip("/")
         self.protocol_version = protocol_version
         self.timeout = timeout
+        self._shared_connector = connector
 
         # 内部状态
         self.session_id: Optional[str] = None
@@ -63,8 +66,8 @@ class McpClient:
     async def connect(self) -> None:
         """连接到 MCP 服务器"""
         try:
-            # 创建连接器，配置连接池参数以避免连接复用问题
-            connector = aiohttp.TCPConnector(
+            # 创建连接器，配置连接池参数以避免连接复用问题（使用共享连接器时跳过）
+            connector = self._shared_connector or aiohttp.TCPConnector(
                 limit=10,  # 最大连接数
                 limit_per_host=5,  # 每个主机的最大连接数
                 ttl_dns_cache=300,  # DNS缓存时间
@@ -75,6 +78,7 @@ class McpClient:
             # 创建 HTTP 会话
             self.http_session = aiohttp.ClientSession(
                 connector=connector,
+                connector_owner=self._shared_connector is None,
                 timeout=aiohttp.ClientTimeout(total=self.timeout),
                 headers={
                     "Content-Type": "application/json",
@@ -117,9 +121,9 @@ class McpClient:
         if "error" in response:
             raise RuntimeError(f"初始化失败: {response['error']}")
 
-        # 确保会话ID已获取
+        # 无状态模式（多 worker 部署）下服务器不返回会话ID，每个请求独立处理
         if not self.session_id:
-            raise RuntimeError("服务器未返回会话ID")
+            logger.debug("🆔 服务器未返回会话ID（无状态模式）")
 
         # logger.info(f"🔗 MCP 会话已建立，会话ID: {self.session_id[:8]}...")
 
@@ -325,20 +329,32 @@ class McpClient:
             return None
 
     async def call_tool(
-        self, tool_name: str, arguments: Dict[str, Any]
+        self,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        meta: Optional[Dict[str, Any]] = None,
     ) -> McpToolResult:
-        """调用 MCP 工具"""
+        """调用 MCP 工具
+
+        Args:
+            tool_name: 工具名称
+            arguments: 工具参数
+            meta: 随请求发送的 _meta 字段（可选，如调用方代理名称）
+        """
         import time
 
         start_time = time.time()
 
         try:
             # 构建工具调用请求
+            params: Dict[str, Any] = {"name": tool_name, "arguments": arguments}
+            if meta:
+                params["_meta"] = meta
             call_request = {
                 "jsonrpc": "2.0",
                 "id": str(uuid.uuid4()),
                 "method": "tools/call",
-                "params": {"name": tool_name, "arguments": arguments},
+                "params": params,
             }
 
             response = await self._post_request("/mcp", call_request)
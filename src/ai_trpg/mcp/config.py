@@ -25,11 +25,31 @@ class McpConfig(BaseModel):
     transport: str = "streamable-http"
     allowed_origins: List[str] = ["http://localhost"]
 
+    # 工具处理函数中同时执行数据库操作的工作线程数上限
+    # （应不超过数据库连接池大小 pool_size + max_overflow）
+    db_worker_threads: int = 8
+
+    # 多 worker 部署：workers > 1 时以多个 uvicorn worker 进程共享同一端口，
+    # 请求可能落到任意进程，因此必须使用无状态模式（不保存 mcp-session-id 会话）
+    stateless_http: bool = False
+    workers: int = 1
+
+    # 客户端与服务器部署在同一进程时，直接调用服务器的工具函数（不经过 HTTP）
+    in_process_client: bool = False
+
+    # 所有游戏代理共享的 MCP 会话数量（见 McpClientPool）
+    client_pool_size: int = 4
+
     @property
     def mcp_server_url(self) -> str:
         """MCP 服务器完整URL地址"""
         return f"http://{self.mcp_server_host}:{self.mcp_server_port}"
 
+    @property
+    def use_stateless_http(self) -> bool:
+        """是否以无状态模式运行（多 worker 部署时强制开启）"""
+        return self.stateless_http or self.workers > 1
+
     @property
     def complete_allowed_origins(self) -> List[str]:
         """获取完整的允许来源列表，包括动态生成的主机地址"""
@@ -0,0 +1,225 @@
+"""
+进程内 MCP 客户端实现
+
+与 MCP 服务器运行在同一进程时（例如管线与游戏 MCP 服务器部署在一起），
+直接调用 FastMCP 实例上注册的工具/提示词/资源，
+省去 HTTP 请求、JSON-RPC 编解码、SSE 解析与会话管理。
+
+接口与 McpClient 相同（子类），可以在任何使用 McpClient 的地方替换；
+远程部署时继续使用基于 Streamable HTTP 的 McpClient。
+"""
+
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
+from loguru import logger
+from .client import McpClient
+from .models import (
+    McpToolInfo,
+    McpToolResult,
+    McpPromptInfo,
+    McpPromptMessage,
+    McpPromptResult,
+    McpResourceInfo,
+    McpResourceContent,
+)
+
+if TYPE_CHECKING:
+    from mcp.server.fastmcp import FastMCP
+
+
+class InProcessMcpClient(McpClient):
+    """进程内 MCP 客户端 - 直接分发到 FastMCP 实例"""
+
+    def __init__(
+        self,
+        server: "FastMCP[Any]",
+        protocol_version: str = "2025-06-18",
+        timeout: int = 30,
+    ):
+        """
+        初始化进程内 MCP 客户端
+
+        Args:
+            server: 已注册工具的 FastMCP 实例
+            protocol_version: MCP 协议版本（仅用于保持接口一致）
+            timeout: 超时时间（仅用于保持接口一致）
+        """
+        super().__init__(
+            base_url=f"inprocess://{server.name}",
+            protocol_version=protocol_version,
+            timeout=timeout,
+        )
+        self.server = server
+
+    async def connect(self) -> None:
+        """进程内无需建立连接"""
+        self._initialized = True
+
+    async def disconnect(self) -> None:
+        """清空缓存"""
+        self._tools_cache = None
+        self._prompts_cache = None
+        self._resources_cache = None
+        self._initialized = False
+
+    async def check_health(self) -> bool:
+        """进程内服务器始终可用"""
+        return True
+
+    async def list_tools(self) -> Optional[List[McpToolInfo]]:
+        """获取可用工具列表"""
+        try:
+            if self._tools_cache is not None:
+                return self._tools_cache
+
+            self._tools_cache = [
+                McpToolInfo(
+                    name=tool.name,
+                    description=tool.description or "",
+                    input_schema=tool.inputSchema,
+                )
+                for tool in await self.server.list_tools()
+            ]
+            return self._tools_cache
+
+        except Exception as e:
+            logger.error(f"获取工具列表时发生错误: {e}")
+            return None
+
+    async def call_tool(
+        self,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> McpToolResult:
+        """直接调用 FastMCP 注册的工具函数（meta 在进程内不需要传递）"""
+        start_time = time.time()
+
+        try:
+            result = await self.server.call_tool(tool_name, arguments)
+            execution_time = time.time() - start_time
+
+            # 结构化输出时返回 (内容列表, 结构化结果)，只取内容列表
+            if isinstance(result, tuple):
+                result = result[0]
+
+            if isinstance(result, dict):
+                final_result: Any = result
+            else:
+                text_results = [
+                    str(getattr(item, "text", ""))
+                    for item in result
+                    if item.type == "text"
+                ]
+                final_result = (
+                    "\n".join(text_results)
+                    if text_results
+                    else str([item.model_dump() for item in result])
+                )
+
+            logger.success(f"✅ 工具 '{tool_name}' 调用成功")
+            return McpToolResult(
+                success=True,
+                result=final_result,
+                error=None,
+                execution_time=execution_time,
+            )
+
+        except Exception as e:
+            execution_time = time.time() - start_time
+            error_msg = f"工具调用异常: {str(e)}"
+            logger.error(error_msg)
+            return McpToolResult(
+                success=False,
+                result=None,
+                error=error_msg,
+                execution_time=execution_time,
+            )
+
+    async def list_prompts(self) -> Optional[List[McpPromptInfo]]:
+        """获取可用提示词模板列表"""
+        try:
+            if self._prompts_cache is not None:
+                return self._prompts_cache
+
+            self._prompts_cache = [
+                McpPromptInfo(
+                    name=prompt.name,
+                    description=prompt.description,
+                    arguments=(
+                        [argument.model_dump() for argument in prompt.arguments]
+                        if prompt.arguments is not None
+                        else None
+                    ),
+                )
+                for prompt in await self.server.list_prompts()
+            ]
+            return self._prompts_cache
+
+        except Exception as e:
+            logger.error(f"获取提示词列表时发生错误: {e}")
+            return None
+
+    async def get_prompt(
+        self, name: str, arguments: Optional[Dict[str, Any]] = None
+    ) -> Optional[McpPromptResult]:
+        """获取指定的提示词模板"""
+        try:
+            result = await self.server.get_prompt(name, arguments)
+            return McpPromptResult(
+                description=result.description,
+                messages=[
+                    McpPromptMessage(
+                        role=message.role,
+                        content=message.content.model_dump(exclude_none=True),
+                    )
+                    for message in result.messages
+                ],
+            )
+
+        except Exception as e:
+            logger.error(f"获取提示词 '{name}' 时发生错误: {e}")
+            return None
+
+    async def list_resources(self) -> Optional[List[McpResourceInfo]]:
+        """获取可用资源列表"""
+        try:
+            if self._resources_cache is not None:
+                return self._resources_cache
+
+            self._resources_cache = [
+                McpResourceInfo(
+                    uri=str(resource.uri),
+                    name=resource.name or str(resource.uri),
+                    description=resource.description,
+                    mime_type=resource.mimeType,
+                )
+                for resource in await self.server.list_resources()
+            ]
+            return self._resources_cache
+
+        except Exception as e:
+            logger.error(f"获取资源列表时发生错误: {e}")
+            return None
+
+    async def read_resource(self, uri: str) -> Optional[McpResourceContent]:
+        """读取指定的资源内容"""
+        try:
+            contents: Iterable[Any] = await self.server.read_resource(uri)
+            for content in contents:
+                return McpResourceContent(
+                    uri=uri,
+                    mime_type=content.mime_type,
+                    text=(
+                        content.content
+                        if isinstance(content.content, str)
+                        else content.content.decode("utf-8", errors="replace")
+                    ),
+                )
+
+            logger.warning(f"资源 '{uri}' 没有内容")
+            return None
+
+        except Exception as e:
+            logger.error(f"读取资源 '{uri}' 时发生错误: {e}")
+            return None
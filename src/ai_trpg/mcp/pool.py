@@ -0,0 +1,199 @@
+"""
+MCP 客户端连接池
+
+所有游戏代理共享同一个 aiohttp 连接器与少量已完成 initialize 握手的 MCP 会话，
+启动时的握手次数与常驻的套接字数量不再随代理数量增长。
+
+- McpClientPool: 持有共享连接器与 size 个 McpClient 会话，按轮询分配请求
+- PooledMcpClient: 分配给单个代理的轻量句柄（McpClient 子类），
+  每次工具调用通过 _meta 携带代理名称
+
+使用方法：
+    pool = McpClientPool(base_url, protocol_version, timeout, size=4)
+    client = pool.client_for("角色名")   # 不建立连接
+    await client.connect()                # 首次调用时启动整个连接池
+    await client.call_tool("update_actor_health", {...})
+    ...
+    await pool.close()
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+import aiohttp
+from loguru import logger
+from .client import McpClient
+from .models import (
+    McpToolInfo,
+    McpToolResult,
+    McpPromptInfo,
+    McpPromptResult,
+    McpResourceInfo,
+    McpResourceContent,
+)
+
+# 每个池内会话可同时使用的连接数
+CONNECTIONS_PER_SESSION = 5
+
+
+class McpClientPool:
+    """MCP 客户端连接池"""
+
+    def __init__(
+        self,
+        base_url: str,
+        protocol_version: str,
+        timeout: int,
+        size: int = 4,
+    ):
+        """
+        初始化连接池（不建立连接）
+
+        Args:
+            base_url: MCP 服务器基础 URL
+            protocol_version: MCP 协议版本
+            timeout: 请求超时时间（秒）
+            size: 池内 MCP 会话数量
+        """
+        assert size > 0, "连接池大小必须大于 0"
+        self.base_url = base_url
+        self.protocol_version = protocol_version
+        self.timeout = timeout
+        self.size = size
+
+        self._connector: Optional[aiohttp.TCPConnector] = None
+        self._clients: List[McpClient] = []
+        self._next_index = 0
+        self._start_lock = asyncio.Lock()
+
+    @property
+    def is_started(self) -> bool:
+        """连接池是否已启动"""
+        return bool(self._clients)
+
+    async def start(self) -> None:
+        """创建共享连接器并并发完成所有会话的握手（重复调用无副作用）"""
+        async with self._start_lock:
+            if self.is_started:
+                return
+
+            self._connector = aiohttp.TCPConnector(
+                limit=self.size * CONNECTIONS_PER_SESSION,
+                limit_per_host=self.size * CONNECTIONS_PER_SESSION,
+                ttl_dns_cache=300,
+                enable_cleanup_closed=True,
+            )
+            clients = [
+                McpClient(
+                    base_url=self.base_url,
+                    protocol_version=self.protocol_version,
+                    timeout=self.timeout,
+                    connector=self._connector,
+                )
+                for _ in range(self.size)
+            ]
+
+            try:
+                await asyncio.gather(*(client.connect() for client in clients))
+            except Exception:
+                await asyncio.gather(
+                    *(client.disconnect() for client in clients),
+                    return_exceptions=True,
+                )
+                await self._connector.close()
+                self._connector = None
+                raise
+
+            self._clients = clients
+            logger.info(f"🔗 MCP 连接池已启动: {self.size} 个会话, {self.base_url}")
+
+    async def close(self) -> None:
+        """断开所有会话并关闭共享连接器"""
+        async with self._start_lock:
+            await asyncio.gather(
+                *(client.disconnect() for client in self._clients),
+                return_exceptions=True,
+            )
+            self._clients = []
+            if self._connector is not None:
+                await self._connector.close()
+                self._connector = None
+            logger.info("🔌 MCP 连接池已关闭")
+
+    def acquire(self) -> McpClient:
+        """按轮询返回一个池内会话（会话可被多个协程并发使用）"""
+        if not self._clients:
+            raise RuntimeError("MCP 连接池未启动")
+        client = self._clients[self._next_index % len(self._clients)]
+        self._next_index += 1
+        return client
+
+    def client_for(self, agent_name: str) -> "PooledMcpClient":
+        """为代理创建共享本连接池的客户端句柄"""
+        return PooledMcpClient(self, agent_name)
+
+
+class PooledMcpClient(McpClient):
+    """共享连接池的代理客户端句柄
+
+    不持有自己的连接与会话，所有请求转发到连接池中的会话；
+    工具调用通过 _meta.agent_name 携带代理身份。
+    """
+
+    def __init__(self, pool: McpClientPool, agent_name: str):
+        super().__init__(
+            base_url=pool.base_url,
+            protocol_version=pool.protocol_version,
+            timeout=pool.timeout,
+        )
+        self.pool = pool
+        self.agent_name = agent_name
+
+    async def connect(self) -> None:
+        """启动连接池（只有第一个代理会真正建立连接）"""
+        await self.pool.start()
+        self._initialized = True
+
+    async def disconnect(self) -> None:
+        """句柄不持有连接；关闭连接池请调用 McpClientPool.close"""
+        self._initialized = False
+
+    async def check_health(self) -> bool:
+        """检查 MCP 服务器健康状态"""
+        if not self.pool.is_started:
+            return False
+        return await self.pool.acquire().check_health()
+
+    async def list_tools(self) -> Optional[List[McpToolInfo]]:
+        """获取可用工具列表"""
+        tools = await self.pool.acquire().list_tools()
+        self._tools_cache = tools
+        return tools
+
+    async def call_tool(
+        self,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> McpToolResult:
+        """调用 MCP 工具（附带代理名称）"""
+        return await self.pool.acquire().call_tool(
+            tool_name, arguments, meta={"agent_name": self.agent_name, **(meta or {})}
+        )
+
+    async def list_prompts(self) -> Optional[List[McpPromptInfo]]:
+        """获取可用提示词模板列表"""
+        return await self.pool.acquire().list_prompts()
+
+    async def get_prompt(
+        self, name: str, arguments: Optional[Dict[str, Any]] = None
+    ) -> Optional[McpPromptResult]:
+        """获取指定的提示词模板"""
+        return await self.pool.acquire().get_prompt(name, arguments)
+
+    async def list_resources(self) -> Optional[List[McpResourceInfo]]:
+        """获取可用资源列表"""
+        return await self.pool.acquire().list_resources()
+
+    async def read_resource(self, uri: str) -> Optional[McpResourceContent]:
+        """读取指定的资源内容"""
+        return await self.pool.acquire().read_resource(uri)
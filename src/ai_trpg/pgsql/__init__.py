@@ -6,7 +6,7 @@ from .client import *
 from .user import UserDB
 from .user_operations import save_user, has_user, get_user
 from .vector_document import VectorDocumentDB
-from .world import WorldDB
+from .world import WorldDB, world_db_to_model
 from .stage import StageDB
 from .stage_connection import StageConnectionDB
 from .actor import ActorDB
@@ -16,9 +16,18 @@ from .attributes import AttributesDB
 from .actor_movement_event import ActorMovementEventDB
 from .actor_plan import ActorPlanDB
 from .config import PostgreSQLConfig, postgresql_config
+from .optimistic_lock import (
+    VersionConflictError,
+    bump_version,
+    loaded_version,
+    retry_on_version_conflict,
+)
 from .world_operations import (
     save_world_to_db,
+    load_world_from_db,
     get_world_id_by_name,
+    get_world_entity_names,
+    WorldEntityNames,
     get_world,
     delete_world,
     set_world_kickoff,
@@ -29,6 +38,7 @@ from .actor_movement_event_operations import (
     save_actor_movement_event_to_db,
     get_actor_movement_events_by_actor,
     get_actor_movement_events_by_stage,
+    get_actor_movement_events_in_world,
     clear_all_actor_movement_events,
 )
 from .message_operations import (
@@ -40,13 +50,105 @@ from .message_operations import (
     add_world_context,
 )
 
-from .stage_operations import update_stage_info, get_stage_by_name, get_stages_in_world
+from .stage_operations import (
+    update_stage_info,
+    get_stage_by_name,
+    get_stages_in_world,
+    get_stage_with_actors,
+    get_stage_connection_names,
+    iter_stages_in_world,
+)
 from .actor_operations import (
     update_actor_appearance,
     update_actor_health,
     add_actor_effect,
     remove_actor_effect,
     get_actors_in_world,
+    get_actors_by_names,
+    iter_actors_in_world,
+)
+from .world_mutation import (
+    UpdateActorHealthMutation,
+    UpdateActorAppearanceMutation,
+    AddActorEffectMutation,
+    RemoveActorEffectMutation,
+    MoveActorToStageMutation,
+    UpdateStageInfoMutation,
+    WorldMutation,
+    world_mutation_adapter,
+    WorldMutationResult,
+    WorldMutationBatchResult,
+)
+from .world_mutation_operations import apply_world_mutations
+from .world_mutation_log import WorldMutationLogDB
+from .world_snapshot import WorldSnapshotDB
+from .world_replay import (
+    TURN_CHECKPOINT_TYPE,
+    WORLD_SYNCED_TYPE,
+    WORLD_LOG_MARKER_TYPES,
+    TurnCheckpoint,
+    decode_logged_mutation,
+    strip_world_context,
+    apply_mutation_to_world,
+    replay_world_mutations,
+)
+from .world_history_operations import (
+    SNAPSHOT_INTERVAL_TURNS,
+    log_world_mutation,
+    write_world_snapshot,
+    save_world_snapshot,
+    record_turn_checkpoint,
+    get_last_turn,
+    load_world_state_at,
+    load_world_state_at_turn,
+    load_world_mutations_since,
+    WorldMutationDelta,
+)
+from .world_sync_operations import WorldSyncResult, sync_world_to_db
+from .turn_journal import TurnJournalDB
+from .turn_journal_operations import (
+    get_turn_journal,
+    record_turn_node_completed,
+    clear_turn_journal,
+)
+from .name_cache import (
+    WorldNameCache,
+    world_name_cache,
+    find_stage_by_name,
+    find_actor_by_name,
+)
+from .change_feed import (
+    WORLD_CHANGE_CHANNEL,
+    WorldEntityKind,
+    WorldChangeEvent,
+    WorldChangeListener,
+    publish_world_change,
+)
+from .statement_stats import (
+    StatementStats,
+    StatementBudget,
+    StatementStatsRecorder,
+    statement_stats,
+    track_phase,
+    track_node,
+    track_agent,
+    run_as_agent,
+    assert_statement_budget,
+)
+from .world_partitions import (
+    PARTITION_BY_WORLD,
+    WORLD_PARTITIONED_TABLES,
+    world_partition_name,
+    create_world_partitions,
+    drop_world_partitions,
+)
+from .world_lease import (
+    WorldLease,
+    WorldLeaseLostError,
+    WorldLeaseTimeoutError,
+    ensure_world_lease_held,
+    world_lease,
+    world_lock_key,
 )
 
 
@@ -54,11 +156,21 @@ __all__: List[str] = [
     # PostgreSQL configuration
     "PostgreSQLConfig",
     "postgresql_config",
+    # Optimistic concurrency control
+    "VersionConflictError",
+    "bump_version",
+    "loaded_version",
+    "retry_on_version_conflict",
     # Database management functions
     "pgsql_database_exists",
     "pgsql_create_database",
     "pgsql_drop_database",
     "pgsql_ensure_database_tables",
+    # Read replica routing
+    "ReadSessionLocal",
+    "mark_primary_write",
+    "reads_pinned_to_primary",
+    "read_from_primary",
     # User database models and functions
     "UserDB",
     "save_user",
@@ -68,6 +180,7 @@ __all__: List[str] = [
     "VectorDocumentDB",
     # World database models
     "WorldDB",
+    "world_db_to_model",
     "StageDB",
     "StageConnectionDB",
     "ActorDB",
@@ -80,7 +193,10 @@ __all__: List[str] = [
     "ActorPlanDB",
     # World operations
     "save_world_to_db",
+    "load_world_from_db",
     "get_world_id_by_name",
+    "get_world_entity_names",
+    "WorldEntityNames",
     "get_world",
     "delete_world",
     "set_world_kickoff",
@@ -90,6 +206,7 @@ __all__: List[str] = [
     "save_actor_movement_event_to_db",
     "get_actor_movement_events_by_actor",
     "get_actor_movement_events_by_stage",
+    "get_actor_movement_events_in_world",
     "clear_all_actor_movement_events",
     # Message operations
     "get_actor_context",
@@ -102,10 +219,93 @@ __all__: List[str] = [
     "update_stage_info",
     "get_stage_by_name",
     "get_stages_in_world",
+    "get_stage_with_actors",
+    "get_stage_connection_names",
+    "iter_stages_in_world",
     # Actor operations
     "update_actor_appearance",
     "update_actor_health",
     "add_actor_effect",
     "remove_actor_effect",
     "get_actors_in_world",
+    "get_actors_by_names",
+    "iter_actors_in_world",
+    # World mutation models
+    "UpdateActorHealthMutation",
+    "UpdateActorAppearanceMutation",
+    "AddActorEffectMutation",
+    "RemoveActorEffectMutation",
+    "MoveActorToStageMutation",
+    "UpdateStageInfoMutation",
+    "WorldMutation",
+    "world_mutation_adapter",
+    "WorldMutationResult",
+    "WorldMutationBatchResult",
+    # World mutation operations
+    "apply_world_mutations",
+    # World history models (mutation log + snapshots)
+    "WorldMutationLogDB",
+    "WorldSnapshotDB",
+    # World replay (pure functions)
+    "TURN_CHECKPOINT_TYPE",
+    "WORLD_SYNCED_TYPE",
+    "WORLD_LOG_MARKER_TYPES",
+    "TurnCheckpoint",
+    "decode_logged_mutation",
+    "strip_world_context",
+    "apply_mutation_to_world",
+    "replay_world_mutations",
+    # World history operations
+    "SNAPSHOT_INTERVAL_TURNS",
+    "log_world_mutation",
+    "write_world_snapshot",
+    "save_world_snapshot",
+    "record_turn_checkpoint",
+    "get_last_turn",
+    "load_world_state_at",
+    "load_world_state_at_turn",
+    "load_world_mutations_since",
+    "WorldMutationDelta",
+    # Turn journal (resumable turns)
+    "TurnJournalDB",
+    "get_turn_journal",
+    "record_turn_node_completed",
+    "clear_turn_journal",
+    # World sync (diff-based upsert)
+    "WorldSyncResult",
+    "sync_world_to_db",
+    # Name → UUID resolution cache
+    "WorldNameCache",
+    "world_name_cache",
+    "find_stage_by_name",
+    "find_actor_by_name",
+    # World change feed (LISTEN/NOTIFY)
+    "WORLD_CHANGE_CHANNEL",
+    "WorldEntityKind",
+    "WorldChangeEvent",
+    "WorldChangeListener",
+    "publish_world_change",
+    # SQL statement statistics
+    "StatementStats",
+    "StatementBudget",
+    "StatementStatsRecorder",
+    "statement_stats",
+    "track_phase",
+    "track_node",
+    "track_agent",
+    "run_as_agent",
+    "assert_statement_budget",
+    # World lease (advisory lock)
+    "WorldLease",
+    "WorldLeaseLostError",
+    "WorldLeaseTimeoutError",
+    "ensure_world_lease_held",
+    "world_lease",
+    "world_lock_key",
+    # World partitions (LIST partitioning by world)
+    "PARTITION_BY_WORLD",
+    "WORLD_PARTITIONED_TABLES",
+    "world_partition_name",
+    "create_world_partitions",
+    "drop_world_partitions",
 ]
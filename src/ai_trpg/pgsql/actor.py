@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING, List
 from uuid import UUID
-from sqlalchemy import String, Text, ForeignKey, Boolean
+from sqlalchemy import String, Text, ForeignKey, Boolean, Integer
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .base import UUIDBase
 
@@ -26,6 +26,11 @@ class ActorDB(UUIDBase):
     appearance: Mapped[str] = mapped_column(Text, nullable=False)
     is_dead: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
 
+    # 乐观锁版本号：每次写入由 bump_version 显式递增，UPDATE 时校验读取时的版本
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+
+    __mapper_args__ = {"version_id_col": version, "version_id_generator": False}
+
     # 关系
     stage: Mapped["StageDB"] = relationship("StageDB", back_populates="actors")
     attributes: Mapped["AttributesDB"] = relationship(
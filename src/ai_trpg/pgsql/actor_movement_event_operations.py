@@ -7,7 +7,7 @@
 from typing import List
 from uuid import UUID
 from loguru import logger
-from .client import SessionLocal
+from .client import ReadSessionLocal, SessionLocal
 from .actor_movement_event import ActorMovementEventDB
 
 
@@ -69,7 +69,7 @@ def get_actor_movement_events_by_actor(
     Returns:
         List[ActorMovementEventDB]: 该角色的所有移动事件
     """
-    with SessionLocal() as db:
+    with ReadSessionLocal() as db:
         try:
             events = (
                 db.query(ActorMovementEventDB)
@@ -99,7 +99,7 @@ def get_actor_movement_events_by_stage(
     Returns:
         List[ActorMovementEventDB]: 所有进入该场景的事件
     """
-    with SessionLocal() as db:
+    with ReadSessionLocal() as db:
         try:
             events = (
                 db.query(ActorMovementEventDB)
@@ -117,6 +117,31 @@ def get_actor_movement_events_by_stage(
             raise
 
 
+def get_actor_movement_events_in_world(world_id: UUID) -> List[ActorMovementEventDB]:
+    """获取指定世界中的所有移动事件
+
+    Args:
+        world_id: 所属世界ID
+
+    Returns:
+        List[ActorMovementEventDB]: 按创建时间排序的所有事件
+    """
+    with ReadSessionLocal() as db:
+        try:
+            events = (
+                db.query(ActorMovementEventDB)
+                .filter_by(world_id=world_id)
+                .order_by(ActorMovementEventDB.created_at)
+                .all()
+            )
+            logger.debug(f"📖 查询到 {len(events)} 个世界 '{world_id}' 中的移动事件")
+            return events
+
+        except Exception as e:
+            logger.error(f"❌ 查询世界移动事件失败: {e}")
+            raise
+
+
 def clear_all_actor_movement_events(world_id: UUID) -> int:
     """清空角色移动事件
 
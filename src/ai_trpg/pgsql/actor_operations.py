@@ -4,17 +4,33 @@
 提供 Actor 的数据库操作
 """
 
-from typing import Optional, List, Tuple
+from typing import Dict, Final, Generator, Optional, List, Tuple
 from uuid import UUID
 from loguru import logger
-from .client import SessionLocal
+from .client import ReadSessionLocal, SessionLocal
 from .actor import ActorDB
 from .attributes import AttributesDB
 from .effect import EffectDB
-from sqlalchemy.orm import joinedload
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload, load_only, raiseload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from .stage import StageDB
-
-
+from .change_feed import publish_world_change
+from .name_cache import find_actor_by_name
+from .optimistic_lock import bump_version, retry_on_version_conflict
+from .world_history_operations import log_world_mutation
+from .world_mutation import (
+    UpdateActorHealthMutation,
+    UpdateActorAppearanceMutation,
+    AddActorEffectMutation,
+    RemoveActorEffectMutation,
+)
+
+# 流式读取角色时每个批次的默认大小
+DEFAULT_ACTOR_CHUNK_SIZE: Final[int] = 500
+
+
+@retry_on_version_conflict()
 def update_actor_appearance(
     world_id: UUID, actor_name: str, new_appearance: str
 ) -> Optional[str]:
@@ -31,13 +47,7 @@ def update_actor_appearance(
     with SessionLocal() as db:
         try:
             # 查找角色
-            actor = (
-                db.query(ActorDB)
-                .join(ActorDB.stage)
-                .filter(ActorDB.name == actor_name)
-                .filter(ActorDB.stage.has(world_id=world_id))
-                .first()
-            )
+            actor = find_actor_by_name(db, world_id, actor_name)
 
             if not actor:
                 logger.error(f"❌ 未找到角色: {actor_name} (世界ID: {world_id})")
@@ -48,6 +58,15 @@ def update_actor_appearance(
 
             # 更新外观描述
             actor.appearance = new_appearance
+            bump_version(actor)
+            log_world_mutation(
+                db,
+                world_id,
+                UpdateActorAppearanceMutation(
+                    actor_name=actor.name, new_appearance=new_appearance
+                ),
+            )
+            publish_world_change(db, world_id, "actor", actor.name, actor.version)
 
             logger.info(
                 f"✨ 角色 '{actor_name}' 外观已更新\n旧外观: {old_appearance}\n\n新外观: {new_appearance}"
@@ -62,6 +81,7 @@ def update_actor_appearance(
             raise
 
 
+@retry_on_version_conflict()
 def update_actor_health(
     world_id: UUID, actor_name: str, new_health: int
 ) -> Optional[Tuple[int, int, int]]:
@@ -78,12 +98,8 @@ def update_actor_health(
     with SessionLocal() as db:
         try:
             # 查找角色及其属性
-            actor = (
-                db.query(ActorDB)
-                .join(ActorDB.stage)
-                .filter(ActorDB.name == actor_name)
-                .filter(ActorDB.stage.has(world_id=world_id))
-                .first()
+            actor = find_actor_by_name(
+                db, world_id, actor_name, joinedload(ActorDB.attributes)
             )
 
             if not actor:
@@ -97,6 +113,15 @@ def update_actor_health(
             # 更新生命值：限制在 0 到 max_health 之间
             clamped_health = max(0, min(new_health, max_health))
             actor.attributes.health = clamped_health
+            bump_version(actor)
+            log_world_mutation(
+                db,
+                world_id,
+                UpdateActorHealthMutation(
+                    actor_name=actor.name, new_health=clamped_health
+                ),
+            )
+            publish_world_change(db, world_id, "actor", actor.name, actor.version)
 
             # 如果生命值为0，标记为死亡
             if actor.attributes.health == 0:
@@ -126,16 +151,10 @@ def is_actor_dead(world_id: UUID, actor_name: str) -> bool:
     Returns:
         bool: 角色是否已死亡，如果角色不存在则返回False
     """
-    with SessionLocal() as db:
+    with ReadSessionLocal() as db:
         try:
             # 查找角色
-            actor = (
-                db.query(ActorDB)
-                .join(ActorDB.stage)
-                .filter(ActorDB.name == actor_name)
-                .filter(ActorDB.stage.has(world_id=world_id))
-                .first()
-            )
+            actor = find_actor_by_name(db, world_id, actor_name)
 
             if not actor:
                 logger.warning(f"⚠️ 未找到角色: {actor_name} (世界ID: {world_id})")
@@ -162,15 +181,11 @@ def get_actor_attributes(world_id: UUID, actor_name: str) -> Optional[Attributes
     Returns:
         Optional[AttributesDB]: 角色的属性对象，如果角色不存在则返回None
     """
-    with SessionLocal() as db:
+    with ReadSessionLocal() as db:
         try:
             # 查找角色
-            actor = (
-                db.query(ActorDB)
-                .join(ActorDB.stage)
-                .filter(ActorDB.name == actor_name)
-                .filter(ActorDB.stage.has(world_id=world_id))
-                .first()
+            actor = find_actor_by_name(
+                db, world_id, actor_name, joinedload(ActorDB.attributes)
             )
 
             if not actor:
@@ -201,7 +216,7 @@ def get_actor_by_name(world_id: UUID, actor_name: str) -> Optional[ActorDB]:
     Returns:
         Optional[ActorDB]: 角色对象（预加载了 attributes 和 effects），如果不存在则返回 None
     """
-    with SessionLocal() as db:
+    with ReadSessionLocal() as db:
         try:
             # 查找角色并预加载关系数据
             actor = (
@@ -250,7 +265,7 @@ def get_actors_in_world(
             - actor.attributes (AttributesDB)
             - actor.effects (List[EffectDB])
     """
-    with SessionLocal() as db:
+    with ReadSessionLocal() as db:
         try:
 
             # 构建基础查询：通过 Stage 关联查询 World 下的所有 Actor
@@ -287,6 +302,139 @@ def get_actors_in_world(
             raise
 
 
+def get_actors_by_names(
+    world_id: UUID, actor_names: List[str], is_dead: Optional[bool] = None
+) -> List[ActorDB]:
+    """按名称批量获取角色（一次查询），可选过滤死亡状态
+
+    Args:
+        world_id: 世界ID
+        actor_names: 角色名称列表
+        is_dead: 可选的死亡状态过滤条件（None 表示全部）
+
+    Returns:
+        List[ActorDB]: 找到的角色列表，预加载的数据与 get_actors_in_world 相同
+    """
+    if not actor_names:
+        return []
+
+    with ReadSessionLocal() as db:
+        try:
+            statement = (
+                select(ActorDB)
+                .options(
+                    selectinload(ActorDB.stage).selectinload(StageDB.actors),
+                    selectinload(ActorDB.attributes),
+                    selectinload(ActorDB.effects),
+                )
+                .join(ActorDB.stage)
+                .filter(StageDB.world_id == world_id)
+                .filter(ActorDB.name.in_(actor_names))
+            )
+            if is_dead is not None:
+                statement = statement.filter(ActorDB.is_dead == is_dead)
+
+            return list(db.execute(statement).scalars().all())
+
+        except Exception as e:
+            logger.error(f"❌ 批量查询角色失败: {e}")
+            raise
+
+
+def iter_actors_in_world(
+    world_id: UUID,
+    is_dead: Optional[bool] = None,
+    chunk_size: int = DEFAULT_ACTOR_CHUNK_SIZE,
+) -> Generator[List[ActorDB], None, None]:
+    """分批读取指定世界中的角色，可选过滤死亡状态
+
+    按角色ID做键集分页（WHERE id > 上一批最后的ID LIMIT chunk_size），每批使用
+    独立的短读会话，读取完成即归还连接。调用方在两批之间等待 LLM 调用时不会占用
+    数据库连接，也不会让事务长时间处于 idle in transaction。
+
+    同场景的其他角色（actor.stage.actors）只用一条窄查询加载名称与外观，
+    不会为每一批重新加载大场景中所有角色的完整数据。
+
+    Args:
+        world_id: 世界ID
+        is_dead: 可选的死亡状态过滤条件（None 表示全部）
+        chunk_size: 每个批次的角色数量
+
+    Yields:
+        List[ActorDB]: 一批角色，每个 ActorDB 预加载了：
+            - actor.stage (StageDB)
+            - actor.stage.actors (List[ActorDB]，同场景角色，只加载 name / appearance)
+            - actor.attributes (AttributesDB)
+            - actor.effects (List[EffectDB])
+    """
+    last_id: Optional[UUID] = None
+    total = 0
+    while True:
+        with ReadSessionLocal() as db:
+            try:
+                statement = (
+                    select(ActorDB)
+                    .options(
+                        selectinload(ActorDB.stage),
+                        selectinload(ActorDB.attributes),
+                        selectinload(ActorDB.effects),
+                    )
+                    .join(ActorDB.stage)
+                    .filter(StageDB.world_id == world_id)
+                    .order_by(ActorDB.id)
+                    .limit(chunk_size)
+                )
+                if is_dead is not None:
+                    statement = statement.filter(ActorDB.is_dead == is_dead)
+                if last_id is not None:
+                    statement = statement.filter(ActorDB.id > last_id)
+
+                chunk = list(db.execute(statement).scalars().all())
+                if chunk:
+                    _load_stage_occupants(db, chunk)
+
+            except Exception as e:
+                logger.error(f"❌ 分批读取世界角色失败: {e}")
+                raise
+
+        if not chunk:
+            break
+        total += len(chunk)
+        last_id = chunk[-1].id
+        yield chunk
+        if len(chunk) < chunk_size:
+            break
+
+    logger.debug(f"📋 分批读取世界 {world_id} 中的角色完成，共 {total} 个")
+
+
+def _load_stage_occupants(db: Session, actors: List[ActorDB]) -> None:
+    """用一条窄查询加载本批角色所在场景的所有角色（只含 name / appearance）"""
+    stages = {actor.stage.id: actor.stage for actor in actors}
+    occupants = (
+        db.execute(
+            select(ActorDB)
+            .options(
+                load_only(ActorDB.name, ActorDB.appearance, ActorDB.stage_id),
+                raiseload("*"),
+            )
+            .filter(ActorDB.stage_id.in_(stages.keys()))
+            .order_by(ActorDB.id)
+        )
+        .scalars()
+        .all()
+    )
+
+    occupants_by_stage: Dict[UUID, List[ActorDB]] = {
+        stage_id: [] for stage_id in stages
+    }
+    for occupant in occupants:
+        occupants_by_stage[occupant.stage_id].append(occupant)
+    for stage_id, stage in stages.items():
+        set_committed_value(stage, "actors", occupants_by_stage[stage_id])
+
+
+@retry_on_version_conflict()
 def add_actor_effect(
     world_id: UUID, actor_name: str, effect_name: str, effect_description: str
 ) -> bool:
@@ -304,13 +452,7 @@ def add_actor_effect(
     with SessionLocal() as db:
         try:
             # 查找角色
-            actor = (
-                db.query(ActorDB)
-                .join(ActorDB.stage)
-                .filter(ActorDB.name == actor_name)
-                .filter(ActorDB.stage.has(world_id=world_id))
-                .first()
-            )
+            actor = find_actor_by_name(db, world_id, actor_name)
 
             if not actor:
                 logger.error(f"❌ 未找到角色: {actor_name} (世界ID: {world_id})")
@@ -324,6 +466,17 @@ def add_actor_effect(
             )
 
             db.add(new_effect)
+            bump_version(actor)
+            log_world_mutation(
+                db,
+                world_id,
+                AddActorEffectMutation(
+                    actor_name=actor.name,
+                    effect_name=effect_name,
+                    effect_description=effect_description,
+                ),
+            )
+            publish_world_change(db, world_id, "actor", actor.name, actor.version)
             db.commit()
 
             logger.info(
@@ -337,6 +490,7 @@ def add_actor_effect(
             raise
 
 
+@retry_on_version_conflict()
 def remove_actor_effect(world_id: UUID, actor_name: str, effect_name: str) -> int:
     """移除角色身上所有匹配指定名称的效果
 
@@ -351,13 +505,7 @@ def remove_actor_effect(world_id: UUID, actor_name: str, effect_name: str) -> in
     with SessionLocal() as db:
         try:
             # 查找角色
-            actor = (
-                db.query(ActorDB)
-                .join(ActorDB.stage)
-                .filter(ActorDB.name == actor_name)
-                .filter(ActorDB.stage.has(world_id=world_id))
-                .first()
-            )
+            actor = find_actor_by_name(db, world_id, actor_name)
 
             if not actor:
                 logger.error(f"❌ 未找到角色: {actor_name} (世界ID: {world_id})")
@@ -371,6 +519,16 @@ def remove_actor_effect(world_id: UUID, actor_name: str, effect_name: str) -> in
                 .delete()
             )
 
+            if removed_count > 0:
+                bump_version(actor)
+                log_world_mutation(
+                    db,
+                    world_id,
+                    RemoveActorEffectMutation(
+                        actor_name=actor.name, effect_name=effect_name
+                    ),
+                )
+                publish_world_change(db, world_id, "actor", actor.name, actor.version)
             db.commit()
 
             if removed_count > 0:
@@ -3,6 +3,7 @@ from uuid import UUID
 from sqlalchemy import String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from .base import UUIDBase
+from .world_partitions import PARTITION_BY_WORLD, world_partitioned_table_kwargs
 
 
 class ActorPlanDB(UUIDBase):
@@ -10,10 +11,11 @@ class ActorPlanDB(UUIDBase):
 
     __tablename__ = "actor_plans"
 
-    # 外键：绑定到 World
+    # 外键：绑定到 World（按世界分区时作为分区键）
     world_id: Mapped[UUID] = mapped_column(
         ForeignKey("worlds.id", ondelete="CASCADE"),
         nullable=False,
+        primary_key=PARTITION_BY_WORLD,
         index=True,
         comment="所属世界ID",
     )
@@ -35,5 +37,6 @@ class ActorPlanDB(UUIDBase):
         Index(
             "idx_world_actor_plan", "world_id", "actor_name"
         ),  # 复合索引:按世界查询角色计划
-        {"prefixes": ["UNLOGGED"]},  # 声明为 unlogged table (必须是最后一个元素)
+        # 声明为 unlogged table；按世界分区时改为 UNLOGGED 分区 (必须是最后一个元素)
+        world_partitioned_table_kwargs("world_id", unlogged=True),
     )
@@ -7,7 +7,7 @@
 from typing import List
 from uuid import UUID
 from loguru import logger
-from .client import SessionLocal
+from .client import ReadSessionLocal, SessionLocal
 from .actor_plan import ActorPlanDB
 
 
@@ -117,7 +117,7 @@ def get_latest_actor_plan(world_id: UUID, actor_name: str) -> str:
     Returns:
         str: 最新的计划内容，如果没有计划则返回空字符串
     """
-    with SessionLocal() as db:
+    with ReadSessionLocal() as db:
         try:
             plan = (
                 db.query(ActorPlanDB)
@@ -0,0 +1,225 @@
+"""
+世界状态变更通知（Change Feed）模块
+
+基于 PostgreSQL LISTEN/NOTIFY 在进程之间广播世界状态的变更：
+- 写入端：操作层在写事务中调用 publish_world_change，通知随事务提交才会发出，
+  回滚的事务不会产生通知
+- 读取端：WorldChangeListener 在 asyncio 事件循环中监听通知，
+  并分发给已注册的缓存失效回调（invalidator）
+
+这样 MCP 服务器进程写入数据库后，客户端进程中的缓存无需轮询即可保持一致。
+
+使用方法：
+    listener = WorldChangeListener()
+    listener.register(lambda event: cache.pop(event.name, None), {"stage"})
+    await listener.start()
+    ...
+    await listener.stop()
+"""
+
+import asyncio
+import json
+from typing import Callable, Final, List, Literal, Optional, Set, Tuple
+from uuid import UUID
+import psycopg2
+import psycopg2.extensions
+from loguru import logger
+from pydantic import BaseModel, Field, ValidationError
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from .config import postgresql_config
+
+# 通知频道名称
+WORLD_CHANGE_CHANNEL: Final[str] = "world_changes"
+
+# 断线重连的最大等待秒数
+MAX_RECONNECT_DELAY: Final[float] = 30.0
+
+# 变更实体类型
+WorldEntityKind = Literal[
+    "world",
+    "stage",
+    "actor",
+    "world_context",
+    "stage_context",
+    "actor_context",
+]
+
+
+class WorldChangeEvent(BaseModel):
+    """世界状态变更事件"""
+
+    world_id: UUID = Field(description="所属世界ID")
+    entity_kind: WorldEntityKind = Field(description="变更的实体类型")
+    name: str = Field(description="实体名称（世界/场景/角色名称）")
+    version: Optional[int] = Field(
+        default=None, description="变更后的版本号（无版本列的实体为 None）"
+    )
+
+
+# 缓存失效回调
+WorldChangeInvalidator = Callable[[WorldChangeEvent], None]
+# 全量失效回调（断线重连后调用，期间的通知可能已丢失）
+WorldChangeResetCallback = Callable[[], None]
+
+
+def publish_world_change(
+    db: Session,
+    world_id: UUID,
+    entity_kind: WorldEntityKind,
+    name: str,
+    version: Optional[int] = None,
+) -> None:
+    """在当前写事务中发布一条世界变更通知（随事务提交发出）
+
+    Args:
+        db: 当前写事务的数据库会话
+        world_id: 所属世界ID
+        entity_kind: 变更的实体类型
+        name: 实体名称
+        version: 变更后的版本号（可选）
+    """
+    event = WorldChangeEvent(
+        world_id=world_id, entity_kind=entity_kind, name=name, version=version
+    )
+    db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": WORLD_CHANGE_CHANNEL, "payload": event.model_dump_json()},
+    )
+
+
+class WorldChangeListener:
+    """世界变更监听器（asyncio）
+
+    使用专用的 autocommit psycopg2 连接执行 LISTEN，
+    通过 loop.add_reader 在连接可读时读取通知，不占用线程、不轮询。
+    """
+
+    def __init__(self, channel: str = WORLD_CHANGE_CHANNEL) -> None:
+        self._channel = channel
+        self._invalidators: List[
+            Tuple[WorldChangeInvalidator, Optional[Set[WorldEntityKind]]]
+        ] = []
+        self._reset_callbacks: List[WorldChangeResetCallback] = []
+        self._connection: Optional[psycopg2.extensions.connection] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reconnect_task: Optional[asyncio.Task[None]] = None
+
+    @property
+    def is_listening(self) -> bool:
+        """是否正在监听"""
+        return self._connection is not None
+
+    def register(
+        self,
+        invalidator: WorldChangeInvalidator,
+        entity_kinds: Optional[Set[WorldEntityKind]] = None,
+    ) -> None:
+        """注册缓存失效回调
+
+        Args:
+            invalidator: 收到变更事件时调用的回调
+            entity_kinds: 只接收这些实体类型的事件（None 表示全部）
+        """
+        self._invalidators.append((invalidator, entity_kinds))
+
+    def register_reset(self, callback: WorldChangeResetCallback) -> None:
+        """注册全量失效回调（监听连接重建后调用）"""
+        self._reset_callbacks.append(callback)
+
+    async def start(self) -> None:
+        """连接数据库并开始监听"""
+        self._loop = asyncio.get_running_loop()
+        await self._connect()
+
+    async def stop(self) -> None:
+        """停止监听并关闭连接"""
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            try:
+                await self._reconnect_task
+            except asyncio.CancelledError:
+                pass
+            self._reconnect_task = None
+        self._disconnect()
+        logger.debug(f"🔕 已停止监听世界变更频道: {self._channel}")
+
+    async def _connect(self) -> None:
+        assert self._loop is not None
+        connection = await asyncio.to_thread(
+            psycopg2.connect, postgresql_config.connection_string
+        )
+        connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self._channel}"')
+
+        self._connection = connection
+        self._loop.add_reader(connection.fileno(), self._on_readable)
+        logger.debug(f"🔔 已开始监听世界变更频道: {self._channel}")
+
+    def _disconnect(self) -> None:
+        if self._connection is None:
+            return
+        if self._loop is not None:
+            try:
+                self._loop.remove_reader(self._connection.fileno())
+            except Exception:
+                pass
+        try:
+            self._connection.close()
+        except Exception:
+            pass
+        self._connection = None
+
+    def _on_readable(self) -> None:
+        assert self._connection is not None
+        try:
+            self._connection.poll()
+        except psycopg2.Error as e:
+            logger.error(f"❌ 世界变更监听连接中断: {e}")
+            self._disconnect()
+            self._schedule_reconnect()
+            return
+
+        while self._connection.notifies:
+            notify = self._connection.notifies.pop(0)
+            self._dispatch(notify.payload)
+
+    def _dispatch(self, payload: str) -> None:
+        try:
+            event = WorldChangeEvent.model_validate(json.loads(payload))
+        except (ValueError, ValidationError) as e:
+            logger.warning(f"⚠️ 忽略无法解析的世界变更通知: {payload}, {e}")
+            return
+
+        for invalidator, entity_kinds in self._invalidators:
+            if entity_kinds is not None and event.entity_kind not in entity_kinds:
+                continue
+            try:
+                invalidator(event)
+            except Exception as e:
+                logger.error(f"❌ 缓存失效回调执行失败: {e}")
+
+    def _schedule_reconnect(self) -> None:
+        assert self._loop is not None
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = self._loop.create_task(self._reconnect_loop())
+
+    async def _reconnect_loop(self) -> None:
+        delay = 1.0
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self._connect()
+            except Exception as e:
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+                logger.warning(f"⚠️ 世界变更监听重连失败，{delay:.0f}s 后重试: {e}")
+                continue
+
+            # 断线期间的通知已丢失，通知所有缓存全量失效
+            for callback in self._reset_callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    logger.error(f"❌ 缓存全量失效回调执行失败: {e}")
+            return
@@ -1,8 +1,13 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Generator
 from loguru import logger
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session, sessionmaker
 from .config import postgresql_config
 from .base import Base
+from .statement_stats import statement_stats
 
 ############################################################################################################
 engine = create_engine(
@@ -13,6 +18,90 @@ engine = create_engine(
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 只读副本引擎（未配置副本时与主库引擎相同）
+read_engine = (
+    create_engine(
+        postgresql_config.replica_connection_string,
+        pool_size=5,
+        max_overflow=10,
+        pool_pre_ping=True,
+    )
+    if postgresql_config.replica_connection_string is not None
+    else engine
+)
+_ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# 按流水线阶段/代理统计 SQL 语句（见 statement_stats.track_phase）
+statement_stats.install(engine)
+statement_stats.install(read_engine)
+
+# 本进程最近一次主库提交的时间（time.monotonic）
+_last_primary_write_at: float = float("-inf")
+
+
+# 当前上下文是否强制读取走主库（见 read_from_primary）
+_read_from_primary: ContextVar[bool] = ContextVar("read_from_primary", default=False)
+
+
+############################################################################################################
+def mark_primary_write() -> None:
+    """记录一次主库写入，随后 read_your_writes_window 秒内的读取走主库"""
+    global _last_primary_write_at
+    _last_primary_write_at = time.monotonic()
+
+
+############################################################################################################
+def reads_pinned_to_primary() -> bool:
+    """当前的读取是否需要走主库（未配置副本，或刚刚有过写入）"""
+    if read_engine is engine or _read_from_primary.get():
+        return True
+    elapsed = time.monotonic() - _last_primary_write_at
+    return elapsed < postgresql_config.read_your_writes_window
+
+
+############################################################################################################
+@contextmanager
+def read_from_primary() -> Generator[None, None, None]:
+    """在此上下文中（含其中创建的任务与 to_thread 线程）的只读会话都走主库
+
+    read_your_writes_window 只记录本进程的提交，其他进程（如 MCP 服务器）的写入
+    不会把本进程的读取固定到主库。回合中紧跟在工具调用（MCP 服务器写库）之后的读取
+    （场景执行、角色/场景自我更新、变更日志）须在此上下文中执行；其余读取
+    （如观察规划加载上下文）仍按常规路由，可以走只读副本。
+    """
+    token = _read_from_primary.set(True)
+    try:
+        yield
+    finally:
+        _read_from_primary.reset(token)
+
+
+############################################################################################################
+@event.listens_for(SessionLocal, "after_commit")
+def _on_primary_commit(session: Session) -> None:
+    mark_primary_write()
+
+
+############################################################################################################
+def ReadSessionLocal() -> Session:
+    """创建只读操作使用的会话
+
+    路由规则：
+    - 未配置副本：走主库
+    - 本进程刚提交过写入（read_your_writes_window 内）：走主库，保证读到自己的写入
+    - 在 read_from_primary 上下文中（读取依赖其他进程的写入）：走主库
+    - 其他情况：走只读副本
+
+    只用于不写入的操作（上下文读取、get_world、向量检索等）；
+    先读后写的操作必须使用 SessionLocal，避免基于副本的旧数据写入。
+
+    Returns:
+        Session: 绑定到主库或副本的会话
+    """
+    if reads_pinned_to_primary():
+        return SessionLocal()
+    return _ReplicaSessionLocal()
+
 
 ############################################################################################################
 def pgsql_database_exists(database_name: str) -> bool:
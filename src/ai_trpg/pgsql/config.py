@@ -1,4 +1,4 @@
-from typing import Final, final
+from typing import Final, Optional, final
 from pydantic import BaseModel
 
 
@@ -8,16 +8,32 @@ class PostgreSQLConfig(BaseModel):
     port: int = 5432
     database: str = "ai-trpg-db"
     user: str = "postgres"
+    # 按世界对 messages / actor_plans / actor_movement_events 做 LIST 分区
+    # （多世界托管时使用；需要在建表前开启，对已存在的表不生效）
+    partition_by_world: bool = False
+    # 只读副本（为空表示不使用副本，所有读写都走主库）
+    replica_host: Optional[str] = None
+    replica_port: int = 5432
+    # 写入提交后多少秒内的读取仍走主库（read-your-writes）
+    read_your_writes_window: float = 2.0
 
     @property
     def connection_string(self) -> str:
         return f"postgresql://{self.user}@{self.host}:{self.port}/{self.database}"
 
+    @property
+    def replica_connection_string(self) -> Optional[str]:
+        if self.replica_host is None:
+            return None
+        return f"postgresql://{self.user}@{self.replica_host}:{self.replica_port}/{self.database}"
+
 
 """
 PostgreSQLConfig() - 默认 localhost:5432
 PostgreSQLConfig(host="192.168.1.50") - 本机局域网地址
 PostgreSQLConfig(host="192.168.1.100", port=5433) - 自定义端口
+PostgreSQLConfig(partition_by_world=True) - 按世界分区（多世界托管）
+PostgreSQLConfig(replica_host="localhost", replica_port=5433) - 本机第二个实例作为只读副本
 """
 
 # 默认配置实例
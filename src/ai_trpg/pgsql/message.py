@@ -5,6 +5,11 @@ from sqlalchemy import Text, Integer, ForeignKey, UniqueConstraint, CheckConstra
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, AIMessage
 from .base import UUIDBase
+from .world_partitions import (
+    PARTITION_BY_WORLD,
+    world_partition_key_columns,
+    world_partitioned_table_kwargs,
+)
 
 if TYPE_CHECKING:
     from .actor import ActorDB
@@ -28,6 +33,14 @@ class MessageDB(UUIDBase):
         ForeignKey("actors.id", ondelete="CASCADE"), nullable=True
     )
 
+    # 消息所属世界（无论归属 World/Stage/Actor），按世界分区时作为分区键
+    owner_world_id: Mapped[UUID] = mapped_column(
+        nullable=False,
+        primary_key=PARTITION_BY_WORLD,
+        index=not PARTITION_BY_WORLD,
+        comment="消息所属世界ID",
+    )
+
     # 消息顺序 (关键!)
     sequence: Mapped[int] = mapped_column(
         Integer, nullable=False, comment="消息在对话中的顺序,从0开始"
@@ -57,21 +70,36 @@ class MessageDB(UUIDBase):
             name="ck_one_owner",
         ),
         # World 的 sequence 唯一
-        UniqueConstraint("world_id", "sequence", name="uq_world_sequence"),
+        UniqueConstraint(
+            *world_partition_key_columns("owner_world_id", "world_id", "sequence"),
+            name="uq_world_sequence",
+        ),
         # Stage 的 sequence 唯一
-        UniqueConstraint("stage_id", "sequence", name="uq_stage_sequence"),
+        UniqueConstraint(
+            *world_partition_key_columns("owner_world_id", "stage_id", "sequence"),
+            name="uq_stage_sequence",
+        ),
         # Actor 的 sequence 唯一
-        UniqueConstraint("actor_id", "sequence", name="uq_actor_sequence"),
+        UniqueConstraint(
+            *world_partition_key_columns("owner_world_id", "actor_id", "sequence"),
+            name="uq_actor_sequence",
+        ),
+        # 按世界分区（见 world_partitions.py，必须是最后一个元素）
+        world_partitioned_table_kwargs("owner_world_id"),
     )
 
 
-def messages_db_to_langchain(message_dbs: List["MessageDB"]) -> List[BaseMessage]:
+def messages_db_to_langchain(
+    message_dbs: List["MessageDB"], trusted: bool = False
+) -> List[BaseMessage]:
     """将 MessageDB 列表转换为 LangChain BaseMessage 列表
 
     统一的转换函数，用于所有需要从数据库读取消息并转换为 LangChain 格式的场景
 
     Args:
         message_dbs: MessageDB 对象列表
+        trusted: 数据是否可信（由本系统序列化写入）。为 True 时用 model_construct
+            跳过 pydantic 校验，适合一次加载大量上下文
 
     Returns:
         List[BaseMessage]: 转换后的 BaseMessage 列表
@@ -86,11 +114,23 @@ def messages_db_to_langchain(message_dbs: List["MessageDB"]) -> List[BaseMessage
 
         match msg_type:
             case "system":
-                messages.append(SystemMessage.model_validate(msg_dict))
+                messages.append(
+                    SystemMessage.model_construct(**msg_dict)
+                    if trusted
+                    else SystemMessage.model_validate(msg_dict)
+                )
             case "ai":
-                messages.append(AIMessage.model_validate(msg_dict))
+                messages.append(
+                    AIMessage.model_construct(**msg_dict)
+                    if trusted
+                    else AIMessage.model_validate(msg_dict)
+                )
             case "human":
-                messages.append(HumanMessage.model_validate(msg_dict))
+                messages.append(
+                    HumanMessage.model_construct(**msg_dict)
+                    if trusted
+                    else HumanMessage.model_validate(msg_dict)
+                )
             case _:
                 raise ValueError(
                     f"未知的消息类型: {msg_type}, 只支持 'system'/'ai'/'human'"
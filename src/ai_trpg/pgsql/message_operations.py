@@ -11,8 +11,9 @@ from loguru import logger
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from .client import SessionLocal
+from .client import ReadSessionLocal, SessionLocal
 from .message import MessageDB, messages_db_to_langchain
+from .change_feed import publish_world_change
 from .actor import ActorDB
 from .stage import StageDB
 from .world import WorldDB
@@ -29,7 +30,7 @@ def get_actor_context(world_id: UUID, actor_name: str) -> List[BaseMessage]:
         List[BaseMessage]: Actor 的对话上下文消息列表，按 sequence 排序
                           如果 Actor 不存在或无消息，返回空列表
     """
-    with SessionLocal() as db:
+    with ReadSessionLocal() as db:
         try:
             # 查找 Actor
             actor = (
@@ -70,7 +71,7 @@ def get_stage_context(world_id: UUID, stage_name: str) -> List[BaseMessage]:
         List[BaseMessage]: Stage 的对话上下文消息列表，按 sequence 排序
                           如果 Stage 不存在或无消息，返回空列表
     """
-    with SessionLocal() as db:
+    with ReadSessionLocal() as db:
         try:
             # 查找 Stage
             stage = (
@@ -109,7 +110,7 @@ def get_world_context(world_id: UUID) -> List[BaseMessage]:
         List[BaseMessage]: World 的对话上下文消息列表，按 sequence 排序
                           如果 World 不存在或无消息，返回空列表
     """
-    with SessionLocal() as db:
+    with ReadSessionLocal() as db:
         try:
             # 查找 World
             world = db.query(WorldDB).filter(WorldDB.id == world_id).first()
@@ -163,7 +164,8 @@ def add_actor_context(
                 return False
 
             # 添加消息（自动计算 sequence 并提交）
-            _add_messages_to_db(db, messages, actor_id=actor.id)
+            _add_messages_to_db(db, messages, world_id, actor_id=actor.id)
+            publish_world_change(db, world_id, "actor_context", actor.name)
             db.commit()
             logger.success(
                 f"✅ 已为角色 '{actor_name}' 添加 {len(messages)} 条对话消息"
@@ -205,7 +207,8 @@ def add_stage_context(
                 return False
 
             # 添加消息（自动计算 sequence 并提交）
-            _add_messages_to_db(db, messages, stage_id=stage.id)
+            _add_messages_to_db(db, messages, world_id, stage_id=stage.id)
+            publish_world_change(db, world_id, "stage_context", stage.name)
             db.commit()
             logger.success(
                 f"✅ 已为场景 '{stage_name}' 添加 {len(messages)} 条对话消息"
@@ -239,7 +242,8 @@ def add_world_context(world_id: UUID, messages: List[BaseMessage]) -> bool:
                 return False
 
             # 添加消息（自动计算 sequence 并提交）
-            _add_messages_to_db(db, messages, world_id=world_id)
+            _add_messages_to_db(db, messages, world_id, world_id=world_id)
+            publish_world_change(db, world_id, "world_context", world.name)
             db.commit()
             logger.success(
                 f"✅ 已为世界 '{world.name}' 添加 {len(messages)} 条对话消息"
@@ -260,6 +264,7 @@ def add_world_context(world_id: UUID, messages: List[BaseMessage]) -> bool:
 def _add_messages_to_db(
     db: Session,
     messages: List[BaseMessage],
+    owner_world_id: UUID,
     world_id: Optional[UUID] = None,
     stage_id: Optional[UUID] = None,
     actor_id: Optional[UUID] = None,
@@ -273,6 +278,7 @@ def _add_messages_to_db(
     Args:
         db: 数据库会话
         messages: 要添加的消息列表
+        owner_world_id: 消息所属世界ID（按世界分区时的分区键）
         world_id: World ID (三选一)
         stage_id: Stage ID (三选一)
         actor_id: Actor ID (三选一)
@@ -280,8 +286,8 @@ def _add_messages_to_db(
     Raises:
         ValueError: 当未指定或指定多个 ID 时抛出
     """
-    # 1. 获取下一个可用的 sequence
-    query = select(MessageDB.sequence)
+    # 1. 获取下一个可用的 sequence（按所属世界过滤，分区时只扫描该世界的分区）
+    query = select(MessageDB.sequence).where(MessageDB.owner_world_id == owner_world_id)
 
     if world_id is not None:
         query = query.where(MessageDB.world_id == world_id)
@@ -301,6 +307,7 @@ def _add_messages_to_db(
         message_db = MessageDB(
             sequence=start_sequence + idx,
             message_json=message.model_dump_json(),
+            owner_world_id=owner_world_id,
             world_id=world_id,
             stage_id=stage_id,
             actor_id=actor_id,
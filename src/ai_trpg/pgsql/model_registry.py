@@ -19,6 +19,9 @@ from .attributes import AttributesDB
 from .actor_movement_event import ActorMovementEventDB
 from .actor_plan import ActorPlanDB
 from .stage_connection import StageConnectionDB
+from .world_mutation_log import WorldMutationLogDB
+from .world_snapshot import WorldSnapshotDB
+from .turn_journal import TurnJournalDB
 
 # 可以在这里添加其他模型的导入
 # from .other_model import OtherModel
@@ -35,6 +38,9 @@ __all__ = [
     "ActorMovementEventDB",
     "ActorPlanDB",
     "StageConnectionDB",
+    "WorldMutationLogDB",
+    "WorldSnapshotDB",
+    "TurnJournalDB",
     "register_all_models",
 ]
 
@@ -48,6 +54,6 @@ def register_all_models() -> None:
     """
     logger.debug("数据库模型注册完成")
     logger.debug(
-        f"已注册模型: VectorDocumentDB, UserDB, WorldDB, StageDB, ActorDB, EffectDB, MessageDB, AttributesDB, ActorMovementEventDB, ActorPlanDB, StageConnectionDB"
+        f"已注册模型: VectorDocumentDB, UserDB, WorldDB, StageDB, ActorDB, EffectDB, MessageDB, AttributesDB, ActorMovementEventDB, ActorPlanDB, StageConnectionDB, WorldMutationLogDB, WorldSnapshotDB, TurnJournalDB"
     )
     # 可以在这里添加其他模型的日志
@@ -0,0 +1,230 @@
+"""
+名称 → UUID 解析缓存模块
+
+世界、场景、角色在数据库中以 UUID 为主键，而工具调用与游戏逻辑都以名称寻址。
+每次调用都先按名称查询 world_id、再按名称查询场景/角色，会多出一个会话和若干查询。
+本模块在进程内缓存名称到 UUID 的映射：
+
+- 世界: world_name → world_id，世界删除/重新保存/整体同步（"world" 变更通知）时失效
+- 场景/角色: (world_id, 名称) → UUID，命中时以主键 db.get 加载
+
+场景/角色的 UUID 在其生命周期内不变（角色移动只改变 stage_id），
+缓存项以 world_id 为键，世界重建后自然不再命中；
+主键加载不到时（已被删除）丢弃缓存项并回退到按名称查询，因此不会返回错误的行。
+
+使用方法：
+    world_id = world_name_cache.resolve_world_id(world_name)
+    actor = find_actor_by_name(db, world_id, actor_name, joinedload(ActorDB.attributes))
+
+    # 跨进程失效（可选）
+    world_name_cache.attach(listener)
+"""
+
+import threading
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.interfaces import ORMOption
+from .client import ReadSessionLocal
+from .world import WorldDB
+from .stage import StageDB
+from .actor import ActorDB
+from .change_feed import WorldChangeEvent, WorldChangeListener
+
+
+class WorldNameCache:
+    """名称 → UUID 解析缓存（线程安全）"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._world_ids: Dict[str, UUID] = {}
+        self._stage_ids: Dict[Tuple[UUID, str], UUID] = {}
+        self._actor_ids: Dict[Tuple[UUID, str], UUID] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def resolve_world_id(self, world_name: str) -> Optional[UUID]:
+        """解析世界名称，未命中时查询数据库并缓存
+
+        Args:
+            world_name: 世界名称
+
+        Returns:
+            Optional[UUID]: 世界ID，世界不存在时返回 None（不缓存）
+        """
+        with self._lock:
+            world_id = self._world_ids.get(world_name)
+            if world_id is not None:
+                self.hits += 1
+                return world_id
+            self.misses += 1
+
+        with ReadSessionLocal() as db:
+            world_id = db.execute(
+                select(WorldDB.id).where(WorldDB.name == world_name)
+            ).scalar_one_or_none()
+
+        if world_id is None:
+            logger.warning(f"⚠️ World '{world_name}' 不存在于数据库")
+            return None
+
+        with self._lock:
+            self._world_ids[world_name] = world_id
+        return world_id
+
+    def get_stage_id(self, world_id: UUID, stage_name: str) -> Optional[UUID]:
+        """返回缓存的场景ID（未命中返回 None）"""
+        return self._get(self._stage_ids, (world_id, stage_name))
+
+    def put_stage_id(self, world_id: UUID, stage_name: str, stage_id: UUID) -> None:
+        """缓存场景ID"""
+        with self._lock:
+            self._stage_ids[(world_id, stage_name)] = stage_id
+
+    def discard_stage(self, world_id: UUID, stage_name: str) -> None:
+        """丢弃场景的缓存项"""
+        with self._lock:
+            self._stage_ids.pop((world_id, stage_name), None)
+
+    def get_actor_id(self, world_id: UUID, actor_name: str) -> Optional[UUID]:
+        """返回缓存的角色ID（未命中返回 None）"""
+        return self._get(self._actor_ids, (world_id, actor_name))
+
+    def put_actor_id(self, world_id: UUID, actor_name: str, actor_id: UUID) -> None:
+        """缓存角色ID"""
+        with self._lock:
+            self._actor_ids[(world_id, actor_name)] = actor_id
+
+    def discard_actor(self, world_id: UUID, actor_name: str) -> None:
+        """丢弃角色的缓存项"""
+        with self._lock:
+            self._actor_ids.pop((world_id, actor_name), None)
+
+    def invalidate_world(
+        self, world_name: Optional[str] = None, world_id: Optional[UUID] = None
+    ) -> None:
+        """丢弃世界及其所有场景/角色的缓存项
+
+        Args:
+            world_name: 世界名称（可选）
+            world_id: 世界ID（可选，未提供时使用名称当前缓存的ID）
+        """
+        with self._lock:
+            if world_name is not None:
+                cached_id = self._world_ids.pop(world_name, None)
+                world_id = world_id or cached_id
+            if world_id is None:
+                return
+            for key in [key for key in self._stage_ids if key[0] == world_id]:
+                del self._stage_ids[key]
+            for key in [key for key in self._actor_ids if key[0] == world_id]:
+                del self._actor_ids[key]
+
+    def clear(self) -> None:
+        """清空全部缓存"""
+        with self._lock:
+            self._world_ids.clear()
+            self._stage_ids.clear()
+            self._actor_ids.clear()
+
+    def on_world_change(self, event: WorldChangeEvent) -> None:
+        """变更通知回调：世界被删除/重新保存/整体同步时失效"""
+        if event.entity_kind == "world":
+            self.invalidate_world(event.name, event.world_id)
+
+    def attach(self, listener: WorldChangeListener) -> None:
+        """注册到变更监听器，使其他进程的删除/同步也能让本缓存失效"""
+        listener.register(self.on_world_change, {"world"})
+        listener.register_reset(self.clear)
+
+    def _get(
+        self, entries: Dict[Tuple[UUID, str], UUID], key: Tuple[UUID, str]
+    ) -> Optional[UUID]:
+        with self._lock:
+            value = entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+
+# 进程级缓存实例
+world_name_cache = WorldNameCache()
+
+
+def find_stage_by_name(
+    db: Session, world_id: UUID, stage_name: str, *options: ORMOption
+) -> Optional[StageDB]:
+    """在会话中按名称查找场景（缓存命中时按主键加载）
+
+    Args:
+        db: 数据库会话
+        world_id: 所属世界ID
+        stage_name: 场景名称
+        *options: 加载选项（如 joinedload）
+
+    Returns:
+        Optional[StageDB]: 场景，不存在时返回 None
+    """
+    stage_id = world_name_cache.get_stage_id(world_id, stage_name)
+    if stage_id is not None:
+        stage = db.get(StageDB, stage_id, options=options)
+        if stage is not None:
+            return stage
+        world_name_cache.discard_stage(world_id, stage_name)
+
+    stage = (
+        db.execute(
+            select(StageDB)
+            .where(StageDB.name == stage_name)
+            .where(StageDB.world_id == world_id)
+            .options(*options)
+        )
+        .unique()
+        .scalars()
+        .first()
+    )
+    if stage is not None:
+        world_name_cache.put_stage_id(world_id, stage_name, stage.id)
+    return stage
+
+
+def find_actor_by_name(
+    db: Session, world_id: UUID, actor_name: str, *options: ORMOption
+) -> Optional[ActorDB]:
+    """在会话中按名称查找角色（缓存命中时按主键加载）
+
+    Args:
+        db: 数据库会话
+        world_id: 所属世界ID
+        actor_name: 角色名称
+        *options: 加载选项（如 joinedload）
+
+    Returns:
+        Optional[ActorDB]: 角色，不存在时返回 None
+    """
+    actor_id = world_name_cache.get_actor_id(world_id, actor_name)
+    if actor_id is not None:
+        actor = db.get(ActorDB, actor_id, options=options)
+        if actor is not None:
+            return actor
+        world_name_cache.discard_actor(world_id, actor_name)
+
+    actor = (
+        db.execute(
+            select(ActorDB)
+            .join(ActorDB.stage)
+            .where(ActorDB.name == actor_name)
+            .where(StageDB.world_id == world_id)
+            .options(*options)
+        )
+        .unique()
+        .scalars()
+        .first()
+    )
+    if actor is not None:
+        world_name_cache.put_actor_id(world_id, actor_name, actor.id)
+    return actor
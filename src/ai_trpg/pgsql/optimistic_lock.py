@@ -0,0 +1,124 @@
+"""
+乐观并发控制模块
+
+StageDB / ActorDB 通过 version 列实现比较并交换（CAS）更新：
+每次写入时版本号 +1，UPDATE 语句附带 `WHERE version = <读取时的版本>`，
+若期间被其他事务修改，SQLAlchemy 会抛出 StaleDataError。
+
+本模块提供：
+- bump_version: 显式递增实体版本号（同一次 flush 内只递增一次）
+- loaded_version: 实体从数据库读取时的版本号（不受本会话内递增的影响）
+- retry_on_version_conflict: 冲突时以新会话重新执行整个数据库操作的重试装饰器
+- VersionConflictError: 重试耗尽或调用方指定的期望版本不匹配时抛出
+"""
+
+import random
+import time
+from functools import wraps
+from typing import Callable, Final, ParamSpec, Protocol, TypeVar
+from loguru import logger
+from sqlalchemy.orm.attributes import get_history
+from sqlalchemy.orm.exc import StaleDataError
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+# 默认重试策略
+DEFAULT_MAX_ATTEMPTS: Final[int] = 3
+DEFAULT_BASE_DELAY: Final[float] = 0.05
+DEFAULT_MAX_DELAY: Final[float] = 0.5
+
+
+class VersionedEntity(Protocol):
+    """带 version 列的实体"""
+
+    version: int
+
+
+class VersionConflictError(Exception):
+    """乐观锁版本冲突（重试耗尽或期望版本不匹配）"""
+
+    pass
+
+
+def bump_version(*entities: VersionedEntity) -> None:
+    """递增实体的版本号，使本次提交成为一次 CAS 更新
+
+    即使实体本身的列没有变化（例如只修改了角色属性、或角色移入/移出场景），
+    递增版本号也会生成一条带版本校验的 UPDATE，从而与并发写入互相检测。
+
+    Args:
+        *entities: 需要递增版本号的实体（已附加到会话）
+    """
+    for entity in entities:
+        # 同一次 flush 内已经递增过的实体不再重复递增
+        if get_history(entity, "version").has_changes():
+            continue
+        entity.version = entity.version + 1
+
+
+def loaded_version(entity: VersionedEntity) -> int:
+    """获取实体从数据库读取时的版本号
+
+    同一事务中先前的修改可能已经递增过版本号（例如批量变更中先移动角色再更新场景），
+    与调用方的期望版本比较时应使用读取时的版本。
+
+    Args:
+        entity: 带 version 列的实体（已附加到会话）
+
+    Returns:
+        int: 读取时的版本号
+    """
+    history = get_history(entity, "version")
+    if history.deleted:
+        return int(history.deleted[0])
+    return entity.version
+
+
+def retry_on_version_conflict(
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    base_delay: float = DEFAULT_BASE_DELAY,
+    max_delay: float = DEFAULT_MAX_DELAY,
+) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """版本冲突重试装饰器
+
+    被装饰的函数必须是自包含的数据库操作（内部自行打开会话并提交），
+    这样重试时会基于最新的数据库状态重新读取并应用修改。
+
+    Args:
+        max_attempts: 最大尝试次数（含首次执行）
+        base_delay: 首次重试前的等待秒数，之后按指数增长
+        max_delay: 单次等待的上限秒数
+
+    Returns:
+        装饰器
+    """
+
+    def decorator(func: Callable[P, R]) -> Callable[P, R]:
+        @wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            for attempt in range(1, max_attempts + 1):
+                try:
+                    return func(*args, **kwargs)
+                except StaleDataError as e:
+                    if attempt >= max_attempts:
+                        logger.error(
+                            f"❌ {func.__name__} 版本冲突，已重试 {max_attempts} 次仍失败"
+                        )
+                        raise VersionConflictError(
+                            f"{func.__name__} 版本冲突: {e}"
+                        ) from e
+
+                    # 指数退避 + 抖动，避免并发写入者同时重试再次冲突
+                    delay = min(max_delay, base_delay * (2 ** (attempt - 1)))
+                    delay = random.uniform(delay / 2, delay)
+                    logger.warning(
+                        f"⚠️ {func.__name__} 检测到并发修改（第 {attempt}/{max_attempts} 次），{delay:.3f}s 后重试"
+                    )
+                    time.sleep(delay)
+
+            raise AssertionError("unreachable")
+
+        return wrapper
+
+    return decorator
@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING, List
 from uuid import UUID
-from sqlalchemy import String, Text, ForeignKey
+from sqlalchemy import String, Text, ForeignKey, Integer
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .base import UUIDBase
 
@@ -28,6 +28,11 @@ class StageDB(UUIDBase):
     actor_states: Mapped[str] = mapped_column(Text, nullable=False)
     connections: Mapped[str] = mapped_column(Text, default="")
 
+    # 乐观锁版本号：每次写入由 bump_version 显式递增，UPDATE 时校验读取时的版本
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+
+    __mapper_args__ = {"version_id_col": version, "version_id_generator": False}
+
     # 关系
     world: Mapped["WorldDB"] = relationship("WorldDB", back_populates="stages")
     actors: Mapped[List["ActorDB"]] = relationship(
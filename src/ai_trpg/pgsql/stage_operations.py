@@ -4,15 +4,30 @@
 提供 Stage 的数据库操作
 """
 
-from typing import Optional, List
+from typing import Dict, Final, Generator, Optional, List
 from uuid import UUID
 from loguru import logger
-from sqlalchemy.orm import joinedload
-from .client import SessionLocal
+from sqlalchemy import select
+from sqlalchemy.orm import aliased, joinedload, selectinload
+from .client import ReadSessionLocal, SessionLocal
 from .stage import StageDB
+from .stage_connection import StageConnectionDB
 from .actor import ActorDB
+from .change_feed import publish_world_change
+from .name_cache import find_stage_by_name
+from .world_history_operations import log_world_mutation
+from .world_mutation import UpdateStageInfoMutation
+from .optimistic_lock import (
+    VersionConflictError,
+    bump_version,
+    retry_on_version_conflict,
+)
 
+# 流式读取场景时每个批次的默认大小
+DEFAULT_STAGE_CHUNK_SIZE: Final[int] = 100
 
+
+@retry_on_version_conflict()
 def update_stage_info(
     world_id: UUID,
     stage_name: str,
@@ -20,9 +35,12 @@ def update_stage_info(
     narrative: Optional[str] = None,
     actor_states: Optional[str] = None,
     connections: Optional[str] = None,
+    expected_version: Optional[int] = None,
 ) -> bool:
     """更新场景的信息字段
 
+    更新以版本号做比较并交换，并发修改会被检测并自动重试。
+
     Args:
         world_id: 所属世界ID
         stage_name: 场景名称
@@ -30,24 +48,29 @@ def update_stage_info(
         narrative: 叙事文本（可选）
         actor_states: 角色状态信息（可选）
         connections: 连接信息（可选）
+        expected_version: 期望的场景版本号（可选）。提供时若与当前版本不一致，
+            说明场景在读取后已被修改，抛出 VersionConflictError 而不是覆盖
 
     Returns:
         bool: 更新是否成功
+
+    Raises:
+        VersionConflictError: 期望版本不匹配，或并发冲突重试耗尽
     """
     with SessionLocal() as db:
         try:
             # 查找场景
-            stage = (
-                db.query(StageDB)
-                .filter(StageDB.name == stage_name)
-                .filter(StageDB.world_id == world_id)
-                .first()
-            )
+            stage = find_stage_by_name(db, world_id, stage_name)
 
             if not stage:
                 logger.error(f"❌ 未找到场景: {stage_name} (世界ID: {world_id})")
                 return False
 
+            if expected_version is not None and stage.version != expected_version:
+                raise VersionConflictError(
+                    f"场景 '{stage_name}' 版本冲突: 期望 {expected_version}, 实际 {stage.version}"
+                )
+
             # 更新提供的字段
             updated_fields = []
 
@@ -71,6 +94,19 @@ def update_stage_info(
                 logger.warning(f"⚠️ 未提供任何要更新的字段")
                 return False
 
+            bump_version(stage)
+            log_world_mutation(
+                db,
+                world_id,
+                UpdateStageInfoMutation(
+                    stage_name=stage.name,
+                    environment=environment,
+                    narrative=narrative,
+                    actor_states=actor_states,
+                    connections=connections,
+                ),
+            )
+            publish_world_change(db, world_id, "stage", stage.name, stage.version)
             db.commit()
             logger.debug(
                 f"✅ 场景 '{stage_name}' 已更新字段: {', '.join(updated_fields)}"
@@ -93,7 +129,7 @@ def get_stage_by_name(world_id: UUID, stage_name: str) -> Optional[StageDB]:
     Returns:
         Optional[StageDB]: 场景对象，如果不存在则返回None
     """
-    with SessionLocal() as db:
+    with ReadSessionLocal() as db:
         try:
             stage = (
                 db.query(StageDB)
@@ -128,7 +164,7 @@ def get_stages_in_world(world_id: UUID) -> List[StageDB]:
             - actors.attributes (AttributesDB)
             - actors.effects (List[EffectDB])
     """
-    with SessionLocal() as db:
+    with ReadSessionLocal() as db:
         try:
             # 查询所有场景并预加载角色列表及其关联数据
             stages = (
@@ -147,3 +183,120 @@ def get_stages_in_world(world_id: UUID) -> List[StageDB]:
         except Exception as e:
             logger.error(f"❌ 查询世界场景失败: {e}")
             raise
+
+
+def get_stage_with_actors(world_id: UUID, stage_name: str) -> Optional[StageDB]:
+    """根据名称获取场景，并预加载场景中的角色
+
+    Args:
+        world_id: 所属世界ID
+        stage_name: 场景名称
+
+    Returns:
+        Optional[StageDB]: 场景对象（预加载 actors 及其 attributes、effects），不存在时返回 None
+    """
+    with ReadSessionLocal() as db:
+        try:
+            stage = find_stage_by_name(
+                db,
+                world_id,
+                stage_name,
+                selectinload(StageDB.actors).selectinload(ActorDB.attributes),
+                selectinload(StageDB.actors).selectinload(ActorDB.effects),
+            )
+            if not stage:
+                logger.warning(f"⚠️ 未找到场景: {stage_name} (世界ID: {world_id})")
+            return stage
+
+        except Exception as e:
+            logger.error(f"❌ 查询场景失败: {e}")
+            raise
+
+
+def get_stage_connection_names(world_id: UUID) -> Dict[str, List[str]]:
+    """获取世界中的场景连接（来源场景名称 → 可到达的目标场景名称列表）
+
+    Args:
+        world_id: 世界ID
+
+    Returns:
+        Dict[str, List[str]]: 场景连接，没有出口的场景不出现在结果中
+    """
+    source_stage = aliased(StageDB)
+    target_stage = aliased(StageDB)
+    with ReadSessionLocal() as db:
+        try:
+            connections: Dict[str, List[str]] = {}
+            for source_name, target_name in db.execute(
+                select(source_stage.name, target_stage.name)
+                .select_from(StageConnectionDB)
+                .join(
+                    source_stage,
+                    StageConnectionDB.source_stage_id == source_stage.id,
+                )
+                .join(
+                    target_stage,
+                    StageConnectionDB.target_stage_id == target_stage.id,
+                )
+                .where(source_stage.world_id == world_id)
+            ):
+                connections.setdefault(source_name, []).append(target_name)
+            return connections
+
+        except Exception as e:
+            logger.error(f"❌ 查询场景连接失败: {e}")
+            raise
+
+
+def iter_stages_in_world(
+    world_id: UUID, chunk_size: int = DEFAULT_STAGE_CHUNK_SIZE
+) -> Generator[List[StageDB], None, None]:
+    """分批读取指定世界中的所有场景
+
+    与 get_stages_in_world 预加载的数据相同，但按场景ID做键集分页，每批使用
+    独立的短读会话，读取完成即归还连接。调用方在两批之间等待 LLM 调用时不会占用
+    数据库连接，也不会让事务长时间处于 idle in transaction。
+
+    Args:
+        world_id: 世界ID
+        chunk_size: 每个批次的场景数量
+
+    Yields:
+        List[StageDB]: 一批场景，每个 StageDB 预加载了：
+            - stage.actors (List[ActorDB])
+            - actors.attributes (AttributesDB)
+            - actors.effects (List[EffectDB])
+    """
+    last_id: Optional[UUID] = None
+    total = 0
+    while True:
+        with ReadSessionLocal() as db:
+            try:
+                statement = (
+                    select(StageDB)
+                    .options(
+                        selectinload(StageDB.actors).selectinload(ActorDB.attributes),
+                        selectinload(StageDB.actors).selectinload(ActorDB.effects),
+                    )
+                    .filter(StageDB.world_id == world_id)
+                    .order_by(StageDB.id)
+                    .limit(chunk_size)
+                )
+                if last_id is not None:
+                    statement = statement.filter(StageDB.id > last_id)
+
+                chunk = list(db.execute(statement).scalars().all())
+
+            except Exception as e:
+                logger.error(f"❌ 分批读取世界场景失败: {e}")
+                raise
+
+        if not chunk:
+            break
+        total += len(chunk)
+        last_id = chunk[-1].id
+        yield chunk
+        if len(chunk) < chunk_size:
+            break
+
+    logger.debug(f"📋 分批读取世界 {world_id} 中的场景完成，共 {total} 个")
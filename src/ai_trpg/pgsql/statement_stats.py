@@ -0,0 +1,317 @@
+"""
+SQL 语句统计模块
+
+通过 SQLAlchemy 的 before/after_cursor_execute 事件统计每条 SQL 语句，
+并按当前的流水线阶段（phase）和代理（agent）归类：语句数、返回/影响行数、耗时。
+track_phase 同时记录每段阶段代码的执行耗时（用于统计阶段延迟分位数）；
+同一阶段拆成多个并发节点执行时（按场景依赖调度的回合），track_node 单独记录每个节点的耗时，
+阶段耗时由调度方每回合记录一次。
+
+阶段与代理通过 contextvar 传递，asyncio 任务创建时会复制上下文，
+因此并发执行的多个代理各自的语句不会互相混淆。
+
+使用方法：
+    with track_phase("stage_execute"):
+        await run_as_agent("场景A", handle_single_stage(...))
+
+    statement_stats.log_summary()
+
+测试中断言语句预算（捕获 N+1 查询回归）：
+    with assert_statement_budget(3):
+        get_actors_in_world(world_id)
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import (
+    Any,
+    Awaitable,
+    Dict,
+    Final,
+    Generator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+from loguru import logger
+from pydantic import BaseModel, Field
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+
+T = TypeVar("T")
+
+# 未处于任何阶段时使用的阶段名称
+UNTRACKED_PHASE: Final[str] = "untracked"
+
+# 当前阶段与代理
+_current_phase: ContextVar[str] = ContextVar(
+    "statement_stats_phase", default=UNTRACKED_PHASE
+)
+_current_agent: ContextVar[str] = ContextVar("statement_stats_agent", default="")
+
+# 当前上下文中生效的语句预算计数器
+_active_budgets: ContextVar[Tuple["StatementBudget", ...]] = ContextVar(
+    "statement_stats_budgets", default=()
+)
+
+
+class StatementStats(BaseModel):
+    """一组 SQL 语句的统计数据"""
+
+    statements: int = Field(default=0, description="语句数")
+    rows: int = Field(default=0, description="返回/影响的行数")
+    total_time: float = Field(default=0.0, description="总耗时（秒）")
+
+    def add(self, rows: int, elapsed: float) -> None:
+        self.statements += 1
+        self.rows += rows
+        self.total_time += elapsed
+
+    def merge(self, other: "StatementStats") -> None:
+        self.statements += other.statements
+        self.rows += other.rows
+        self.total_time += other.total_time
+
+
+class StatementBudget:
+    """语句预算计数器（记录上下文内执行的所有语句）"""
+
+    def __init__(self, max_statements: int) -> None:
+        self.max_statements = max_statements
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+class StatementStatsRecorder:
+    """按 (阶段, 代理) 汇总的 SQL 语句统计（线程安全）"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], StatementStats] = {}
+        # 阶段 → 每次 track_phase 的执行耗时（秒）
+        self._phase_durations: Dict[str, List[float]] = {}
+        # 阶段 → 该阶段每个节点（track_node）的执行耗时（秒）
+        self._node_durations: Dict[str, List[float]] = {}
+        self._installed_engines: List[Engine] = []
+
+    def install(self, engine: Engine) -> None:
+        """为引擎注册语句统计事件（重复调用无副作用）"""
+        if any(installed is engine for installed in self._installed_engines):
+            return
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        self._installed_engines.append(engine)
+
+    def reset(self) -> None:
+        """清空已记录的统计"""
+        with self._lock:
+            self._stats.clear()
+            self._phase_durations.clear()
+            self._node_durations.clear()
+
+    def record_phase_duration(self, phase: str, elapsed: float) -> None:
+        """记录一次阶段执行耗时（由 track_phase 调用）"""
+        with self._lock:
+            self._phase_durations.setdefault(phase, []).append(elapsed)
+
+    def phase_durations(self) -> Dict[str, List[float]]:
+        """返回每个阶段的执行耗时列表副本（秒，按记录顺序）"""
+        with self._lock:
+            return {
+                phase: list(durations)
+                for phase, durations in self._phase_durations.items()
+            }
+
+    def record_node_duration(self, phase: str, elapsed: float) -> None:
+        """记录阶段中一个节点的执行耗时（由 track_node 调用）"""
+        with self._lock:
+            self._node_durations.setdefault(phase, []).append(elapsed)
+
+    def node_durations(self) -> Dict[str, List[float]]:
+        """返回每个阶段的节点执行耗时列表副本（秒，按记录顺序）"""
+        with self._lock:
+            return {
+                phase: list(durations)
+                for phase, durations in self._node_durations.items()
+            }
+
+    def snapshot(self) -> Dict[Tuple[str, str], StatementStats]:
+        """返回按 (阶段, 代理) 划分的统计副本"""
+        with self._lock:
+            return {key: stats.model_copy() for key, stats in self._stats.items()}
+
+    def by_phase(self) -> Dict[str, StatementStats]:
+        """返回按阶段汇总（合并所有代理）的统计"""
+        totals: Dict[str, StatementStats] = {}
+        for (phase, _), stats in self.snapshot().items():
+            totals.setdefault(phase, StatementStats()).merge(stats)
+        return totals
+
+    def log_summary(self) -> None:
+        """输出按阶段汇总的统计，以及每个阶段语句最多的代理"""
+        snapshot = self.snapshot()
+        if not snapshot:
+            logger.info("📊 SQL 语句统计: 无记录")
+            return
+
+        lines = ["📊 SQL 语句统计（按阶段）:"]
+        for phase, totals in self.by_phase().items():
+            lines.append(
+                f"  - {phase}: {totals.statements} 条语句, {totals.rows} 行, {totals.total_time * 1000:.1f}ms"
+            )
+            agents = sorted(
+                (
+                    (agent, stats)
+                    for (stats_phase, agent), stats in snapshot.items()
+                    if stats_phase == phase and agent
+                ),
+                key=lambda item: item[1].statements,
+                reverse=True,
+            )
+            for agent, stats in agents[:5]:
+                lines.append(
+                    f"      {agent}: {stats.statements} 条语句, {stats.rows} 行, {stats.total_time * 1000:.1f}ms"
+                )
+        logger.info("\n".join(lines))
+
+    def _before_cursor_execute(
+        self,
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        conn.info.setdefault("statement_stats_start", []).append(time.perf_counter())
+
+    def _after_cursor_execute(
+        self,
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        start_times: List[float] = conn.info.get("statement_stats_start", [])
+        elapsed = time.perf_counter() - start_times.pop() if start_times else 0.0
+        rows = max(getattr(cursor, "rowcount", 0) or 0, 0)
+        key = (_current_phase.get(), _current_agent.get())
+
+        with self._lock:
+            self._stats.setdefault(key, StatementStats()).add(rows, elapsed)
+
+        for budget in _active_budgets.get():
+            budget.statements.append(statement)
+
+
+# 全局统计实例
+statement_stats: Final[StatementStatsRecorder] = StatementStatsRecorder()
+
+
+@contextmanager
+def track_phase(phase: str, agent: str = "") -> Generator[None, None, None]:
+    """将上下文内执行的 SQL 语句归类到指定阶段（与代理）
+
+    阶段级别（agent 为空）的上下文同时记录执行耗时到 statement_stats.phase_durations。
+
+    Args:
+        phase: 流水线阶段名称
+        agent: 代理名称（为空表示阶段级别的语句）
+    """
+    phase_token = _current_phase.set(phase)
+    agent_token = _current_agent.set(agent)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _current_agent.reset(agent_token)
+        _current_phase.reset(phase_token)
+        if not agent:
+            statement_stats.record_phase_duration(phase, time.perf_counter() - start)
+
+
+@contextmanager
+def track_node(phase: str) -> Generator[None, None, None]:
+    """将上下文内执行的 SQL 语句归类到指定阶段，执行耗时记为该阶段的一个节点耗时
+
+    记录到 statement_stats.node_durations，不计入 phase_durations。
+
+    Args:
+        phase: 节点所属的流水线阶段名称
+    """
+    phase_token = _current_phase.set(phase)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _current_phase.reset(phase_token)
+        statement_stats.record_node_duration(phase, time.perf_counter() - start)
+
+
+@contextmanager
+def track_agent(agent: str) -> Generator[None, None, None]:
+    """在当前阶段内，将上下文内执行的 SQL 语句归类到指定代理
+
+    Args:
+        agent: 代理名称
+    """
+    agent_token = _current_agent.set(agent)
+    try:
+        yield
+    finally:
+        _current_agent.reset(agent_token)
+
+
+async def run_as_agent(agent: str, awaitable: Awaitable[T]) -> T:
+    """以指定代理的身份执行协程（适用于 asyncio.gather 中的每个代理任务）
+
+    Args:
+        agent: 代理名称
+        awaitable: 要执行的协程
+
+    Returns:
+        协程的返回值
+    """
+    with track_agent(agent):
+        return await awaitable
+
+
+@contextmanager
+def assert_statement_budget(
+    max_statements: int, label: Optional[str] = None
+) -> Generator[StatementBudget, None, None]:
+    """断言上下文内执行的 SQL 语句数不超过预算（用于测试捕获 N+1 查询）
+
+    Args:
+        max_statements: 允许的最大语句数
+        label: 断言失败时显示的说明
+
+    Yields:
+        StatementBudget: 语句计数器（可在上下文内读取已执行的语句）
+
+    Raises:
+        AssertionError: 语句数超过预算
+    """
+    budget = StatementBudget(max_statements)
+    token = _active_budgets.set(_active_budgets.get() + (budget,))
+    try:
+        yield budget
+    finally:
+        _active_budgets.reset(token)
+
+    if budget.count > max_statements:
+        statements = "\n".join(
+            f"  [{index}] {statement}"
+            for index, statement in enumerate(budget.statements, start=1)
+        )
+        raise AssertionError(
+            f"{label or 'SQL 语句预算'}: 执行了 {budget.count} 条语句，超过预算 {max_statements} 条\n{statements}"
+        )
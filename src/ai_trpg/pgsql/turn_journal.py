@@ -0,0 +1,48 @@
+"""
+回合日志数据模型
+
+记录当前回合中每个已完成的调度节点（代理 + 阶段，如 observe:角色A、execute:场景1），
+进程在回合中途退出后重新执行同一回合时，跳过已完成的节点，不再重复已成功的 LLM 调用。
+回合序号与回合检查点一致（上一个检查点 + 1）。
+"""
+
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+from sqlalchemy import DateTime, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import UUIDBase
+
+
+class TurnJournalDB(UUIDBase):
+    """回合日志表"""
+
+    __tablename__ = "turn_journal"
+
+    # 外键：绑定到 World
+    world_id: Mapped[UUID] = mapped_column(
+        ForeignKey("worlds.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="所属世界ID",
+    )
+
+    turn: Mapped[int] = mapped_column(Integer, nullable=False, comment="回合序号")
+
+    node_key: Mapped[str] = mapped_column(
+        String(255), nullable=False, comment="已完成的调度节点（阶段:代理名称）"
+    )
+
+    payload_json: Mapped[Optional[str]] = mapped_column(
+        Text, nullable=True, comment="节点附带的数据（JSON，可选）"
+    )
+
+    completed_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.now, nullable=False, comment="完成时间"
+    )
+
+    # 表约束和索引
+    __table_args__ = (
+        UniqueConstraint(
+            "world_id", "turn", "node_key", name="uq_turn_journal_node"
+        ),  # 同一回合的节点只记录一次
+    )
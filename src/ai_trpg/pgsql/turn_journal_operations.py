@@ -0,0 +1,101 @@
+"""
+回合日志数据库操作模块
+
+提供 TurnJournal 的数据库操作：
+- get_turn_journal: 读取某回合已完成的节点
+- record_turn_node_completed: 记录节点完成（重复记录被忽略）
+- clear_turn_journal: 清理已结束回合的日志
+"""
+
+from typing import Dict, Optional
+from uuid import UUID
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from .client import SessionLocal
+from .turn_journal import TurnJournalDB
+
+
+def get_turn_journal(world_id: UUID, turn: int) -> Dict[str, Optional[str]]:
+    """读取某回合已完成的节点
+
+    决定哪些节点需要重做，必须读到最新的记录，因此始终走主库（不走只读副本）。
+
+    Args:
+        world_id: 世界ID
+        turn: 回合序号
+
+    Returns:
+        Dict[str, Optional[str]]: 节点名称 → 节点附带的数据（JSON）
+    """
+    with SessionLocal() as db:
+        try:
+            rows = db.execute(
+                select(TurnJournalDB.node_key, TurnJournalDB.payload_json)
+                .where(TurnJournalDB.world_id == world_id)
+                .where(TurnJournalDB.turn == turn)
+            ).all()
+            return {node_key: payload_json for node_key, payload_json in rows}
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ 读取回合日志失败: {e}")
+            raise
+
+
+def record_turn_node_completed(
+    world_id: UUID, turn: int, node_key: str, payload_json: Optional[str] = None
+) -> None:
+    """记录节点完成（同一回合的同一节点只保留第一次记录）
+
+    Args:
+        world_id: 世界ID
+        turn: 回合序号
+        node_key: 节点名称（阶段:代理名称）
+        payload_json: 节点附带的数据（JSON，可选）
+    """
+    with SessionLocal() as db:
+        try:
+            db.execute(
+                insert(TurnJournalDB)
+                .values(
+                    world_id=world_id,
+                    turn=turn,
+                    node_key=node_key,
+                    payload_json=payload_json,
+                )
+                .on_conflict_do_nothing(constraint="uq_turn_journal_node")
+            )
+            db.commit()
+            logger.debug(f"📒 回合日志: 第 {turn} 回合 {node_key} 已完成")
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ 记录回合日志失败: {e}")
+            raise
+
+
+def clear_turn_journal(world_id: UUID, before_turn: Optional[int] = None) -> int:
+    """清理回合日志
+
+    Args:
+        world_id: 世界ID
+        before_turn: 只清理该回合之前的日志（为 None 时清理全部）
+
+    Returns:
+        int: 删除的记录数量
+    """
+    with SessionLocal() as db:
+        try:
+            query = db.query(TurnJournalDB).filter(TurnJournalDB.world_id == world_id)
+            if before_turn is not None:
+                query = query.filter(TurnJournalDB.turn < before_turn)
+            count = query.delete()
+            db.commit()
+            logger.debug(f"🗑️ 已清理 {count} 条回合日志 (世界ID: {world_id})")
+            return count
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ 清理回合日志失败: {e}")
+            raise
@@ -11,7 +11,7 @@ from pgvector.sqlalchemy import Vector  # type: ignore
 from sqlalchemy import DateTime, Index, Integer, String, Text, func, text
 from sqlalchemy.orm import Mapped, mapped_column
 from .base import UUIDBase
-from .client import SessionLocal
+from .client import ReadSessionLocal, SessionLocal
 
 
 class VectorDocumentDB(UUIDBase):
@@ -182,7 +182,7 @@ def search_similar_documents(
     返回:
         List[Tuple[VectorDocumentDB, float]]: (文档对象, 相似度分数) 的列表
     """
-    with SessionLocal() as db:
+    with ReadSessionLocal() as db:
         try:
             # 自动检测查询向量维度
             query_dim = len(query_embedding)
@@ -1,7 +1,11 @@
 from datetime import datetime
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, Any, List, Mapping, Optional, Type, TypeVar
+from uuid import UUID
+from langchain_core.messages import BaseMessage
+from pydantic import BaseModel
 from sqlalchemy import String, Text, DateTime, Boolean, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from ..demo.models import Actor, Attributes, Effect, Stage, World
 from .base import UUIDBase
 
 if TYPE_CHECKING:
@@ -40,3 +44,89 @@ class WorldDB(UUIDBase):
         order_by="MessageDB.sequence",
         foreign_keys="MessageDB.world_id",
     )
+
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def _build_model(model: Type[ModelT], trusted: bool, **fields: Any) -> ModelT:
+    """构造 pydantic 模型，可信数据跳过校验"""
+    if trusted:
+        return model.model_construct(**fields)
+    return model(**fields)
+
+
+def world_db_to_model(
+    world_db: WorldDB,
+    contexts: Optional[Mapping[UUID, List[BaseMessage]]] = None,
+    trusted: bool = False,
+) -> World:
+    """将 WorldDB（已预加载场景/角色/属性/Effect/连接）转换为 pydantic World
+
+    Args:
+        world_db: 已预加载关系的 WorldDB
+        contexts: World/Stage/Actor 的 ID → 对话上下文（为 None 时上下文为空）
+        trusted: 数据是否可信（来自本系统的数据库）。为 True 时用 model_construct
+            跳过 pydantic 校验
+
+    Returns:
+        World: 转换后的世界模型
+    """
+    contexts = contexts or {}
+
+    stages: List[Stage] = []
+    for stage_db in world_db.stages:
+        actors = [
+            _build_model(
+                Actor,
+                trusted,
+                name=actor_db.name,
+                profile=actor_db.profile,
+                appearance=actor_db.appearance,
+                attributes=_build_model(
+                    Attributes,
+                    trusted,
+                    health=actor_db.attributes.health,
+                    max_health=actor_db.attributes.max_health,
+                    attack=actor_db.attributes.attack,
+                ),
+                effects=[
+                    _build_model(
+                        Effect,
+                        trusted,
+                        name=effect_db.name,
+                        description=effect_db.description,
+                    )
+                    for effect_db in actor_db.effects
+                ],
+                context=list(contexts.get(actor_db.id, [])),
+            )
+            for actor_db in stage_db.actors
+        ]
+        stages.append(
+            _build_model(
+                Stage,
+                trusted,
+                name=stage_db.name,
+                profile=stage_db.profile,
+                environment=stage_db.environment,
+                actors=actors,
+                narrative=stage_db.narrative,
+                actor_states=stage_db.actor_states,
+                connections=stage_db.connections,
+                stage_connections=[
+                    connection.target_stage.name
+                    for connection in stage_db.outgoing_connections
+                ],
+                context=list(contexts.get(stage_db.id, [])),
+            )
+        )
+
+    return _build_model(
+        World,
+        trusted,
+        name=world_db.name,
+        campaign_setting=world_db.campaign_setting,
+        stages=stages,
+        context=list(contexts.get(world_db.id, [])),
+    )
@@ -0,0 +1,342 @@
+"""
+世界历史（变更日志 + 快照）数据库操作模块
+
+每次生效的世界状态变更都会在同一事务中追加到 world_mutation_log，
+世界保存时写入初始快照，之后每隔 SNAPSHOT_INTERVAL_TURNS 个回合检查点再写一次快照。
+任意时刻的世界状态 = 该时刻之前最近的快照 + 其后的变更日志回放。
+
+- log_world_mutation: 在当前事务中追加一条变更日志（供各写操作调用）
+- write_world_snapshot: 在当前事务中写入世界快照
+- save_world_snapshot: 为世界的当前状态写入快照
+- record_turn_checkpoint: 记录回合检查点（只追加一条日志，按间隔写快照）
+- get_last_turn: 获取最后一个回合检查点的回合序号
+- load_world_state_at: 重建指定日志序号时的世界状态
+- load_world_state_at_turn: 重建指定回合结束时的世界状态
+- load_world_mutations_since: 读取指定日志序号之后的变更（增量刷新）
+"""
+
+from typing import Final, List, Optional
+from uuid import UUID
+from loguru import logger
+from pydantic import BaseModel, Field
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, joinedload, selectinload
+from ..demo.models import World
+from .client import ReadSessionLocal, SessionLocal
+from .world import WorldDB, world_db_to_model
+from .stage import StageDB
+from .stage_connection import StageConnectionDB
+from .actor import ActorDB
+from .world_mutation import WorldMutation
+from .world_mutation_log import WorldMutationLogDB
+from .world_snapshot import WorldSnapshotDB
+from .world_replay import (
+    TURN_CHECKPOINT_TYPE,
+    WORLD_SYNCED_TYPE,
+    TurnCheckpoint,
+    decode_logged_mutation,
+    replay_world_mutations,
+    strip_world_context,
+)
+
+# 每隔多少个回合检查点写一次快照
+SNAPSHOT_INTERVAL_TURNS: Final[int] = 10
+
+
+def log_world_mutation(db: Session, world_id: UUID, mutation: WorldMutation) -> None:
+    """在当前事务中追加一条变更日志（随事务一起提交或回滚）
+
+    Args:
+        db: 数据库会话
+        world_id: 所属世界ID
+        mutation: 已生效的变更（调用方负责记录实际生效的值）
+    """
+    db.add(
+        WorldMutationLogDB(
+            world_id=world_id,
+            mutation_type=mutation.type,
+            payload_json=mutation.model_dump_json(exclude_none=True),
+        )
+    )
+
+
+def write_world_snapshot(db: Session, world_id: UUID, world: World) -> int:
+    """在当前事务中写入世界快照，快照对应当前最后一条变更日志
+
+    Args:
+        db: 数据库会话
+        world_id: 世界ID
+        world: 世界当前状态（上下文会被去掉）
+
+    Returns:
+        int: 快照对应的变更日志序号
+    """
+    db.flush()
+    seq = _latest_log_seq(db, world_id)
+    db.add(
+        WorldSnapshotDB(
+            world_id=world_id,
+            seq=seq,
+            snapshot_json=strip_world_context(world).model_dump_json(),
+        )
+    )
+    return seq
+
+
+def save_world_snapshot(world_id: UUID) -> Optional[int]:
+    """为世界的当前状态写入快照
+
+    Args:
+        world_id: 世界ID
+
+    Returns:
+        Optional[int]: 快照对应的变更日志序号，世界不存在时返回 None
+    """
+    with SessionLocal() as db:
+        try:
+            world = _load_current_world_state(db, world_id)
+            if world is None:
+                logger.error(f"❌ 未找到世界: (ID: {world_id})")
+                return None
+
+            seq = write_world_snapshot(db, world_id, world)
+            db.commit()
+            logger.debug(f"📸 已写入世界快照 (世界ID: {world_id}, seq: {seq})")
+            return seq
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ 写入世界快照失败: {e}")
+            raise
+
+
+def record_turn_checkpoint(world_id: UUID) -> int:
+    """记录回合检查点
+
+    只追加一条日志，代价很低，可以每回合调用；
+    每隔 SNAPSHOT_INTERVAL_TURNS 个回合额外写一次快照，限制回放的增量长度。
+
+    Args:
+        world_id: 世界ID
+
+    Returns:
+        int: 本次检查点的回合序号（从1开始）
+    """
+    with SessionLocal() as db:
+        try:
+            checkpoint = TurnCheckpoint(turn=_last_turn(db, world_id) + 1)
+            db.add(
+                WorldMutationLogDB(
+                    world_id=world_id,
+                    mutation_type=checkpoint.type,
+                    payload_json=checkpoint.model_dump_json(),
+                )
+            )
+
+            if checkpoint.turn % SNAPSHOT_INTERVAL_TURNS == 0:
+                world = _load_current_world_state(db, world_id)
+                if world is not None:
+                    write_world_snapshot(db, world_id, world)
+
+            db.commit()
+            logger.debug(
+                f"🏁 已记录回合检查点: 第 {checkpoint.turn} 回合 (世界ID: {world_id})"
+            )
+            return checkpoint.turn
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ 记录回合检查点失败: {e}")
+            raise
+
+
+def get_last_turn(world_id: UUID) -> int:
+    """获取最后一个回合检查点的回合序号
+
+    Args:
+        world_id: 世界ID
+
+    Returns:
+        int: 最后一个已结束的回合序号（还没有检查点时返回 0），进行中的回合为其 + 1
+    """
+    with ReadSessionLocal() as db:
+        return _last_turn(db, world_id)
+
+
+def load_world_state_at(world_id: UUID, seq: Optional[int] = None) -> Optional[World]:
+    """重建指定变更日志序号时的世界状态（不含上下文）
+
+    从 seq 之前最近的快照开始，回放 (快照seq, seq] 之间的变更。
+
+    Args:
+        world_id: 世界ID
+        seq: 变更日志序号（包含），为 None 时重建到最新
+
+    Returns:
+        Optional[World]: 重建的世界状态，没有可用快照时返回 None
+    """
+    with ReadSessionLocal() as db:
+        snapshot_query = select(WorldSnapshotDB).where(
+            WorldSnapshotDB.world_id == world_id
+        )
+        if seq is not None:
+            snapshot_query = snapshot_query.where(WorldSnapshotDB.seq <= seq)
+        snapshot = db.execute(
+            snapshot_query.order_by(WorldSnapshotDB.seq.desc()).limit(1)
+        ).scalar_one_or_none()
+
+        if snapshot is None:
+            logger.warning(f"⚠️ 世界没有可用的快照 (世界ID: {world_id}, seq: {seq})")
+            return None
+
+        log_query = (
+            select(WorldMutationLogDB.mutation_type, WorldMutationLogDB.payload_json)
+            .where(WorldMutationLogDB.world_id == world_id)
+            .where(WorldMutationLogDB.seq > snapshot.seq)
+        )
+        if seq is not None:
+            log_query = log_query.where(WorldMutationLogDB.seq <= seq)
+
+        mutations: List[WorldMutation] = []
+        for mutation_type, payload_json in db.execute(
+            log_query.order_by(WorldMutationLogDB.seq)
+        ):
+            mutation = decode_logged_mutation(mutation_type, payload_json)
+            if mutation is not None:
+                mutations.append(mutation)
+
+        logger.debug(
+            f"⏪ 从快照 seq={snapshot.seq} 回放 {len(mutations)} 条变更 (世界ID: {world_id})"
+        )
+        return replay_world_mutations(
+            World.model_validate_json(snapshot.snapshot_json), mutations
+        )
+
+
+def load_world_state_at_turn(world_id: UUID, turn: int) -> Optional[World]:
+    """重建指定回合检查点时的世界状态（不含上下文）
+
+    Args:
+        world_id: 世界ID
+        turn: 回合序号
+
+    Returns:
+        Optional[World]: 重建的世界状态，回合检查点不存在时返回 None
+    """
+    with ReadSessionLocal() as db:
+        seq = db.execute(
+            select(WorldMutationLogDB.seq)
+            .where(WorldMutationLogDB.world_id == world_id)
+            .where(WorldMutationLogDB.mutation_type == TURN_CHECKPOINT_TYPE)
+            .where(
+                WorldMutationLogDB.payload_json
+                == TurnCheckpoint(turn=turn).model_dump_json()
+            )
+        ).scalar_one_or_none()
+
+    if seq is None:
+        logger.warning(f"⚠️ 未找到回合检查点: 第 {turn} 回合 (世界ID: {world_id})")
+        return None
+
+    return load_world_state_at(world_id, seq)
+
+
+class WorldMutationDelta(BaseModel):
+    """指定日志序号之后的世界变更"""
+
+    latest_seq: int = Field(description="已读取的最后一条日志序号（没有新日志时不变）")
+    mutations: List[WorldMutation] = Field(
+        default_factory=list,
+        description="按顺序排列的变更（发生过整体同步时只包含最后一次同步之后的变更）",
+    )
+    resynced: bool = Field(
+        default=False,
+        description="期间是否发生过世界整体同步（场景/角色可能被新增或删除）",
+    )
+
+
+def load_world_mutations_since(world_id: UUID, after_seq: int) -> WorldMutationDelta:
+    """读取 after_seq 之后的变更日志（不含 after_seq）
+
+    Args:
+        world_id: 世界ID
+        after_seq: 上次读取到的日志序号
+
+    整体同步会覆盖之前的全部变更，遇到同步标记时丢弃已读取的变更，
+    调用方重新读取名称快照后只需应用同步之后的变更。
+
+    Returns:
+        WorldMutationDelta: 新增的变更，以及期间是否发生过整体同步
+    """
+    with ReadSessionLocal() as db:
+        delta = WorldMutationDelta(latest_seq=after_seq)
+        for seq, mutation_type, payload_json in db.execute(
+            select(
+                WorldMutationLogDB.seq,
+                WorldMutationLogDB.mutation_type,
+                WorldMutationLogDB.payload_json,
+            )
+            .where(WorldMutationLogDB.world_id == world_id)
+            .where(WorldMutationLogDB.seq > after_seq)
+            .order_by(WorldMutationLogDB.seq)
+        ):
+            delta.latest_seq = seq
+            if mutation_type == WORLD_SYNCED_TYPE:
+                delta.resynced = True
+                delta.mutations.clear()
+            mutation = decode_logged_mutation(mutation_type, payload_json)
+            if mutation is not None:
+                delta.mutations.append(mutation)
+        return delta
+
+
+# ============================================================================
+# 私有辅助函数
+# ============================================================================
+
+
+def _last_turn(db: Session, world_id: UUID) -> int:
+    """返回世界最后一个回合检查点的回合序号（没有检查点时返回 0）"""
+    last_payload = db.execute(
+        select(WorldMutationLogDB.payload_json)
+        .where(WorldMutationLogDB.world_id == world_id)
+        .where(WorldMutationLogDB.mutation_type == TURN_CHECKPOINT_TYPE)
+        .order_by(WorldMutationLogDB.seq.desc())
+        .limit(1)
+    ).scalar_one_or_none()
+    if last_payload is None:
+        return 0
+    return TurnCheckpoint.model_validate_json(last_payload).turn
+
+
+def _latest_log_seq(db: Session, world_id: UUID) -> int:
+    """返回世界最后一条变更日志的序号（没有日志时返回 0）"""
+    latest = db.execute(
+        select(func.max(WorldMutationLogDB.seq)).where(
+            WorldMutationLogDB.world_id == world_id
+        )
+    ).scalar_one_or_none()
+    return latest or 0
+
+
+def _load_current_world_state(db: Session, world_id: UUID) -> Optional[World]:
+    """从当前数据库行构建世界状态（不含上下文）"""
+    world_db = db.execute(
+        select(WorldDB)
+        .where(WorldDB.id == world_id)
+        .options(
+            selectinload(WorldDB.stages)
+            .selectinload(StageDB.actors)
+            .joinedload(ActorDB.attributes),
+            selectinload(WorldDB.stages)
+            .selectinload(StageDB.actors)
+            .selectinload(ActorDB.effects),
+            selectinload(WorldDB.stages)
+            .selectinload(StageDB.outgoing_connections)
+            .joinedload(StageConnectionDB.target_stage),
+        )
+    ).scalar_one_or_none()
+
+    if world_db is None:
+        return None
+    return world_db_to_model(world_db, trusted=True)
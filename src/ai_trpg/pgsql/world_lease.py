@@ -0,0 +1,245 @@
+"""
+世界租约（World Lease）模块
+
+基于 PostgreSQL 会话级 advisory lock 实现按世界划分的回合互斥：
+- 同一世界的回合在多个客户端/进程之间串行执行
+- 不同世界的回合互不影响，可以并行执行
+- 不使用表锁，只占用一个数据库连接
+
+租约超时：
+- acquire_timeout: 获取租约的最长等待时间，超时抛出 WorldLeaseTimeoutError
+- lease_ttl: 持有租约的连接设置 idle_session_timeout，
+  持有者挂起（心跳停止）超过 TTL 后由数据库断开会话，锁自动释放；
+  持有者进程退出时连接断开，锁同样立即释放
+
+租约丢失检测：
+- 心跳失败或会话断开后租约即丢失，其他持有者可能已经开始执行同一世界的回合
+- 回合在每个阶段/节点开始前与记录完成前调用 ensure_world_lease_held，
+  租约丢失时抛出 WorldLeaseLostError 中止回合，不再继续写入
+
+使用方法：
+    async with world_lease(world_id):
+        ...  # 执行一个回合
+        await ensure_world_lease_held()  # 阶段之间确认租约仍然有效
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncGenerator, Final, Optional
+from uuid import UUID
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from .client import engine
+
+# 默认租约参数
+DEFAULT_ACQUIRE_TIMEOUT: Final[float] = 30.0
+DEFAULT_LEASE_TTL: Final[float] = 600.0
+DEFAULT_POLL_INTERVAL: Final[float] = 0.5
+
+
+class WorldLeaseTimeoutError(Exception):
+    """在超时时间内未能获取世界租约"""
+
+    pass
+
+
+class WorldLeaseLostError(Exception):
+    """持有中的世界租约已丢失（心跳失败或会话断开）"""
+
+    pass
+
+
+# 当前上下文持有的世界租约（回合内创建的任务继承该上下文）
+_current_lease: ContextVar[Optional["WorldLease"]] = ContextVar(
+    "world_lease_current", default=None
+)
+
+
+def world_lock_key(world_id: UUID) -> int:
+    """将世界ID映射为 advisory lock 使用的 64 位有符号整数键
+
+    Args:
+        world_id: 世界ID
+
+    Returns:
+        int: advisory lock 键
+    """
+    return int.from_bytes(world_id.bytes[:8], byteorder="big", signed=True)
+
+
+class WorldLease:
+    """已获取的世界租约（持有一个专用数据库连接）"""
+
+    def __init__(
+        self, world_id: UUID, connection: Connection, lease_ttl: float
+    ) -> None:
+        self.world_id = world_id
+        self.lease_ttl = lease_ttl
+        self._connection = connection
+        self._key = world_lock_key(world_id)
+        # 串行化同一连接上的心跳与释放操作
+        self._connection_lock = asyncio.Lock()
+        self._heartbeat_task: Optional[asyncio.Task[None]] = None
+        self._lost = False
+
+    @property
+    def is_held(self) -> bool:
+        """租约是否仍然有效（心跳失败则视为已丢失）"""
+        return not self._lost
+
+    async def verify(self) -> None:
+        """在租约连接上执行一次心跳，确认会话（以及会话级的锁）仍然存在
+
+        Raises:
+            WorldLeaseLostError: 租约已丢失
+        """
+        if not self._lost:
+            try:
+                async with self._connection_lock:
+                    await asyncio.to_thread(self._ping)
+            except Exception as e:
+                self._lost = True
+                logger.error(f"❌ 世界租约已丢失: {self.world_id}, {e}")
+
+        if self._lost:
+            raise WorldLeaseLostError(f"世界租约已丢失: {self.world_id}")
+
+    def start_heartbeat(self) -> None:
+        """启动心跳任务，周期性刷新会话以免触发 idle_session_timeout"""
+        self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+
+    async def _heartbeat_loop(self) -> None:
+        interval = max(self.lease_ttl / 3, DEFAULT_POLL_INTERVAL)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with self._connection_lock:
+                    await asyncio.to_thread(self._ping)
+            except Exception as e:
+                self._lost = True
+                logger.error(
+                    f"❌ 世界租约心跳失败，租约可能已丢失: {self.world_id}, {e}"
+                )
+                return
+
+    async def release(self) -> None:
+        """释放租约并归还连接"""
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+
+        async with self._connection_lock:
+            try:
+                if self._lost:
+                    self._connection.invalidate()
+                else:
+                    await asyncio.to_thread(self._unlock_and_reset)
+                    logger.debug(f"🔓 已释放世界租约: {self.world_id}")
+            except Exception as e:
+                # 会话已断开时锁已由数据库释放
+                logger.warning(f"⚠️ 释放世界租约时连接异常（锁已随会话释放）: {e}")
+                self._connection.invalidate()
+            finally:
+                self._connection.close()
+
+    def _ping(self) -> None:
+        self._connection.execute(text("SELECT 1"))
+        # 提交以回到 idle 状态，使 idle_session_timeout 重新计时
+        self._connection.commit()
+
+    def _unlock_and_reset(self) -> None:
+        self._connection.execute(
+            text("SELECT pg_advisory_unlock(:key)"), {"key": self._key}
+        )
+        self._connection.execute(text("RESET idle_session_timeout"))
+        self._connection.commit()
+
+
+def _try_acquire(connection: Connection, key: int) -> bool:
+    acquired = connection.execute(
+        text("SELECT pg_try_advisory_lock(:key)"), {"key": key}
+    ).scalar_one()
+    # 提交以结束隐式事务，避免连接停留在 idle in transaction 状态
+    connection.commit()
+    return bool(acquired)
+
+
+def _set_lease_ttl(connection: Connection, lease_ttl: float) -> None:
+    try:
+        connection.execute(
+            text(f"SET idle_session_timeout = {int(lease_ttl * 1000)}"),
+        )
+        connection.commit()
+    except Exception as e:
+        # idle_session_timeout 需要 PostgreSQL 14+，低版本仅依赖连接断开释放锁
+        connection.rollback()
+        logger.warning(f"⚠️ 无法设置租约有效期（idle_session_timeout）: {e}")
+
+
+@asynccontextmanager
+async def world_lease(
+    world_id: UUID,
+    acquire_timeout: float = DEFAULT_ACQUIRE_TIMEOUT,
+    lease_ttl: float = DEFAULT_LEASE_TTL,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+) -> AsyncGenerator[WorldLease, None]:
+    """获取指定世界的租约，并在上下文结束时释放
+
+    Args:
+        world_id: 世界ID
+        acquire_timeout: 获取租约的最长等待秒数
+        lease_ttl: 租约有效期秒数（持有者失去响应超过该时间后锁自动释放）
+        poll_interval: 获取失败时的轮询间隔秒数
+
+    Yields:
+        WorldLease: 已获取的租约
+
+    Raises:
+        WorldLeaseTimeoutError: 超时仍未获取到租约
+    """
+    key = world_lock_key(world_id)
+    connection = await asyncio.to_thread(engine.connect)
+
+    try:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + acquire_timeout
+        while not await asyncio.to_thread(_try_acquire, connection, key):
+            if loop.time() >= deadline:
+                raise WorldLeaseTimeoutError(
+                    f"获取世界租约超时（{acquire_timeout}s）: {world_id}"
+                )
+            await asyncio.sleep(poll_interval)
+
+        await asyncio.to_thread(_set_lease_ttl, connection, lease_ttl)
+
+    except BaseException:
+        # 获取失败（超时/取消/异常）时丢弃连接，数据库会随会话结束释放可能已获得的锁
+        connection.invalidate()
+        connection.close()
+        raise
+
+    logger.debug(f"🔒 已获取世界租约: {world_id}")
+    lease = WorldLease(world_id, connection, lease_ttl)
+    lease.start_heartbeat()
+    lease_token = _current_lease.set(lease)
+    try:
+        yield lease
+    finally:
+        _current_lease.reset(lease_token)
+        await lease.release()
+
+
+async def ensure_world_lease_held() -> None:
+    """确认当前上下文持有的世界租约仍然有效（不在租约内时不做检查）
+
+    Raises:
+        WorldLeaseLostError: 租约已丢失，调用方应中止回合
+    """
+    lease = _current_lease.get()
+    if lease is not None:
+        await lease.verify()
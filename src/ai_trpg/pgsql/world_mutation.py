@@ -0,0 +1,114 @@
+"""
+世界状态变更（Mutation）数据模型
+
+定义一次场景执行中可能产生的所有状态变更类型，用于批量、原子地提交到数据库。
+每个变更对应一个原有的单项 MCP 工具：
+
+- update_actor_health: 更新角色生命值
+- update_actor_appearance: 更新角色外观
+- add_actor_effect: 添加角色 Effect
+- remove_actor_effect: 移除角色 Effect
+- move_actor_to_stage: 移动角色到目标场景（同时记录移动事件）
+- update_stage_info: 更新场景信息字段
+"""
+
+from typing import Annotated, Any, Dict, List, Literal, Optional, Union
+from pydantic import BaseModel, Field, TypeAdapter
+
+
+class UpdateActorHealthMutation(BaseModel):
+    """更新角色生命值（会被限制在 0 到 max_health 之间，归零则标记死亡）"""
+
+    type: Literal["update_actor_health"] = "update_actor_health"
+    actor_name: str = Field(description="角色名称")
+    new_health: int = Field(description="新的生命值（绝对值）")
+
+
+class UpdateActorAppearanceMutation(BaseModel):
+    """更新角色外观描述"""
+
+    type: Literal["update_actor_appearance"] = "update_actor_appearance"
+    actor_name: str = Field(description="角色名称")
+    new_appearance: str = Field(description="新的外观描述")
+
+
+class AddActorEffectMutation(BaseModel):
+    """为角色添加一个 Effect"""
+
+    type: Literal["add_actor_effect"] = "add_actor_effect"
+    actor_name: str = Field(description="角色名称")
+    effect_name: str = Field(description="Effect 名称")
+    effect_description: str = Field(description="Effect 描述")
+
+
+class RemoveActorEffectMutation(BaseModel):
+    """移除角色身上所有匹配名称的 Effect"""
+
+    type: Literal["remove_actor_effect"] = "remove_actor_effect"
+    actor_name: str = Field(description="角色名称")
+    effect_name: str = Field(description="要移除的 Effect 名称")
+
+
+class MoveActorToStageMutation(BaseModel):
+    """将角色移动到目标场景，并记录角色移动事件"""
+
+    type: Literal["move_actor_to_stage"] = "move_actor_to_stage"
+    actor_name: str = Field(description="角色名称")
+    target_stage_name: str = Field(description="目标场景名称")
+    entry_posture_and_status: str = Field(
+        default="", description="进入姿态与状态（格式：姿态 | 状态）"
+    )
+
+
+class UpdateStageInfoMutation(BaseModel):
+    """更新场景信息字段（未提供的字段保持不变）"""
+
+    type: Literal["update_stage_info"] = "update_stage_info"
+    stage_name: str = Field(description="场景名称")
+    environment: Optional[str] = Field(default=None, description="环境描述")
+    narrative: Optional[str] = Field(default=None, description="叙事文本")
+    actor_states: Optional[str] = Field(default=None, description="角色状态信息")
+    connections: Optional[str] = Field(default=None, description="场景连通性")
+    expected_version: Optional[int] = Field(
+        default=None, description="期望的场景版本号（提供时不匹配则视为冲突）"
+    )
+
+
+# 所有变更类型的联合（通过 type 字段区分）
+WorldMutation = Annotated[
+    Union[
+        UpdateActorHealthMutation,
+        UpdateActorAppearanceMutation,
+        AddActorEffectMutation,
+        RemoveActorEffectMutation,
+        MoveActorToStageMutation,
+        UpdateStageInfoMutation,
+    ],
+    Field(discriminator="type"),
+]
+
+world_mutation_adapter: TypeAdapter[WorldMutation] = TypeAdapter(WorldMutation)
+
+
+class WorldMutationResult(BaseModel):
+    """单个变更的执行结果"""
+
+    index: int = Field(description="变更在批次中的序号（从0开始）")
+    type: str = Field(description="变更类型")
+    success: bool = Field(description="是否执行成功")
+    data: Dict[str, Any] = Field(default_factory=dict, description="执行结果数据")
+    error: Optional[str] = Field(default=None, description="失败原因")
+
+
+class WorldMutationBatchResult(BaseModel):
+    """批量变更的执行结果"""
+
+    committed: bool = Field(description="本批次是否已提交到数据库")
+    results: List[WorldMutationResult] = Field(
+        default_factory=list, description="逐条变更的执行结果"
+    )
+
+    @property
+    def all_succeeded(self) -> bool:
+        """是否所有变更都执行成功"""
+        return all(result.success for result in self.results)
@@ -0,0 +1,47 @@
+"""
+世界变更日志数据模型
+
+按世界记录每一次生效的状态变更（生命值、Effect、移动、场景字段等），
+以及回合检查点等标记。seq 全局递增，同一世界内的顺序即变更的应用顺序。
+"""
+
+from datetime import datetime
+from uuid import UUID
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Identity, Index, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+
+
+class WorldMutationLogDB(Base):
+    """世界变更日志表（只追加）"""
+
+    __tablename__ = "world_mutation_log"
+
+    # 日志序号（自增），回放与快照都以它定位
+    seq: Mapped[int] = mapped_column(
+        BigInteger, Identity(), primary_key=True, comment="日志序号"
+    )
+
+    # 外键：绑定到 World
+    world_id: Mapped[UUID] = mapped_column(
+        ForeignKey("worlds.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="所属世界ID",
+    )
+
+    mutation_type: Mapped[str] = mapped_column(
+        String(64), nullable=False, comment="变更类型（WorldMutation.type 或标记类型）"
+    )
+
+    payload_json: Mapped[str] = mapped_column(
+        Text, nullable=False, comment="变更内容的 JSON 序列化结果"
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.now, nullable=False, comment="记录时间"
+    )
+
+    # 表约束和索引
+    __table_args__ = (
+        Index("idx_world_mutation_log_seq", "world_id", "seq"),  # 按世界顺序回放
+    )
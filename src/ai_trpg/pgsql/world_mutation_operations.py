@@ -0,0 +1,350 @@
+"""
+世界状态批量变更操作模块
+
+提供 apply_world_mutations：在同一个事务中应用一组类型化的世界状态变更，
+使一次场景执行的所有状态写入只需一次数据库往返，并保证原子性。
+"""
+
+from typing import Any, Dict, List, Sequence, Set
+from uuid import UUID
+from loguru import logger
+from sqlalchemy.orm import Session, joinedload
+from .client import SessionLocal
+from .actor import ActorDB
+from .stage import StageDB
+from .effect import EffectDB
+from .actor_movement_event import ActorMovementEventDB
+from .change_feed import publish_world_change
+from .optimistic_lock import (
+    bump_version,
+    loaded_version,
+    retry_on_version_conflict,
+)
+from .world_history_operations import log_world_mutation
+from .world_mutation import (
+    WorldMutation,
+    WorldMutationResult,
+    WorldMutationBatchResult,
+    UpdateActorHealthMutation,
+    UpdateActorAppearanceMutation,
+    AddActorEffectMutation,
+    RemoveActorEffectMutation,
+    MoveActorToStageMutation,
+    UpdateStageInfoMutation,
+)
+
+
+@retry_on_version_conflict()
+def apply_world_mutations(
+    world_id: UUID,
+    mutations: Sequence[WorldMutation],
+    atomic: bool = True,
+) -> WorldMutationBatchResult:
+    """在一个事务中批量应用世界状态变更
+
+    本批次涉及的角色与场景会被一次性预加载，逐条应用变更后统一提交。
+    被修改的角色与场景会递增版本号，与并发写入冲突时整批基于最新状态重试。
+
+    Args:
+        world_id: 所属世界ID
+        mutations: 要应用的变更列表（按顺序执行）
+        atomic: 是否原子提交。为 True 时任意一条变更失败则整批回滚
+
+    Returns:
+        WorldMutationBatchResult: 是否已提交，以及逐条变更的执行结果
+
+    Raises:
+        VersionConflictError: 并发冲突重试耗尽
+        Exception: 数据库操作失败时抛出异常（整批回滚）
+    """
+    if not mutations:
+        return WorldMutationBatchResult(committed=False, results=[])
+
+    with SessionLocal() as db:
+        try:
+            actors = _preload_actors(db, world_id, mutations)
+            stages = _preload_stages(db, world_id, mutations)
+
+            results: List[WorldMutationResult] = []
+            for index, mutation in enumerate(mutations):
+                results.append(
+                    _apply_world_mutation(db, world_id, index, mutation, actors, stages)
+                )
+
+            failed_count = sum(1 for result in results if not result.success)
+            if atomic and failed_count > 0:
+                db.rollback()
+                logger.warning(
+                    f"⚠️ 批量变更中有 {failed_count}/{len(results)} 条失败，已整批回滚 (世界ID: {world_id})"
+                )
+                return WorldMutationBatchResult(committed=False, results=results)
+
+            _publish_batch_changes(db, world_id, mutations, results, actors, stages)
+            db.commit()
+            logger.debug(
+                f"✅ 批量变更已提交: {len(results) - failed_count}/{len(results)} 条成功 (世界ID: {world_id})"
+            )
+            return WorldMutationBatchResult(committed=True, results=results)
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ 批量应用世界变更失败: {e}")
+            raise
+
+
+# ============================================================================
+# 私有辅助函数
+# ============================================================================
+
+
+def _preload_actors(
+    db: Session, world_id: UUID, mutations: Sequence[WorldMutation]
+) -> Dict[str, ActorDB]:
+    """一次性加载本批次涉及的所有角色（含 stage 与 attributes）"""
+    actor_names: Set[str] = {
+        mutation.actor_name
+        for mutation in mutations
+        if not isinstance(mutation, UpdateStageInfoMutation)
+    }
+    if not actor_names:
+        return {}
+
+    actors = (
+        db.query(ActorDB)
+        .options(joinedload(ActorDB.stage), joinedload(ActorDB.attributes))
+        .join(ActorDB.stage)
+        .filter(StageDB.world_id == world_id)
+        .filter(ActorDB.name.in_(actor_names))
+        .all()
+    )
+    return {actor.name: actor for actor in actors}
+
+
+def _preload_stages(
+    db: Session, world_id: UUID, mutations: Sequence[WorldMutation]
+) -> Dict[str, StageDB]:
+    """一次性加载本批次涉及的所有场景"""
+    stage_names: Set[str] = set()
+    for mutation in mutations:
+        if isinstance(mutation, UpdateStageInfoMutation):
+            stage_names.add(mutation.stage_name)
+        elif isinstance(mutation, MoveActorToStageMutation):
+            stage_names.add(mutation.target_stage_name)
+    if not stage_names:
+        return {}
+
+    stages = (
+        db.query(StageDB)
+        .filter(StageDB.world_id == world_id)
+        .filter(StageDB.name.in_(stage_names))
+        .all()
+    )
+    return {stage.name: stage for stage in stages}
+
+
+def _publish_batch_changes(
+    db: Session,
+    world_id: UUID,
+    mutations: Sequence[WorldMutation],
+    results: List[WorldMutationResult],
+    actors: Dict[str, ActorDB],
+    stages: Dict[str, StageDB],
+) -> None:
+    """为本批次中实际被修改的角色与场景各发布一条变更通知"""
+    changed_actors: Dict[str, ActorDB] = {}
+    changed_stages: Dict[str, StageDB] = {}
+
+    for mutation, result in zip(mutations, results):
+        if not result.success:
+            continue
+        match mutation:
+            case UpdateStageInfoMutation():
+                changed_stages[mutation.stage_name] = stages[mutation.stage_name]
+            case MoveActorToStageMutation():
+                changed_actors[mutation.actor_name] = actors[mutation.actor_name]
+                if result.data.get("moved"):
+                    target_stage = stages[mutation.target_stage_name]
+                    source_stage_name = str(result.data["source_stage"])
+                    changed_stages[target_stage.name] = target_stage
+                    source_stage = changed_stages.get(source_stage_name)
+                    if source_stage is None:
+                        source_stage = (
+                            db.query(StageDB)
+                            .filter(StageDB.world_id == world_id)
+                            .filter(StageDB.name == source_stage_name)
+                            .one()
+                        )
+                    changed_stages[source_stage_name] = source_stage
+            case _:
+                changed_actors[mutation.actor_name] = actors[mutation.actor_name]
+
+    for actor in changed_actors.values():
+        publish_world_change(db, world_id, "actor", actor.name, actor.version)
+    for stage in changed_stages.values():
+        publish_world_change(db, world_id, "stage", stage.name, stage.version)
+
+
+def _apply_world_mutation(
+    db: Session,
+    world_id: UUID,
+    index: int,
+    mutation: WorldMutation,
+    actors: Dict[str, ActorDB],
+    stages: Dict[str, StageDB],
+) -> WorldMutationResult:
+    """应用单个变更（不提交），返回执行结果"""
+
+    def _failure(error: str) -> WorldMutationResult:
+        logger.error(f"❌ 变更[{index}] {mutation.type} 失败: {error}")
+        return WorldMutationResult(
+            index=index, type=mutation.type, success=False, error=error
+        )
+
+    def _success(**data: Any) -> WorldMutationResult:
+        return WorldMutationResult(
+            index=index, type=mutation.type, success=True, data=data
+        )
+
+    match mutation:
+        case UpdateStageInfoMutation():
+            stage = stages.get(mutation.stage_name)
+            if stage is None:
+                return _failure(f"未找到场景: {mutation.stage_name}")
+            # 与读取时的版本比较（本批次中先前的移动可能已递增过该场景的版本）
+            if (
+                mutation.expected_version is not None
+                and loaded_version(stage) != mutation.expected_version
+            ):
+                return _failure(
+                    f"场景版本冲突: 期望 {mutation.expected_version}, 实际 {loaded_version(stage)}"
+                )
+
+            updated_fields: List[str] = []
+            for field_name in (
+                "environment",
+                "narrative",
+                "actor_states",
+                "connections",
+            ):
+                value = getattr(mutation, field_name)
+                if value is not None:
+                    setattr(stage, field_name, value)
+                    updated_fields.append(field_name)
+
+            if not updated_fields:
+                return _failure("未提供任何要更新的字段")
+            bump_version(stage)
+            log_world_mutation(
+                db, world_id, mutation.model_copy(update={"expected_version": None})
+            )
+            return _success(stage=stage.name, updated_fields=updated_fields)
+
+        case MoveActorToStageMutation():
+            actor = actors.get(mutation.actor_name)
+            if actor is None:
+                return _failure(f"未找到角色: {mutation.actor_name}")
+            target_stage = stages.get(mutation.target_stage_name)
+            if target_stage is None:
+                return _failure(f"未找到目标场景: {mutation.target_stage_name}")
+
+            source_stage_name = actor.stage.name
+            if actor.stage_id == target_stage.id:
+                return _success(
+                    actor=actor.name,
+                    source_stage=source_stage_name,
+                    target_stage=target_stage.name,
+                    moved=False,
+                )
+
+            source_stage = actor.stage
+            actor.stage = target_stage
+            bump_version(actor, source_stage, target_stage)
+            log_world_mutation(db, world_id, mutation)
+            db.add(
+                ActorMovementEventDB(
+                    world_id=world_id,
+                    actor_name=actor.name,
+                    from_stage=source_stage_name,
+                    to_stage=target_stage.name,
+                    description=f"成功将角色 '{actor.name}' 从场景 '{source_stage_name}' 移动到 '{target_stage.name}', 进入姿态与状态: {mutation.entry_posture_and_status}",
+                    entry_posture_and_status=mutation.entry_posture_and_status,
+                )
+            )
+            return _success(
+                actor=actor.name,
+                source_stage=source_stage_name,
+                target_stage=target_stage.name,
+                moved=True,
+            )
+
+        case UpdateActorHealthMutation():
+            actor = actors.get(mutation.actor_name)
+            if actor is None:
+                return _failure(f"未找到角色: {mutation.actor_name}")
+
+            old_health = actor.attributes.health
+            max_health = actor.attributes.max_health
+            clamped_health = max(0, min(mutation.new_health, max_health))
+            actor.attributes.health = clamped_health
+            bump_version(actor)
+            log_world_mutation(
+                db, world_id, mutation.model_copy(update={"new_health": clamped_health})
+            )
+            if clamped_health == 0:
+                actor.is_dead = True
+                logger.warning(f"💀 角色 '{actor.name}' 生命值归零，已标记为死亡")
+            return _success(
+                actor=actor.name,
+                old_health=old_health,
+                new_health=clamped_health,
+                max_health=max_health,
+            )
+
+        case UpdateActorAppearanceMutation():
+            actor = actors.get(mutation.actor_name)
+            if actor is None:
+                return _failure(f"未找到角色: {mutation.actor_name}")
+
+            old_appearance = actor.appearance
+            actor.appearance = mutation.new_appearance
+            bump_version(actor)
+            log_world_mutation(db, world_id, mutation)
+            return _success(actor=actor.name, old_appearance=old_appearance)
+
+        case AddActorEffectMutation():
+            actor = actors.get(mutation.actor_name)
+            if actor is None:
+                return _failure(f"未找到角色: {mutation.actor_name}")
+
+            db.add(
+                EffectDB(
+                    actor_id=actor.id,
+                    name=mutation.effect_name,
+                    description=mutation.effect_description,
+                )
+            )
+            bump_version(actor)
+            log_world_mutation(db, world_id, mutation)
+            return _success(actor=actor.name, effect=mutation.effect_name)
+
+        case RemoveActorEffectMutation():
+            actor = actors.get(mutation.actor_name)
+            if actor is None:
+                return _failure(f"未找到角色: {mutation.actor_name}")
+
+            # 先刷新本批次中待写入的 Effect，保证"先添加后移除"的顺序语义
+            db.flush()
+            removed_count = (
+                db.query(EffectDB)
+                .filter(EffectDB.actor_id == actor.id)
+                .filter(EffectDB.name == mutation.effect_name)
+                .delete(synchronize_session=False)
+            )
+            if removed_count > 0:
+                bump_version(actor)
+                log_world_mutation(db, world_id, mutation)
+            return _success(
+                actor=actor.name,
+                effect=mutation.effect_name,
+                removed_count=removed_count,
+            )
@@ -5,21 +5,33 @@ World 数据库操作模块
 - save_world_to_db: 保存 World 到数据库
 - load_world_from_db: 从数据库加载 World
 - get_world_id_by_name: 通过 world_name 获取数据库 world_id
+- get_world_entity_names: 获取世界中所有场景、角色的名称
 - delete_world: 删除 World
 """
 
-from typing import Optional, Tuple
-from uuid import UUID
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+from langchain_core.messages import BaseMessage
 from loguru import logger
+from pydantic import BaseModel, Field
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload, selectinload
 from ..demo.models import World
-from .client import SessionLocal
-from .world import WorldDB
+from .client import ReadSessionLocal, SessionLocal
+from .world import WorldDB, world_db_to_model
 from .stage import StageDB
 from .stage_connection import StageConnectionDB
 from .actor import ActorDB
 from .attributes import AttributesDB
 from .effect import EffectDB
-from .message import MessageDB
+from .message import MessageDB, messages_db_to_langchain
+from .change_feed import publish_world_change
+from .name_cache import find_actor_by_name, find_stage_by_name, world_name_cache
+from .optimistic_lock import bump_version, retry_on_version_conflict
+from .world_history_operations import log_world_mutation, write_world_snapshot
+from .world_mutation import MoveActorToStageMutation
+from .world_mutation_log import WorldMutationLogDB
+from .world_partitions import create_world_partitions, drop_world_partitions
 
 
 def save_world_to_db(world: World) -> WorldDB:
@@ -36,10 +48,15 @@ def save_world_to_db(world: World) -> WorldDB:
     Raises:
         Exception: 数据库操作失败时抛出异常
     """
+    # 0. 按世界分区时，先在独立的短事务中创建该世界的分区（预先生成 ID）
+    world_id = uuid4()
+    create_world_partitions(world_id)
+
     with SessionLocal() as db:
         try:
-            # 1. 创建 WorldDB
+            # 1. 创建 WorldDB（消息需要记录所属世界）
             world_db = WorldDB(
+                id=world_id,
                 name=world.name,
                 campaign_setting=world.campaign_setting,
             )
@@ -49,6 +66,7 @@ def save_world_to_db(world: World) -> WorldDB:
                 message_db = MessageDB(
                     sequence=idx,
                     message_json=message.model_dump_json(),
+                    owner_world_id=world_db.id,
                 )
                 world_db.context.append(message_db)
 
@@ -71,6 +89,7 @@ def save_world_to_db(world: World) -> WorldDB:
                     message_db = MessageDB(
                         sequence=idx,
                         message_json=message.model_dump_json(),
+                        owner_world_id=world_db.id,
                     )
                     stage_db.context.append(message_db)
 
@@ -104,6 +123,7 @@ def save_world_to_db(world: World) -> WorldDB:
                         message_db = MessageDB(
                             sequence=idx,
                             message_json=message.model_dump_json(),
+                            owner_world_id=world_db.id,
                         )
                         actor_db.context.append(message_db)
 
@@ -130,6 +150,9 @@ def save_world_to_db(world: World) -> WorldDB:
 
             # 7. 提交到数据库
             db.add(world_db)
+            db.flush()
+            write_world_snapshot(db, world_db.id, world)
+            publish_world_change(db, world_db.id, "world", world_db.name)
             db.commit()
             db.refresh(world_db)
 
@@ -141,6 +164,87 @@ def save_world_to_db(world: World) -> WorldDB:
         except Exception as e:
             db.rollback()
             logger.error(f"❌ 保存 World '{world.name}' 失败: {e}")
+            drop_world_partitions(world_id)
+            raise
+
+
+def load_world_from_db(world_name: str, trusted: bool = True) -> Optional[World]:
+    """从数据库加载完整的 pydantic World（含所有对话上下文）
+
+    查询数与世界规模无关：
+    1. World
+    2. Stages
+    3. Actors + Attributes
+    4. Effects
+    5. StageConnections + 目标场景
+    6. 该世界的全部 Messages（按 owner_world_id 一次取出，再按所属对象分组）
+
+    Args:
+        world_name: 世界名称
+        trusted: 是否信任数据库中的数据（默认 True）。为 True 时用 model_construct
+            构造模型，跳过 pydantic 校验
+
+    Returns:
+        Optional[World]: 世界模型，不存在时返回 None
+
+    Raises:
+        Exception: 数据库操作失败时抛出异常
+    """
+    with ReadSessionLocal() as db:
+        try:
+            world_db = db.execute(
+                select(WorldDB)
+                .where(WorldDB.name == world_name)
+                .options(
+                    selectinload(WorldDB.stages)
+                    .selectinload(StageDB.actors)
+                    .joinedload(ActorDB.attributes),
+                    selectinload(WorldDB.stages)
+                    .selectinload(StageDB.actors)
+                    .selectinload(ActorDB.effects),
+                    selectinload(WorldDB.stages)
+                    .selectinload(StageDB.outgoing_connections)
+                    .joinedload(StageConnectionDB.target_stage),
+                )
+            ).scalar_one_or_none()
+
+            if not world_db:
+                logger.warning(f"⚠️ World '{world_name}' 不存在于数据库")
+                return None
+
+            message_dbs = (
+                db.execute(
+                    select(MessageDB)
+                    .where(MessageDB.owner_world_id == world_db.id)
+                    .order_by(MessageDB.sequence)
+                )
+                .scalars()
+                .all()
+            )
+
+            # 按所属对象（World/Stage/Actor）分组，保持 sequence 顺序
+            grouped: Dict[UUID, List[MessageDB]] = {}
+            for message_db in message_dbs:
+                owner_id = (
+                    message_db.world_id or message_db.stage_id or message_db.actor_id
+                )
+                assert owner_id is not None
+                grouped.setdefault(owner_id, []).append(message_db)
+
+            contexts: Dict[UUID, List[BaseMessage]] = {
+                owner_id: messages_db_to_langchain(owner_messages, trusted=trusted)
+                for owner_id, owner_messages in grouped.items()
+            }
+
+            world = world_db_to_model(world_db, contexts, trusted=trusted)
+            logger.debug(
+                f"📋 已加载 World '{world_name}': {len(world.stages)} 个 Stage, "
+                f"{len(world.get_all_actors())} 个 Actor, {len(message_dbs)} 条消息"
+            )
+            return world
+
+        except Exception as e:
+            logger.error(f"❌ 加载 World '{world_name}' 失败: {e}")
             raise
 
 
@@ -155,7 +259,7 @@ def get_world_id_by_name(world_name: str) -> Optional[UUID]:
     Returns:
         UUID | None: 数据库中的 world_id,未找到则返回 None
     """
-    with SessionLocal() as db:
+    with ReadSessionLocal() as db:
         try:
             world_db = db.query(WorldDB).filter_by(name=world_name).first()
             if not world_db:
@@ -167,10 +271,78 @@ def get_world_id_by_name(world_name: str) -> Optional[UUID]:
             raise
 
 
+class WorldEntityNames(BaseModel):
+    """世界中场景/角色的名称与归属（不含实体数据）"""
+
+    world_id: UUID = Field(description="世界ID")
+    log_seq: int = Field(description="读取前最后一条变更日志的序号（没有日志时为 0）")
+    stage_names: List[str] = Field(default_factory=list, description="场景名称列表")
+    actor_stage_names: Dict[str, str] = Field(
+        default_factory=dict, description="角色名称 → 所在场景名称"
+    )
+    dead_actor_names: List[str] = Field(
+        default_factory=list, description="已死亡的角色名称列表"
+    )
+
+
+def get_world_entity_names(world_name: str) -> Optional[WorldEntityNames]:
+    """获取世界ID以及所有场景、角色的名称（不加载任何实体数据）
+
+    用于按需创建代理：启动时只需要名称，实体数据在使用时再读取。
+    log_seq 在读取名称之前获取，其后的变更可以通过变更日志增量获得
+    （与名称读取之间提交的变更会被重复应用，移动与死亡都是幂等的）。
+
+    Args:
+        world_name: World 名称
+
+    Returns:
+        Optional[WorldEntityNames]: 场景/角色名称与归属，World 不存在时返回 None
+    """
+    with ReadSessionLocal() as db:
+        try:
+            world_id = db.execute(
+                select(WorldDB.id).where(WorldDB.name == world_name)
+            ).scalar_one_or_none()
+            if world_id is None:
+                logger.warning(f"⚠️ World '{world_name}' 不存在于数据库")
+                return None
+
+            log_seq = db.execute(
+                select(func.max(WorldMutationLogDB.seq)).where(
+                    WorldMutationLogDB.world_id == world_id
+                )
+            ).scalar_one_or_none()
+
+            stage_names = list(
+                db.execute(
+                    select(StageDB.name).where(StageDB.world_id == world_id)
+                ).scalars()
+            )
+
+            entity_names = WorldEntityNames(
+                world_id=world_id, log_seq=log_seq or 0, stage_names=stage_names
+            )
+            for actor_name, stage_name, is_dead in db.execute(
+                select(ActorDB.name, StageDB.name, ActorDB.is_dead)
+                .join(ActorDB.stage)
+                .where(StageDB.world_id == world_id)
+            ):
+                entity_names.actor_stage_names[actor_name] = stage_name
+                if is_dead:
+                    entity_names.dead_actor_names.append(actor_name)
+            return entity_names
+
+        except Exception as e:
+            logger.error(f"❌ 获取 World '{world_name}' 的实体名称失败: {e}")
+            raise
+
+
 def delete_world(world_name: str) -> bool:
     """从数据库删除 World
 
     由于 CASCADE 删除配置,会自动删除关联的 Stages/Actors/Attributes/Effects/Messages
+    按世界分区时，先在删除数据的事务之外 DETACH CONCURRENTLY + DROP 该世界的
+    messages/actor_plans/actor_movement_events 分区
 
     Args:
         world_name: World 名称
@@ -196,8 +368,16 @@ def delete_world(world_name: str) -> bool:
                 logger.warning(f"⚠️ World '{world_name}' 不存在于数据库")
                 return False
 
+            # 分区在独立的 AUTOCOMMIT 连接上 DETACH CONCURRENTLY，
+            # 它会等待未结束的事务，因此先结束本会话的事务
+            world_id = world_db.id
+            db.commit()
+            drop_world_partitions(world_id)
+
+            publish_world_change(db, world_db.id, "world", world_db.name)
             db.delete(world_db)
             db.commit()
+            world_name_cache.invalidate_world(world_db.name, world_db.id)
 
             logger.success(
                 f"✅ World '{world_name}' 已从数据库删除 (CASCADE 删除所有关联数据)"
@@ -231,6 +411,7 @@ def set_world_kickoff(world_name: str, kickoff: bool) -> bool:
                 return False
 
             world_db.is_kicked_off = kickoff
+            publish_world_change(db, world_db.id, "world", world_db.name)
             db.commit()
 
             logger.success(f"✅ World '{world_name}' 的 kickoff 已设置为 {kickoff}")
@@ -254,7 +435,7 @@ def get_world_kickoff(world_name: str) -> Optional[bool]:
     Raises:
         Exception: 数据库操作失败时抛出异常
     """
-    with SessionLocal() as db:
+    with ReadSessionLocal() as db:
         try:
             world_db = db.query(WorldDB).filter_by(name=world_name).first()
             if not world_db:
@@ -287,7 +468,7 @@ def get_world(world_name: str) -> Optional[WorldDB]:
     Raises:
         Exception: 数据库操作失败时抛出异常
     """
-    with SessionLocal() as db:
+    with ReadSessionLocal() as db:
         try:
             from sqlalchemy.orm import joinedload
 
@@ -324,6 +505,7 @@ def get_world(world_name: str) -> Optional[WorldDB]:
             raise
 
 
+@retry_on_version_conflict()
 def move_actor_to_stage(
     world_id: UUID, actor_name: str, target_stage_name: str
 ) -> Tuple[bool, str]:
@@ -331,6 +513,7 @@ def move_actor_to_stage(
 
     这是一个纯粹的数据库操作函数，直接修改 ActorDB 的 stage_id 外键。
     不涉及内存中的 Pydantic 模型，所有操作都在数据库层面完成。
+    移动会同时递增角色、源场景和目标场景的版本号，使跨场景的并发写入能被检测到。
 
     Args:
         world_id: 所属世界ID
@@ -348,12 +531,7 @@ def move_actor_to_stage(
     with SessionLocal() as db:
         try:
             # 1. 查找目标场景（必须属于指定世界）
-            target_stage = (
-                db.query(StageDB)
-                .filter(StageDB.name == target_stage_name)
-                .filter(StageDB.world_id == world_id)
-                .first()
-            )
+            target_stage = find_stage_by_name(db, world_id, target_stage_name)
 
             if not target_stage:
                 logger.error(
@@ -362,12 +540,8 @@ def move_actor_to_stage(
                 return False, "未知"
 
             # 2. 查找角色及其当前场景（必须属于指定世界）
-            actor = (
-                db.query(ActorDB)
-                .join(ActorDB.stage)
-                .filter(ActorDB.name == actor_name)
-                .filter(StageDB.world_id == world_id)
-                .first()
+            actor = find_actor_by_name(
+                db, world_id, actor_name, joinedload(ActorDB.stage)
             )
 
             if not actor:
@@ -386,6 +560,18 @@ def move_actor_to_stage(
 
             # 5. 执行移动：更新 Actor 的 stage_id 外键
             actor.stage_id = target_stage.id
+            source_stage = actor.stage
+            bump_version(actor, source_stage, target_stage)
+            log_world_mutation(
+                db,
+                world_id,
+                MoveActorToStageMutation(
+                    actor_name=actor.name, target_stage_name=target_stage.name
+                ),
+            )
+            publish_world_change(db, world_id, "actor", actor.name, actor.version)
+            for stage in (source_stage, target_stage):
+                publish_world_change(db, world_id, "stage", stage.name, stage.version)
 
             # 6. 提交更改
             db.commit()
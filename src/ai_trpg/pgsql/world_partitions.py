@@ -0,0 +1,165 @@
+"""
+按世界分区（World Partitions）模块
+
+开启 postgresql_config.partition_by_world 后，以下表按世界做 LIST 分区：
+- messages: 分区键 owner_world_id（消息所属世界，无论归属 World/Stage/Actor）
+- actor_plans: 分区键 world_id（分区为 UNLOGGED）
+- actor_movement_events: 分区键 world_id（分区为 UNLOGGED）
+
+每个世界在保存时创建自己的分区，删除时 DETACH + DROP 分区，
+无需逐行 DELETE；索引也按分区建立，大小只与单个世界相关。
+分区的 DDL 不放在保存/删除数据的长事务里：建表后用 ATTACH、删除前用
+DETACH ... CONCURRENTLY，父表只持有 SHARE UPDATE EXCLUSIVE 锁，
+不会阻塞其他世界对共享父表的读写。
+
+注意：
+- 分区表的父表不能是 UNLOGGED，因此 UNLOGGED 声明移到每个分区上
+- 分区表的主键/唯一约束必须包含分区键，见 world_partition_key_columns
+- 未开启时各表保持原有结构，本模块的函数不做任何操作
+"""
+
+from typing import Any, Dict, Final, Optional, Tuple
+from uuid import UUID
+from loguru import logger
+from sqlalchemy import Connection, text
+from .client import engine
+from .config import postgresql_config
+
+# 是否按世界分区（建表时确定，运行中不可切换）
+PARTITION_BY_WORLD: Final[bool] = postgresql_config.partition_by_world
+
+# 按世界分区的表: (表名, 分区键, 分区是否为 UNLOGGED)
+WORLD_PARTITIONED_TABLES: Final[Tuple[Tuple[str, str, bool], ...]] = (
+    ("messages", "owner_world_id", False),
+    ("actor_plans", "world_id", True),
+    ("actor_movement_events", "world_id", True),
+)
+
+
+def world_partitioned_table_kwargs(
+    partition_key: str, unlogged: bool = False
+) -> Dict[str, Any]:
+    """返回按世界分区的表的 __table_args__ 字典部分
+
+    Args:
+        partition_key: 分区键列名
+        unlogged: 未分区时是否声明为 UNLOGGED 表（分区时改为在分区上声明）
+
+    Returns:
+        Dict[str, Any]: 放在 __table_args__ 最后一个元素的表参数
+    """
+    if PARTITION_BY_WORLD:
+        return {"postgresql_partition_by": f"LIST ({partition_key})"}
+    if unlogged:
+        return {"prefixes": ["UNLOGGED"]}
+    return {}
+
+
+def world_partition_key_columns(partition_key: str, *columns: str) -> Tuple[str, ...]:
+    """返回唯一约束的列（分区时在前面加上分区键）
+
+    Args:
+        partition_key: 分区键列名
+        *columns: 原唯一约束的列
+
+    Returns:
+        Tuple[str, ...]: 唯一约束实际使用的列
+    """
+    if PARTITION_BY_WORLD:
+        return (partition_key, *columns)
+    return columns
+
+
+def world_partition_name(table_name: str, world_id: UUID) -> str:
+    """返回世界分区的表名（如 messages_<world_id hex>）"""
+    return f"{table_name}_{world_id.hex}"
+
+
+def create_world_partitions(world_id: UUID) -> None:
+    """为世界创建并挂载所有分区（未开启分区时不做任何操作）
+
+    每张表在自己的短事务中先建普通表，再 ATTACH PARTITION 挂到父表上：
+    ATTACH 只对父表加 SHARE UPDATE EXCLUSIVE 锁，不阻塞其他世界的读写；
+    而 CREATE TABLE ... PARTITION OF 会对父表加 ACCESS EXCLUSIVE 锁。
+    须在保存该世界数据的事务之前调用，不要放进那个事务里。
+
+    Args:
+        world_id: 世界ID
+    """
+    if not PARTITION_BY_WORLD:
+        return
+
+    for table_name, _, unlogged in WORLD_PARTITIONED_TABLES:
+        partition_name = world_partition_name(table_name, world_id)
+        with engine.begin() as conn:
+            exists, _ = _partition_state(conn, partition_name)
+            if exists:
+                continue
+
+            conn.execute(
+                text(
+                    f'CREATE {"UNLOGGED " if unlogged else ""}TABLE "{partition_name}" '
+                    f'(LIKE "{table_name}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+                )
+            )
+            conn.execute(
+                text(
+                    f'ALTER TABLE "{table_name}" ATTACH PARTITION "{partition_name}" '
+                    f"FOR VALUES IN ('{world_id}')"
+                )
+            )
+
+    logger.debug(f"🗂️ 已创建世界分区 (世界ID: {world_id})")
+
+
+def drop_world_partitions(world_id: UUID) -> None:
+    """DETACH CONCURRENTLY 并 DROP 世界的所有分区（未开启分区时不做任何操作）
+
+    DETACH ... CONCURRENTLY 不能在事务块中执行，这里使用 AUTOCOMMIT 连接，
+    父表只加 SHARE UPDATE EXCLUSIVE 锁。它会等待正在使用父表的事务结束，
+    因此调用方不能持有未结束的事务；须在删除该世界数据的事务之前调用。
+    上次中断而停在 detach pending 状态的分区用 FINALIZE 完成分离。
+
+    Args:
+        world_id: 世界ID
+    """
+    if not PARTITION_BY_WORLD:
+        return
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table_name, _, _ in WORLD_PARTITIONED_TABLES:
+            partition_name = world_partition_name(table_name, world_id)
+            exists, detach_pending = _partition_state(conn, partition_name)
+            if not exists:
+                continue
+
+            if detach_pending is True:
+                conn.execute(
+                    text(
+                        f'ALTER TABLE "{table_name}" DETACH PARTITION "{partition_name}" FINALIZE'
+                    )
+                )
+            elif detach_pending is False:
+                conn.execute(
+                    text(
+                        f'ALTER TABLE "{table_name}" DETACH PARTITION "{partition_name}" CONCURRENTLY'
+                    )
+                )
+            conn.execute(text(f'DROP TABLE "{partition_name}"'))
+
+    logger.debug(f"🗂️ 已删除世界分区 (世界ID: {world_id})")
+
+
+def _partition_state(
+    conn: Connection, partition_name: str
+) -> Tuple[bool, Optional[bool]]:
+    """返回 (分区表是否存在, 是否处于 detach pending 状态；未挂载到父表时为 None)"""
+    row = conn.execute(
+        text(
+            "SELECT c.oid IS NOT NULL, i.inhdetachpending "
+            "FROM (SELECT to_regclass(:name) AS oid) c "
+            "LEFT JOIN pg_inherits i ON i.inhrelid = c.oid"
+        ),
+        {"name": f'"{partition_name}"'},
+    ).one()
+    return bool(row[0]), row[1]
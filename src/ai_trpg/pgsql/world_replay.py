@@ -0,0 +1,163 @@
+"""
+世界变更回放模块（纯函数，不访问数据库）
+
+将变更日志中的 WorldMutation 依次应用到 World 模型上，
+用于从"快照 + 增量"重建任意时刻的世界状态（不含 LLM 上下文）。
+
+变更日志中除了 WorldMutation 外还有标记类条目（回合检查点、整体同步），回放时跳过。
+"""
+
+from typing import FrozenSet, Final, Iterable, Literal, Optional
+from pydantic import BaseModel, Field
+from ..demo.models import Effect, World
+from .world_mutation import (
+    WorldMutation,
+    world_mutation_adapter,
+    UpdateActorHealthMutation,
+    UpdateActorAppearanceMutation,
+    AddActorEffectMutation,
+    RemoveActorEffectMutation,
+    MoveActorToStageMutation,
+    UpdateStageInfoMutation,
+)
+
+# 回合检查点标记的日志类型
+TURN_CHECKPOINT_TYPE: Final[str] = "turn_checkpoint"
+
+# 世界整体同步标记的日志类型（sync_world_to_db，紧随其后写入快照）
+WORLD_SYNCED_TYPE: Final[str] = "world_synced"
+
+# 不改变世界状态的标记类日志类型
+WORLD_LOG_MARKER_TYPES: Final[FrozenSet[str]] = frozenset(
+    {TURN_CHECKPOINT_TYPE, WORLD_SYNCED_TYPE}
+)
+
+
+class TurnCheckpoint(BaseModel):
+    """回合检查点标记（记录在变更日志中，不改变世界状态）"""
+
+    type: Literal["turn_checkpoint"] = "turn_checkpoint"
+    turn: int = Field(description="回合序号（从1开始）")
+
+
+def decode_logged_mutation(
+    mutation_type: str, payload_json: str
+) -> Optional[WorldMutation]:
+    """解析变更日志条目，标记类条目返回 None
+
+    Args:
+        mutation_type: 日志条目的类型
+        payload_json: 日志条目的 JSON 内容
+
+    Returns:
+        Optional[WorldMutation]: 变更对象，标记类条目返回 None
+    """
+    if mutation_type in WORLD_LOG_MARKER_TYPES:
+        return None
+    return world_mutation_adapter.validate_json(payload_json)
+
+
+def strip_world_context(world: World) -> World:
+    """返回不含 World/Stage/Actor 上下文的世界副本（用于快照）"""
+    stripped = world.model_copy(deep=True)
+    stripped.context = []
+    for stage in stripped.stages:
+        stage.context = []
+        for actor in stage.actors:
+            actor.context = []
+    return stripped
+
+
+def apply_mutation_to_world(world: World, mutation: WorldMutation) -> bool:
+    """将一个变更应用到 World 模型（原地修改）
+
+    日志中记录的是已生效的变更（生命值已限制在合法范围内），
+    因此这里只做与数据库操作一致的最小处理。
+
+    Args:
+        world: 要修改的世界模型
+        mutation: 要应用的变更
+
+    Returns:
+        bool: 是否找到目标并应用成功
+    """
+    match mutation:
+        case UpdateActorHealthMutation():
+            actor, _ = world.find_actor_with_stage(mutation.actor_name)
+            if actor is None:
+                return False
+            actor.attributes.health = max(
+                0, min(mutation.new_health, actor.attributes.max_health)
+            )
+            return True
+
+        case UpdateActorAppearanceMutation():
+            actor, _ = world.find_actor_with_stage(mutation.actor_name)
+            if actor is None:
+                return False
+            actor.appearance = mutation.new_appearance
+            return True
+
+        case AddActorEffectMutation():
+            actor, _ = world.find_actor_with_stage(mutation.actor_name)
+            if actor is None:
+                return False
+            actor.effects.append(
+                Effect(
+                    name=mutation.effect_name,
+                    description=mutation.effect_description,
+                )
+            )
+            return True
+
+        case RemoveActorEffectMutation():
+            actor, _ = world.find_actor_with_stage(mutation.actor_name)
+            if actor is None:
+                return False
+            actor.effects = [
+                effect
+                for effect in actor.effects
+                if effect.name != mutation.effect_name
+            ]
+            return True
+
+        case MoveActorToStageMutation():
+            return (
+                world.move_actor_to_stage(
+                    mutation.actor_name, mutation.target_stage_name
+                )
+                is not None
+            )
+
+        case UpdateStageInfoMutation():
+            stage = world.find_stage(mutation.stage_name)
+            if stage is None:
+                return False
+            for field_name in (
+                "environment",
+                "narrative",
+                "actor_states",
+                "connections",
+            ):
+                value = getattr(mutation, field_name)
+                if value is not None:
+                    setattr(stage, field_name, value)
+            return True
+
+
+def replay_world_mutations(
+    snapshot: World, mutations: Iterable[WorldMutation]
+) -> World:
+    """从快照开始依次应用变更，返回重建后的世界（不修改快照本身）
+
+    Args:
+        snapshot: 起始快照
+        mutations: 按日志顺序排列的变更
+
+    Returns:
+        World: 重建后的世界模型
+    """
+    world = snapshot.model_copy(deep=True)
+    for mutation in mutations:
+        apply_mutation_to_world(world, mutation)
+    return world
@@ -0,0 +1,43 @@
+"""
+世界快照数据模型
+
+保存某一时刻的世界状态（场景、角色、属性、Effect，不含 LLM 上下文），
+配合变更日志实现"快照 + 增量"重建任意时刻的世界状态。
+"""
+
+from datetime import datetime
+from uuid import UUID
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Text
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import UUIDBase
+
+
+class WorldSnapshotDB(UUIDBase):
+    """世界快照表"""
+
+    __tablename__ = "world_snapshots"
+
+    # 外键：绑定到 World
+    world_id: Mapped[UUID] = mapped_column(
+        ForeignKey("worlds.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="所属世界ID",
+    )
+
+    # 快照包含的最后一条变更日志序号（0 表示尚无日志）
+    seq: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, comment="快照对应的变更日志序号"
+    )
+
+    snapshot_json: Mapped[str] = mapped_column(
+        Text, nullable=False, comment="World 模型（不含上下文）的 JSON 序列化结果"
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.now, nullable=False, comment="快照创建时间"
+    )
+
+    # 表约束和索引
+    __table_args__ = (
+        Index("idx_world_snapshot_seq", "world_id", "seq"),  # 按世界查找最近快照
+    )
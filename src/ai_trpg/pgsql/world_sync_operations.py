@@ -0,0 +1,383 @@
+"""
+世界同步（差异更新）数据库操作模块
+
+提供 sync_world_to_db：将 pydantic World 与数据库中的同名世界按自然键
+（场景名称、角色名称）比较，只执行必要的插入、更新与删除，保留已有行的 UUID。
+
+同步后的结果与"删除后重新保存"一致：
+- 场景/角色的字段、属性、Effect、场景连接与 World 一致（角色复活为未死亡状态）
+- World/Stage/Actor 的上下文与 World 一致：保留相同的前缀，只改写其后的消息
+
+对未改变的大型世界重复同步时，只需要加载与比较，不产生对世界内容的写入。
+
+同步会清理该世界的回合状态（回合日志、行动计划、移动事件），与删除后重新保存一致：
+否则下一次执行回合会从同步前遗留的回合日志恢复，跳过本应重新执行的节点。
+"""
+
+from typing import Dict, List, Optional, Sequence, Set
+from uuid import UUID
+from langchain_core.messages import BaseMessage
+from loguru import logger
+from pydantic import BaseModel, Field
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session, joinedload, selectinload
+from ..demo.models import Actor, Stage, World
+from .client import SessionLocal
+from .world import WorldDB
+from .stage import StageDB
+from .stage_connection import StageConnectionDB
+from .actor import ActorDB
+from .actor_movement_event import ActorMovementEventDB
+from .actor_plan import ActorPlanDB
+from .attributes import AttributesDB
+from .effect import EffectDB
+from .message import MessageDB
+from .change_feed import publish_world_change
+from .optimistic_lock import bump_version
+from .turn_journal import TurnJournalDB
+from .world_history_operations import write_world_snapshot
+from .world_mutation_log import WorldMutationLogDB
+from .world_operations import save_world_to_db
+from .world_replay import WORLD_SYNCED_TYPE
+
+
+class WorldSyncResult(BaseModel):
+    """世界同步结果"""
+
+    world_id: UUID = Field(description="世界ID")
+    created: bool = Field(description="是否为新建世界（数据库中原本不存在）")
+    inserted: int = Field(default=0, description="插入的行数")
+    updated: int = Field(default=0, description="更新的行数")
+    deleted: int = Field(default=0, description="删除的行数")
+    cleared: int = Field(
+        default=0, description="清理的回合状态行数（回合日志/行动计划/移动事件）"
+    )
+
+    @property
+    def changed(self) -> bool:
+        """是否有任何写入"""
+        return self.created or (self.inserted + self.updated + self.deleted) > 0
+
+
+def sync_world_to_db(world: World) -> WorldSyncResult:
+    """将 pydantic World 差异同步到数据库
+
+    世界不存在时等同于 save_world_to_db。世界已存在时（包括无变化的情况）
+    同时清理该世界的回合日志、行动计划与移动事件。
+
+    Args:
+        world: Pydantic World 模型实例
+
+    Returns:
+        WorldSyncResult: 同步结果（插入/更新/删除的行数）
+
+    Raises:
+        Exception: 数据库操作失败时抛出异常
+    """
+    with SessionLocal() as db:
+        try:
+            world_db = _load_world_for_sync(db, world.name)
+            if world_db is None:
+                db.rollback()
+                saved = save_world_to_db(world)
+                return WorldSyncResult(world_id=saved.id, created=True)
+
+            result = WorldSyncResult(world_id=world_db.id, created=False)
+            syncer = _WorldSyncer(db, world_db, result)
+            syncer.sync(world)
+            result.cleared = _clear_turn_state(db, world_db.id)
+
+            if not result.changed:
+                db.commit()
+                logger.info(
+                    f"✅ World '{world.name}' 无变化，跳过同步（清理回合状态 {result.cleared} 行）"
+                )
+                return result
+
+            # 同步不以 WorldMutation 表示：记录标记并写入快照，回放从快照继续
+            db.add(
+                WorldMutationLogDB(
+                    world_id=world_db.id,
+                    mutation_type=WORLD_SYNCED_TYPE,
+                    payload_json=result.model_dump_json(),
+                )
+            )
+            write_world_snapshot(db, world_db.id, world)
+            publish_world_change(db, world_db.id, "world", world_db.name)
+            db.commit()
+
+            logger.success(
+                f"✅ World '{world.name}' 已同步: 插入 {result.inserted}, 更新 {result.updated}, 删除 {result.deleted}"
+            )
+            return result
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ 同步 World '{world.name}' 失败: {e}")
+            raise
+
+
+# ============================================================================
+# 私有辅助函数
+# ============================================================================
+
+
+def _clear_turn_state(db: Session, world_id: UUID) -> int:
+    """删除世界的回合日志、行动计划与移动事件，返回删除的行数"""
+    cleared = 0
+    for model in (TurnJournalDB, ActorPlanDB, ActorMovementEventDB):
+        cleared += db.query(model).filter_by(world_id=world_id).delete()
+    return cleared
+
+
+def _load_world_for_sync(db: Session, world_name: str) -> Optional[WorldDB]:
+    """加载世界及比较所需的全部关系（查询数与世界规模无关）"""
+    return db.execute(
+        select(WorldDB)
+        .where(WorldDB.name == world_name)
+        .options(
+            selectinload(WorldDB.stages)
+            .selectinload(StageDB.actors)
+            .joinedload(ActorDB.attributes),
+            selectinload(WorldDB.stages)
+            .selectinload(StageDB.actors)
+            .selectinload(ActorDB.effects),
+            selectinload(WorldDB.stages)
+            .selectinload(StageDB.outgoing_connections)
+            .joinedload(StageConnectionDB.target_stage),
+        )
+    ).scalar_one_or_none()
+
+
+class _WorldSyncer:
+    """在一个会话中比较并同步一个世界"""
+
+    def __init__(self, db: Session, world_db: WorldDB, result: WorldSyncResult):
+        self._db = db
+        self._world_db = world_db
+        self._result = result
+        self._messages = self._load_messages()
+
+    def sync(self, world: World) -> None:
+        world_db = self._world_db
+
+        if world_db.campaign_setting != world.campaign_setting:
+            world_db.campaign_setting = world.campaign_setting
+            self._result.updated += 1
+        self._sync_context(world.context, world_id=world_db.id)
+
+        stage_dbs = {stage_db.name: stage_db for stage_db in world_db.stages}
+        actor_dbs = {
+            actor_db.name: actor_db
+            for stage_db in world_db.stages
+            for actor_db in stage_db.actors
+        }
+
+        # 1. 新增/更新场景（先于角色，角色可能移动到新场景）
+        for stage in world.stages:
+            stage_db = stage_dbs.get(stage.name)
+            if stage_db is None:
+                stage_db = StageDB(
+                    name=stage.name,
+                    profile=stage.profile,
+                    environment=stage.environment,
+                    narrative=stage.narrative,
+                    actor_states=stage.actor_states,
+                    connections=stage.connections,
+                )
+                world_db.stages.append(stage_db)
+                stage_dbs[stage.name] = stage_db
+                self._result.inserted += 1
+            else:
+                self._sync_stage(stage_db, stage)
+
+        # 2. 新增/更新/移动角色
+        synced_actor_dbs: Dict[str, ActorDB] = {}
+        for stage in world.stages:
+            stage_db = stage_dbs[stage.name]
+            for actor in stage.actors:
+                actor_db = actor_dbs.pop(actor.name, None)
+                if actor_db is None:
+                    actor_db = self._insert_actor(stage_db, actor)
+                else:
+                    self._sync_actor(actor_db, stage_db, actor)
+                synced_actor_dbs[actor.name] = actor_db
+
+        # 3. 删除不再存在的角色与场景
+        for actor_db in actor_dbs.values():
+            self._db.delete(actor_db)
+            self._result.deleted += 1
+        world_stage_names = {stage.name for stage in world.stages}
+        for stage_name in list(stage_dbs):
+            if stage_name not in world_stage_names:
+                self._db.delete(stage_dbs.pop(stage_name))
+                self._result.deleted += 1
+
+        # 4. 场景连接与上下文（新增的场景/角色需要先写入以获得 ID）
+        self._db.flush()
+        for stage in world.stages:
+            stage_db = stage_dbs[stage.name]
+            self._sync_connections(stage_db, stage, stage_dbs)
+            self._sync_context(stage.context, stage_id=stage_db.id)
+            for actor in stage.actors:
+                self._sync_context(
+                    actor.context, actor_id=synced_actor_dbs[actor.name].id
+                )
+
+    def _load_messages(self) -> Dict[UUID, List[MessageDB]]:
+        """一次加载世界的全部消息，按所属对象分组"""
+        grouped: Dict[UUID, List[MessageDB]] = {}
+        for message_db in self._db.execute(
+            select(MessageDB)
+            .where(MessageDB.owner_world_id == self._world_db.id)
+            .order_by(MessageDB.sequence)
+        ).scalars():
+            owner_id = message_db.world_id or message_db.stage_id or message_db.actor_id
+            assert owner_id is not None
+            grouped.setdefault(owner_id, []).append(message_db)
+        return grouped
+
+    def _sync_stage(self, stage_db: StageDB, stage: Stage) -> None:
+        changed = False
+        for field_name in (
+            "profile",
+            "environment",
+            "narrative",
+            "actor_states",
+            "connections",
+        ):
+            value = getattr(stage, field_name)
+            if getattr(stage_db, field_name) != value:
+                setattr(stage_db, field_name, value)
+                changed = True
+
+        if changed:
+            bump_version(stage_db)
+            self._result.updated += 1
+
+    def _insert_actor(self, stage_db: StageDB, actor: Actor) -> ActorDB:
+        actor_db = ActorDB(
+            name=actor.name,
+            profile=actor.profile,
+            appearance=actor.appearance,
+        )
+        actor_db.attributes = AttributesDB(
+            health=actor.attributes.health,
+            max_health=actor.attributes.max_health,
+            attack=actor.attributes.attack,
+        )
+        for effect in actor.effects:
+            actor_db.effects.append(
+                EffectDB(name=effect.name, description=effect.description)
+            )
+        stage_db.actors.append(actor_db)
+        self._result.inserted += 2 + len(actor.effects)
+        return actor_db
+
+    def _sync_actor(self, actor_db: ActorDB, stage_db: StageDB, actor: Actor) -> None:
+        changed = False
+
+        # 角色移动到了其他场景（通过关系赋值，同时从原场景的 actors 中移除）
+        if actor_db.stage is not stage_db:
+            actor_db.stage = stage_db
+            changed = True
+
+        for field_name in ("profile", "appearance"):
+            value = getattr(actor, field_name)
+            if getattr(actor_db, field_name) != value:
+                setattr(actor_db, field_name, value)
+                changed = True
+        if actor_db.is_dead:
+            actor_db.is_dead = False
+            changed = True
+
+        attributes_db = actor_db.attributes
+        for field_name in ("health", "max_health", "attack"):
+            value = getattr(actor.attributes, field_name)
+            if getattr(attributes_db, field_name) != value:
+                setattr(attributes_db, field_name, value)
+                changed = True
+
+        current_effects = sorted((e.name, e.description) for e in actor_db.effects)
+        target_effects = sorted((e.name, e.description) for e in actor.effects)
+        if current_effects != target_effects:
+            self._result.deleted += len(actor_db.effects)
+            self._result.inserted += len(actor.effects)
+            actor_db.effects.clear()
+            for effect in actor.effects:
+                actor_db.effects.append(
+                    EffectDB(name=effect.name, description=effect.description)
+                )
+            changed = True
+
+        if changed:
+            bump_version(actor_db)
+            self._result.updated += 1
+
+    def _sync_connections(
+        self, stage_db: StageDB, stage: Stage, stage_dbs: Dict[str, StageDB]
+    ) -> None:
+        # 指向已删除场景的连接已随场景级联删除
+        current: Dict[str, StageConnectionDB] = {
+            connection.target_stage.name: connection
+            for connection in stage_db.outgoing_connections
+            if connection.target_stage.name in stage_dbs
+        }
+        target: Set[str] = {
+            name for name in stage.stage_connections if name in stage_dbs
+        }
+
+        for name, connection in current.items():
+            if name not in target:
+                self._db.delete(connection)
+                self._result.deleted += 1
+        for name in target - current.keys():
+            connection = StageConnectionDB()
+            connection.source_stage = stage_db
+            connection.target_stage = stage_dbs[name]
+            self._db.add(connection)
+            self._result.inserted += 1
+
+    def _sync_context(
+        self,
+        messages: Sequence[BaseMessage],
+        world_id: Optional[UUID] = None,
+        stage_id: Optional[UUID] = None,
+        actor_id: Optional[UUID] = None,
+    ) -> None:
+        """保留相同的消息前缀，删除其后的旧消息并追加新消息"""
+        owner_id = world_id or stage_id or actor_id
+        assert owner_id is not None
+        current = self._messages.get(owner_id, [])
+        target_json = [message.model_dump_json() for message in messages]
+
+        prefix = 0
+        for current_db, message_json in zip(current, target_json):
+            if current_db.message_json != message_json:
+                break
+            prefix += 1
+
+        stale = current[prefix:]
+        if stale:
+            # 立即删除（Core 语句），避免与随后插入的相同 sequence 冲突
+            self._db.execute(
+                delete(MessageDB).where(
+                    MessageDB.id.in_([message_db.id for message_db in stale])
+                )
+            )
+            for message_db in stale:
+                self._db.expunge(message_db)
+            self._result.deleted += len(stale)
+
+        for sequence in range(prefix, len(target_json)):
+            self._db.add(
+                MessageDB(
+                    sequence=sequence,
+                    message_json=target_json[sequence],
+                    owner_world_id=self._world_db.id,
+                    world_id=world_id,
+                    stage_id=stage_id,
+                    actor_id=actor_id,
+                )
+            )
+            self._result.inserted += 1
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Change Feed 集成测试
+
+测试 change_feed.py 中基于 LISTEN/NOTIFY 的世界变更通知:
+- 操作层写入提交后，监听器收到对应的变更事件
+- 按实体类型过滤回调
+- 回滚的事务不产生通知
+
+Author: yanghanggit
+Date: 2025-01-20
+"""
+
+import asyncio
+from typing import Generator, List
+from uuid import UUID
+import pytest
+from loguru import logger
+
+from src.ai_trpg.demo.world1 import create_test_world1
+from src.ai_trpg.pgsql.world_operations import save_world_to_db, delete_world
+from src.ai_trpg.pgsql.stage_operations import update_stage_info
+from src.ai_trpg.pgsql.actor_operations import update_actor_health
+from src.ai_trpg.pgsql.client import SessionLocal
+from src.ai_trpg.pgsql.change_feed import (
+    WorldChangeEvent,
+    WorldChangeListener,
+    publish_world_change,
+)
+
+
+async def _wait_for(events: List[WorldChangeEvent], count: int) -> None:
+    """等待收到指定数量的事件（最多2秒）"""
+    for _ in range(40):
+        if len(events) >= count:
+            return
+        await asyncio.sleep(0.05)
+
+
+class TestChangeFeed:
+    """Change Feed 测试类"""
+
+    test_world_id: UUID
+    test_world_name: str
+    test_stage_name: str
+    test_actor_name: str
+
+    @pytest.fixture(scope="class", autouse=True)
+    def setup_test_world(self) -> Generator[None, None, None]:
+        """为整个测试类设置测试世界(class-scoped)"""
+        from src.ai_trpg.pgsql import pgsql_ensure_database_tables
+
+        pgsql_ensure_database_tables()
+
+        test_world = create_test_world1()
+        try:
+            delete_world(test_world.name)
+        except Exception:
+            pass
+
+        TestChangeFeed.test_world_name = test_world.name
+        TestChangeFeed.test_stage_name = test_world.stages[0].name
+        TestChangeFeed.test_actor_name = test_world.stages[0].actors[0].name
+        TestChangeFeed.test_world_id = save_world_to_db(test_world).id
+        logger.info(f"🌍 测试世界已创建: {TestChangeFeed.test_world_name}")
+
+        yield
+
+        delete_world(TestChangeFeed.test_world_name)
+
+    async def test_listener_receives_stage_and_actor_changes(self) -> None:
+        """测试监听器收到场景与角色的变更事件"""
+        events: List[WorldChangeEvent] = []
+        stage_events: List[WorldChangeEvent] = []
+
+        listener = WorldChangeListener()
+        listener.register(events.append)
+        listener.register(stage_events.append, {"stage"})
+        await listener.start()
+        try:
+            await asyncio.to_thread(
+                update_stage_info,
+                self.test_world_id,
+                self.test_stage_name,
+                narrative="变更通知测试",
+            )
+            await asyncio.to_thread(
+                update_actor_health, self.test_world_id, self.test_actor_name, 50
+            )
+            await _wait_for(events, 2)
+        finally:
+            await listener.stop()
+
+        assert [(e.entity_kind, e.name) for e in events] == [
+            ("stage", self.test_stage_name),
+            ("actor", self.test_actor_name),
+        ]
+        assert all(e.world_id == self.test_world_id for e in events)
+        assert events[0].version is not None
+        assert len(stage_events) == 1
+
+        logger.success("✅ 变更通知接收测试通过")
+
+    async def test_rolled_back_transaction_does_not_notify(self) -> None:
+        """测试回滚的事务不产生通知"""
+        events: List[WorldChangeEvent] = []
+
+        listener = WorldChangeListener()
+        listener.register(events.append)
+        await listener.start()
+        try:
+
+            def publish_and_rollback() -> None:
+                with SessionLocal() as db:
+                    publish_world_change(
+                        db, self.test_world_id, "stage", self.test_stage_name
+                    )
+                    db.rollback()
+
+            await asyncio.to_thread(publish_and_rollback)
+            await _wait_for(events, 1)
+        finally:
+            await listener.stop()
+
+        assert events == []
+
+        logger.success("✅ 回滚不通知测试通过")
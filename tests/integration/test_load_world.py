@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+load_world_from_db 集成测试
+
+测试 World 的数据库往返:
+- save_world_to_db → load_world_from_db 得到与原始数据一致的 World（含所有上下文）
+- 可信路径与校验路径的结果一致
+- 查询数与世界规模无关
+
+Author: yanghanggit
+Date: 2025-01-20
+"""
+
+from typing import Generator
+import pytest
+from loguru import logger
+
+from src.ai_trpg.demo.models import World
+from src.ai_trpg.demo.world3 import create_test_world3
+from src.ai_trpg.pgsql.world_operations import (
+    save_world_to_db,
+    delete_world,
+    load_world_from_db,
+)
+from src.ai_trpg.pgsql.statement_stats import assert_statement_budget
+
+
+class TestLoadWorld:
+    """load_world_from_db 测试类"""
+
+    original_world: World
+
+    @pytest.fixture(scope="class", autouse=True)
+    def setup_test_world(self) -> Generator[None, None, None]:
+        """为整个测试类设置测试世界(class-scoped)"""
+        from src.ai_trpg.pgsql import pgsql_ensure_database_tables
+
+        pgsql_ensure_database_tables()
+
+        test_world = create_test_world3()
+        try:
+            delete_world(test_world.name)
+        except Exception:
+            pass
+
+        TestLoadWorld.original_world = test_world
+        save_world_to_db(test_world)
+
+        yield
+
+        delete_world(test_world.name)
+
+    def test_round_trip(self) -> None:
+        """测试往返后的 World 与原始数据一致"""
+        original = self.original_world
+        loaded = load_world_from_db(original.name)
+        assert loaded is not None
+
+        assert loaded.name == original.name
+        assert loaded.campaign_setting == original.campaign_setting
+        assert loaded.context == original.context
+        assert sorted(s.name for s in loaded.stages) == sorted(
+            s.name for s in original.stages
+        )
+
+        for original_stage in original.stages:
+            stage = loaded.find_stage(original_stage.name)
+            assert stage is not None
+            exclude = {"actors", "stage_connections"}
+            assert stage.model_dump(exclude=exclude) == original_stage.model_dump(
+                exclude=exclude
+            )
+            assert sorted(stage.stage_connections) == sorted(
+                original_stage.stage_connections
+            )
+
+            for original_actor in original_stage.actors:
+                actor = stage.find_actor(original_actor.name)
+                assert actor is not None
+                assert actor.model_dump(
+                    exclude={"effects"}
+                ) == original_actor.model_dump(exclude={"effects"})
+                assert sorted(e.name for e in actor.effects) == sorted(
+                    e.name for e in original_actor.effects
+                )
+
+        logger.success("✅ World 往返测试通过")
+
+    def test_trusted_matches_validated(self) -> None:
+        """测试可信路径与校验路径结果一致"""
+        trusted = load_world_from_db(self.original_world.name, trusted=True)
+        validated = load_world_from_db(self.original_world.name, trusted=False)
+        assert trusted is not None and validated is not None
+        assert trusted.model_dump() == validated.model_dump()
+
+    def test_statement_budget(self) -> None:
+        """测试加载整个世界的语句数固定"""
+        with assert_statement_budget(6, label="load_world_from_db"):
+            load_world_from_db(self.original_world.name)
+
+    def test_missing_world(self) -> None:
+        """测试不存在的世界返回 None"""
+        assert load_world_from_db("不存在的世界") is None
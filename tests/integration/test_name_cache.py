@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+名称 → UUID 解析缓存集成测试
+
+测试:
+- world_name → world_id 解析命中缓存后不再查询数据库
+- 角色缓存命中时按主键加载，写入语句数少于按名称查询
+- 删除世界后缓存失效，缓存的角色ID不会返回已删除的行
+
+Author: yanghanggit
+Date: 2025-01-20
+"""
+
+from typing import Generator
+from uuid import UUID
+import pytest
+from loguru import logger
+
+from src.ai_trpg.demo.world1 import create_test_world1
+from src.ai_trpg.pgsql.world_operations import save_world_to_db, delete_world
+from src.ai_trpg.pgsql.actor_operations import update_actor_health
+from src.ai_trpg.pgsql.name_cache import world_name_cache
+from src.ai_trpg.pgsql.statement_stats import assert_statement_budget
+
+
+class TestNameCache:
+    """名称解析缓存测试类"""
+
+    test_world_id: UUID
+    test_world_name: str
+    test_actor_name: str
+
+    @pytest.fixture(scope="class", autouse=True)
+    def setup_test_world(self) -> Generator[None, None, None]:
+        """为整个测试类设置测试世界(class-scoped)"""
+        from src.ai_trpg.pgsql import pgsql_ensure_database_tables
+
+        pgsql_ensure_database_tables()
+
+        test_world = create_test_world1()
+        try:
+            delete_world(test_world.name)
+        except Exception:
+            pass
+
+        TestNameCache.test_world_name = test_world.name
+        TestNameCache.test_actor_name = test_world.stages[0].actors[0].name
+        TestNameCache.test_world_id = save_world_to_db(test_world).id
+
+        yield
+
+        delete_world(TestNameCache.test_world_name)
+
+    def test_resolve_world_id_is_cached(self) -> None:
+        """测试世界ID解析命中缓存后不再查询"""
+        world_id = world_name_cache.resolve_world_id(self.test_world_name)
+        assert world_id == self.test_world_id
+
+        with assert_statement_budget(0, label="缓存命中的世界解析"):
+            assert (
+                world_name_cache.resolve_world_id(self.test_world_name)
+                == self.test_world_id
+            )
+
+        assert world_name_cache.resolve_world_id("不存在的世界") is None
+
+    def test_cached_actor_write_uses_fewer_statements(self) -> None:
+        """测试角色缓存命中后写入的语句数减少"""
+        world_name_cache.discard_actor(self.test_world_id, self.test_actor_name)
+        with assert_statement_budget(6, label="未命中缓存") as cold:
+            assert update_actor_health(self.test_world_id, self.test_actor_name, 90)
+
+        with assert_statement_budget(6, label="命中缓存") as warm:
+            assert update_actor_health(self.test_world_id, self.test_actor_name, 80)
+
+        assert warm.count <= cold.count
+        logger.info(f"📊 未命中: {cold.count} 条, 命中: {warm.count} 条")
+
+    def test_delete_world_invalidates(self) -> None:
+        """测试删除世界后缓存失效"""
+        world = create_test_world1()
+        world.name = f"{world.name}-名称缓存"
+        world_id = save_world_to_db(world).id
+        actor_name = world.stages[0].actors[0].name
+
+        assert world_name_cache.resolve_world_id(world.name) == world_id
+        assert update_actor_health(world_id, actor_name, 50) is not None
+        assert world_name_cache.get_actor_id(world_id, actor_name) is not None
+
+        delete_world(world.name)
+
+        assert world_name_cache.get_actor_id(world_id, actor_name) is None
+        assert world_name_cache.resolve_world_id(world.name) is None
+        assert update_actor_health(world_id, actor_name, 40) is None
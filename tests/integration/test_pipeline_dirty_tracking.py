@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+流水线脏标记集成测试
+
+以 pipeline:test1 执行完整回合（LLM 工作流替换为记录调用的桩函数），验证：
+- 场景中只有一个角色时，执行结果只是该角色自身行动的回声，安静的下一回合不再调用 LLM
+- 场景被外部修改后，下一回合重新观察规划并执行
+
+Author: yanghanggit
+Date: 2025-01-20
+"""
+
+import sys
+from pathlib import Path
+from typing import Any, Generator, List
+from uuid import UUID
+import pytest
+from langchain_core.messages import AIMessage, BaseMessage
+from loguru import logger
+
+# 流水线脚本以 ai_trpg 包名导入（与在 scripts 目录中运行时一致），测试使用同一份模块
+_ROOT = Path(__file__).resolve().parents[2]
+for _path in (_ROOT / "src", _ROOT / "scripts"):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+import gameplay_handler  # noqa: E402
+import pipeline_actor_observe_and_plan  # noqa: E402
+import pipeline_actor_self_update  # noqa: E402
+import pipeline_stage_execute  # noqa: E402
+from ai_trpg.agent import GameWorld  # noqa: E402
+from ai_trpg.demo.world2 import create_test_world_2_1  # noqa: E402
+from ai_trpg.mcp import McpClient, mcp_config  # noqa: E402
+from ai_trpg.pgsql import pgsql_ensure_database_tables  # noqa: E402
+from ai_trpg.pgsql.stage_operations import update_stage_info  # noqa: E402
+from ai_trpg.pgsql.world_operations import (  # noqa: E402
+    delete_world,
+    save_world_to_db,
+)
+
+
+class TestPipelineDirtyTracking:
+    """流水线脏标记测试类"""
+
+    test_world_id: UUID
+    test_world_name: str
+    stage_name: str
+    actor_name: str
+
+    @pytest.fixture(scope="class", autouse=True)
+    def setup_test_world(self) -> Generator[None, None, None]:
+        """为整个测试类设置测试世界(class-scoped)"""
+        pgsql_ensure_database_tables()
+
+        # 世界2.1: 第一个场景中只有一个角色，第二个场景为空
+        test_world = create_test_world_2_1()
+        try:
+            delete_world(test_world.name)
+        except Exception:
+            pass
+
+        TestPipelineDirtyTracking.test_world_name = test_world.name
+        TestPipelineDirtyTracking.test_world_id = save_world_to_db(test_world).id
+        TestPipelineDirtyTracking.stage_name = test_world.stages[0].name
+        TestPipelineDirtyTracking.actor_name = test_world.stages[0].actors[0].name
+
+        yield
+
+        delete_world(TestPipelineDirtyTracking.test_world_name)
+
+    @pytest.mark.asyncio
+    async def test_quiet_turn_makes_no_llm_calls(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """测试安静的回合不调用 LLM，场景被外部修改后重新调用"""
+        calls: List[str] = []
+        executions: List[str] = []
+
+        async def observe(agent_name: str, **kwargs: Any) -> List[BaseMessage]:
+            calls.append(f"observe:{agent_name}")
+            return [
+                AIMessage(
+                    content='{"observation": "我站在侧门前。", "plan": "我推开侧门。"}'
+                )
+            ]
+
+        async def stage_execute(agent_name: str, **kwargs: Any) -> List[BaseMessage]:
+            calls.append(f"execute:{agent_name}")
+            executions.append(agent_name)
+            # 代替 apply_world_mutations 写入执行结果
+            update_stage_info(
+                self.test_world_id,
+                agent_name,
+                narrative=f"第 {len(executions)} 次执行: 侧门被推开了。",
+                actor_states=f"**{self.actor_name}**: 侧门门口 | 站立 | 推开了门",
+            )
+            return []
+
+        async def self_update(agent_name: str, **kwargs: Any) -> List[BaseMessage]:
+            calls.append(f"self_update:{agent_name}")
+            return []
+
+        for module in (
+            pipeline_actor_observe_and_plan,
+            pipeline_stage_execute,
+            pipeline_actor_self_update,
+        ):
+            monkeypatch.setattr(module, "create_deepseek_llm", lambda: None)
+        monkeypatch.setattr(
+            pipeline_actor_observe_and_plan, "handle_chat_workflow_execution", observe
+        )
+        monkeypatch.setattr(
+            pipeline_stage_execute, "handle_mcp_workflow_execution", stage_execute
+        )
+        monkeypatch.setattr(
+            pipeline_actor_self_update, "handle_mcp_workflow_execution", self_update
+        )
+
+        game_world = GameWorld(
+            mcp_client_factory=lambda agent_name: McpClient(
+                base_url=mcp_config.mcp_server_url,
+                protocol_version=mcp_config.protocol_version,
+                timeout=mcp_config.mcp_timeout,
+            )
+        )
+        await game_world.load(self.test_world_name)
+        assert game_world.input_fingerprints.policy == "reuse_plan"
+
+        # 第一回合: 观察规划 → 场景执行 → 自我更新
+        await gameplay_handler.run_game_commands(["pipeline:test1"], game_world)
+        assert calls == [
+            f"observe:{self.actor_name}",
+            f"execute:{self.stage_name}",
+            f"self_update:{self.actor_name}",
+        ]
+
+        # 第二回合: 执行结果只是角色自身行动的回声，没有新的事件
+        calls.clear()
+        await gameplay_handler.run_game_commands(["pipeline:test1"], game_world)
+        assert calls == []
+        assert game_world.input_fingerprints.skipped == {
+            pipeline_actor_observe_and_plan.OBSERVE_AND_PLAN_PHASE: 1,
+            pipeline_stage_execute.STAGE_EXECUTE_PHASE: 1,
+            pipeline_actor_self_update.ACTOR_SELF_UPDATE_PHASE: 1,
+        }
+
+        # 场景被外部修改: 下一回合重新观察规划并执行
+        calls.clear()
+        update_stage_info(
+            self.test_world_id, self.stage_name, environment="侧门外刮起了大风。"
+        )
+        await gameplay_handler.run_game_commands(["pipeline:test1"], game_world)
+        assert calls == [
+            f"observe:{self.actor_name}",
+            f"execute:{self.stage_name}",
+            f"self_update:{self.actor_name}",
+        ]
+
+        logger.success("✅ 流水线脏标记测试通过")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+读写分离集成测试
+
+测试 client.py 中的只读副本路由（需要配置 postgresql_config.replica_host，否则跳过）:
+- 没有近期写入时，只读会话连接到副本
+- 写入提交后的 read_your_writes_window 内，只读会话走主库，能立即读到刚追加的消息
+- read_from_primary 上下文中，只读会话始终走主库（读取依赖其他进程的写入）
+
+本地搭建两个实例（主库 5432 + 流复制备库 5433）:
+    pg_basebackup -h localhost -p 5432 -D ./replica -R
+    pg_ctl -D ./replica -o "-p 5433" start
+然后设置 PostgreSQLConfig(replica_host="localhost", replica_port=5433)
+
+Author: yanghanggit
+Date: 2025-01-20
+"""
+
+import time
+from typing import Generator
+from uuid import UUID
+import pytest
+from langchain_core.messages import HumanMessage
+from loguru import logger
+from sqlalchemy import text
+
+from src.ai_trpg.demo.world1 import create_test_world1
+from src.ai_trpg.pgsql.client import (
+    ReadSessionLocal,
+    read_from_primary,
+    reads_pinned_to_primary,
+)
+from src.ai_trpg.pgsql.config import postgresql_config
+from src.ai_trpg.pgsql.message_operations import add_world_context, get_world_context
+from src.ai_trpg.pgsql.world_operations import save_world_to_db, delete_world
+
+pytestmark = pytest.mark.skipif(
+    postgresql_config.replica_connection_string is None,
+    reason="未配置只读副本 postgresql_config.replica_host",
+)
+
+
+def _read_session_in_recovery() -> bool:
+    """只读会话所连接的实例是否为备库"""
+    with ReadSessionLocal() as db:
+        return bool(db.execute(text("SELECT pg_is_in_recovery()")).scalar_one())
+
+
+class TestReadReplica:
+    """读写分离测试类"""
+
+    test_world_id: UUID
+    test_world_name: str
+
+    @pytest.fixture(scope="class", autouse=True)
+    def setup_test_world(self) -> Generator[None, None, None]:
+        """为整个测试类设置测试世界(class-scoped)"""
+        from src.ai_trpg.pgsql import pgsql_ensure_database_tables
+
+        pgsql_ensure_database_tables()
+
+        test_world = create_test_world1()
+        try:
+            delete_world(test_world.name)
+        except Exception:
+            pass
+
+        TestReadReplica.test_world_name = test_world.name
+        TestReadReplica.test_world_id = save_world_to_db(test_world).id
+
+        yield
+
+        delete_world(TestReadReplica.test_world_name)
+
+    def test_reads_go_to_replica_without_recent_writes(self) -> None:
+        """测试没有近期写入时读取走副本"""
+        time.sleep(postgresql_config.read_your_writes_window)
+
+        assert not reads_pinned_to_primary()
+        assert _read_session_in_recovery()
+
+        logger.success("✅ 只读会话路由到副本")
+
+    def test_read_your_writes_after_append(self) -> None:
+        """测试追加消息后立即读取走主库，能读到自己的写入"""
+        marker = f"read-your-writes-{time.monotonic()}"
+        assert add_world_context(self.test_world_id, [HumanMessage(content=marker)])
+
+        assert reads_pinned_to_primary()
+        assert not _read_session_in_recovery()
+        context = get_world_context(self.test_world_id)
+        assert context[-1].content == marker
+
+        logger.success("✅ 写入后读取固定到主库")
+
+    def test_read_from_primary_context(self) -> None:
+        """测试 read_from_primary 上下文中读取走主库，离开后恢复走副本"""
+        time.sleep(postgresql_config.read_your_writes_window)
+
+        with read_from_primary():
+            assert reads_pinned_to_primary()
+            assert not _read_session_in_recovery()
+
+        assert _read_session_in_recovery()
+
+        logger.success("✅ read_from_primary 上下文中读取走主库")
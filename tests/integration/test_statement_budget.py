@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+SQL 语句预算集成测试
+
+使用 assert_statement_budget 锁定流水线常用数据库操作的语句数，
+防止 N+1 查询回归:
+- 世界内角色/场景的批量读取与角色数量无关，只需一条语句
+- 单次角色写入的语句数固定
+- 观察规划阶段（N 个角色）的读取语句数与 N 无关，每个角色的读写语句数固定
+
+Author: yanghanggit
+Date: 2025-01-20
+"""
+
+from typing import Dict, Generator, List
+from uuid import UUID
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from loguru import logger
+
+from src.ai_trpg.demo.models import Actor, Attributes, Stage, World
+from src.ai_trpg.demo.world1 import create_test_world1
+from src.ai_trpg.pgsql.world_operations import save_world_to_db, delete_world
+from src.ai_trpg.pgsql.actor_operations import (
+    get_actors_in_world,
+    iter_actors_in_world,
+    update_actor_health,
+)
+from src.ai_trpg.pgsql.actor_plan_operations import (
+    add_actor_plan_to_db,
+    clear_all_actor_plans,
+)
+from src.ai_trpg.pgsql.message_operations import add_actor_context, get_actor_context
+from src.ai_trpg.pgsql.stage_operations import get_stages_in_world
+from src.ai_trpg.pgsql.statement_stats import assert_statement_budget
+
+# 观察规划阶段的语句预算
+# 读取所有存活角色（含场景、同场景角色、属性、Effect），与角色数量无关
+OBSERVE_AND_PLAN_READ_BUDGET = 5
+# 每个角色: 读取上下文 + 追加两条上下文 + 清空旧计划 + 保存新计划
+OBSERVE_AND_PLAN_PER_ACTOR_BUDGET = 10
+
+# 观察规划预算测试的世界规模（角色数量）
+OBSERVE_AND_PLAN_WORLD_SIZES = (4, 16)
+
+
+class TestStatementBudget:
+    """SQL 语句预算测试类"""
+
+    test_world_id: UUID
+    test_world_name: str
+    test_actor_name: str
+
+    @pytest.fixture(scope="class", autouse=True)
+    def setup_test_world(self) -> Generator[None, None, None]:
+        """为整个测试类设置测试世界(class-scoped)"""
+        from src.ai_trpg.pgsql import pgsql_ensure_database_tables
+
+        pgsql_ensure_database_tables()
+
+        test_world = create_test_world1()
+        try:
+            delete_world(test_world.name)
+        except Exception:
+            pass
+
+        TestStatementBudget.test_world_name = test_world.name
+        TestStatementBudget.test_actor_name = test_world.stages[0].actors[0].name
+        TestStatementBudget.test_world_id = save_world_to_db(test_world).id
+
+        yield
+
+        delete_world(TestStatementBudget.test_world_name)
+
+    def test_get_actors_in_world_is_single_statement(self) -> None:
+        """测试读取所有角色（含 stage/attributes/effects）只需一条语句"""
+        with assert_statement_budget(1, label="get_actors_in_world"):
+            actors = get_actors_in_world(self.test_world_id, is_dead=False)
+
+        # 会话外访问预加载关系不应再触发查询
+        with assert_statement_budget(0, label="访问预加载关系"):
+            for actor in actors:
+                _ = actor.stage.name
+                _ = actor.attributes.health
+                _ = [effect.name for effect in actor.effects]
+
+        logger.success(f"✅ get_actors_in_world 语句预算通过 ({len(actors)} 个角色)")
+
+    def test_get_stages_in_world_is_single_statement(self) -> None:
+        """测试读取所有场景（含角色）只需一条语句"""
+        with assert_statement_budget(1, label="get_stages_in_world"):
+            get_stages_in_world(self.test_world_id)
+
+        logger.success("✅ get_stages_in_world 语句预算通过")
+
+    def test_update_actor_health_statement_budget(self) -> None:
+        """测试单次生命值更新的语句数固定
+
+        查询角色 + 加载属性 + 更新属性 + 更新角色版本号 + 变更日志 + 变更通知
+        """
+        with assert_statement_budget(6, label="update_actor_health"):
+            update_actor_health(self.test_world_id, self.test_actor_name, 80)
+
+        logger.success("✅ update_actor_health 语句预算通过")
+
+
+def _create_budget_world(world_name: str, actor_count: int) -> World:
+    """生成包含指定数量角色的测试世界（两个场景）"""
+    stages = [
+        Stage(
+            name=f"{world_name}场景{stage_index}",
+            profile="预算测试场景",
+            environment="预算测试环境",
+            narrative="",
+            actor_states="",
+            actors=[
+                Actor(
+                    name=f"{world_name}角色{actor_index}",
+                    profile="预算测试角色",
+                    appearance="预算测试外观",
+                    attributes=Attributes(health=100, max_health=100, attack=10),
+                    context=[
+                        SystemMessage(content=f"你是{world_name}角色{actor_index}")
+                    ],
+                )
+                for actor_index in range(actor_count)
+                if actor_index % 2 == stage_index
+            ],
+        )
+        for stage_index in range(2)
+    ]
+    return World(name=world_name, campaign_setting="预算测试", stages=stages)
+
+
+class TestObserveAndPlanBudget:
+    """观察规划阶段语句预算测试类"""
+
+    world_ids: Dict[int, UUID]
+
+    @pytest.fixture(scope="class", autouse=True)
+    def setup_test_worlds(self) -> Generator[None, None, None]:
+        """为每种规模生成一个测试世界(class-scoped)"""
+        from src.ai_trpg.pgsql import pgsql_ensure_database_tables
+
+        pgsql_ensure_database_tables()
+
+        world_names: List[str] = []
+        TestObserveAndPlanBudget.world_ids = {}
+        for actor_count in OBSERVE_AND_PLAN_WORLD_SIZES:
+            world = _create_budget_world(f"预算测试世界{actor_count}", actor_count)
+            delete_world(world.name)
+            TestObserveAndPlanBudget.world_ids[actor_count] = save_world_to_db(world).id
+            world_names.append(world.name)
+
+        yield
+
+        for world_name in world_names:
+            delete_world(world_name)
+
+    @pytest.mark.parametrize("actor_count", OBSERVE_AND_PLAN_WORLD_SIZES)
+    def test_observe_and_plan_phase_budget(self, actor_count: int) -> None:
+        """测试观察规划阶段（不含 LLM 调用）的数据库访问预算
+
+        与 pipeline_actor_observe_and_plan 相同的数据库访问：流式读取存活角色，
+        用预加载的数据构建提示词，每个角色读取上下文、追加上下文并替换计划。
+        """
+        world_id = self.world_ids[actor_count]
+        per_actor_statements = 0
+        observed = 0
+
+        with assert_statement_budget(
+            OBSERVE_AND_PLAN_READ_BUDGET
+            + OBSERVE_AND_PLAN_PER_ACTOR_BUDGET * actor_count,
+            label=f"观察规划阶段 ({actor_count} 个角色)",
+        ) as phase_budget:
+            for actors in iter_actors_in_world(world_id, is_dead=False):
+                for actor in actors:
+                    with assert_statement_budget(
+                        OBSERVE_AND_PLAN_PER_ACTOR_BUDGET,
+                        label=f"观察规划 {actor.name}",
+                    ) as actor_budget:
+                        # 构建提示词只使用预加载的数据
+                        _ = [other.appearance for other in actor.stage.actors]
+                        _ = actor.attributes.health
+                        _ = [effect.name for effect in actor.effects]
+
+                        get_actor_context(world_id, actor.name)
+                        add_actor_context(
+                            world_id,
+                            actor.name,
+                            [HumanMessage(content="观察"), AIMessage(content="规划")],
+                        )
+                        clear_all_actor_plans(world_id, actor.name)
+                        add_actor_plan_to_db(world_id, actor.name, "计划")
+
+                    per_actor_statements += actor_budget.count
+                    observed += 1
+
+        assert observed == actor_count
+        read_statements = phase_budget.count - per_actor_statements
+        assert read_statements <= OBSERVE_AND_PLAN_READ_BUDGET, (
+            f"观察规划阶段读取了 {read_statements} 条语句（{actor_count} 个角色），"
+            f"超过与角色数量无关的预算 {OBSERVE_AND_PLAN_READ_BUDGET} 条"
+        )
+
+        logger.success(
+            f"✅ 观察规划阶段语句预算通过 ({actor_count} 个角色): "
+            f"读取 {read_statements} 条, 每个角色 {per_actor_statements / actor_count:.1f} 条"
+        )
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+回合日志集成测试
+
+测试 turn_journal_operations.py:
+- 记录节点完成，重复记录被忽略（保留第一次的数据）
+- 按回合读取已完成的节点
+- 回合序号与回合检查点一致，清理已结束回合的日志
+- 节点失败时依赖它的节点不写入回合日志，恢复回合时先补做失败的节点再执行依赖它的节点
+
+Author: yanghanggit
+Date: 2025-01-20
+"""
+
+from typing import Dict, Generator, List, Optional, Set
+from uuid import UUID
+import pytest
+
+from src.ai_trpg.agent import TurnNodeFunc, TurnScheduler
+from src.ai_trpg.demo.world1 import create_test_world1
+from src.ai_trpg.pgsql.world_operations import save_world_to_db, delete_world
+from src.ai_trpg.pgsql.world_history_operations import (
+    get_last_turn,
+    record_turn_checkpoint,
+)
+from src.ai_trpg.pgsql.turn_journal_operations import (
+    clear_turn_journal,
+    get_turn_journal,
+    record_turn_node_completed,
+)
+
+
+class TestTurnJournal:
+    """回合日志测试类"""
+
+    test_world_id: UUID
+    test_world_name: str
+
+    @pytest.fixture(scope="class", autouse=True)
+    def setup_test_world(self) -> Generator[None, None, None]:
+        """为整个测试类设置测试世界(class-scoped)"""
+        from src.ai_trpg.pgsql import pgsql_ensure_database_tables
+
+        pgsql_ensure_database_tables()
+
+        test_world = create_test_world1()
+        try:
+            delete_world(test_world.name)
+        except Exception:
+            pass
+
+        TestTurnJournal.test_world_name = test_world.name
+        TestTurnJournal.test_world_id = save_world_to_db(test_world).id
+
+        yield
+
+        delete_world(TestTurnJournal.test_world_name)
+
+    def test_record_and_resume(self) -> None:
+        """测试记录节点完成后可按回合读取，重复记录被忽略"""
+        turn = get_last_turn(self.test_world_id) + 1
+        assert get_turn_journal(self.test_world_id, turn) == {}
+
+        record_turn_node_completed(self.test_world_id, turn, "turn_start", '{"a": 1}')
+        record_turn_node_completed(self.test_world_id, turn, "observe:角色A")
+        record_turn_node_completed(self.test_world_id, turn, "turn_start", '{"a": 2}')
+
+        journal = get_turn_journal(self.test_world_id, turn)
+        assert journal == {"turn_start": '{"a": 1}', "observe:角色A": None}
+        assert get_turn_journal(self.test_world_id, turn + 1) == {}
+
+    def test_checkpoint_ends_turn(self) -> None:
+        """测试记录检查点后进入下一回合，清理只删除已结束回合的日志"""
+        turn = get_last_turn(self.test_world_id) + 1
+        record_turn_node_completed(self.test_world_id, turn, "execute:场景1")
+
+        assert record_turn_checkpoint(self.test_world_id) == turn
+        assert get_last_turn(self.test_world_id) == turn
+
+        next_turn = turn + 1
+        record_turn_node_completed(self.test_world_id, next_turn, "observe:角色B")
+
+        clear_turn_journal(self.test_world_id, before_turn=next_turn)
+        assert get_turn_journal(self.test_world_id, turn) == {}
+        assert list(get_turn_journal(self.test_world_id, next_turn)) == [
+            "observe:角色B"
+        ]
+
+        assert clear_turn_journal(self.test_world_id) == 1
+        assert get_turn_journal(self.test_world_id, next_turn) == {}
+
+    @pytest.mark.asyncio
+    async def test_resume_after_failed_node(self) -> None:
+        """测试节点失败时依赖它的节点不记录完成，恢复时只补做失败及未执行的节点"""
+        turn = get_last_turn(self.test_world_id) + 1
+        events: List[str] = []
+        failing: Set[str] = {"execute:场景2", "actor_self_update:角色B"}
+
+        def journaled(key: str) -> TurnNodeFunc:
+            async def run() -> None:
+                events.append(key)
+                if key in failing:
+                    raise RuntimeError(f"{key} 失败")
+                record_turn_node_completed(self.test_world_id, turn, key)
+
+            return run
+
+        async def skipped() -> None:
+            pass
+
+        def build_turn(journal: Dict[str, Optional[str]]) -> TurnScheduler:
+            # 与回合调度相同：回合日志中已完成的节点不再执行
+            scheduler = TurnScheduler()
+            nodes = [
+                ("observe:角色A", []),
+                ("observe:角色B", []),
+                ("execute:场景1", ["observe:角色A", "observe:角色B"]),
+                ("actor_self_update:角色A", ["execute:场景1"]),
+                ("actor_self_update:角色B", ["execute:场景1"]),
+                ("observe:角色C", []),
+                ("execute:场景2", ["observe:角色C"]),
+                ("actor_self_update:角色C", ["execute:场景2"]),
+                (
+                    "stage_self_update:场景1",
+                    ["actor_self_update:角色A", "actor_self_update:角色B"],
+                ),
+            ]
+            for key, depends_on in nodes:
+                func = skipped if key in journal else journaled(key)
+                scheduler.add_node(key, func, depends_on)
+            return scheduler
+
+        result = await build_turn(get_turn_journal(self.test_world_id, turn)).run()
+        assert set(result.failures) == failing
+        assert sorted(result.skipped) == [
+            "actor_self_update:角色C",
+            "stage_self_update:场景1",
+        ]
+        assert set(get_turn_journal(self.test_world_id, turn)) == {
+            "observe:角色A",
+            "observe:角色B",
+            "observe:角色C",
+            "execute:场景1",
+            "actor_self_update:角色A",
+        }
+
+        # 恢复：已完成的角色不再更新，失败的节点完成后再执行依赖它的节点
+        events.clear()
+        failing.clear()
+        result = await build_turn(get_turn_journal(self.test_world_id, turn)).run()
+        assert not result.incomplete
+        assert sorted(events) == [
+            "actor_self_update:角色B",
+            "actor_self_update:角色C",
+            "execute:场景2",
+            "stage_self_update:场景1",
+        ]
+        assert events.index("actor_self_update:角色C") > events.index("execute:场景2")
+        assert events.index("stage_self_update:场景1") > events.index(
+            "actor_self_update:角色B"
+        )
+        assert len(get_turn_journal(self.test_world_id, turn)) == 9
+
+        clear_turn_journal(self.test_world_id)
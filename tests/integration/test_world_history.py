@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+世界历史（变更日志 + 快照）集成测试
+
+测试 world_history_operations.py:
+- 保存世界时写入初始快照
+- 写操作在同一事务中追加变更日志
+- 回合检查点之后，可以从快照 + 增量重建任意回合的世界状态
+- 回滚的批量变更不留下日志
+- 从实体名称快照的日志序号开始增量读取变更
+- 增量中发生过整体同步时，只返回同步之后的变更
+
+Author: yanghanggit
+Date: 2025-01-20
+"""
+
+from typing import Generator
+from uuid import UUID
+import pytest
+from loguru import logger
+
+from src.ai_trpg.demo.world1 import create_test_world1
+from src.ai_trpg.pgsql.world_sync_operations import sync_world_to_db
+from src.ai_trpg.pgsql.world_operations import (
+    save_world_to_db,
+    delete_world,
+    get_world_entity_names,
+)
+from src.ai_trpg.pgsql.actor_operations import add_actor_effect, update_actor_health
+from src.ai_trpg.pgsql.stage_operations import update_stage_info
+from src.ai_trpg.pgsql.world_mutation import UpdateActorHealthMutation
+from src.ai_trpg.pgsql.world_mutation_operations import apply_world_mutations
+from src.ai_trpg.pgsql.world_history_operations import (
+    load_world_mutations_since,
+    load_world_state_at,
+    load_world_state_at_turn,
+    record_turn_checkpoint,
+    save_world_snapshot,
+)
+
+
+class TestWorldHistory:
+    """世界历史测试类"""
+
+    test_world_id: UUID
+    test_world_name: str
+    test_stage_name: str
+    test_actor_name: str
+
+    @pytest.fixture(scope="class", autouse=True)
+    def setup_test_world(self) -> Generator[None, None, None]:
+        """为整个测试类设置测试世界(class-scoped)"""
+        from src.ai_trpg.pgsql import pgsql_ensure_database_tables
+
+        pgsql_ensure_database_tables()
+
+        test_world = create_test_world1()
+        try:
+            delete_world(test_world.name)
+        except Exception:
+            pass
+
+        TestWorldHistory.test_world_name = test_world.name
+        TestWorldHistory.test_stage_name = test_world.stages[0].name
+        TestWorldHistory.test_actor_name = test_world.stages[0].actors[0].name
+        TestWorldHistory.test_world_id = save_world_to_db(test_world).id
+
+        yield
+
+        delete_world(TestWorldHistory.test_world_name)
+
+    def test_initial_snapshot(self) -> None:
+        """测试保存世界后可以直接加载初始状态"""
+        world = load_world_state_at(self.test_world_id)
+        assert world is not None
+        assert world.name == self.test_world_name
+        assert world.context == []
+
+    def test_replay_to_turns(self) -> None:
+        """测试回放到不同回合的世界状态"""
+        update_actor_health(self.test_world_id, self.test_actor_name, 70)
+        add_actor_effect(self.test_world_id, self.test_actor_name, "流血", "持续掉血")
+        turn_one = record_turn_checkpoint(self.test_world_id)
+
+        update_actor_health(self.test_world_id, self.test_actor_name, 40)
+        update_stage_info(
+            self.test_world_id, self.test_stage_name, narrative="第二回合"
+        )
+        turn_two = record_turn_checkpoint(self.test_world_id)
+        assert turn_two == turn_one + 1
+
+        world_one = load_world_state_at_turn(self.test_world_id, turn_one)
+        world_two = load_world_state_at_turn(self.test_world_id, turn_two)
+        assert world_one is not None and world_two is not None
+
+        actor_one, _ = world_one.find_actor_with_stage(self.test_actor_name)
+        actor_two, stage_two = world_two.find_actor_with_stage(self.test_actor_name)
+        assert actor_one is not None and actor_two is not None
+        assert actor_one.attributes.health == 70
+        assert [effect.name for effect in actor_one.effects] == ["流血"]
+        assert actor_two.attributes.health == 40
+        assert stage_two is not None and stage_two.narrative == "第二回合"
+
+        logger.success("✅ 回合回放测试通过")
+
+    def test_snapshot_matches_replay(self) -> None:
+        """测试新快照与回放到最新的结果一致"""
+        replayed = load_world_state_at(self.test_world_id)
+        assert save_world_snapshot(self.test_world_id) is not None
+        from_snapshot = load_world_state_at(self.test_world_id)
+
+        assert replayed is not None and from_snapshot is not None
+        actor_replayed, _ = replayed.find_actor_with_stage(self.test_actor_name)
+        actor_snapshot, _ = from_snapshot.find_actor_with_stage(self.test_actor_name)
+        assert actor_replayed is not None and actor_snapshot is not None
+        assert actor_replayed.attributes == actor_snapshot.attributes
+        assert sorted(e.name for e in actor_replayed.effects) == sorted(
+            e.name for e in actor_snapshot.effects
+        )
+
+    def test_rolled_back_batch_is_not_logged(self) -> None:
+        """测试整批回滚的变更不会写入日志"""
+        before = load_world_state_at(self.test_world_id)
+        result = apply_world_mutations(
+            self.test_world_id,
+            [
+                UpdateActorHealthMutation(
+                    actor_name=self.test_actor_name, new_health=1
+                ),
+                UpdateActorHealthMutation(actor_name="不存在的角色", new_health=1),
+            ],
+        )
+        assert not result.committed
+
+        after = load_world_state_at(self.test_world_id)
+        assert before is not None and after is not None
+        assert after == before
+
+    def test_mutations_since_entity_names(self) -> None:
+        """测试从名称快照的日志序号开始增量读取变更"""
+        entity_names = get_world_entity_names(self.test_world_name)
+        assert entity_names is not None
+        assert entity_names.world_id == self.test_world_id
+        assert (
+            entity_names.actor_stage_names[self.test_actor_name] == self.test_stage_name
+        )
+
+        delta = load_world_mutations_since(self.test_world_id, entity_names.log_seq)
+        assert delta.mutations == []
+        assert delta.latest_seq == entity_names.log_seq
+
+        update_actor_health(self.test_world_id, self.test_actor_name, 0)
+        record_turn_checkpoint(self.test_world_id)
+
+        delta = load_world_mutations_since(self.test_world_id, entity_names.log_seq)
+        assert delta.latest_seq > entity_names.log_seq
+        assert not delta.resynced
+        assert len(delta.mutations) == 1
+        mutation = delta.mutations[0]
+        assert isinstance(mutation, UpdateActorHealthMutation)
+        assert mutation.actor_name == self.test_actor_name
+        assert mutation.new_health == 0
+
+        entity_names = get_world_entity_names(self.test_world_name)
+        assert entity_names is not None
+        assert self.test_actor_name in entity_names.dead_actor_names
+
+        logger.success("✅ 增量读取变更测试通过")
+
+    def test_mutations_since_drop_presync_mutations(self) -> None:
+        """测试增量中发生过整体同步时，同步之前的变更被丢弃（最后执行，世界已被同步）"""
+        entity_names = get_world_entity_names(self.test_world_name)
+        assert entity_names is not None
+
+        update_actor_health(self.test_world_id, self.test_actor_name, 0)
+        assert sync_world_to_db(create_test_world1()).changed
+        update_actor_health(self.test_world_id, self.test_actor_name, 7)
+
+        delta = load_world_mutations_since(self.test_world_id, entity_names.log_seq)
+        assert delta.resynced
+        assert len(delta.mutations) == 1
+        mutation = delta.mutations[0]
+        assert isinstance(mutation, UpdateActorHealthMutation)
+        assert mutation.new_health == 7
+
+        logger.success("✅ 同步前变更丢弃测试通过")
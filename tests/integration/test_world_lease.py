@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+World Lease 集成测试
+
+测试 world_lease.py 中基于 advisory lock 的世界租约:
+- 同一世界的租约互斥，第二个持有者超时
+- 租约释放后可以再次获取
+- 不同世界的租约可以同时持有
+- 租约会话被断开后 ensure_world_lease_held 检测到租约丢失
+
+Author: yanghanggit
+Date: 2025-01-20
+"""
+
+import asyncio
+from uuid import uuid4
+import pytest
+from sqlalchemy import text
+
+from src.ai_trpg.pgsql.client import engine
+from src.ai_trpg.pgsql.world_lease import (
+    WorldLeaseLostError,
+    WorldLeaseTimeoutError,
+    ensure_world_lease_held,
+    world_lease,
+    world_lock_key,
+)
+
+
+class TestWorldLease:
+    """World Lease 测试类"""
+
+    def test_world_lock_key_is_stable_bigint(self) -> None:
+        """测试锁键稳定且落在 bigint 范围内"""
+        world_id = uuid4()
+        key = world_lock_key(world_id)
+        assert key == world_lock_key(world_id)
+        assert -(2**63) <= key < 2**63
+
+    async def test_same_world_lease_is_exclusive(self) -> None:
+        """测试同一世界的租约互斥"""
+        world_id = uuid4()
+
+        async with world_lease(world_id) as lease:
+            assert lease.is_held
+            with pytest.raises(WorldLeaseTimeoutError):
+                async with world_lease(
+                    world_id, acquire_timeout=0.3, poll_interval=0.1
+                ):
+                    pass
+
+        # 释放后可以再次获取
+        async with world_lease(world_id, acquire_timeout=1.0) as lease:
+            assert lease.is_held
+
+    async def test_different_worlds_run_in_parallel(self) -> None:
+        """测试不同世界的租约可以同时持有"""
+        entered = 0
+
+        async def hold(world_index: int) -> None:
+            nonlocal entered
+            async with world_lease(uuid4(), acquire_timeout=1.0):
+                entered += 1
+                await asyncio.sleep(0.2)
+
+        await asyncio.gather(*(hold(i) for i in range(3)))
+        assert entered == 3
+
+    async def test_waiter_acquires_after_release(self) -> None:
+        """测试等待者在持有者释放后获取租约（回合串行执行）"""
+        world_id = uuid4()
+        order = []
+
+        async def turn(name: str, hold_seconds: float) -> None:
+            async with world_lease(world_id, acquire_timeout=5.0, poll_interval=0.05):
+                order.append(f"{name}:start")
+                await asyncio.sleep(hold_seconds)
+                order.append(f"{name}:end")
+
+        first = asyncio.create_task(turn("first", 0.3))
+        await asyncio.sleep(0.1)
+        second = asyncio.create_task(turn("second", 0.0))
+        await asyncio.gather(first, second)
+
+        assert order == ["first:start", "first:end", "second:start", "second:end"]
+
+    async def test_lost_lease_is_detected(self) -> None:
+        """测试租约会话被断开后检测到租约丢失"""
+        # 不在租约内时不做检查
+        await ensure_world_lease_held()
+
+        world_id = uuid4()
+        async with world_lease(world_id) as lease:
+            await ensure_world_lease_held()
+
+            backend_pid = lease._connection.execute(
+                text("SELECT pg_backend_pid()")
+            ).scalar_one()
+            lease._connection.commit()
+            with engine.connect() as admin:
+                admin.execute(
+                    text("SELECT pg_terminate_backend(:pid)"), {"pid": backend_pid}
+                )
+
+            with pytest.raises(WorldLeaseLostError):
+                await ensure_world_lease_held()
+            assert not lease.is_held
+
+        # 会话断开后锁已由数据库释放，可以再次获取
+        async with world_lease(world_id, acquire_timeout=1.0) as lease:
+            assert lease.is_held
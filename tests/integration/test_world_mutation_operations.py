@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+World Mutation Operations 数据库操作集成测试
+
+测试 world_mutation_operations.py 中的功能:
+- apply_world_mutations: 在单个事务中批量应用世界状态变更
+- 原子性: 任意一条变更失败时整批回滚
+- 非原子模式: 成功的变更照常提交
+
+Author: yanghanggit
+Date: 2025-01-20
+"""
+
+from typing import Generator, List
+from uuid import UUID
+import pytest
+from loguru import logger
+
+from src.ai_trpg.demo.world1 import create_test_world1
+from src.ai_trpg.pgsql.world_operations import save_world_to_db, delete_world
+from src.ai_trpg.pgsql.world_mutation import (
+    WorldMutation,
+    UpdateActorHealthMutation,
+    UpdateActorAppearanceMutation,
+    AddActorEffectMutation,
+    RemoveActorEffectMutation,
+    MoveActorToStageMutation,
+    UpdateStageInfoMutation,
+    world_mutation_adapter,
+)
+from src.ai_trpg.pgsql.world_mutation_operations import apply_world_mutations
+from src.ai_trpg.pgsql.client import SessionLocal
+from src.ai_trpg.pgsql.actor import ActorDB
+from src.ai_trpg.pgsql.stage import StageDB
+from src.ai_trpg.pgsql.effect import EffectDB
+
+
+class TestWorldMutationOperations:
+    """World Mutation Operations 数据库操作测试类"""
+
+    # 类变量存储测试 World 信息
+    test_world_id: UUID
+    test_world_name: str
+    test_stage_name: str
+    test_actor_name: str
+
+    @pytest.fixture(scope="class", autouse=True)
+    def setup_test_world(self) -> Generator[None, None, None]:
+        """为整个测试类设置测试世界(class-scoped)"""
+        # 确保表存在
+        from src.ai_trpg.pgsql import pgsql_ensure_database_tables
+
+        pgsql_ensure_database_tables()
+        logger.info("✅ 数据库表已确保存在")
+
+        test_world = create_test_world1()
+
+        # 测试前：先清理可能存在的同名世界
+        try:
+            delete_world(test_world.name)
+            logger.info(f"🧹 已清理旧的测试世界: {test_world.name}")
+        except Exception:
+            pass
+
+        # 创建测试世界
+        TestWorldMutationOperations.test_world_name = test_world.name
+        TestWorldMutationOperations.test_stage_name = test_world.stages[0].name
+        TestWorldMutationOperations.test_actor_name = (
+            test_world.stages[0].actors[0].name
+        )
+        world_db = save_world_to_db(test_world)
+        TestWorldMutationOperations.test_world_id = world_db.id
+        logger.info(
+            f"🌍 测试世界已创建: {TestWorldMutationOperations.test_world_name} (ID: {TestWorldMutationOperations.test_world_id})"
+        )
+
+        yield  # 运行所有测试
+
+        # 测试后：清理
+        delete_world(TestWorldMutationOperations.test_world_name)
+        logger.info(
+            f"🧹 测试完成，已清理世界: {TestWorldMutationOperations.test_world_name}"
+        )
+
+    def _load_actor(self) -> ActorDB:
+        """读取测试角色（含属性与效果）"""
+        with SessionLocal() as db:
+            actor = (
+                db.query(ActorDB)
+                .join(ActorDB.stage)
+                .filter(StageDB.world_id == self.test_world_id)
+                .filter(ActorDB.name == self.test_actor_name)
+                .first()
+            )
+            assert actor is not None
+            # 触发懒加载，便于会话关闭后访问
+            _ = actor.attributes.health
+            _ = list(actor.effects)
+            return actor
+
+    def test_apply_mutations_in_single_transaction(self) -> None:
+        """测试一组变更在同一事务中全部生效"""
+        mutations: List[WorldMutation] = [
+            UpdateActorHealthMutation(actor_name=self.test_actor_name, new_health=42),
+            UpdateActorAppearanceMutation(
+                actor_name=self.test_actor_name, new_appearance="浑身是血"
+            ),
+            AddActorEffectMutation(
+                actor_name=self.test_actor_name,
+                effect_name="流血",
+                effect_description="每回合损失生命值",
+            ),
+            UpdateStageInfoMutation(
+                stage_name=self.test_stage_name, narrative="战斗结束，尘埃落定。"
+            ),
+        ]
+
+        batch_result = apply_world_mutations(self.test_world_id, mutations)
+
+        assert batch_result.committed
+        assert batch_result.all_succeeded
+        assert [result.index for result in batch_result.results] == [0, 1, 2, 3]
+        assert batch_result.results[0].data["new_health"] == 42
+
+        actor = self._load_actor()
+        assert actor.attributes.health == 42
+        assert actor.appearance == "浑身是血"
+        assert "流血" in [effect.name for effect in actor.effects]
+
+        with SessionLocal() as db:
+            stage = (
+                db.query(StageDB)
+                .filter(StageDB.world_id == self.test_world_id)
+                .filter(StageDB.name == self.test_stage_name)
+                .first()
+            )
+            assert stage is not None
+            assert stage.narrative == "战斗结束，尘埃落定。"
+
+        logger.success("✅ 批量变更单事务提交测试通过")
+
+    def test_add_then_remove_effect_in_same_batch(self) -> None:
+        """测试同一批次中先添加后移除 Effect 的顺序语义"""
+        batch_result = apply_world_mutations(
+            self.test_world_id,
+            [
+                AddActorEffectMutation(
+                    actor_name=self.test_actor_name,
+                    effect_name="短暂眩晕",
+                    effect_description="无法行动",
+                ),
+                RemoveActorEffectMutation(
+                    actor_name=self.test_actor_name, effect_name="短暂眩晕"
+                ),
+            ],
+        )
+
+        assert batch_result.committed
+        assert batch_result.results[1].data["removed_count"] == 1
+
+        with SessionLocal() as db:
+            remaining = (
+                db.query(EffectDB)
+                .join(EffectDB.actor)
+                .join(ActorDB.stage)
+                .filter(StageDB.world_id == self.test_world_id)
+                .filter(EffectDB.name == "短暂眩晕")
+                .count()
+            )
+            assert remaining == 0
+
+        logger.success("✅ 同批次添加后移除 Effect 测试通过")
+
+    def test_atomic_batch_rolls_back_on_failure(self) -> None:
+        """测试原子模式下任意一条变更失败则整批回滚"""
+        old_health = self._load_actor().attributes.health
+
+        batch_result = apply_world_mutations(
+            self.test_world_id,
+            [
+                UpdateActorHealthMutation(
+                    actor_name=self.test_actor_name, new_health=old_health - 1
+                ),
+                MoveActorToStageMutation(
+                    actor_name=self.test_actor_name,
+                    target_stage_name="不存在的场景",
+                ),
+            ],
+        )
+
+        assert not batch_result.committed
+        assert batch_result.results[0].success
+        assert not batch_result.results[1].success
+        assert batch_result.results[1].error is not None
+        assert self._load_actor().attributes.health == old_health
+
+        logger.success("✅ 原子回滚测试通过")
+
+    def test_non_atomic_batch_commits_successful_mutations(self) -> None:
+        """测试非原子模式下成功的变更照常提交"""
+        batch_result = apply_world_mutations(
+            self.test_world_id,
+            [
+                UpdateActorHealthMutation(
+                    actor_name=self.test_actor_name, new_health=7
+                ),
+                UpdateActorHealthMutation(actor_name="不存在的角色", new_health=1),
+            ],
+            atomic=False,
+        )
+
+        assert batch_result.committed
+        assert not batch_result.all_succeeded
+        assert self._load_actor().attributes.health == 7
+
+        logger.success("✅ 非原子模式部分提交测试通过")
+
+    def test_mutation_adapter_parses_dict_payload(self) -> None:
+        """测试通过 type 字段将字典解析为对应的变更类型"""
+        mutation = world_mutation_adapter.validate_python(
+            {
+                "type": "move_actor_to_stage",
+                "actor_name": self.test_actor_name,
+                "target_stage_name": self.test_stage_name,
+            }
+        )
+        assert isinstance(mutation, MoveActorToStageMutation)
+
+        # 移动到当前所在场景不产生实际移动
+        batch_result = apply_world_mutations(self.test_world_id, [mutation])
+        assert batch_result.committed
+        assert batch_result.results[0].data["moved"] is False
+
+        logger.success("✅ 字典解析测试通过")
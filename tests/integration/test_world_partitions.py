@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+按世界分区集成测试
+
+测试 world_partitions.py（需要 postgresql_config.partition_by_world=True，否则跳过）:
+- 保存世界时为 messages/actor_plans/actor_movement_events 创建分区
+- 计划与移动事件分区为 UNLOGGED
+- 分区 DDL 不在数据事务内执行，不阻塞其他世界对父表的写入
+- 删除世界时 DETACH + DROP 分区
+
+Author: yanghanggit
+Date: 2025-01-20
+"""
+
+import threading
+from typing import Generator, List, Optional
+from uuid import UUID
+import pytest
+from loguru import logger
+from sqlalchemy import text
+
+from src.ai_trpg.demo.world1 import create_test_world1
+from src.ai_trpg.pgsql.client import SessionLocal
+from src.ai_trpg.pgsql.world_operations import save_world_to_db, delete_world
+from src.ai_trpg.pgsql.world_partitions import (
+    PARTITION_BY_WORLD,
+    WORLD_PARTITIONED_TABLES,
+    world_partition_name,
+)
+
+pytestmark = pytest.mark.skipif(
+    not PARTITION_BY_WORLD, reason="未开启 postgresql_config.partition_by_world"
+)
+
+
+def _partition_persistence(partition_name: str) -> Optional[str]:
+    """返回分区的 relpersistence（p=普通表, u=UNLOGGED），不存在时返回 None"""
+    with SessionLocal() as db:
+        result = db.execute(
+            text("SELECT relpersistence FROM pg_class WHERE relname = :name"),
+            {"name": partition_name},
+        ).scalar_one_or_none()
+        return str(result) if result is not None else None
+
+
+class TestWorldPartitions:
+    """按世界分区测试类"""
+
+    test_world_id: UUID
+    test_world_name: str
+
+    @pytest.fixture(scope="class", autouse=True)
+    def setup_test_world(self) -> Generator[None, None, None]:
+        """为整个测试类设置测试世界(class-scoped)"""
+        from src.ai_trpg.pgsql import pgsql_ensure_database_tables
+
+        pgsql_ensure_database_tables()
+
+        test_world = create_test_world1()
+        try:
+            delete_world(test_world.name)
+        except Exception:
+            pass
+
+        TestWorldPartitions.test_world_name = test_world.name
+        TestWorldPartitions.test_world_id = save_world_to_db(test_world).id
+
+        yield
+
+        delete_world(TestWorldPartitions.test_world_name)
+
+    def test_partitions_created_on_save(self) -> None:
+        """测试保存世界时创建分区，计划与事件分区为 UNLOGGED"""
+        for table_name, _, unlogged in WORLD_PARTITIONED_TABLES:
+            partition_name = world_partition_name(table_name, self.test_world_id)
+            persistence = _partition_persistence(partition_name)
+            assert persistence == ("u" if unlogged else "p"), partition_name
+
+        logger.success("✅ 世界分区创建测试通过")
+
+    def test_messages_stored_in_world_partition(self) -> None:
+        """测试世界的消息写入该世界的分区"""
+        partition_name = world_partition_name("messages", self.test_world_id)
+        with SessionLocal() as db:
+            count = db.execute(
+                text(f'SELECT COUNT(*) FROM "{partition_name}"')
+            ).scalar_one()
+        assert count > 0
+
+    def test_partition_ddl_does_not_block_other_worlds(self) -> None:
+        """测试另一事务正在写父表时，保存/删除其他世界不会被分区 DDL 阻塞"""
+        other_world = create_test_world1()
+        other_world.name = f"{other_world.name}_partition_lock"
+        errors: List[Exception] = []
+
+        def _save() -> None:
+            try:
+                save_world_to_db(other_world)
+            except Exception as e:
+                errors.append(e)
+
+        with SessionLocal() as db:
+            # 模拟其他世界的写事务（与 CREATE TABLE ... PARTITION OF 的锁冲突）
+            db.execute(text("LOCK TABLE messages IN ROW EXCLUSIVE MODE"))
+            worker = threading.Thread(target=_save)
+            worker.start()
+            worker.join(timeout=10)
+            blocked = worker.is_alive()
+            db.rollback()
+
+        worker.join()
+        delete_world(other_world.name)
+        assert not blocked
+        assert not errors
+
+        logger.success("✅ 分区 DDL 不阻塞其他世界测试通过")
+
+    def test_partitions_dropped_on_delete(self) -> None:
+        """测试删除世界时删除分区（最后执行，重新保存供 fixture 清理）"""
+        assert delete_world(self.test_world_name)
+
+        for table_name, _, _ in WORLD_PARTITIONED_TABLES:
+            partition_name = world_partition_name(table_name, self.test_world_id)
+            assert _partition_persistence(partition_name) is None
+
+        TestWorldPartitions.test_world_id = save_world_to_db(create_test_world1()).id
+
+        logger.success("✅ 世界分区删除测试通过")
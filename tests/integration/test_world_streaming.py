@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+世界流式读取集成测试
+
+测试 iter_stages_in_world / iter_actors_in_world:
+- 分批读取的结果与一次性读取一致
+- 每批的关联数据已预加载，会话外可直接访问
+- 死亡状态过滤
+- 两批之间不占用数据库连接（每批使用独立的短读会话）
+- 同场景角色只加载名称与外观
+
+Author: yanghanggit
+Date: 2025-01-20
+"""
+
+from typing import Generator
+from uuid import UUID
+import pytest
+from loguru import logger
+from sqlalchemy.exc import InvalidRequestError
+
+from src.ai_trpg.demo.world1 import create_test_world1
+from src.ai_trpg.pgsql.client import engine
+from src.ai_trpg.pgsql.world_operations import save_world_to_db, delete_world
+from src.ai_trpg.pgsql.actor_operations import (
+    get_actors_in_world,
+    iter_actors_in_world,
+)
+from src.ai_trpg.pgsql.stage_operations import (
+    get_stages_in_world,
+    iter_stages_in_world,
+)
+
+
+class TestWorldStreaming:
+    """世界流式读取测试类"""
+
+    test_world_id: UUID
+    test_world_name: str
+
+    @pytest.fixture(scope="class", autouse=True)
+    def setup_test_world(self) -> Generator[None, None, None]:
+        """为整个测试类设置测试世界(class-scoped)"""
+        from src.ai_trpg.pgsql import pgsql_ensure_database_tables
+
+        pgsql_ensure_database_tables()
+
+        test_world = create_test_world1()
+        try:
+            delete_world(test_world.name)
+        except Exception:
+            pass
+
+        TestWorldStreaming.test_world_name = test_world.name
+        TestWorldStreaming.test_world_id = save_world_to_db(test_world).id
+
+        yield
+
+        delete_world(TestWorldStreaming.test_world_name)
+
+    def test_iter_actors_matches_eager_read(self) -> None:
+        """测试分批读取角色与一次性读取结果一致"""
+        expected = {actor.name for actor in get_actors_in_world(self.test_world_id)}
+
+        streamed = set()
+        chunk_count = 0
+        for chunk in iter_actors_in_world(self.test_world_id, chunk_size=1):
+            chunk_count += 1
+            assert len(chunk) == 1
+            for actor in chunk:
+                # 会话外访问预加载关系
+                assert actor.stage.name
+                assert actor.name in [a.name for a in actor.stage.actors]
+                assert actor.attributes.max_health > 0
+                _ = [effect.name for effect in actor.effects]
+                streamed.add(actor.name)
+
+        assert streamed == expected
+        assert chunk_count == len(expected)
+
+        logger.success(f"✅ 分批读取角色测试通过 ({chunk_count} 批)")
+
+    def test_iter_releases_connection_between_chunks(self) -> None:
+        """测试调用方处理每一批时不占用数据库连接"""
+        for chunk in iter_actors_in_world(self.test_world_id, chunk_size=1):
+            assert chunk
+            assert engine.pool.checkedout() == 0  # type: ignore[attr-defined]
+
+        for stages in iter_stages_in_world(self.test_world_id, chunk_size=1):
+            assert stages
+            assert engine.pool.checkedout() == 0  # type: ignore[attr-defined]
+
+    def test_iter_actors_loads_narrow_stage_occupants(self) -> None:
+        """测试同场景角色只加载名称与外观"""
+        for chunk in iter_actors_in_world(self.test_world_id, chunk_size=1):
+            for actor in chunk:
+                for occupant in actor.stage.actors:
+                    assert occupant.name and occupant.appearance is not None
+                    if occupant.name != actor.name:
+                        # 不在本批中的同场景角色没有加载关联数据
+                        with pytest.raises(InvalidRequestError):
+                            _ = occupant.attributes
+
+    def test_iter_actors_filters_dead(self) -> None:
+        """测试死亡状态过滤"""
+        dead = [
+            actor
+            for chunk in iter_actors_in_world(self.test_world_id, is_dead=True)
+            for actor in chunk
+        ]
+        assert all(actor.is_dead for actor in dead)
+
+    def test_iter_stages_matches_eager_read(self) -> None:
+        """测试分批读取场景与一次性读取结果一致"""
+        expected = {
+            stage.name: len(stage.actors)
+            for stage in get_stages_in_world(self.test_world_id)
+        }
+
+        streamed = {}
+        for chunk in iter_stages_in_world(self.test_world_id, chunk_size=1):
+            for stage in chunk:
+                for actor in stage.actors:
+                    assert actor.attributes is not None
+                    _ = [effect.name for effect in actor.effects]
+                streamed[stage.name] = len(stage.actors)
+
+        assert streamed == expected
+
+        logger.success("✅ 分批读取场景测试通过")
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+sync_world_to_db 集成测试
+
+测试世界的差异同步:
+- 数据库中不存在时新建世界
+- 世界未变化时不产生写入，已有行的 ID 保持不变
+- 场景字段、生命值、Effect、角色移动、上下文追加只写入变化的部分
+- 同步后 load_world_from_db 与 World 一致，回放也从同步快照继续
+- 同步（包括无变化时）清理该世界的回合日志、行动计划与移动事件
+- 同步后刷新代理注册表，不再应用同步之前的移动与死亡
+
+Author: yanghanggit
+Date: 2025-01-20
+"""
+
+from typing import Generator
+import pytest
+from langchain_core.messages import AIMessage
+from loguru import logger
+
+from src.ai_trpg.agent import GameWorld
+from src.ai_trpg.demo.models import Effect, World
+from src.ai_trpg.mcp import McpClient, mcp_config
+from src.ai_trpg.demo.world3 import create_test_world3
+from src.ai_trpg.pgsql.world_operations import (
+    delete_world,
+    get_world_id_by_name,
+    load_world_from_db,
+    move_actor_to_stage,
+)
+from src.ai_trpg.pgsql.actor_operations import get_actors_in_world, update_actor_health
+from src.ai_trpg.pgsql.actor_plan_operations import (
+    add_actor_plan_to_db,
+    get_latest_actor_plan,
+)
+from src.ai_trpg.pgsql.actor_movement_event_operations import (
+    get_actor_movement_events_in_world,
+    save_actor_movement_event_to_db,
+)
+from src.ai_trpg.pgsql.turn_journal_operations import (
+    get_turn_journal,
+    record_turn_node_completed,
+)
+from src.ai_trpg.pgsql.world_history_operations import load_world_state_at
+from src.ai_trpg.pgsql.world_sync_operations import sync_world_to_db
+
+
+def _assert_world_matches(loaded: World, expected: World) -> None:
+    """比较世界内容（忽略场景/角色/连接/Effect 的顺序）"""
+    assert loaded.campaign_setting == expected.campaign_setting
+    assert loaded.context == expected.context
+    assert sorted(s.name for s in loaded.stages) == sorted(
+        s.name for s in expected.stages
+    )
+    for expected_stage in expected.stages:
+        stage = loaded.find_stage(expected_stage.name)
+        assert stage is not None
+        exclude = {"actors", "stage_connections"}
+        assert stage.model_dump(exclude=exclude) == expected_stage.model_dump(
+            exclude=exclude
+        )
+        assert sorted(stage.stage_connections) == sorted(
+            expected_stage.stage_connections
+        )
+        assert sorted(a.name for a in stage.actors) == sorted(
+            a.name for a in expected_stage.actors
+        )
+        for expected_actor in expected_stage.actors:
+            actor = stage.find_actor(expected_actor.name)
+            assert actor is not None
+            assert actor.model_dump(exclude={"effects"}) == expected_actor.model_dump(
+                exclude={"effects"}
+            )
+            assert sorted(e.name for e in actor.effects) == sorted(
+                e.name for e in expected_actor.effects
+            )
+
+
+class TestWorldSync:
+    """sync_world_to_db 测试类"""
+
+    original_world: World
+
+    @pytest.fixture(scope="class", autouse=True)
+    def setup_test_world(self) -> Generator[None, None, None]:
+        """为整个测试类设置测试世界(class-scoped)"""
+        from src.ai_trpg.pgsql import pgsql_ensure_database_tables
+
+        pgsql_ensure_database_tables()
+
+        test_world = create_test_world3()
+        try:
+            delete_world(test_world.name)
+        except Exception:
+            pass
+
+        TestWorldSync.original_world = test_world
+
+        yield
+
+        delete_world(test_world.name)
+
+    @pytest.fixture(autouse=True)
+    def reset_world(self) -> None:
+        """每个测试前将数据库中的世界同步回原始状态"""
+        sync_world_to_db(self.original_world)
+
+    def test_create_and_no_change(self) -> None:
+        """测试新建后重复同步不产生写入，ID 保持不变"""
+        world = self.original_world
+        world_id = get_world_id_by_name(world.name)
+        assert world_id is not None
+        actor_ids = {a.name: a.id for a in get_actors_in_world(world_id)}
+
+        result = sync_world_to_db(world)
+        assert not result.created
+        assert not result.changed
+        assert result.world_id == world_id
+        assert {a.name: a.id for a in get_actors_in_world(world_id)} == actor_ids
+
+        logger.success("✅ 无变化同步测试通过")
+
+    def test_minimal_writes(self) -> None:
+        """测试只写入变化的部分"""
+        world = self.original_world.model_copy(deep=True)
+        world_id = get_world_id_by_name(world.name)
+        assert world_id is not None
+        actor_ids = {a.name: a.id for a in get_actors_in_world(world_id)}
+
+        stage = world.stages[0]
+        stage.narrative = "同步测试的新叙事"
+        actor = stage.actors[0]
+        actor.attributes.health = max(0, actor.attributes.health - 1)
+        actor.effects.append(Effect(name="同步测试", description="测试用效果"))
+        actor.context.append(AIMessage(content="同步测试的新消息"))
+
+        result = sync_world_to_db(world)
+        assert not result.created
+        # 场景 + 角色（生命值/Effect 合并为一次角色更新）
+        assert result.updated == 2
+        # Effect 整体重建 + 一条新消息
+        assert result.inserted == len(actor.effects) + 1
+        assert result.deleted == len(actor.effects) - 1
+
+        # 已有行的 ID 保持不变
+        assert {a.name: a.id for a in get_actors_in_world(world_id)} == actor_ids
+
+        loaded = load_world_from_db(world.name)
+        assert loaded is not None
+        _assert_world_matches(loaded, world)
+
+        logger.success("✅ 最小写入同步测试通过")
+
+    def test_move_actor(self) -> None:
+        """测试角色移动到其他场景"""
+        world = self.original_world.model_copy(deep=True)
+        source, target = world.stages[0], world.stages[1]
+        actor = source.actors[0]
+        assert world.move_actor_to_stage(actor.name, target.name) is not None
+
+        result = sync_world_to_db(world)
+        assert result.changed
+        assert result.inserted == 0
+        assert result.deleted == 0
+
+        loaded = load_world_from_db(world.name)
+        assert loaded is not None
+        _assert_world_matches(loaded, world)
+
+        logger.success("✅ 角色移动同步测试通过")
+
+    def test_snapshot_after_sync(self) -> None:
+        """测试同步后从快照回放得到同步后的状态"""
+        world = self.original_world.model_copy(deep=True)
+        world.stages[0].environment = "同步测试的新环境"
+        sync_world_to_db(world)
+
+        world_id = get_world_id_by_name(world.name)
+        assert world_id is not None
+        state = load_world_state_at(world_id)
+        assert state is not None
+        stage = state.find_stage(world.stages[0].name)
+        assert stage is not None
+        assert stage.environment == "同步测试的新环境"
+
+        logger.success("✅ 同步快照测试通过")
+
+    def test_sync_clears_turn_state(self) -> None:
+        """测试无变化的同步也会清理回合日志、行动计划与移动事件"""
+        world = self.original_world
+        world_id = get_world_id_by_name(world.name)
+        assert world_id is not None
+        actor = world.stages[0].actors[0]
+
+        record_turn_node_completed(world_id, 1, f"observe:{actor.name}")
+        add_actor_plan_to_db(world_id, actor.name, "同步测试的计划")
+        save_actor_movement_event_to_db(
+            world_id,
+            actor.name,
+            world.stages[0].name,
+            world.stages[1].name,
+            "同步测试的移动",
+            "站立",
+        )
+
+        result = sync_world_to_db(world)
+        assert not result.changed
+        assert result.cleared == 3
+
+        assert get_turn_journal(world_id, 1) == {}
+        assert get_latest_actor_plan(world_id, actor.name) == ""
+        assert get_actor_movement_events_in_world(world_id) == []
+
+        logger.success("✅ 同步清理回合状态测试通过")
+
+    @pytest.mark.asyncio
+    async def test_refresh_after_sync_ignores_presync_mutations(self) -> None:
+        """测试同步之前的移动与死亡不会在刷新注册表时重新应用"""
+        world = self.original_world
+        world_id = get_world_id_by_name(world.name)
+        assert world_id is not None
+        source, target = world.stages[0], world.stages[1]
+        actor = source.actors[0]
+
+        game_world = GameWorld(
+            mcp_client_factory=lambda agent_name: McpClient(
+                base_url=mcp_config.mcp_server_url,
+                protocol_version=mcp_config.protocol_version,
+                timeout=mcp_config.mcp_timeout,
+            )
+        )
+        await game_world.load(world.name)
+
+        # 回合中角色移动并死亡，随后世界被同步回原始状态
+        assert move_actor_to_stage(world_id, actor.name, target.name)[0]
+        update_actor_health(world_id, actor.name, 0)
+        assert sync_world_to_db(world).changed
+
+        await game_world.refresh()
+        assert game_world.get_actor_stage_name(actor.name) == source.name
+        assert not game_world.is_actor_dead(actor.name)
+
+        logger.success("✅ 同步后刷新注册表测试通过")
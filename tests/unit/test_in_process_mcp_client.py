@@ -0,0 +1,89 @@
+"""
+进程内 MCP 客户端单元测试
+
+使用一个最小的 FastMCP 服务器验证 InProcessMcpClient：
+- 工具列表与 HTTP 客户端相同的 McpToolInfo 结构
+- 工具调用直接分发到注册的函数，文本结果与 HTTP 客户端一致
+- 工具异常返回失败结果而不是抛出
+- 提示词与资源的读取
+"""
+
+from typing import Any
+import pytest
+from mcp.server.fastmcp import FastMCP
+from src.ai_trpg.mcp import InProcessMcpClient, McpClient
+
+
+def _create_server() -> FastMCP[Any]:
+    server: FastMCP[Any] = FastMCP(name="进程内测试服务器")
+
+    @server.tool()
+    async def add(a: int, b: int) -> str:
+        """两数相加"""
+        return str(a + b)
+
+    @server.tool()
+    async def fail(reason: str) -> str:
+        """总是失败"""
+        raise ValueError(reason)
+
+    @server.prompt()
+    async def greeting(name: str) -> str:
+        """问候提示词"""
+        return f"你好，{name}"
+
+    @server.resource("game://status")
+    async def status() -> str:
+        """服务器状态"""
+        return "ok"
+
+    return server
+
+
+class TestInProcessMcpClient:
+    """进程内 MCP 客户端测试类"""
+
+    @pytest.mark.asyncio
+    async def test_list_and_call_tool(self) -> None:
+        client = InProcessMcpClient(_create_server())
+        assert isinstance(client, McpClient)
+        await client.connect()
+
+        tools = await client.list_tools()
+        assert tools is not None
+        assert {tool.name for tool in tools} == {"add", "fail"}
+        add_tool = next(tool for tool in tools if tool.name == "add")
+        assert set(add_tool.input_schema["properties"]) == {"a", "b"}
+
+        result = await client.call_tool("add", {"a": 1, "b": 2})
+        assert result.success
+        assert result.result == "3"
+
+    @pytest.mark.asyncio
+    async def test_tool_error(self) -> None:
+        client = InProcessMcpClient(_create_server())
+        await client.connect()
+
+        result = await client.call_tool("fail", {"reason": "测试失败"})
+        assert not result.success
+        assert result.error is not None and "测试失败" in result.error
+
+        result = await client.call_tool("missing", {})
+        assert not result.success
+
+    @pytest.mark.asyncio
+    async def test_prompts_and_resources(self) -> None:
+        client = InProcessMcpClient(_create_server())
+        await client.connect()
+
+        prompts = await client.list_prompts()
+        assert prompts is not None and [p.name for p in prompts] == ["greeting"]
+        prompt = await client.get_prompt("greeting", {"name": "勇者"})
+        assert prompt is not None
+        assert prompt.messages[0].content["text"] == "你好，勇者"
+
+        resources = await client.list_resources()
+        assert resources is not None
+        assert [r.uri for r in resources] == ["game://status"]
+        content = await client.read_resource("game://status")
+        assert content is not None and content.text == "ok"
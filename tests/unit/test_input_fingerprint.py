@@ -0,0 +1,56 @@
+"""
+InputFingerprintTracker 代理输入指纹单元测试
+
+验证：
+- 输入指纹与上下文长度都未变化时判定为未变化，并按阶段计数
+- 任一输入部分变化或上下文有新消息时判定为已变化
+- "always" 策略不做判断，clear 后所有代理重新调用
+"""
+
+from src.ai_trpg.agent import InputFingerprintTracker, fingerprint_inputs
+
+PHASE = "observe_and_plan"
+
+
+class TestInputFingerprint:
+    """InputFingerprintTracker 测试类"""
+
+    def test_fingerprint_inputs(self) -> None:
+        assert fingerprint_inputs("场景", "叙事") == fingerprint_inputs("场景", "叙事")
+        assert fingerprint_inputs("场景", "叙事") != fingerprint_inputs(
+            "场景", "新叙事"
+        )
+        # 各部分之间有分隔，拼接相同也不会冲突
+        assert fingerprint_inputs("ab", "c") != fingerprint_inputs("a", "bc")
+
+    def test_unchanged_inputs_are_skipped(self) -> None:
+        tracker = InputFingerprintTracker(policy="reuse_plan")
+        inputs = fingerprint_inputs("提示词", "叙事")
+
+        # 没有记录时总是调用
+        assert not tracker.is_unchanged(PHASE, "角色A", inputs, 3)
+
+        tracker.record(PHASE, "角色A", inputs, 5)
+        assert tracker.is_unchanged(PHASE, "角色A", inputs, 5)
+        # 上下文有新消息 / 输入变化 / 其他阶段或其他角色
+        assert not tracker.is_unchanged(PHASE, "角色A", inputs, 6)
+        assert not tracker.is_unchanged(
+            PHASE, "角色A", fingerprint_inputs("提示词", "新叙事"), 5
+        )
+        assert not tracker.is_unchanged("actor_self_update", "角色A", inputs, 5)
+        assert not tracker.is_unchanged(PHASE, "角色B", inputs, 5)
+
+        assert tracker.skipped == {PHASE: 1}
+
+    def test_always_policy_and_clear(self) -> None:
+        tracker = InputFingerprintTracker(policy="always")
+        inputs = fingerprint_inputs("提示词")
+        tracker.record(PHASE, "角色A", inputs, 2)
+        assert not tracker.is_unchanged(PHASE, "角色A", inputs, 2)
+
+        tracker.policy = "skip"
+        assert tracker.is_unchanged(PHASE, "角色A", inputs, 2)
+
+        tracker.clear()
+        assert not tracker.is_unchanged(PHASE, "角色A", inputs, 2)
+        assert tracker.skipped == {}
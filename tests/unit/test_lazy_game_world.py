@@ -0,0 +1,244 @@
+"""
+GameWorld 按需创建代理单元测试
+
+验证（模拟数据库中的名称查询）：
+- 加载时只创建世界观代理，场景/角色代理第一次访问时创建
+- 闲置代理被回收并断开 MCP 客户端，世界观代理与当前代理保留
+- 回收后再次访问会重新创建代理
+- 按类型查找角色/场景代理，名称类型不符时返回 None
+- refresh 按变更日志增量更新角色所在场景/死亡状态，整体同步后增删代理
+- 生命值恢复不会复活注册表中已死亡的角色（数据库中只有整体同步清除死亡标记）
+"""
+
+from typing import List, Optional
+from unittest.mock import patch
+from uuid import UUID, uuid4
+import pytest
+from src.ai_trpg.agent import ActorAgent, GameWorld, StageAgent
+from src.ai_trpg.mcp import McpClient, mcp_config
+from src.ai_trpg.pgsql import (
+    MoveActorToStageMutation,
+    UpdateActorHealthMutation,
+    WorldEntityNames,
+    WorldMutationDelta,
+)
+
+WORLD_NAME = "测试世界"
+STAGE_NAMES = ["场景A", "场景B"]
+ACTOR_NAMES = [f"角色{index}" for index in range(100)]
+WORLD_ID = uuid4()
+
+
+class _TrackingMcpClient(McpClient):
+    """记录断开次数的 MCP 客户端（不建立连接）"""
+
+    def __init__(self, agent_name: str) -> None:
+        super().__init__(
+            base_url=mcp_config.mcp_server_url,
+            protocol_version=mcp_config.protocol_version,
+            timeout=mcp_config.mcp_timeout,
+        )
+        self.agent_name = agent_name
+        self.disconnect_count = 0
+
+    async def disconnect(self) -> None:
+        self.disconnect_count += 1
+
+
+def _fake_entity_names(world_name: str) -> Optional[WorldEntityNames]:
+    return WorldEntityNames(
+        world_id=WORLD_ID,
+        log_seq=10,
+        stage_names=STAGE_NAMES,
+        actor_stage_names={name: STAGE_NAMES[0] for name in ACTOR_NAMES},
+    )
+
+
+def _fake_world_id(world_name: str) -> Optional[UUID]:
+    return WORLD_ID
+
+
+async def _load_game_world(created: List[_TrackingMcpClient]) -> GameWorld:
+    def factory(agent_name: str) -> McpClient:
+        client = _TrackingMcpClient(agent_name)
+        created.append(client)
+        return client
+
+    game_world = GameWorld(mcp_client_factory=factory)
+    with patch("src.ai_trpg.agent.manager.get_world_entity_names", _fake_entity_names):
+        await game_world.load(WORLD_NAME)
+    return game_world
+
+
+class TestLazyGameWorld:
+    """GameWorld 按需创建代理测试类"""
+
+    @pytest.mark.asyncio
+    async def test_agents_created_on_first_use(self) -> None:
+        created: List[_TrackingMcpClient] = []
+        game_world = await _load_game_world(created)
+
+        # 只创建了世界观代理
+        assert [client.agent_name for client in created] == [WORLD_NAME]
+        assert game_world.materialized_agents == []
+        assert len(game_world.agent_names) == 1 + len(STAGE_NAMES) + len(ACTOR_NAMES)
+
+        actor = game_world.get_agent_by_name("角色7")
+        assert isinstance(actor, ActorAgent)
+        assert game_world.get_agent_by_name("角色7") is actor
+        assert isinstance(game_world.get_agent_by_name("场景B"), StageAgent)
+        assert game_world.get_agent_by_name("不存在") is None
+        assert len(created) == 3
+
+        # all_agents 会创建全部代理
+        assert len(game_world.all_agents) == len(game_world.agent_names)
+        assert len(game_world.actor_agents) == len(ACTOR_NAMES)
+
+    @pytest.mark.asyncio
+    async def test_typed_lookups(self) -> None:
+        created: List[_TrackingMcpClient] = []
+        game_world = await _load_game_world(created)
+
+        actor = game_world.get_actor_agent("角色42")
+        assert isinstance(actor, ActorAgent)
+        assert game_world.get_agent_by_name("角色42") is actor
+        assert game_world.get_stage_agent("角色42") is None
+
+        stage = game_world.get_stage_agent("场景A")
+        assert isinstance(stage, StageAgent)
+        assert game_world.get_actor_agent("场景A") is None
+
+        assert game_world.get_actor_agent(WORLD_NAME) is None
+        assert game_world.get_stage_agent("不存在") is None
+        assert len(created) == 3
+
+    @pytest.mark.asyncio
+    async def test_evict_idle_agents(self) -> None:
+        created: List[_TrackingMcpClient] = []
+        game_world = await _load_game_world(created)
+
+        first = game_world.get_agent_by_name("角色1")
+        assert first is not None
+        assert game_world.switch_current_agent("角色2") is not None
+        game_world.get_agent_by_name("场景A")
+
+        # 刚访问过的代理不会被回收
+        assert await game_world.evict_idle_agents(max_idle_seconds=60.0) == 0
+
+        # 当前代理保留，其余被回收并断开
+        assert await game_world.evict_idle_agents(max_idle_seconds=0.0) == 2
+        assert [agent.name for agent in game_world.materialized_agents] == ["角色2"]
+        assert first.mcp_client.disconnect_count == 1  # type: ignore[attr-defined]
+        assert game_world.world_agent is not None
+        assert game_world.get_agent_by_name(WORLD_NAME) is game_world.world_agent
+
+        # 再次访问时重新创建
+        recreated = game_world.get_agent_by_name("角色1")
+        assert recreated is not None and recreated is not first
+
+    @pytest.mark.asyncio
+    async def test_refresh_applies_moves_and_deaths(self) -> None:
+        created: List[_TrackingMcpClient] = []
+        game_world = await _load_game_world(created)
+        assert game_world.get_actor_stage_name("角色3") == "场景A"
+
+        requested_seqs: List[int] = []
+
+        def fake_mutations_since(world_id: UUID, after_seq: int) -> WorldMutationDelta:
+            requested_seqs.append(after_seq)
+            return WorldMutationDelta(
+                latest_seq=12,
+                mutations=[
+                    MoveActorToStageMutation(
+                        actor_name="角色3", target_stage_name="场景B"
+                    ),
+                    UpdateActorHealthMutation(actor_name="角色4", new_health=0),
+                ],
+            )
+
+        with (
+            patch("src.ai_trpg.agent.manager.get_world_id_by_name", _fake_world_id),
+            patch(
+                "src.ai_trpg.agent.manager.load_world_mutations_since",
+                fake_mutations_since,
+            ),
+        ):
+            assert await game_world.refresh() == 2
+
+        # 从加载时的日志序号继续，不重新创建任何客户端
+        assert requested_seqs == [10]
+        assert len(created) == 1
+        assert game_world.get_actor_stage_name("角色3") == "场景B"
+        assert "角色3" in game_world.get_stage_actor_names("场景B")
+        assert game_world.is_actor_dead("角色4")
+        assert not game_world.is_actor_dead("角色3")
+
+    @pytest.mark.asyncio
+    async def test_refresh_does_not_revive_dead_actor(self) -> None:
+        created: List[_TrackingMcpClient] = []
+        game_world = await _load_game_world(created)
+
+        def fake_mutations_since(world_id: UUID, after_seq: int) -> WorldMutationDelta:
+            return WorldMutationDelta(
+                latest_seq=12,
+                mutations=[
+                    UpdateActorHealthMutation(actor_name="角色4", new_health=0),
+                    UpdateActorHealthMutation(actor_name="角色4", new_health=50),
+                ],
+            )
+
+        with (
+            patch("src.ai_trpg.agent.manager.get_world_id_by_name", _fake_world_id),
+            patch(
+                "src.ai_trpg.agent.manager.load_world_mutations_since",
+                fake_mutations_since,
+            ),
+        ):
+            assert await game_world.refresh() == 1
+
+        assert game_world.is_actor_dead("角色4")
+
+    @pytest.mark.asyncio
+    async def test_refresh_after_resync(self) -> None:
+        created: List[_TrackingMcpClient] = []
+        game_world = await _load_game_world(created)
+        removed = game_world.get_actor_agent("角色0")
+        kept = game_world.get_actor_agent("角色1")
+        assert removed is not None and kept is not None
+        assert game_world.switch_current_agent("角色0") is not None
+
+        def fake_resynced_names(world_name: str) -> Optional[WorldEntityNames]:
+            actor_stage_names = {name: STAGE_NAMES[1] for name in ACTOR_NAMES[1:]}
+            actor_stage_names["新角色"] = STAGE_NAMES[0]
+            return WorldEntityNames(
+                world_id=WORLD_ID,
+                log_seq=20,
+                stage_names=STAGE_NAMES,
+                actor_stage_names=actor_stage_names,
+            )
+
+        def fake_mutations_since(world_id: UUID, after_seq: int) -> WorldMutationDelta:
+            return WorldMutationDelta(latest_seq=20, resynced=True)
+
+        with (
+            patch("src.ai_trpg.agent.manager.get_world_id_by_name", _fake_world_id),
+            patch(
+                "src.ai_trpg.agent.manager.get_world_entity_names",
+                fake_resynced_names,
+            ),
+            patch(
+                "src.ai_trpg.agent.manager.load_world_mutations_since",
+                fake_mutations_since,
+            ),
+        ):
+            await game_world.refresh()
+
+        # 被删除的角色代理已释放，当前代理回到世界观代理
+        assert removed.mcp_client.disconnect_count == 1  # type: ignore[attr-defined]
+        assert game_world.get_actor_agent("角色0") is None
+        assert game_world.current_agent is game_world.world_agent
+
+        # 保留的代理不重建，新角色可以按需创建
+        assert game_world.get_actor_agent("角色1") is kept
+        assert game_world.get_actor_stage_name("角色1") == "场景B"
+        assert isinstance(game_world.get_actor_agent("新角色"), ActorAgent)
@@ -0,0 +1,152 @@
+"""
+LlmGovernor LLM 并发调度器单元测试
+
+验证（不发起真实的 LLM 请求）：
+- 同时进行中的请求数不超过 max_in_flight
+- 排队的请求按优先级出队，玩家请求插队到代理请求之前
+- 请求/token 令牌桶不足时排队等待补充
+- 排队等待统计与 429 限流计数
+"""
+
+import asyncio
+from typing import List
+import pytest
+from src.ai_trpg.deepseek import LlmGovernor, LlmGovernorConfig, LlmPriority
+
+
+class _RateLimitError(Exception):
+    status_code = 429
+
+
+class TestLlmGovernor:
+    """LlmGovernor 测试类"""
+
+    @pytest.mark.asyncio
+    async def test_max_in_flight(self) -> None:
+        governor = LlmGovernor(
+            LlmGovernorConfig(
+                max_in_flight=2, requests_per_minute=0, tokens_per_minute=0
+            )
+        )
+        running = 0
+        max_running = 0
+
+        async def call() -> None:
+            nonlocal running, max_running
+            async with governor.acquire(LlmPriority.AGENT):
+                running += 1
+                max_running = max(max_running, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(call() for _ in range(6)))
+        assert max_running == 2
+        assert governor.in_flight == 0
+        assert governor.metrics().priorities["agent"].requests == 6
+
+    @pytest.mark.asyncio
+    async def test_player_jumps_queue(self) -> None:
+        governor = LlmGovernor(
+            LlmGovernorConfig(
+                max_in_flight=1, requests_per_minute=0, tokens_per_minute=0
+            )
+        )
+        order: List[str] = []
+        release = asyncio.Event()
+
+        async def call(name: str, priority: LlmPriority) -> None:
+            async with governor.acquire(priority):
+                order.append(name)
+                if name == "first":
+                    await release.wait()
+
+        tasks = [asyncio.create_task(call("first", LlmPriority.AGENT))]
+        await asyncio.sleep(0)
+        tasks += [
+            asyncio.create_task(call(f"agent{i}", LlmPriority.AGENT)) for i in range(3)
+        ]
+        tasks.append(asyncio.create_task(call("background", LlmPriority.BACKGROUND)))
+        tasks.append(asyncio.create_task(call("player", LlmPriority.PLAYER)))
+        await asyncio.sleep(0)
+        assert governor.queued == 5
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert order == ["first", "player", "agent0", "agent1", "agent2", "background"]
+
+        metrics = governor.metrics().priorities
+        assert metrics["agent"].max_wait >= metrics["player"].max_wait
+        assert metrics["agent"].queued == 0
+
+    @pytest.mark.asyncio
+    async def test_token_buckets_throttle(self) -> None:
+        # 每分钟 600 次请求 = 每 0.1 秒补充 1 次，只留 1 次可用额度
+        governor = LlmGovernor(
+            LlmGovernorConfig(
+                max_in_flight=0, requests_per_minute=600, tokens_per_minute=60_000
+            )
+        )
+        governor._requests.tokens = 1
+
+        async def call() -> None:
+            async with governor.acquire(LlmPriority.AGENT):
+                pass
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.gather(call(), call())
+        assert loop.time() - start >= 0.08
+
+        # token 桶：每分钟 6000 = 每秒补充 100，实际用量超出预估时补扣差额
+        governor = LlmGovernor(
+            LlmGovernorConfig(
+                max_in_flight=0, requests_per_minute=0, tokens_per_minute=6000
+            )
+        )
+        async with governor.acquire(LlmPriority.AGENT, estimated_tokens=5000) as ticket:
+            ticket.record_usage(6020, prompt_tokens=6000, completion_tokens=20)
+        assert governor._tokens.tokens < 0
+        metrics = governor.metrics()
+        assert metrics.tokens_used == 6020
+        assert (metrics.prompt_tokens, metrics.completion_tokens) == (6000, 20)
+
+        start = loop.time()
+        async with governor.acquire(LlmPriority.AGENT, estimated_tokens=10):
+            pass
+        assert loop.time() - start >= 0.2
+
+    @pytest.mark.asyncio
+    async def test_failures_and_rate_limit(self) -> None:
+        governor = LlmGovernor(
+            LlmGovernorConfig(
+                max_in_flight=1, requests_per_minute=6000, tokens_per_minute=0
+            )
+        )
+        with pytest.raises(_RateLimitError):
+            async with governor.acquire(LlmPriority.PLAYER):
+                raise _RateLimitError()
+
+        metrics = governor.metrics().priorities["player"]
+        assert metrics.failed == 1
+        assert metrics.rate_limited == 1
+        assert governor.in_flight == 0
+        # 限流后请求令牌桶被清空，下一个请求需要等待补充
+        assert governor._requests.wait_time(1) > 0
+
+        # 排队中被取消的请求不占用许可
+        release = asyncio.Event()
+
+        async def hold() -> None:
+            async with governor.acquire(LlmPriority.AGENT):
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0.05)
+        waiting = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        release.set()
+        await holder
+        assert waiting.cancelled()
+        assert governor.in_flight == 0
+        assert governor.queued == 0
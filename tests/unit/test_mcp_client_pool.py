@@ -0,0 +1,82 @@
+"""
+MCP 客户端连接池单元测试
+
+验证（模拟池内会话的网络请求）：
+- 大量代理句柄连接时，只有连接池的 size 个会话执行握手
+- 工具调用在池内会话间轮询分配，并通过 _meta 携带代理名称
+- 连接池未启动时无法分配会话
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+import pytest
+from src.ai_trpg.mcp import McpClient, McpClientPool, McpToolResult, mcp_config
+
+
+def _create_pool(size: int) -> McpClientPool:
+    return McpClientPool(
+        base_url=mcp_config.mcp_server_url,
+        protocol_version=mcp_config.protocol_version,
+        timeout=mcp_config.mcp_timeout,
+        size=size,
+    )
+
+
+class TestMcpClientPool:
+    """MCP 客户端连接池测试类"""
+
+    @pytest.mark.asyncio
+    async def test_handshakes_do_not_scale_with_agents(self) -> None:
+        handshakes: List[McpClient] = []
+
+        async def fake_connect(self: McpClient) -> None:
+            handshakes.append(self)
+
+        pool = _create_pool(size=3)
+        handles = [pool.client_for(f"角色{index}") for index in range(200)]
+
+        with patch.object(McpClient, "connect", fake_connect):
+            await asyncio.gather(*(handle.connect() for handle in handles))
+
+        assert len(handshakes) == 3
+        assert pool.is_started
+        await pool.close()
+        assert not pool.is_started
+
+    @pytest.mark.asyncio
+    async def test_call_tool_round_robin_with_agent_meta(self) -> None:
+        calls: List[tuple[McpClient, Optional[Dict[str, Any]]]] = []
+
+        async def fake_connect(self: McpClient) -> None:
+            pass
+
+        async def fake_call_tool(
+            self: McpClient,
+            tool_name: str,
+            arguments: Dict[str, Any],
+            meta: Optional[Dict[str, Any]] = None,
+        ) -> McpToolResult:
+            calls.append((self, meta))
+            return McpToolResult(success=True, result="ok", execution_time=0.0)
+
+        pool = _create_pool(size=2)
+        handle = pool.client_for("勇者")
+
+        with (
+            patch.object(McpClient, "connect", fake_connect),
+            patch.object(McpClient, "call_tool", fake_call_tool),
+        ):
+            await handle.connect()
+            for _ in range(4):
+                result = await handle.call_tool("update_actor_health", {})
+                assert result.success
+
+        assert [meta for _, meta in calls] == [{"agent_name": "勇者"}] * 4
+        sessions = [client for client, _ in calls]
+        assert sessions[0] is sessions[2] and sessions[1] is sessions[3]
+        assert sessions[0] is not sessions[1]
+
+    def test_acquire_before_start(self) -> None:
+        with pytest.raises(RuntimeError):
+            _create_pool(size=1).acquire()
@@ -0,0 +1,59 @@
+"""
+测试名称 → UUID 解析缓存（不访问数据库的部分）
+
+验证：
+- 场景/角色缓存项按 (world_id, 名称) 存取，并统计命中/未命中
+- invalidate_world 只丢弃该世界的缓存项
+- "world" 变更通知使世界失效，其他类型的通知不影响缓存
+"""
+
+from uuid import uuid4
+from src.ai_trpg.pgsql.change_feed import WorldChangeEvent
+from src.ai_trpg.pgsql.name_cache import WorldNameCache
+
+
+def test_actor_and_stage_entries() -> None:
+    cache = WorldNameCache()
+    world_id, stage_id, actor_id = uuid4(), uuid4(), uuid4()
+
+    assert cache.get_actor_id(world_id, "角色") is None
+    cache.put_actor_id(world_id, "角色", actor_id)
+    cache.put_stage_id(world_id, "场景", stage_id)
+
+    assert cache.get_actor_id(world_id, "角色") == actor_id
+    assert cache.get_stage_id(world_id, "场景") == stage_id
+    assert cache.get_actor_id(uuid4(), "角色") is None
+    assert (cache.hits, cache.misses) == (2, 2)
+
+    cache.discard_actor(world_id, "角色")
+    assert cache.get_actor_id(world_id, "角色") is None
+
+
+def test_invalidate_world_is_scoped() -> None:
+    cache = WorldNameCache()
+    world_a, world_b = uuid4(), uuid4()
+    cache.put_actor_id(world_a, "角色", uuid4())
+    cache.put_stage_id(world_a, "场景", uuid4())
+    cache.put_actor_id(world_b, "角色", uuid4())
+
+    cache.invalidate_world(world_id=world_a)
+
+    assert cache.get_actor_id(world_a, "角色") is None
+    assert cache.get_stage_id(world_a, "场景") is None
+    assert cache.get_actor_id(world_b, "角色") is not None
+
+
+def test_world_change_event_invalidates() -> None:
+    cache = WorldNameCache()
+    world_id = uuid4()
+    cache.put_actor_id(world_id, "角色", uuid4())
+
+    cache.on_world_change(
+        WorldChangeEvent(world_id=world_id, entity_kind="actor", name="角色")
+    )
+    assert cache.get_actor_id(world_id, "角色") is not None
+
+    cache.on_world_change(
+        WorldChangeEvent(world_id=world_id, entity_kind="world", name="世界")
+    )
+    assert cache.get_actor_id(world_id, "角色") is None
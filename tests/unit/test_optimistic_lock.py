@@ -0,0 +1,174 @@
+"""
+测试乐观并发控制模块的功能
+
+使用内存 SQLite 数据库和独立的测试模型验证：
+- bump_version 生成带版本校验的 CAS 更新
+- loaded_version 返回读取时的版本（不受本会话内递增的影响）
+- retry_on_version_conflict 在冲突时重试，重试耗尽后抛出 VersionConflictError
+"""
+
+import pytest
+from typing import Generator, List
+from sqlalchemy import Integer, String, create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column
+from sqlalchemy.orm.exc import StaleDataError
+
+from src.ai_trpg.pgsql.optimistic_lock import (
+    VersionConflictError,
+    bump_version,
+    loaded_version,
+    retry_on_version_conflict,
+)
+
+
+class _TestBase(DeclarativeBase):
+    pass
+
+
+class _VersionedItem(_TestBase):
+    """与 StageDB / ActorDB 相同版本配置的测试模型"""
+
+    __tablename__ = "versioned_items"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(String(50), nullable=False)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+
+    __mapper_args__ = {"version_id_col": version, "version_id_generator": False}
+
+
+@pytest.fixture
+def engine() -> Generator[Engine, None, None]:
+    """创建带一条测试数据的内存数据库"""
+    engine = create_engine("sqlite:///:memory:")
+    _TestBase.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(_VersionedItem(id=1, name="初始"))
+        db.commit()
+    yield engine
+    engine.dispose()
+
+
+class TestBumpVersion:
+    """测试版本号递增"""
+
+    def test_bump_version_increments_once_per_flush(self, engine: Engine) -> None:
+        """测试同一次 flush 内多次调用只递增一次"""
+        with Session(engine) as db:
+            item = db.get(_VersionedItem, 1)
+            assert item is not None
+            bump_version(item)
+            bump_version(item)
+            db.commit()
+            assert item.version == 2
+
+    def test_loaded_version_ignores_pending_bump(self, engine: Engine) -> None:
+        """测试递增版本号后 loaded_version 仍返回读取时的版本"""
+        with Session(engine) as db:
+            item = db.get(_VersionedItem, 1)
+            assert item is not None
+            assert loaded_version(item) == 1
+            bump_version(item)
+            assert item.version == 2
+            assert loaded_version(item) == 1
+            db.commit()
+            assert loaded_version(item) == 2
+
+    def test_concurrent_update_raises_stale_data_error(self, engine: Engine) -> None:
+        """测试基于过期版本的更新被检测为冲突"""
+        with Session(engine) as first, Session(engine) as second:
+            first_item = first.get(_VersionedItem, 1)
+            second_item = second.get(_VersionedItem, 1)
+            assert first_item is not None and second_item is not None
+
+            first_item.name = "第一次写入"
+            bump_version(first_item)
+            first.commit()
+
+            second_item.name = "第二次写入"
+            bump_version(second_item)
+            with pytest.raises(StaleDataError):
+                second.commit()
+
+
+class TestRetryOnVersionConflict:
+    """测试版本冲突重试装饰器"""
+
+    def test_retries_until_success(self) -> None:
+        """测试冲突后重试并最终成功"""
+        calls: List[int] = []
+
+        @retry_on_version_conflict(max_attempts=3, base_delay=0.0)
+        def flaky_update() -> str:
+            calls.append(1)
+            if len(calls) < 3:
+                raise StaleDataError("模拟并发冲突")
+            return "ok"
+
+        assert flaky_update() == "ok"
+        assert len(calls) == 3
+
+    def test_raises_version_conflict_error_when_exhausted(self) -> None:
+        """测试重试耗尽后抛出 VersionConflictError"""
+        calls: List[int] = []
+
+        @retry_on_version_conflict(max_attempts=2, base_delay=0.0)
+        def always_conflict() -> None:
+            calls.append(1)
+            raise StaleDataError("模拟并发冲突")
+
+        with pytest.raises(VersionConflictError):
+            always_conflict()
+        assert len(calls) == 2
+
+    def test_other_errors_are_not_retried(self) -> None:
+        """测试非版本冲突的异常直接抛出，不重试"""
+        calls: List[int] = []
+
+        @retry_on_version_conflict(max_attempts=3, base_delay=0.0)
+        def broken() -> None:
+            calls.append(1)
+            raise ValueError("其他错误")
+
+        with pytest.raises(ValueError):
+            broken()
+        assert len(calls) == 1
+
+    def test_retry_rereads_fresh_state(self, engine: Engine) -> None:
+        """测试重试以新会话重新读取，从而基于最新版本完成写入"""
+        with Session(engine) as stale_db:
+            stale_item = stale_db.get(_VersionedItem, 1)
+            assert stale_item is not None
+
+            attempts: List[int] = []
+
+            @retry_on_version_conflict(max_attempts=3, base_delay=0.0)
+            def rename(new_name: str) -> int:
+                attempts.append(1)
+                if len(attempts) == 1:
+                    # 首次尝试使用过期的会话对象，模拟读取后被并发修改
+                    with Session(engine) as other_db:
+                        other_item = other_db.get(_VersionedItem, 1)
+                        assert other_item is not None
+                        bump_version(other_item)
+                        other_db.commit()
+                    stale_item.name = new_name
+                    bump_version(stale_item)
+                    try:
+                        stale_db.commit()
+                    except StaleDataError:
+                        stale_db.rollback()
+                        raise
+                    return stale_item.version
+
+                with Session(engine) as db:
+                    item = db.get(_VersionedItem, 1)
+                    assert item is not None
+                    item.name = new_name
+                    bump_version(item)
+                    db.commit()
+                    return item.version
+
+            assert rename("重试后写入") == 3
+            assert len(attempts) == 2
@@ -0,0 +1,148 @@
+"""
+测试 SQL 语句统计模块的功能
+
+使用内存 SQLite 数据库验证：
+- 语句按阶段与代理归类
+- 并发任务中的代理归类互不干扰
+- track_phase 记录阶段级别的执行耗时
+- track_node 记录节点耗时，不计入阶段耗时
+- assert_statement_budget 在超过预算时失败
+"""
+
+import asyncio
+import pytest
+from typing import Generator
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+
+from src.ai_trpg.pgsql.statement_stats import (
+    StatementStatsRecorder,
+    assert_statement_budget,
+    run_as_agent,
+    statement_stats,
+    track_node,
+    track_phase,
+)
+
+
+@pytest.fixture
+def engine() -> Generator[Engine, None, None]:
+    """创建内存数据库"""
+    engine = create_engine("sqlite:///:memory:")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def recorder(engine: Engine) -> StatementStatsRecorder:
+    """创建已注册到测试引擎的统计实例"""
+    recorder = StatementStatsRecorder()
+    recorder.install(engine)
+    recorder.install(engine)  # 重复注册无副作用
+    return recorder
+
+
+def _run_queries(engine: Engine, count: int) -> None:
+    with engine.connect() as conn:
+        for _ in range(count):
+            conn.execute(text("SELECT 1"))
+
+
+class TestStatementStats:
+    """测试语句统计"""
+
+    def test_statements_are_attributed_to_phase_and_agent(
+        self, engine: Engine, recorder: StatementStatsRecorder
+    ) -> None:
+        """测试语句按阶段与代理归类"""
+        with track_phase("observe"):
+            _run_queries(engine, 1)
+            with track_phase("observe", "角色A"):
+                _run_queries(engine, 2)
+        _run_queries(engine, 1)
+
+        snapshot = recorder.snapshot()
+        assert snapshot[("observe", "")].statements == 1
+        assert snapshot[("observe", "角色A")].statements == 2
+        assert snapshot[("untracked", "")].statements == 1
+        assert recorder.by_phase()["observe"].statements == 3
+
+        recorder.reset()
+        assert recorder.snapshot() == {}
+
+    async def test_concurrent_agents_do_not_mix(
+        self, engine: Engine, recorder: StatementStatsRecorder
+    ) -> None:
+        """测试并发任务中各代理的语句归类互不干扰"""
+
+        async def agent_work(count: int) -> int:
+            for _ in range(count):
+                _run_queries(engine, 1)
+                await asyncio.sleep(0)
+            return count
+
+        with track_phase("execute"):
+            results = await asyncio.gather(
+                run_as_agent("场景A", agent_work(2)),
+                run_as_agent("场景B", agent_work(3)),
+            )
+
+        assert list(results) == [2, 3]
+        snapshot = recorder.snapshot()
+        assert snapshot[("execute", "场景A")].statements == 2
+        assert snapshot[("execute", "场景B")].statements == 3
+
+    def test_phase_durations(self) -> None:
+        """测试阶段级别的 track_phase 记录执行耗时，代理级别的不记录"""
+        statement_stats.reset()
+        for _ in range(2):
+            with track_phase("observe"):
+                with track_phase("observe", "角色A"):
+                    pass
+
+        durations = statement_stats.phase_durations()
+        assert list(durations) == ["observe"]
+        assert len(durations["observe"]) == 2
+        assert all(duration >= 0 for duration in durations["observe"])
+
+        statement_stats.reset()
+        assert statement_stats.phase_durations() == {}
+
+    def test_node_durations(self, engine: Engine) -> None:
+        """测试 track_node 按阶段归类语句并记录节点耗时，不计入阶段耗时"""
+        statement_stats.reset()
+        recorder = StatementStatsRecorder()
+        recorder.install(engine)
+
+        for _ in range(3):
+            with track_node("execute"):
+                _run_queries(engine, 1)
+
+        assert recorder.by_phase()["execute"].statements == 3
+        assert len(statement_stats.node_durations()["execute"]) == 3
+        assert statement_stats.phase_durations() == {}
+
+        statement_stats.reset()
+        assert statement_stats.node_durations() == {}
+
+
+class TestStatementBudget:
+    """测试语句预算断言"""
+
+    def test_within_budget(
+        self, engine: Engine, recorder: StatementStatsRecorder
+    ) -> None:
+        """测试未超过预算时通过"""
+        with assert_statement_budget(2) as budget:
+            _run_queries(engine, 2)
+        assert budget.count == 2
+
+    def test_over_budget_fails(
+        self, engine: Engine, recorder: StatementStatsRecorder
+    ) -> None:
+        """测试超过预算时抛出 AssertionError 并列出语句"""
+        with pytest.raises(AssertionError, match="超过预算 2 条"):
+            with assert_statement_budget(2, label="N+1 检查"):
+                _run_queries(engine, 3)
@@ -0,0 +1,114 @@
+"""
+TurnScheduler 回合依赖调度器单元测试
+
+验证：
+- 节点在依赖完成后立即开始，慢链不阻塞无关的链
+- 节点失败时依赖它的节点（包括间接依赖）不执行，无关的节点照常执行
+- 依赖不存在的节点或存在环时拒绝执行
+"""
+
+import asyncio
+from typing import List
+import pytest
+from src.ai_trpg.agent import TurnNodeFunc, TurnScheduler
+
+
+def _recording_node(
+    events: List[str], key: str, delay: float = 0.0, fail: bool = False
+) -> TurnNodeFunc:
+    async def run() -> None:
+        events.append(f"start:{key}")
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError(f"{key} 失败")
+        events.append(f"end:{key}")
+
+    return run
+
+
+class TestTurnScheduler:
+    """TurnScheduler 测试类"""
+
+    @pytest.mark.asyncio
+    async def test_independent_chains_do_not_wait(self) -> None:
+        events: List[str] = []
+        scheduler = TurnScheduler()
+
+        # 慢场景链
+        scheduler.add_node("observe:慢", _recording_node(events, "observe:慢", 0.2))
+        scheduler.add_node(
+            "execute:慢", _recording_node(events, "execute:慢"), ["observe:慢"]
+        )
+        # 快场景链
+        scheduler.add_node("observe:快", _recording_node(events, "observe:快"))
+        scheduler.add_node(
+            "execute:快", _recording_node(events, "execute:快"), ["observe:快"]
+        )
+        scheduler.add_node(
+            "update:快", _recording_node(events, "update:快"), ["execute:快"]
+        )
+
+        result = await scheduler.run()
+
+        # 快链整体在慢链的观察结束之前完成
+        assert events.index("end:update:快") < events.index("end:observe:慢")
+        assert events.index("start:execute:慢") > events.index("end:observe:慢")
+        assert set(result.durations) == set(scheduler.node_keys)
+        assert result.failures == {}
+        assert result.elapsed < 0.4
+
+    @pytest.mark.asyncio
+    async def test_cross_chain_dependency(self) -> None:
+        events: List[str] = []
+        scheduler = TurnScheduler()
+        scheduler.add_node("execute:A", _recording_node(events, "execute:A", 0.05))
+        scheduler.add_node("execute:B", _recording_node(events, "execute:B"))
+        scheduler.add_node(
+            "update:B", _recording_node(events, "update:B"), ["execute:B"]
+        )
+        # A 的角色可能移动到 B
+        scheduler.add_dependency("update:B", ["execute:A"])
+        assert scheduler.dependencies_of("update:B") == {"execute:A", "execute:B"}
+
+        await scheduler.run()
+        assert events.index("start:update:B") > events.index("end:execute:A")
+
+    @pytest.mark.asyncio
+    async def test_failures_skip_transitive_dependents(self) -> None:
+        events: List[str] = []
+        scheduler = TurnScheduler()
+        scheduler.add_node("observe", _recording_node(events, "observe"))
+        scheduler.add_node(
+            "execute", _recording_node(events, "execute", fail=True), ["observe"]
+        )
+        scheduler.add_node("update", _recording_node(events, "update"), ["execute"])
+        scheduler.add_node(
+            "stage_update", _recording_node(events, "stage_update"), ["update"]
+        )
+        scheduler.add_node("other", _recording_node(events, "other"), ["observe"])
+
+        result = await scheduler.run()
+        assert list(result.failures) == ["execute"]
+        assert sorted(result.skipped) == ["stage_update", "update"]
+        assert result.incomplete
+        assert "start:update" not in events
+        assert "start:stage_update" not in events
+        assert "end:other" in events
+
+    def test_validate_rejects_invalid_graphs(self) -> None:
+        events: List[str] = []
+
+        scheduler = TurnScheduler()
+        scheduler.add_node("a", _recording_node(events, "a"), ["不存在"])
+        with pytest.raises(ValueError):
+            scheduler.validate()
+
+        scheduler = TurnScheduler()
+        scheduler.add_node("a", _recording_node(events, "a"), ["b"])
+        scheduler.add_node("b", _recording_node(events, "b"), ["a"])
+        scheduler.add_node("c", _recording_node(events, "c"))
+        with pytest.raises(ValueError):
+            scheduler.validate()
+
+        with pytest.raises(ValueError):
+            scheduler.add_node("c", _recording_node(events, "c"))
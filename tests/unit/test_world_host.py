@@ -0,0 +1,152 @@
+"""
+WorldHost 多世界宿主单元测试
+
+验证（模拟数据库中的名称查询，代理客户端不建立连接）：
+- 多个世界共享同一个 MCP 连接池
+- 回合在世界之间轮询调度，回合多的世界不会让其他世界饿死
+- 同一世界的回合依次执行，总并发不超过上限
+- 回合异常通过 Future 返回，移除世界时取消排队中的回合
+"""
+
+import asyncio
+from typing import List, Optional
+from unittest.mock import patch
+from uuid import uuid4
+import pytest
+from src.ai_trpg.agent import GameWorld, WorldHost
+from src.ai_trpg.mcp import McpClient, mcp_config
+from src.ai_trpg.pgsql import WorldEntityNames
+
+WORLD_NAMES = ["世界A", "世界B", "世界C"]
+
+
+class _OfflineMcpClient(McpClient):
+    """不建立连接的 MCP 客户端"""
+
+    def __init__(self, agent_name: str) -> None:
+        super().__init__(
+            base_url=mcp_config.mcp_server_url,
+            protocol_version=mcp_config.protocol_version,
+            timeout=mcp_config.mcp_timeout,
+        )
+
+    async def connect(self) -> None:
+        self._initialized = True
+
+    async def disconnect(self) -> None:
+        self._initialized = False
+
+
+def _fake_entity_names(world_name: str) -> Optional[WorldEntityNames]:
+    return WorldEntityNames(
+        world_id=uuid4(),
+        log_seq=0,
+        stage_names=[f"{world_name}的场景"],
+        actor_stage_names={f"{world_name}的角色": f"{world_name}的场景"},
+    )
+
+
+async def _create_host(max_concurrent_turns: int) -> WorldHost:
+    host = WorldHost(
+        max_concurrent_turns=max_concurrent_turns,
+        mcp_client_factory=_OfflineMcpClient,
+    )
+    with patch("src.ai_trpg.agent.manager.get_world_entity_names", _fake_entity_names):
+        for world_name in WORLD_NAMES:
+            await host.add_world(world_name)
+    return host
+
+
+class TestWorldHost:
+    """WorldHost 测试类"""
+
+    @pytest.mark.asyncio
+    async def test_worlds_share_mcp_client_pool(self) -> None:
+        host = await _create_host(max_concurrent_turns=2)
+        worlds = [host.get_world(world_name) for world_name in WORLD_NAMES]
+        assert all(world is not None for world in worlds)
+        pools = {id(world._mcp_client_pool) for world in worlds if world is not None}
+        assert len(pools) == 1
+        assert await host.add_world("世界A") is worlds[0]
+        await host.close()
+        assert host.world_names == []
+
+    @pytest.mark.asyncio
+    async def test_round_robin_between_worlds(self) -> None:
+        host = await _create_host(max_concurrent_turns=1)
+        order: List[str] = []
+
+        async def turn(game_world: GameWorld) -> str:
+            order.append(game_world.world_name)
+            await asyncio.sleep(0)
+            return game_world.world_name
+
+        # 世界A 先提交了 3 个回合，B/C 各 1 个
+        futures = [host.submit_turn("世界A", turn) for _ in range(3)]
+        futures.append(host.submit_turn("世界B", turn))
+        futures.append(host.submit_turn("世界C", turn))
+        assert host.pending_turns("世界A") == 2
+
+        results = await asyncio.gather(*futures)
+        assert results == ["世界A", "世界A", "世界A", "世界B", "世界C"]
+        assert order == ["世界A", "世界B", "世界C", "世界A", "世界A"]
+        await host.close()
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit_and_per_world_serialization(self) -> None:
+        host = await _create_host(max_concurrent_turns=2)
+        running: List[str] = []
+        max_running = 0
+        max_running_per_world = 0
+
+        async def turn(game_world: GameWorld) -> None:
+            nonlocal max_running, max_running_per_world
+            running.append(game_world.world_name)
+            max_running = max(max_running, len(running))
+            max_running_per_world = max(
+                max_running_per_world, running.count(game_world.world_name)
+            )
+            await asyncio.sleep(0.01)
+            running.remove(game_world.world_name)
+
+        await asyncio.gather(
+            *(
+                host.submit_turn(world_name, turn)
+                for world_name in WORLD_NAMES
+                for _ in range(3)
+            )
+        )
+        assert max_running == 2
+        assert max_running_per_world == 1
+        await host.close()
+
+    @pytest.mark.asyncio
+    async def test_errors_and_remove_world(self) -> None:
+        host = await _create_host(max_concurrent_turns=1)
+        release = asyncio.Event()
+
+        async def failing_turn(game_world: GameWorld) -> None:
+            raise RuntimeError("回合失败")
+
+        async def blocking_turn(game_world: GameWorld) -> str:
+            await release.wait()
+            return "完成"
+
+        with pytest.raises(RuntimeError):
+            await host.submit_turn("世界A", failing_turn)
+
+        running = host.submit_turn("世界B", blocking_turn)
+        queued = host.submit_turn("世界B", blocking_turn)
+        await asyncio.sleep(0)
+
+        remove_task = asyncio.create_task(host.remove_world("世界B"))
+        await asyncio.sleep(0)
+        release.set()
+        await remove_task
+
+        assert await running == "完成"
+        assert queued.cancelled()
+        assert host.world_names == ["世界A", "世界C"]
+        with pytest.raises(ValueError):
+            host.submit_turn("世界B", blocking_turn)
+        await host.close()
@@ -0,0 +1,144 @@
+"""
+测试世界变更回放（纯函数）
+
+验证：
+- 各类变更应用到 World 模型的结果与数据库操作语义一致
+- 回放不修改起始快照
+- 快照 + 增量回放到中间位置的结果等于逐条应用到该位置
+- 变更日志条目的解析（标记条目被跳过）
+"""
+
+from typing import List
+from src.ai_trpg.demo.models import Effect
+from src.ai_trpg.demo.world1 import create_test_world1
+from src.ai_trpg.demo.world3 import create_test_world3
+from src.ai_trpg.pgsql.world_mutation import (
+    AddActorEffectMutation,
+    MoveActorToStageMutation,
+    RemoveActorEffectMutation,
+    UpdateActorAppearanceMutation,
+    UpdateActorHealthMutation,
+    UpdateStageInfoMutation,
+    WorldMutation,
+)
+from src.ai_trpg.pgsql.world_replay import (
+    TURN_CHECKPOINT_TYPE,
+    TurnCheckpoint,
+    apply_mutation_to_world,
+    decode_logged_mutation,
+    replay_world_mutations,
+    strip_world_context,
+)
+
+
+class TestApplyMutation:
+    """测试单个变更的应用"""
+
+    def test_actor_mutations(self) -> None:
+        """测试角色生命值、外观与 Effect 变更"""
+        world = strip_world_context(create_test_world1())
+        actor = world.stages[0].actors[0]
+        actor.effects = [Effect(name="中毒", description="持续掉血")]
+
+        assert apply_mutation_to_world(
+            world, UpdateActorHealthMutation(actor_name=actor.name, new_health=-5)
+        )
+        assert actor.attributes.health == 0
+
+        assert apply_mutation_to_world(
+            world,
+            UpdateActorAppearanceMutation(
+                actor_name=actor.name, new_appearance="浑身是血"
+            ),
+        )
+        assert actor.appearance == "浑身是血"
+
+        assert apply_mutation_to_world(
+            world,
+            AddActorEffectMutation(
+                actor_name=actor.name, effect_name="中毒", effect_description="再次中毒"
+            ),
+        )
+        assert apply_mutation_to_world(
+            world, RemoveActorEffectMutation(actor_name=actor.name, effect_name="中毒")
+        )
+        assert actor.effects == []
+
+    def test_move_and_stage_update(self) -> None:
+        """测试移动角色与更新场景字段"""
+        world = strip_world_context(create_test_world3())
+        source_stage, target_stage = world.stages[0], world.stages[1]
+        actor_name = source_stage.actors[0].name
+        old_environment = target_stage.environment
+
+        assert apply_mutation_to_world(
+            world,
+            MoveActorToStageMutation(
+                actor_name=actor_name, target_stage_name=target_stage.name
+            ),
+        )
+        assert target_stage.find_actor(actor_name) is not None
+        assert source_stage.find_actor(actor_name) is None
+
+        assert apply_mutation_to_world(
+            world,
+            UpdateStageInfoMutation(stage_name=target_stage.name, narrative="新的叙事"),
+        )
+        assert target_stage.narrative == "新的叙事"
+        assert target_stage.environment == old_environment
+
+    def test_unknown_target_is_not_applied(self) -> None:
+        """测试目标不存在时返回 False"""
+        world = strip_world_context(create_test_world1())
+        assert not apply_mutation_to_world(
+            world, UpdateActorHealthMutation(actor_name="不存在", new_health=1)
+        )
+
+
+class TestReplay:
+    """测试快照 + 增量回放"""
+
+    def test_replay_from_intermediate_snapshot(self) -> None:
+        """测试从中间快照回放与从头回放结果一致，且不修改快照"""
+        initial = strip_world_context(create_test_world1())
+        actor_name = initial.stages[0].actors[0].name
+        mutations: List[WorldMutation] = [
+            UpdateActorHealthMutation(actor_name=actor_name, new_health=50),
+            AddActorEffectMutation(
+                actor_name=actor_name, effect_name="护盾", effect_description="减伤"
+            ),
+            UpdateActorHealthMutation(actor_name=actor_name, new_health=30),
+        ]
+
+        full = replay_world_mutations(initial, mutations)
+        snapshot = replay_world_mutations(initial, mutations[:2])
+        from_snapshot = replay_world_mutations(snapshot, mutations[2:])
+
+        assert from_snapshot == full
+        assert full.stages[0].actors[0].attributes.health == 30
+        assert snapshot.stages[0].actors[0].attributes.health == 50
+        assert initial.stages[0].actors[0].effects == []
+
+    def test_strip_world_context(self) -> None:
+        """测试快照去掉所有上下文"""
+        stripped = strip_world_context(create_test_world1())
+        assert stripped.context == []
+        assert all(stage.context == [] for stage in stripped.stages)
+        assert all(actor.context == [] for actor in stripped.get_all_actors())
+
+
+class TestDecodeLoggedMutation:
+    """测试变更日志条目解析"""
+
+    def test_decode(self) -> None:
+        mutation = UpdateStageInfoMutation(stage_name="场景", narrative="叙事")
+        decoded = decode_logged_mutation(
+            mutation.type, mutation.model_dump_json(exclude_none=True)
+        )
+        assert decoded == mutation
+
+        checkpoint = TurnCheckpoint(turn=3)
+        assert (
+            decode_logged_mutation(TURN_CHECKPOINT_TYPE, checkpoint.model_dump_json())
+            is None
+        )